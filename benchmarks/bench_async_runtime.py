@@ -0,0 +1,122 @@
+"""
+Threaded PowerSwitcherApp vs. AsyncPowerSwitcherRuntime on the same replayed foreground trace.
+
+Both runtimes get the paced alternating trace of bench_pipeline and an equivalent backend
+(in memory by default, or the subprocess backends against benchmarks/fake_powercfg.py) and report:
+  - latency:   event timestamp -> switch completion, p50/p95/p99;
+  - threads:   Python threads alive while the trace is replayed;
+  - stop_ms:   time stop() takes;
+  - cpu:       process CPU time per delivered event.
+
+Runs headless on Linux (no Windows modules are imported).
+
+Usage (from the project root):
+    python -m benchmarks.bench_async_runtime
+    python -m benchmarks.bench_async_runtime --backend subprocess --events 100 --interval-ms 50
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_pipeline import BENCHMARK_CONFIG, _alternating_trace, _create_app, _SwitchRecorder, _write_fake_powercfg_launcher
+from benchmarks.common import configure_benchmark_logging, summarize_ms, write_results
+from benchmarks.fake_power_backend import AsyncFakePowerBackend
+from src.application.async_runtime import AsyncPowerSwitcherRuntime
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.events.replay_event_source import ReplayEventSource
+
+
+def _create_async_runtime(config_path, args, trace_entries):
+    backend = None
+    if args.backend == "fake":
+        backend = AsyncFakePowerBackend(set_latency=args.set_latency_ms / 1000.0)
+    sources = []
+
+    def event_source_factory(mailbox):
+        source = ReplayEventSource(mailbox, entries=trace_entries, speed=1.0)
+        sources.append(source)
+        return source
+
+    runtime = AsyncPowerSwitcherRuntime(event_source_factory=event_source_factory,
+                                        config_manager=ConfigManager(config_path), power_backend=backend)
+    return runtime, sources[0]
+
+
+def run_runtime(runtime_name, config_path, args):
+    warmup = args.warmup_events
+    trace = _alternating_trace(args.events + warmup, args.interval_ms / 1000.0)
+    recorder = _SwitchRecorder(warmup_events=warmup)
+    threads_before = threading.active_count()
+    if runtime_name == "threads":
+        app, source = _create_app(config_path, args, trace, speed=1.0)
+    else:
+        app, source = _create_async_runtime(config_path, args, trace)
+    app.register_switch_listener(recorder)
+
+    cpu_start = time.process_time()
+    app.start()
+    threads_running = threading.active_count() - threads_before
+    source.wait_until_finished()
+    time.sleep(max(0.2, args.interval_ms / 1000.0 * 4))
+    cpu_used = time.process_time() - cpu_start
+    state = app.get_current_state_info()
+
+    stop_started = time.perf_counter()
+    app.stop()
+    stop_ms = (time.perf_counter() - stop_started) * 1000.0
+
+    delivered = source.get_pipeline_stats()["emitted"]
+    result = summarize_ms(recorder.latencies)
+    result.update({
+        "events": delivered,
+        "switches": recorder.switches,
+        "switch_failures": recorder.failures,
+        "threads": threads_running,
+        "stop_ms": stop_ms,
+        "cpu_us_per_event": cpu_used / delivered * 1e6 if delivered else 0.0,
+        "switches_superseded_before_start": state.get("switch_executor", {}).get("superseded_before_start", 0),
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threaded vs. asyncio runtime benchmark.")
+    parser.add_argument("--backend", choices=["fake", "subprocess"], default="fake",
+                        help="fake: in-memory backends; subprocess: powercfg processes running benchmarks/fake_powercfg.py")
+    parser.add_argument("--set-latency-ms", type=float, default=0.0, help="simulated /setactive latency of the fake backends")
+    parser.add_argument("--events", type=int, default=500, help="paced events measured per runtime")
+    parser.add_argument("--warmup-events", type=int, default=50, help="paced events replayed before measuring")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="time between paced events")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the application during the run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    configure_benchmark_logging(args.log_level)
+    work_dir = tempfile.mkdtemp(prefix="aps_bench_async_")
+    try:
+        powercfg_path = _write_fake_powercfg_launcher(work_dir) if args.backend == "subprocess" else "powercfg"
+        config_path = os.path.join(work_dir, "bench_config.ini")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            # The threaded app applies switches on its executor thread, like the asyncio runtime's switch task
+            config_file.write(BENCHMARK_CONFIG.format(backend="subprocess", powercfg_path=powercfg_path,
+                                                      background_switching="true"))
+        results = {
+            "backend": args.backend,
+            "python": sys.version.split()[0],
+            "threads": run_runtime("threads", config_path, args),
+            "asyncio": run_runtime("asyncio", config_path, args),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
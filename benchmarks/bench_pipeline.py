@@ -0,0 +1,266 @@
+"""
+End-to-end benchmark of the foreground event -> power plan switch path.
+
+Drives PowerSwitcherApp through a ReplayEventSource and a fake power backend (in memory by default,
+the real subprocess/persistent backends against benchmarks/fake_powercfg.py, or the native powrprof backend,
+driven by an in-memory powrprof API where powrprof.dll is not available) and reports:
+  - latency:    event timestamp -> switch_power_plan() completion, p50/p95/p99 (paced events);
+  - burst:      events/s accepted and time until the last event of a burst is applied;
+  - cpu:        process CPU time per delivered event.
+
+Usage (from the project root):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --backend persistent --interval-ms 50 --events 200
+    python -m benchmarks.bench_pipeline --output baseline.json
+    python -m benchmarks.bench_pipeline --baseline baseline.json --max-regression 0.25   # exit code 1 on regression
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import compare_with_baseline, configure_benchmark_logging, summarize_ms, write_results
+from benchmarks.fake_power_backend import FakePowerBackend, FakePowrProfApi
+from src.application.power_switcher_app import PowerSwitcherApp
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.events.replay_event_source import ReplayEventSource, TraceEntry
+from src.infrastructure.power_management.powrprof_backend import NativePowerBackend
+
+BALANCED_GUID = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH_PERFORMANCE_GUID = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+POWER_SAVER_GUID = "a1841308-3541-4fab-bc81-f71556f20b4a"
+
+# Two apps mapped to different plans: alternating between them makes every processed event a switch.
+APP_A = "bench_app_a.exe"
+APP_B = "bench_app_b.exe"
+# Last event of a burst, mapped to a third plan so it always results in a switch.
+APP_FINAL = "bench_final.exe"
+
+BENCHMARK_CONFIG = f"""[General]
+default_power_plan = {BALANCED_GUID}
+log_level = WARNING
+power_backend = {{backend}}
+powercfg_path = {{powercfg_path}}
+focus_settle_ms = 0
+background_switching = {{background_switching}}
+
+[ProcessPowerMap]
+{APP_A} = {HIGH_PERFORMANCE_GUID}
+{APP_B} = {BALANCED_GUID}
+{APP_FINAL} = {POWER_SAVER_GUID}
+"""
+
+# (section, key) pairs compared against a baseline, lower is better
+REGRESSION_METRICS = [
+    ("latency", "p50_ms"),
+    ("latency", "p95_ms"),
+    ("latency", "p99_ms"),
+    ("burst", "time_to_last_switch_ms"),
+    ("cpu", "latency_cpu_us_per_event"),
+    ("cpu", "burst_cpu_us_per_event"),
+]
+
+
+def _write_fake_powercfg_launcher(work_dir):
+    """
+    Creates an executable wrapper running benchmarks/fake_powercfg.py with the current interpreter.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_powercfg.py")
+    if os.name == "nt":
+        launcher = os.path.join(work_dir, "powercfg.cmd")
+        with open(launcher, "w", encoding="utf-8") as launcher_file:
+            launcher_file.write(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        launcher = os.path.join(work_dir, "powercfg")
+        with open(launcher, "w", encoding="utf-8") as launcher_file:
+            launcher_file.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+        os.chmod(launcher, 0o755)
+    os.environ["APS_FAKE_POWERCFG_STATE"] = os.path.join(work_dir, "active.txt")
+    return launcher
+
+
+class _SwitchRecorder:
+    """
+    Switch listener collecting event -> switch completion latencies.
+    """
+    def __init__(self, warmup_events=0):
+        self._warmup_events = warmup_events
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.switches = 0
+        self.failures = 0
+        self.final_switch_at = None
+        self.final_switch_done = threading.Event()
+
+    def __call__(self, foreground_event, target_guid, success):
+        completed_at = time.perf_counter()
+        with self._lock:
+            self.switches += 1
+            if not success:
+                self.failures += 1
+            # The trace uses the event index as PID, so warmup events can be recognised
+            if foreground_event.pid is not None and foreground_event.pid >= self._warmup_events:
+                self.latencies.append(completed_at - foreground_event.timestamp)
+        if foreground_event.process_name == APP_FINAL:
+            self.final_switch_at = completed_at
+            self.final_switch_done.set()
+
+
+def _alternating_trace(count, interval_seconds, final_event=False):
+    entries = [
+        TraceEntry(index * interval_seconds, APP_A if index % 2 == 0 else APP_B, index, None)
+        for index in range(count)
+    ]
+    if final_event:
+        entries.append(TraceEntry(count * interval_seconds, APP_FINAL, count, None))
+    return entries
+
+
+def _create_app(config_path, args, trace_entries, speed):
+    config_manager = ConfigManager(config_path)
+    backend = None
+    if args.backend == "fake":
+        backend = FakePowerBackend(set_latency=args.set_latency_ms / 1000.0)
+    elif args.backend == "native" and os.name != "nt":
+        backend = NativePowerBackend(api=FakePowrProfApi(set_latency=args.set_latency_ms / 1000.0))
+    sources = []
+
+    def event_source_factory(mailbox):
+        source = ReplayEventSource(mailbox, entries=trace_entries, speed=speed)
+        sources.append(source)
+        return source
+
+    app = PowerSwitcherApp(event_source_factory=event_source_factory, config_manager=config_manager, power_backend=backend)
+    return app, sources[0]
+
+
+def run_latency_scenario(config_path, args):
+    """
+    Paced events: every event is processed on its own, latency is measured per switch.
+    """
+    warmup = args.warmup_events
+    trace = _alternating_trace(args.events + warmup, args.interval_ms / 1000.0)
+    recorder = _SwitchRecorder(warmup_events=warmup)
+    app, source = _create_app(config_path, args, trace, speed=1.0)
+    app.register_switch_listener(recorder)
+
+    cpu_start = time.process_time()
+    app.start()
+    source.wait_until_finished()
+    # Give the processing thread time to finish the last event
+    time.sleep(max(0.2, args.interval_ms / 1000.0 * 4))
+    cpu_used = time.process_time() - cpu_start
+    state = app.get_current_state_info()
+    app.stop()
+
+    delivered = source.get_pipeline_stats()["emitted"]
+    result = summarize_ms(recorder.latencies)
+    result.update({
+        "events": delivered,
+        "interval_ms": args.interval_ms,
+        "switches": recorder.switches,
+        "switch_failures": recorder.failures,
+        "coalesced_in_mailbox": state.get("event_mailbox", {}).get("overwritten", 0),
+        "replay_lag_max_ms": source.get_pipeline_stats()["lag_max_ms"],
+    })
+    return result, cpu_used / delivered if delivered else 0.0
+
+
+def run_burst_scenario(config_path, args):
+    """
+    Burst: all events as fast as possible, measures accepted events/s and time until the last one is applied.
+    """
+    trace = _alternating_trace(args.burst_events, 0.0, final_event=True)
+    recorder = _SwitchRecorder()
+    app, source = _create_app(config_path, args, trace, speed=0)
+    app.register_switch_listener(recorder)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    app.start()
+    source.wait_until_finished()
+    delivered_at = time.perf_counter()
+    applied = recorder.final_switch_done.wait(timeout=30.0)
+    cpu_used = time.process_time() - cpu_start
+    state = app.get_current_state_info()
+    app.stop()
+
+    source_stats = source.get_pipeline_stats()
+    delivered = source_stats["emitted"]
+    delivery_time = source_stats["duration_s"]
+    result = {
+        "events": delivered,
+        "accepted_events_per_s": delivered / delivery_time if delivery_time > 0 else 0.0,
+        "delivery_time_ms": delivery_time * 1000.0,
+        "time_to_last_switch_ms": ((recorder.final_switch_at if applied else delivered_at) - wall_start) * 1000.0,
+        "last_event_applied": applied,
+        "switches": recorder.switches,
+        "coalesced_in_mailbox": state.get("event_mailbox", {}).get("overwritten", 0),
+        "switches_superseded_before_start": state.get("switch_executor", {}).get("superseded_before_start", 0),
+    }
+    return result, cpu_used / delivered if delivered else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end latency/throughput benchmark of the power switching pipeline.")
+    parser.add_argument("--backend", choices=["fake", "subprocess", "persistent", "native"], default="fake",
+                        help="fake: in-memory backend; subprocess/persistent: real backends driving benchmarks/fake_powercfg.py; "
+                             "native: powrprof backend (in-memory powrprof API outside Windows)")
+    parser.add_argument("--set-latency-ms", type=float, default=0.0, help="simulated /setactive latency of the fake backend")
+    parser.add_argument("--events", type=int, default=2000, help="paced events measured in the latency scenario")
+    parser.add_argument("--warmup-events", type=int, default=100, help="paced events replayed before measuring")
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="time between paced events")
+    parser.add_argument("--burst-events", type=int, default=20000, help="events in the burst scenario")
+    parser.add_argument("--background-switching", action="store_true",
+                        help="apply switches on the switch executor thread (background_switching = true)")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the application during the run")
+    parser.add_argument("--output", help="write results as JSON to this file (e.g. to create a baseline)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    configure_benchmark_logging(args.log_level)
+    work_dir = tempfile.mkdtemp(prefix="aps_bench_")
+    try:
+        powercfg_path = _write_fake_powercfg_launcher(work_dir) if args.backend in ("subprocess", "persistent") else "powercfg"
+        config_path = os.path.join(work_dir, "bench_config.ini")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(BENCHMARK_CONFIG.format(backend=args.backend if args.backend != "fake" else "subprocess",
+                                                      powercfg_path=powercfg_path,
+                                                      background_switching=str(args.background_switching).lower()))
+
+        latency, latency_cpu = run_latency_scenario(config_path, args)
+        burst, burst_cpu = run_burst_scenario(config_path, args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "backend": args.backend,
+        "background_switching": args.background_switching,
+        "python": sys.version.split()[0],
+        "latency": latency,
+        "burst": burst,
+        "cpu": {
+            "latency_cpu_us_per_event": latency_cpu * 1e6,
+            "burst_cpu_us_per_event": burst_cpu * 1e6,
+        },
+    }
+    write_results(results, args.output)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, REGRESSION_METRICS, args.max_regression)
+        if regressions:
+            print("Performance regressions detected:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
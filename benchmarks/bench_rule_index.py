@@ -0,0 +1,163 @@
+"""
+Benchmark of large [ProcessPowerMap] sections: parsing the config file vs. loading the compiled rule index.
+
+For each map size a synthetic config file is written and loaded with ConfigManager:
+  - parse:  rule_index = false, the whole file is parsed by configparser on every load;
+  - index:  rule_index = true with the index already built, the map is memory-mapped from the index;
+  - build:  rule_index = true, first load (parse + compile + write the index).
+Reported per mode: load time (best of --repeat), exact-name lookup latency through the rule engine
+for a working set of --working-set names (foreground apps repeat, the engine memoizes index hits),
+the uncached lookup in the map itself, and the Python heap (tracemalloc) retained by the loaded configuration.
+
+Usage (from the project root):
+    python -m benchmarks.bench_rule_index
+    python -m benchmarks.bench_rule_index --sizes 1000 10000 50000 --output rule_index.json
+"""
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import configure_benchmark_logging, write_results
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.configuration.rule_index import remove_stale_rule_indexes
+
+PLAN_GUIDS = ["381b4222-f694-41f0-9685-ff5bb260df2e", "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c",
+              "a1841308-3541-4fab-bc81-f71556f20b4a"]
+
+
+def write_config(path, count, rule_index, seed=0):
+    """
+    Config with `count` exact process names (mixed case, like hand-written maps) and a few wildcard keys.
+    Returns the process names.
+    """
+    rng = random.Random(seed)
+    names = [f"Tool_{index:06d}_{rng.getrandbits(24):06x}.exe" for index in range(count)]
+    lines = ["[General]", f"default_power_plan = {PLAN_GUIDS[0]}", "log_level = WARNING",
+             f"rule_index = {str(rule_index).lower()}", "", "[ProcessPowerMap]"]
+    lines.extend(f"{name} = {PLAN_GUIDS[index % len(PLAN_GUIDS)]}" for index, name in enumerate(names))
+    lines.extend(["game_*.exe = 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c", "setup??.exe = a1841308-3541-4fab-bc81-f71556f20b4a"])
+    with open(path, "w", encoding="utf-8") as config_file:
+        config_file.write("\n".join(lines) + "\n")
+    return names
+
+
+def _load(config_path):
+    config_manager = ConfigManager(config_path)
+    if not config_manager.load_config():
+        raise RuntimeError(f"Failed to load {config_path}")
+    return config_manager
+
+
+def _best_load_s(config_path, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _load(config_path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _retained_kib(config_path):
+    """Python heap still allocated after loading, i.e. held by the ConfigManager and its snapshot."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    config_manager = _load(config_path)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del config_manager
+    return retained / 1024.0
+
+
+def _lookup_ns(lookup, probe_names):
+    started = time.perf_counter()
+    for name in probe_names:
+        lookup(name)
+    return (time.perf_counter() - started) / len(probe_names) * 1e9
+
+
+def run_size(work_dir, count, repeat, lookups, working_set):
+    config_path = os.path.join(work_dir, f"map_{count}.ini")
+    names = write_config(config_path, count, rule_index=False)
+    rng = random.Random(1)
+    probe_names = [rng.choice(names) for _ in range(lookups)]
+    working_set_names = rng.sample(names, min(working_set, count))
+    engine_probe_names = [rng.choice(working_set_names) for _ in range(lookups)]
+    config_bytes = os.path.getsize(config_path)
+
+    parse_s = _best_load_s(config_path, repeat)
+    parse_kib = _retained_kib(config_path)
+    parsed = _load(config_path)
+    parse_lookup_ns = _lookup_ns(parsed.get_snapshot().rule_engine.match, engine_probe_names)
+    parse_map_lookup_ns = _lookup_ns(parsed.get_snapshot().app_power_map.get, [name.lower() for name in probe_names])
+
+    write_config(config_path, count, rule_index=True)
+    started = time.perf_counter()
+    indexed = _load(config_path)
+    build_s = time.perf_counter() - started
+    index_files = [name for name in os.listdir(work_dir) if name.startswith(os.path.basename(config_path) + ".")]
+    index_bytes = sum(os.path.getsize(os.path.join(work_dir, name)) for name in index_files)
+    index_s = _best_load_s(config_path, repeat)
+    index_kib = _retained_kib(config_path)
+    index_lookup_ns = _lookup_ns(indexed.get_snapshot().rule_engine.match, engine_probe_names)
+    index_map_lookup_ns = _lookup_ns(indexed.get_snapshot().app_power_map.get, [name.lower() for name in probe_names])
+
+    for name in probe_names[:1000]:
+        if parsed.get_power_plan_for_process(name) != indexed.get_power_plan_for_process(name):
+            raise RuntimeError(f"Index lookup of '{name}' differs from the parsed map")
+    del parsed, indexed
+    gc.collect()
+    remove_stale_rule_indexes(config_path)
+
+    return {
+        "entries": count,
+        "config_bytes": config_bytes,
+        "index_bytes": index_bytes,
+        "parse_load_ms": parse_s * 1000.0,
+        "index_build_ms": build_s * 1000.0,
+        "index_load_ms": index_s * 1000.0,
+        "load_speedup": parse_s / index_s if index_s else 0.0,
+        "parse_retained_kib": parse_kib,
+        "index_retained_kib": index_kib,
+        "parse_lookup_ns": parse_lookup_ns,
+        "index_lookup_ns": index_lookup_ns,
+        "parse_map_lookup_ns": parse_map_lookup_ns,
+        "index_map_lookup_ns": index_map_lookup_ns,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Config parsing vs. compiled rule index benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="process map sizes to test")
+    parser.add_argument("--repeat", type=int, default=5, help="loads per measurement (best is reported)")
+    parser.add_argument("--lookups", type=int, default=100000, help="exact-name lookups per size and mode")
+    parser.add_argument("--working-set", type=int, default=200, help="distinct process names the engine lookups are drawn from")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the application during the run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    configure_benchmark_logging(args.log_level)
+    work_dir = tempfile.mkdtemp(prefix="aps_bench_rule_index_")
+    try:
+        results = {
+            "python": sys.version.split()[0],
+            "sizes": [run_size(work_dir, count, max(1, args.repeat), max(1, args.lookups), max(1, args.working_set)) for count in args.sizes],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Benchmark of the RunningProcessTracker: full enumeration vs. incremental (PID diff) polls.
+
+Two enumerators are measured:
+  - synthetic: an in-memory process table of --processes entries where each poll starts and ends
+    --churn processes; describe() costs --describe-us microseconds (a Windows process query is
+    far more expensive than reading a dict, this models it);
+  - procfs: the real process list of this machine from /proc (Linux only, skipped elsewhere).
+For each, every poll either re-describes all processes (full_rescan_every=1, what a naive
+"enumerate everything" loop does) or only the PIDs that appeared since the last poll (the tracker's
+default). Reported: poll latency (p50/p95/max) and describe() calls per poll.
+
+The parent chain section measures inherit_parent_rules lookups (ancestors of a process, nearest
+first, at most --chain-depth) through the tracker's pid index against rebuilding a pid -> parent
+map from a full enumeration for every lookup, for the same table sizes.
+
+Usage (from the project root):
+    python -m benchmarks.bench_running_processes
+    python -m benchmarks.bench_running_processes --processes 2000 --churn 5 --polls 200 --output running.json
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import configure_benchmark_logging, summarize_ms, write_results
+from src.infrastructure.processes.process_enumerator import ProcessEntry, ProcessEnumerator, ProcFsProcessEnumerator
+from src.infrastructure.processes.running_process_tracker import RunningProcessTracker
+
+
+class SyntheticProcessEnumerator(ProcessEnumerator):
+    """
+    In-memory process table. churn() replaces the oldest processes with new ones, like short-lived
+    helper processes (compilers, browser tabs) coming and going between polls.
+    """
+    name = "synthetic"
+
+    def __init__(self, count, describe_us, chain_length=1):
+        self._describe_s = describe_us / 1e6
+        # Processes are spawned in chains of chain_length (launcher -> child -> grandchild ...)
+        self._chain_length = max(1, chain_length)
+        self._spawned = 0
+        self._next_pid = 8
+        self._processes = {}
+        self.describe_calls = 0
+        for _ in range(count):
+            self._spawn()
+
+    def _spawn(self):
+        pid = self._next_pid
+        self._next_pid += 4 # Windows PIDs are multiples of 4
+        parent_pid = pid - 4 if self._spawned % self._chain_length else 4
+        self._processes[pid] = ProcessEntry(pid, parent_pid, f"worker_{pid % 97}.exe", pid)
+        self._spawned += 1
+
+    def churn(self, count):
+        for pid in list(self._processes)[:count]:
+            del self._processes[pid]
+        for _ in range(count):
+            self._spawn()
+
+    def pids(self):
+        return list(self._processes)
+
+    def describe(self, pid):
+        self.describe_calls += 1
+        if self._describe_s:
+            # Busy wait: sleep() granularity is too coarse for microseconds
+            deadline = time.perf_counter() + self._describe_s
+            while time.perf_counter() < deadline:
+                pass
+        return self._processes.get(pid)
+
+
+def _run_polls(enumerator, full_rescan_every, polls, churn):
+    tracker = RunningProcessTracker(enumerator, full_rescan_every=full_rescan_every)
+    tracker.poll() # Initial full enumeration, not part of the measurement
+    samples = []
+    describe_calls = 0
+    for _ in range(polls):
+        if churn and hasattr(enumerator, "churn"):
+            enumerator.churn(churn)
+        calls_before = getattr(enumerator, "describe_calls", 0)
+        started = time.perf_counter()
+        tracker.poll()
+        samples.append(time.perf_counter() - started)
+        describe_calls += getattr(enumerator, "describe_calls", 0) - calls_before
+    result = {
+        "poll": summarize_ms(samples),
+        "processes": tracker.get_process_count(),
+        "distinct_names": len(tracker.get_running_names()),
+    }
+    if hasattr(enumerator, "describe_calls"):
+        result["describe_calls_per_poll"] = describe_calls / polls
+    return result
+
+
+def _speedup(results):
+    diff_p50 = results["diff"]["poll"]["p50_ms"]
+    return results["full"]["poll"]["p50_ms"] / diff_p50 if diff_p50 else 0.0
+
+
+def run_synthetic(count, churn, polls, describe_us):
+    results = {"processes": count, "churn_per_poll": churn, "describe_us": describe_us}
+    for mode, full_rescan_every in (("full", 1), ("diff", 0)):
+        results[mode] = _run_polls(SyntheticProcessEnumerator(count, describe_us), full_rescan_every, polls, churn)
+    results["speedup_p50"] = _speedup(results)
+    return results
+
+
+def run_procfs(polls):
+    if not os.path.isdir("/proc/self"):
+        return "skipped (no /proc)"
+    results = {}
+    for mode, full_rescan_every in (("full", 1), ("diff", 0)):
+        results[mode] = _run_polls(ProcFsProcessEnumerator(), full_rescan_every, polls, churn=0)
+    results["speedup_p50"] = _speedup(results)
+    return results
+
+
+def _naive_ancestors(enumerator, pid, max_depth):
+    """Ancestors without a maintained index: enumerate and describe everything, then walk the parents."""
+    processes = {entry.pid: entry for entry in map(enumerator.describe, enumerator.pids()) if entry is not None}
+    ancestors = []
+    entry = processes.get(pid)
+    while entry is not None and entry.ppid in processes and len(ancestors) < max_depth:
+        entry = processes[entry.ppid]
+        ancestors.append(entry)
+    return ancestors
+
+
+def run_parent_chain(count, chain_depth, lookups, naive_lookups, describe_us):
+    enumerator = SyntheticProcessEnumerator(count, describe_us, chain_length=chain_depth + 1)
+    tracker = RunningProcessTracker(enumerator)
+    tracker.poll()
+    # Leaves of the chains: the processes with the longest ancestor chains
+    leaves = [pid for pid in enumerator.pids() if (pid // 4 - 2) % (chain_depth + 1) == chain_depth]
+    probe_pids = [leaves[index % len(leaves)] for index in range(lookups)]
+
+    calls_before = enumerator.describe_calls
+    started = time.perf_counter()
+    for pid in probe_pids:
+        ancestors = tracker.get_ancestors(pid, chain_depth)
+    indexed_s = (time.perf_counter() - started) / lookups
+    indexed_describe_calls = (enumerator.describe_calls - calls_before) / lookups
+    if len(ancestors) != chain_depth:
+        raise RuntimeError(f"Expected {chain_depth} ancestors, got {len(ancestors)}")
+
+    started = time.perf_counter()
+    for pid in probe_pids[:naive_lookups]:
+        naive = _naive_ancestors(enumerator, pid, chain_depth)
+    naive_s = (time.perf_counter() - started) / min(naive_lookups, lookups)
+    if [entry.pid for entry in naive] != [entry.pid for entry in tracker.get_ancestors(probe_pids[naive_lookups - 1], chain_depth)]:
+        raise RuntimeError("Indexed and naive ancestor chains differ")
+
+    return {
+        "processes": count,
+        "chain_depth": chain_depth,
+        "indexed_lookup_us": indexed_s * 1e6,
+        "indexed_describe_calls_per_lookup": indexed_describe_calls,
+        "naive_lookup_us": naive_s * 1e6,
+        "speedup": naive_s / indexed_s if indexed_s else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Running process tracker: full enumeration vs. PID diff polls.")
+    parser.add_argument("--processes", type=int, nargs="+", default=[300, 1000, 3000], help="synthetic process table sizes")
+    parser.add_argument("--churn", type=int, default=3, help="processes started and ended between two polls")
+    parser.add_argument("--describe-us", type=float, default=20.0, help="simulated cost of describing one process (microseconds)")
+    parser.add_argument("--polls", type=int, default=100, help="measured polls per mode")
+    parser.add_argument("--chain-depth", type=int, default=4, help="ancestors per parent chain lookup")
+    parser.add_argument("--lookups", type=int, default=10000, help="indexed parent chain lookups per size")
+    parser.add_argument("--naive-lookups", type=int, default=5, help="parent chain lookups by full enumeration per size")
+    parser.add_argument("--log-level", default="WARNING", help="log level of the application during the run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    configure_benchmark_logging(args.log_level)
+    polls = max(1, args.polls)
+    results = {
+        "python": sys.version.split()[0],
+        "synthetic": [run_synthetic(count, max(0, args.churn), polls, max(0.0, args.describe_us)) for count in args.processes],
+        "procfs": run_procfs(polls),
+        "parent_chain": [run_parent_chain(count, max(1, args.chain_depth), max(1, args.lookups), max(1, args.naive_lookups),
+                                          max(0.0, args.describe_us)) for count in args.processes],
+    }
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
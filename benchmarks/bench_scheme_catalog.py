@@ -0,0 +1,109 @@
+"""
+Benchmark of power scheme list parsing and SchemeCatalog lookups against synthetic 'powercfg /list' output.
+
+Compares the single-pass parser (scheme_catalog.parse_powercfg_list) with the previous line-by-line
+parsing, and measures catalog construction and GUID -> name lookups, for growing plan counts.
+
+Usage (from the project root):
+    python -m benchmarks.bench_scheme_catalog
+    python -m benchmarks.bench_scheme_catalog --sizes 10 1000 50000 --output catalog.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import write_results
+from src.infrastructure.power_management.power_backends import POWER_PLAN_LIST_REGEX
+from src.infrastructure.power_management.scheme_catalog import SchemeCatalog, parse_powercfg_list
+
+
+def synthetic_list_output(count, seed=0):
+    """
+    'powercfg /list' style output with `count` schemes, the middle one marked active.
+    Some names contain parentheses, like user created plans can.
+    """
+    rng = random.Random(seed)
+    lines = ["Existing Power Schemes (* Active)", "-----------------------------------"]
+    for index in range(count):
+        guid = uuid.UUID(int=rng.getrandbits(128))
+        name = f"Plan {index} (copy)" if index % 7 == 0 else f"Plan {index}"
+        active = " *" if index == count // 2 else ""
+        lines.append(f"Power Scheme GUID: {guid}  ({name}){active}")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def legacy_parse(text):
+    """The previous parsing: split into lines and search every line separately."""
+    schemes = []
+    for line in text.splitlines():
+        match = POWER_PLAN_LIST_REGEX.search(line)
+        if match:
+            guid = match.group(1).strip()
+            name = match.group(2).strip()
+            if guid and name:
+                schemes.append((guid, name))
+    return schemes
+
+
+def _best_of(function, repeat):
+    """Fastest of `repeat` runs in seconds (least disturbed by other processes)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_size(count, repeat, lookups):
+    text = synthetic_list_output(count)
+    schemes = parse_powercfg_list(text)
+    assert len(schemes) == count, f"parsed {len(schemes)} of {count} schemes"
+
+    legacy_s = _best_of(lambda: legacy_parse(text), repeat)
+    single_pass_s = _best_of(lambda: parse_powercfg_list(text), repeat)
+    build_s = _best_of(lambda: SchemeCatalog(schemes, version=1), repeat)
+
+    catalog = SchemeCatalog(schemes, version=1)
+    rng = random.Random(1)
+    probe_guids = [rng.choice(schemes).guid for _ in range(lookups)]
+    started = time.perf_counter()
+    for guid in probe_guids:
+        catalog.get_name(guid)
+    lookup_s = time.perf_counter() - started
+
+    return {
+        "schemes": count,
+        "output_bytes": len(text),
+        "legacy_parse_ms": legacy_s * 1000.0,
+        "single_pass_parse_ms": single_pass_s * 1000.0,
+        "parse_speedup": legacy_s / single_pass_s if single_pass_s else 0.0,
+        "catalog_build_ms": build_s * 1000.0,
+        "lookup_ns": lookup_s / lookups * 1e9 if lookups else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Power scheme list parsing and catalog lookup benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500, 5000, 50000], help="plan counts to test")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is reported)")
+    parser.add_argument("--lookups", type=int, default=100000, help="GUID -> name lookups per size")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split()[0],
+        "sizes": [run_size(count, args.repeat, args.lookups) for count in args.sizes],
+    }
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
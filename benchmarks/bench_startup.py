@@ -0,0 +1,189 @@
+"""
+Cold-start benchmark: import time of main.py per module and time to the first handled foreground event.
+
+Every run starts fresh interpreters running benchmarks/startup_probe.py (the pywin32 modules are
+stubbed where they aren't installed, so it runs on Linux):
+  - import:      `python -X importtime` profile of `import main`: total, per project module (cumulative)
+                 and the most expensive modules by self time;
+  - cold_start:  process start -> first plan switch (in-memory backend, one replayed event),
+                 plus the startup timeline of the last run;
+  - deferred modules (pywin32, subprocess, asyncio) that `import main` loaded although it shouldn't.
+
+Exit code 1 if a budget (--max-import-ms, --max-first-event-ms) is exceeded, a deferred module is
+imported by main.py, or with --baseline, a metric regressed by more than --max-regression.
+
+Usage (from the project root):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --output startup_baseline.json
+    python -m benchmarks.bench_startup --baseline startup_baseline.json --max-regression 0.25
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import compare_with_baseline, summarize_ms, write_results
+
+PROBE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_probe.py")
+PROBE_RESULT_PREFIX = "STARTUP_PROBE "
+PROBE_TIMEOUT = 60.0
+
+PROBE_PROCESS = "bench_startup.exe"
+PROBE_CONFIG = f"""[General]
+default_power_plan = 381b4222-f694-41f0-9685-ff5bb260df2e
+log_level = WARNING
+focus_settle_ms = 0
+
+[ProcessPowerMap]
+{PROBE_PROCESS} = 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c
+"""
+
+# Default budgets, generous enough for a slow CI machine; tighten them with the options
+DEFAULT_MAX_IMPORT_MS = 250.0
+DEFAULT_MAX_FIRST_EVENT_MS = 400.0
+
+# (section, key) pairs compared against a baseline, lower is better
+REGRESSION_METRICS = [
+    ("import", "main_ms"),
+    ("cold_start", "p50_ms"),
+]
+
+
+def _median(values):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def _probe_env():
+    env = dict(os.environ)
+    # Cold starts of the installed application use cached bytecode
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def _run_probe(config_path, import_profile=False):
+    """
+    Runs the probe in a fresh interpreter. Returns (result dict, -X importtime lines).
+    """
+    command = [sys.executable] + (["-X", "importtime"] if import_profile else []) + [PROBE_SCRIPT, config_path, PROBE_PROCESS]
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=PROBE_TIMEOUT, env=_probe_env())
+    result = None
+    for line in completed.stdout.splitlines():
+        if line.startswith(PROBE_RESULT_PREFIX):
+            result = json.loads(line[len(PROBE_RESULT_PREFIX):])
+    if completed.returncode != 0 or result is None:
+        raise RuntimeError(f"Startup probe failed (exit code {completed.returncode}):\n{completed.stderr}")
+    importtime_lines = [line for line in completed.stderr.splitlines() if line.startswith("import time:")]
+    return result, importtime_lines
+
+
+def parse_importtime(lines):
+    """
+    Parses `-X importtime` output into {module: (self_ms, cumulative_ms)}.
+    """
+    modules = {}
+    for line in lines:
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue # Header line
+        modules[fields[2].strip()] = (self_us / 1000.0, cumulative_us / 1000.0)
+    return modules
+
+
+def run_benchmark(config_path, runs, top):
+    # Warm-up run: writes the bytecode caches, so all measured runs are cold process starts with warm caches
+    _run_probe(config_path)
+
+    profiles = [parse_importtime(_run_probe(config_path, import_profile=True)[1]) for _ in range(runs)]
+    cold_starts = [_run_probe(config_path)[0] for _ in range(runs)]
+
+    def median_of(module, index):
+        return _median([profile[module][index] for profile in profiles if module in profile])
+
+    project_modules = sorted({name for profile in profiles for name in profile if name == "main" or name.startswith("src.")})
+    all_modules = {name for profile in profiles for name in profile}
+    by_self_time = sorted(all_modules, key=lambda name: median_of(name, 0), reverse=True)[:top]
+
+    first_event = summarize_ms([result["first_event_ms"] / 1000.0 for result in cold_starts])
+    first_event.update({
+        "import_main_ms": _median([result["import_main_ms"] for result in cold_starts]),
+        "event_to_switch_ms": _median([result["event_to_switch_ms"] for result in cold_starts]),
+        "timeline": cold_starts[-1]["timeline"],
+    })
+    return {
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "import": {
+            # Measured under -X importtime, which adds some overhead of its own
+            "main_ms": median_of("main", 1),
+            "project_modules_cumulative_ms": {name: round(median_of(name, 1), 3) for name in project_modules},
+            "top_self_ms": {name: round(median_of(name, 0), 3) for name in by_self_time},
+        },
+        "cold_start": first_event,
+        "deferred_modules_loaded_by_main": sorted({name for result in cold_starts for name in result["deferred_modules_loaded_by_main"]}),
+    }
+
+
+def check_budgets(results, max_import_ms, max_first_event_ms):
+    """
+    Returns human readable budget violations (empty if none).
+    """
+    violations = []
+    import_ms = results["cold_start"]["import_main_ms"]
+    if import_ms > max_import_ms:
+        violations.append(f"import main: {import_ms:.1f} ms > budget {max_import_ms:.1f} ms")
+    first_event_ms = results["cold_start"]["p50_ms"]
+    if first_event_ms > max_first_event_ms:
+        violations.append(f"time to first event (p50): {first_event_ms:.1f} ms > budget {max_first_event_ms:.1f} ms")
+    if results["deferred_modules_loaded_by_main"]:
+        violations.append(f"modules that should be imported lazily are loaded by `import main`: {', '.join(results['deferred_modules_loaded_by_main'])}")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-event benchmark.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreter starts per measurement (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="number of modules listed by self import time")
+    parser.add_argument("--max-import-ms", type=float, default=DEFAULT_MAX_IMPORT_MS, help="budget for `import main`")
+    parser.add_argument("--max-first-event-ms", type=float, default=DEFAULT_MAX_FIRST_EVENT_MS,
+                        help="budget for process start -> first plan switch (p50)")
+    parser.add_argument("--output", help="write results as JSON to this file (e.g. to create a baseline)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="aps_bench_startup_")
+    try:
+        config_path = os.path.join(work_dir, "bench_config.ini")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(PROBE_CONFIG)
+        results = run_benchmark(config_path, max(1, args.runs), args.top)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    write_results(results, args.output)
+
+    failures = check_budgets(results, args.max_import_ms, args.max_first_event_ms)
+    if args.baseline:
+        failures.extend(compare_with_baseline(results, args.baseline, REGRESSION_METRICS, args.max_regression))
+    if failures:
+        print("Startup budget exceeded:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
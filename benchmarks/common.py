@@ -0,0 +1,83 @@
+import json
+import logging
+import sys
+
+
+def percentile(sorted_values, fraction):
+    """
+    Linear-interpolated percentile of an already sorted list (fraction in [0, 1]). Returns 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1.0 - weight) + sorted_values[upper] * weight
+
+
+def summarize_ms(samples_seconds):
+    """
+    Summary of a list of durations in seconds, reported in milliseconds.
+    """
+    values = sorted(samples_seconds)
+    count = len(values)
+    return {
+        "count": count,
+        "min_ms": values[0] * 1000.0 if count else 0.0,
+        "mean_ms": (sum(values) / count * 1000.0) if count else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000.0,
+        "p95_ms": percentile(values, 0.95) * 1000.0,
+        "p99_ms": percentile(values, 0.99) * 1000.0,
+        "max_ms": values[-1] * 1000.0 if count else 0.0,
+    }
+
+
+def configure_benchmark_logging(level_name):
+    """
+    Logs to stderr only. Benchmarks should not write to the application's log files.
+    """
+    logging.basicConfig(
+        level=getattr(logging, str(level_name).upper(), logging.WARNING),
+        format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
+        stream=sys.stderr,
+        force=True,
+    )
+
+
+def write_results(results, output_path=None):
+    """
+    Prints results as JSON and optionally writes them to output_path (e.g. to store a baseline).
+    """
+    text = json.dumps(results, indent=2, sort_keys=True)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+
+
+def compare_with_baseline(results, baseline_path, metrics, max_regression):
+    """
+    Compares "lower is better" metrics with a stored baseline.
+
+    Args:
+        results: current results dict.
+        baseline_path: JSON file written earlier with --output.
+        metrics: list of (section, key) pairs to compare, e.g. [("latency", "p95_ms")].
+        max_regression: allowed relative increase (0.2 = 20 % slower).
+
+    Returns:
+        List of human readable regression messages (empty if none).
+    """
+    with open(baseline_path, "r", encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = []
+    for section, key in metrics:
+        try:
+            old_value = float(baseline[section][key])
+            new_value = float(results[section][key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if old_value > 0 and new_value > old_value * (1.0 + max_regression):
+            regressions.append(f"{section}.{key}: {new_value:.3f} vs baseline {old_value:.3f} (+{(new_value / old_value - 1.0) * 100:.1f} %)")
+    return regressions
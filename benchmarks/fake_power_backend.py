@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from src.infrastructure.power_management.async_power_backends import AsyncPowerBackend
+from src.infrastructure.power_management.power_backends import PowerBackend
+
+# Power plans offered by the fake backend (GUID -> name), matching the Windows defaults.
+FAKE_SCHEMES = {
+    "381b4222-f694-41f0-9685-ff5bb260df2e": "Balanced",
+    "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c": "High performance",
+    "a1841308-3541-4fab-bc81-f71556f20b4a": "Power saver",
+}
+
+
+class FakePowerBackend(PowerBackend):
+    """
+    In-memory PowerBackend for benchmarks: no powercfg process, optional artificial latency per call.
+    Lets the benchmark measure the application's own processing path separately from the cost of powercfg.
+    """
+    name = "fake"
+
+    def __init__(self, schemes=None, active_guid=None, set_latency=0.0, get_latency=0.0):
+        """
+        Args:
+            schemes: dict GUID -> name of available plans. Defaults to FAKE_SCHEMES.
+            active_guid: initially active plan. Defaults to the first scheme.
+            set_latency: seconds each set_active_scheme() call takes (simulated powercfg /setactive).
+            get_latency: seconds each get_active_scheme() call takes (simulated powercfg /getactivescheme).
+        """
+        self._schemes = dict(schemes or FAKE_SCHEMES)
+        self._active_guid = active_guid or next(iter(self._schemes))
+        self._set_latency = set_latency
+        self._get_latency = get_latency
+        self._lock = threading.Lock()
+        self.set_calls = 0
+        self.get_calls = 0
+        self.list_calls = 0
+
+    def list_schemes(self):
+        with self._lock:
+            self.list_calls += 1
+            return list(self._schemes.items())
+
+    def get_active_scheme(self):
+        if self._get_latency:
+            time.sleep(self._get_latency)
+        with self._lock:
+            self.get_calls += 1
+            return self._active_guid
+
+    def set_active_scheme(self, power_plan_guid: str):
+        if self._set_latency:
+            time.sleep(self._set_latency)
+        guid = str(power_plan_guid).strip().lower()
+        with self._lock:
+            self.set_calls += 1
+            if guid not in self._schemes:
+                return False
+            self._active_guid = guid
+            return True
+
+
+class FakePowrProfApi:
+    """
+    In-memory stand-in for powrprof_backend.PowrProfApi: same methods and (error_code, value) results,
+    so NativePowerBackend's own code path can be benchmarked on systems without powrprof.dll.
+    """
+    ERROR_SUCCESS = 0
+    ERROR_FILE_NOT_FOUND = 2
+
+    def __init__(self, schemes=None, active_guid=None, set_latency=0.0):
+        self._schemes = dict(schemes or FAKE_SCHEMES)
+        self._active_guid = active_guid or next(iter(self._schemes))
+        self._set_latency = set_latency
+        self._lock = threading.Lock()
+        self.set_calls = 0
+        self.get_calls = 0
+
+    def enumerate_schemes(self):
+        with self._lock:
+            return self.ERROR_SUCCESS, list(self._schemes)
+
+    def read_friendly_name(self, guid_string):
+        with self._lock:
+            name = self._schemes.get(str(guid_string).lower())
+        return (self.ERROR_SUCCESS, name) if name is not None else (self.ERROR_FILE_NOT_FOUND, None)
+
+    def get_active_scheme(self):
+        with self._lock:
+            self.get_calls += 1
+            return self.ERROR_SUCCESS, self._active_guid
+
+    def set_active_scheme(self, guid_string):
+        # Same validation as the ctypes binding: malformed GUIDs raise ValueError
+        guid = str(uuid.UUID(str(guid_string).strip()))
+        if self._set_latency:
+            time.sleep(self._set_latency)
+        with self._lock:
+            self.set_calls += 1
+            if guid not in self._schemes:
+                return self.ERROR_FILE_NOT_FOUND, None
+            self._active_guid = guid
+            return self.ERROR_SUCCESS, None
+
+
+class AsyncFakePowerBackend(AsyncPowerBackend):
+    """
+    In-memory AsyncPowerBackend for the asyncio runtime: simulated latency is awaited
+    (asyncio.sleep), so a slow switch doesn't occupy a thread, like an awaited powercfg process.
+    """
+    name = "async-fake"
+
+    def __init__(self, schemes=None, active_guid=None, set_latency=0.0, get_latency=0.0):
+        self._schemes = dict(schemes or FAKE_SCHEMES)
+        self._active_guid = active_guid or next(iter(self._schemes))
+        self._set_latency = set_latency
+        self._get_latency = get_latency
+        self.set_calls = 0
+        self.get_calls = 0
+        self.list_calls = 0
+
+    async def list_schemes(self):
+        self.list_calls += 1
+        return list(self._schemes.items())
+
+    async def get_active_scheme(self):
+        if self._get_latency:
+            await asyncio.sleep(self._get_latency)
+        self.get_calls += 1
+        return self._active_guid
+
+    async def set_active_scheme(self, power_plan_guid: str):
+        if self._set_latency:
+            await asyncio.sleep(self._set_latency)
+        guid = str(power_plan_guid).strip().lower()
+        self.set_calls += 1
+        if guid not in self._schemes:
+            return False
+        self._active_guid = guid
+        return True
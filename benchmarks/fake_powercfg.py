@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Minimal powercfg stand-in for benchmarking the subprocess/persistent power backends without Windows.
+
+Supports /list, /getactivescheme and /setactive <GUID> with the same output format as powercfg.
+The active plan is stored in the file named by the APS_FAKE_POWERCFG_STATE environment variable
+(or fake_powercfg_active.txt in the temp directory).
+"""
+import os
+import sys
+import tempfile
+
+SCHEMES = {
+    "381b4222-f694-41f0-9685-ff5bb260df2e": "Balanced",
+    "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c": "High performance",
+    "a1841308-3541-4fab-bc81-f71556f20b4a": "Power saver",
+}
+DEFAULT_ACTIVE = "381b4222-f694-41f0-9685-ff5bb260df2e"
+STATE_FILE = os.environ.get("APS_FAKE_POWERCFG_STATE") or os.path.join(tempfile.gettempdir(), "fake_powercfg_active.txt")
+
+
+def _read_active():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as state:
+            return state.read().strip() or DEFAULT_ACTIVE
+    except OSError:
+        return DEFAULT_ACTIVE
+
+
+def main(args):
+    active = _read_active()
+    if args == ["/list"]:
+        print("Existing Power Schemes (* Active)")
+        print("-----------------------------------")
+        for guid, name in SCHEMES.items():
+            print(f"Power Scheme GUID: {guid}  ({name}){' *' if guid == active else ''}")
+        return 0
+    if args == ["/getactivescheme"]:
+        print(f"Power Scheme GUID: {active}  ({SCHEMES.get(active, 'Unknown')})")
+        return 0
+    if len(args) == 2 and args[0] == "/setactive":
+        guid = args[1].strip().lower()
+        if guid not in SCHEMES:
+            print("Invalid Parameters -- try \"/?\" for help", file=sys.stderr)
+            return 1
+        with open(STATE_FILE, "w", encoding="utf-8") as state:
+            state.write(guid)
+        return 0
+    print("Invalid Parameters -- try \"/?\" for help", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
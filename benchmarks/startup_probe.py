@@ -0,0 +1,129 @@
+"""
+Cold-start probe run in a fresh interpreter by bench_startup: imports main.py (with the pywin32
+modules stubbed where they aren't installed), starts the app through the StartupOrchestrator with an
+in-memory power backend and a one-event replay trace, and prints one JSON line with the timings.
+
+Everything is measured from the first statement of this script, so imports count. Nothing beyond the
+interpreter's own startup modules is imported before main.py, and benchmarks.fake_power_backend (which
+pulls in asyncio) isn't used at all.
+
+Usage (normally started by bench_startup):
+    python benchmarks/startup_probe.py <config_path> <process_name>
+"""
+import time
+
+STARTED_AT = time.perf_counter()
+
+import importlib.machinery
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# Modules whose import the lazy-loading boundaries keep out of `import main`
+WINDOWS_MODULES = ("win32api", "win32con", "win32gui", "winerror")
+DEFERRED_MODULES = WINDOWS_MODULES + ("subprocess", "asyncio")
+# Prefix of the result line on stdout
+RESULT_PREFIX = "STARTUP_PROBE "
+# Seconds to wait for the first switch before giving up
+FIRST_EVENT_TIMEOUT = 10.0
+
+
+class _WindowsStubFinder:
+    """
+    Meta path finder and loader providing empty stand-ins for the pywin32 modules that aren't installed
+    (Linux), created only when imported, so sys.modules still shows whether main.py imported them.
+    Attributes read as 0. (Not derived from importlib.abc, which would import pathlib and friends before main.py.)
+    """
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in WINDOWS_MODULES:
+            return importlib.machinery.ModuleSpec(fullname, self)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        module.__getattr__ = lambda name: 0
+
+
+def _install_windows_stubs():
+    if any(importlib.machinery.PathFinder.find_spec(name) is None for name in WINDOWS_MODULES):
+        sys.meta_path.append(_WindowsStubFinder())
+
+
+def run_probe(config_path, process_name):
+    _install_windows_stubs()
+    modules_before = set(sys.modules)
+    import_started = time.perf_counter()
+    import main # noqa: F401 (the import itself is measured)
+    imported_at = time.perf_counter()
+    loaded_by_main = sorted(name for name in DEFERRED_MODULES if name in sys.modules and name not in modules_before)
+
+    # Imported after main.py, so their cost is part of its import if main.py needs them (nothing is preloaded)
+    import json
+    import logging
+    import threading
+    from src.application.startup import StartupOrchestrator, StartupTimeline
+    from src.infrastructure.configuration.config_manager import ConfigManager
+    from src.infrastructure.events.replay_event_source import ReplayEventSource, TraceEntry
+    from src.infrastructure.power_management.power_backends import PowerBackend
+
+    class InstantPowerBackend(PowerBackend):
+        # Minimal in-memory backend: two plans, no latency
+        name = "probe"
+
+        def __init__(self):
+            self._schemes = [("381b4222-f694-41f0-9685-ff5bb260df2e", "Balanced"),
+                             ("8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c", "High performance")]
+            self._active_guid = self._schemes[0][0]
+
+        def list_schemes(self):
+            return list(self._schemes)
+
+        def get_active_scheme(self):
+            return self._active_guid
+
+        def set_active_scheme(self, power_plan_guid):
+            self._active_guid = power_plan_guid
+            return True
+
+    first_switch = threading.Event()
+    switch_times = []
+
+    def on_switch(foreground_event, target_guid, success):
+        if not switch_times:
+            switch_times.append((time.perf_counter(), foreground_event.timestamp))
+            first_switch.set()
+
+    startup = StartupOrchestrator(config_manager=ConfigManager(config_path),
+                                  timeline=StartupTimeline(origin=STARTED_AT))
+    startup.load_config()
+    # Warnings and errors to stderr only, the probe must not write the application's log files
+    startup.configure_logging(lambda log_level, async_logging: logging.basicConfig(level=logging.WARNING, stream=sys.stderr))
+    app = startup.create_app(
+        power_backend=InstantPowerBackend(),
+        event_source_factory=lambda mailbox: ReplayEventSource(mailbox, entries=[TraceEntry(0.0, process_name, 1, None)])
+    )
+    app.register_switch_listener(on_switch)
+    started = startup.start_app()
+    got_event = first_switch.wait(FIRST_EVENT_TIMEOUT)
+    startup.wait_for_background(FIRST_EVENT_TIMEOUT)
+    app.stop()
+
+    result = {
+        "started": bool(started),
+        "import_main_ms": (imported_at - import_started) * 1000.0,
+        "imported_at_ms": (imported_at - STARTED_AT) * 1000.0,
+        "deferred_modules_loaded_by_main": loaded_by_main,
+        "first_event_ms": (switch_times[0][0] - STARTED_AT) * 1000.0 if got_event else None,
+        "event_to_switch_ms": (switch_times[0][0] - switch_times[0][1]) * 1000.0 if got_event else None,
+        "timeline": startup.get_timeline().as_dict(),
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    return 0 if got_event and started else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_probe(sys.argv[1], sys.argv[2]))
@@ -3,6 +3,10 @@ import sys
 import os
 import threading # Still needed for AppPowerSwitcher, but main thread runs GUI loop
 import time # Could be useful for delays, but PumpMessages is blocking
+# Origin of the startup timeline (see StartupOrchestrator), taken before the heavy imports below
+_STARTUP_STARTED_AT = time.perf_counter()
+import ctypes # Needed for power setting change notifications (not wrapped by pywin32)
+import ctypes.wintypes
 # keyboard is not needed for the basic taskbar icon GUI
 # import keyboard # Remove if not used
 
@@ -22,26 +26,24 @@ SRC_DIR = os.path.join(PROJECT_ROOT, "src")
 if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR) # Insert at the beginning for higher priority
 
-# Import pywin32 modules for Taskbar Icon functionality
-# These are standard library-level imports for pywin32 installation
-try:
-    import win32api
-    import win32con
-    import win32gui
-    import winerror # Useful for checking specific Windows errors
-except ImportError:
-    print("Fatal Error: pywin32 library not found.")
-    print("Please install it using: pip install pywin32")
-    sys.exit(1)
+# pywin32 modules for Taskbar Icon functionality.
+# Only the TrayIcon uses them, and it is created after the core app has installed its event hook,
+# so they are imported by _import_gui_modules() (called from main()) instead of at module import:
+# loading the pywin32 DLLs doesn't delay the first foreground event, and importing this module
+# has no side effects (the startup benchmark imports it on Linux).
+win32api = None
+win32con = None
+win32gui = None
+winerror = None # Useful for checking specific Windows errors
 
 # Now import necessary modules from our project's src package
 try:
     # Import the main application class from the src.application package
     from src.application.power_switcher_app import PowerSwitcherApp
+    # Startup orchestration: single config parse, scheme enumeration in parallel with hook installation
+    from src.application.startup import StartupOrchestrator, StartupTimeline
     # Import logging configuration utility from src.utils package
-    from src.utils.logging_config import configure_logging
-    # Import ConfigManager from src.infrastructure.configuration package
-    from src.infrastructure.configuration.config_manager import ConfigManager
+    from src.utils.logging_config import configure_logging, shutdown_logging
     # Need PowerCfgManager to get plan names for GUI display if needed (optional)
     from src.infrastructure.power_management.power_cfg_manager import PowerCfgManager
 except ImportError as e:
@@ -56,10 +58,12 @@ except ImportError as e:
 TASKBAR_WINDOW_CLASS = "AppPowerSwitcherTrayWindowClass"
 # Custom Windows Message ID for taskbar notifications (arbitrary offset)
 # Shell_NotifyIcon sends events to the window with this message ID
-TASKBAR_NOTIFY_MSG = win32con.WM_USER + 20 # Must be WM_USER + something
+# (WM_USER is spelled out because win32con isn't imported yet when this module is loaded)
+WM_USER = 0x0400
+TASKBAR_NOTIFY_MSG = WM_USER + 20 # Must be WM_USER + something
 
 # Menu item IDs for the right-click context menu
-MENU_EXIT_ID = win32con.WM_USER + 21 # Pick a unique ID for the Exit action
+MENU_EXIT_ID = WM_USER + 21 # Pick a unique ID for the Exit action
 
 # Taskbar icon ID (can be 0 if only one icon for this window)
 TASKBAR_ICON_ID = 0
@@ -67,6 +71,35 @@ TASKBAR_ICON_ID = 0
 # Default tooltip text shown when hovering over the icon
 TASKBAR_TOOLTIP = "App Power Switcher"
 
+# --- Constants for power plan change notifications ---
+# Windows sends WM_POWERBROADCAST / PBT_POWERSETTINGCHANGE to windows registered for
+# GUID_POWERSCHEME_PERSONALITY whenever the active power plan changes (by us or by anyone else).
+# The notification carries the new active scheme GUID, which keeps the app's active scheme cache authoritative.
+PBT_POWERSETTINGCHANGE = 0x8013
+DEVICE_NOTIFY_WINDOW_HANDLE = 0x00000000
+
+class _GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", ctypes.wintypes.DWORD),
+        ("Data2", ctypes.wintypes.WORD),
+        ("Data3", ctypes.wintypes.WORD),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+    def __str__(self):
+        data4 = bytes(self.Data4).hex()
+        return f"{self.Data1:08x}-{self.Data2:04x}-{self.Data3:04x}-{data4[:4]}-{data4[4:]}"
+
+class _POWERBROADCAST_SETTING(ctypes.Structure):
+    _fields_ = [
+        ("PowerSetting", _GUID),
+        ("DataLength", ctypes.wintypes.DWORD),
+        ("Data", _GUID), # For GUID_POWERSCHEME_PERSONALITY the data is the new scheme GUID
+    ]
+
+# {245D8541-3943-4422-B025-13A784F679B7}
+GUID_POWERSCHEME_PERSONALITY = _GUID(0x245D8541, 0x3943, 0x4422, (ctypes.c_ubyte * 8)(0xB0, 0x25, 0x13, 0xA7, 0x84, 0xF6, 0x79, 0xB7))
+
 # --- Global reference for the AppPowerSwitcher instance ---
 # The TrayIcon callback function needs to access the AppPowerSwitcher instance to stop it.
 # We'll store a reference here after it's initialized.
@@ -111,6 +144,7 @@ class TrayIcon:
             win32con.WM_COMMAND: self.OnCommand, # Menu item selected
             win32con.WM_USER + 20: self.OnTaskbarNotify, # Our custom message ID for taskbar icon events
             win32gui.RegisterWindowMessage("TaskbarCreated"): self.OnTaskbarCreated, # Explorer restarted
+            win32con.WM_POWERBROADCAST: self.OnPowerBroadcast, # Active power plan changed
             # Add other messages if needed, e.g., WM_QUERYENDSESSION, WM_ENDSESSION for shutdown handling
         }
 
@@ -169,8 +203,43 @@ class TrayIcon:
         # 3. Create Taskbar Icon
         self._create_taskbar_icon()
 
+        # 4. Subscribe to active power plan changes for the app's active scheme cache
+        self._power_notify_handle = None
+        self._register_power_scheme_notification()
+
         logger.info("TrayIcon initialization complete.")
 
+    def _register_power_scheme_notification(self):
+        """
+        Registers the hidden window for GUID_POWERSCHEME_PERSONALITY notifications.
+        Failure only costs the external invalidation signal, the cache TTL still applies.
+        """
+        try:
+            register = ctypes.windll.user32.RegisterPowerSettingNotification
+            register.argtypes = [ctypes.wintypes.HANDLE, ctypes.POINTER(_GUID), ctypes.wintypes.DWORD]
+            register.restype = ctypes.c_void_p
+            self._power_notify_handle = register(self.hwnd, ctypes.byref(GUID_POWERSCHEME_PERSONALITY), DEVICE_NOTIFY_WINDOW_HANDLE)
+            if self._power_notify_handle:
+                logger.info("Registered for active power plan change notifications.")
+            else:
+                logger.warning(f"RegisterPowerSettingNotification failed. Last Error: {ctypes.GetLastError()}. External power plan changes will only be noticed after the cache TTL.")
+        except Exception as e:
+            logger.warning(f"Could not register for power plan change notifications: {e}", exc_info=True)
+
+    def _unregister_power_scheme_notification(self):
+        if not self._power_notify_handle:
+            return
+        try:
+            unregister = ctypes.windll.user32.UnregisterPowerSettingNotification
+            unregister.argtypes = [ctypes.c_void_p]
+            unregister.restype = ctypes.wintypes.BOOL
+            unregister(self._power_notify_handle)
+            logger.debug("Unregistered power plan change notifications.")
+        except Exception as e:
+            logger.warning(f"Failed to unregister power plan change notifications: {e}")
+        finally:
+            self._power_notify_handle = None
+
     def _message_handler_router(self, hwnd, msg, wparam, lparam):
         """
         Router function for Windows messages.
@@ -294,6 +363,9 @@ class TrayIcon:
             logger.warning(f"Failed to delete taskbar icon (Shell_NotifyIcon NIM_DELETE): {e}", exc_info=True)
             # Continue cleanup despite this.
 
+        # Stop power plan change notifications for this window
+        self._unregister_power_scheme_notification()
+
         # 2. Post WM_QUIT message
         # This message signals the message loop (win32gui.PumpMessages) to exit.
         logger.debug("Posting WM_QUIT message to exit message loop.")
@@ -430,6 +502,30 @@ class TrayIcon:
         self._create_taskbar_icon()
         return 0
 
+    def OnPowerBroadcast(self, hwnd, msg, wparam, lparam):
+        """
+        Handler for WM_POWERBROADCAST.
+        For PBT_POWERSETTINGCHANGE on GUID_POWERSCHEME_PERSONALITY, forwards the new active plan GUID
+        to the app so its active scheme cache stays correct without querying powercfg.
+        """
+        if wparam != PBT_POWERSETTINGCHANGE or not lparam:
+            return 1 # TRUE: message handled, nothing to do for other power events
+
+        try:
+            setting = ctypes.cast(lparam, ctypes.POINTER(_POWERBROADCAST_SETTING)).contents
+            if str(setting.PowerSetting) != str(GUID_POWERSCHEME_PERSONALITY):
+                return 1
+            new_active_guid = str(setting.Data) if setting.DataLength >= ctypes.sizeof(_GUID) else None
+            logger.debug(f"Power plan change notification received. New active scheme: {new_active_guid}")
+            if _app_power_switcher_instance:
+                _app_power_switcher_instance.notify_power_scheme_changed(new_active_guid)
+        except Exception as e:
+            logger.error(f"Error handling power plan change notification: {e}", exc_info=True)
+            # Without a trustworthy GUID, just drop the cached value
+            if _app_power_switcher_instance:
+                _app_power_switcher_instance.notify_power_scheme_changed(None)
+        return 1
+
 # --- Global Window Message Hook for Python Instance Routing ---
 # Since win32gui.WNDCLASS.lpfnWndProc needs a C-compatible function pointer,
 # it's difficult to directly point it to a bound method like self.OnMessage.
@@ -448,38 +544,63 @@ class TrayIcon:
 
 # --- Main Application Entry Point ---
 
-# Initial configuration of logging is crucial and should happen here first thing.
-# The AppPowerSwitcher will load config and might implicitly try to configure logging again,
-# but calling configure_logging here first ensures the root logger is set up correctly
-# with handlers and basic level.
-# A temporary ConfigManager instance is used *only* to get the desired log level early.
-
-print("AppPowerSwitcher main script started.")
-print("Loading initial configuration for logging level...")
-# Create a temporary ConfigManager instance just to read the config file for log level
-# ConfigManager uses its internal logic to find the config file path relative to the determined PROJECT_ROOT
-temp_config_manager_for_log = ConfigManager()
-# Load config. This will also handle creating the default file if it doesn't exist.
-load_success_for_log = temp_config_manager_for_log.load_config()
-
-# Determine the desired log level string from the loaded config (or use a fallback like "INFO" if loading failed)
-log_level_str = temp_config_manager_for_log.get_log_level() if load_success_for_log else "INFO"
-# Convert the log level string (e.g., "INFO") to the corresponding logging module constant (e.g., logging.INFO)
-log_level = getattr(logging, log_level_str.upper(), logging.INFO)
-
-# Configure the root logging system based on the determined level. All loggers inherit from this.
-print(f"Configuring shared logging system with level: {log_level_str}")
-configure_logging(log_level=log_level)
-
-# Now that logging is fully configured, retrieve the logger for the main script itself.
+# Logger for the main script itself. Handlers are attached by _initialize_startup() once the config is loaded.
 logger = logging.getLogger(__name__)
-logger.info("Logging system initialized successfully via main.py.")
+
+def _pywin32_installed():
+    """
+    Checks that pywin32 is installed without importing (loading) its modules.
+    """
+    import importlib.util
+    return all(importlib.util.find_spec(name) is not None for name in ("win32api", "win32con", "win32gui", "winerror"))
+
+def _import_gui_modules():
+    """
+    Imports the pywin32 modules used by the TrayIcon and binds them to the module-level names.
+    """
+    global win32api, win32con, win32gui, winerror
+    import win32api
+    import win32con
+    import win32gui
+    import winerror
+
+def _initialize_startup():
+    """
+    Loads the configuration and configures logging. Returns the StartupOrchestrator that starts the app.
+    """
+    # Initial configuration of logging is crucial and should happen here first thing.
+    # The AppPowerSwitcher will load config and might implicitly try to configure logging again,
+    # but calling configure_logging here first ensures the root logger is set up correctly
+    # with handlers and basic level.
+    # The StartupOrchestrator parses the config file once here; the same ConfigManager is later
+    # handed to PowerSwitcherApp, so the file isn't parsed a second time.
+    print("AppPowerSwitcher main script started.")
+    print("Loading configuration...")
+    # Every startup step is recorded in a timeline measured from the start of this script
+    startup = StartupOrchestrator(timeline=StartupTimeline(origin=_STARTUP_STARTED_AT))
+    # Load config. This will also handle creating the default file if it doesn't exist.
+    startup.load_config()
+
+    # Configure the root logging system based on the loaded log level (INFO if loading failed). All loggers inherit from this.
+    # Asynchronous (queue-based) logging keeps formatting and file I/O off the event hook and processing threads.
+    log_level_str, async_logging = startup.configure_logging(configure_logging)
+    print(f"Configured shared logging system with level: {log_level_str} (async: {async_logging})")
+    logger.info("Logging system initialized successfully via main.py.")
+    return startup
 
 def main():
     """
     主函数：应用程序的入口。
     加载配置，启动核心应用逻辑 (后台线程)，创建任务栏图标GUI (主线程)，运行消息循环。
     """
+    # Fail early (before starting anything) if pywin32 is missing; its modules are imported later.
+    if not _pywin32_installed():
+        print("Fatal Error: pywin32 library not found.")
+        print("Please install it using: pip install pywin32")
+        sys.exit(1)
+
+    startup = _initialize_startup()
+
     logger.info("-" * 40)
     logger.info("Starting AppPowerSwitcher application...")
     logger.info("-" * 40)
@@ -498,11 +619,12 @@ def main():
 
     try:
         # 1. Instantiate and Start the core application logic (runs in background threads)
-        # This loads full config, starts power manager, event listener, and processing thread.
-        app_switcher = PowerSwitcherApp()
+        # This reuses the loaded config, starts power manager, event listener, and processing thread.
+        # The power schemes are enumerated in the background while the event hook is installed.
+        app_switcher = startup.create_app()
         logger.info("AppPowerSwitcher instance created.")
 
-        app_start_success = app_switcher.start()
+        app_start_success = startup.start_app()
         if not app_start_success:
              logger.critical("AppPowerSwitcher failed to start successfully. Exiting application.")
              # AppPowerSwitcher.start() logs internal reasons for failure.
@@ -513,7 +635,10 @@ def main():
 
         # 2. Create and manage the Taskbar Icon GUI (runs in the main thread)
         # Pass the AppPowerSwitcher instance to the TrayIcon manager
-        tray_icon = TrayIcon(app_switcher)
+        with startup.get_timeline().phase("tray_icon"):
+            # The event hook is already installed, loading pywin32's GUI modules no longer delays events
+            _import_gui_modules()
+            tray_icon = TrayIcon(app_switcher)
         logger.info("TrayIcon initialized.")
 
         # 3. Run the Windows Message Loop.
@@ -560,6 +685,8 @@ def main():
     logger.info("-" * 40)
     logger.info("AppPowerSwitcher application finished.")
     logger.info("-" * 40)
+    # Flush records still queued for the background logging thread (no-op in synchronous mode)
+    shutdown_logging()
 
 if __name__ == "__main__":
     # This is the actual entry point when the script is executed.
@@ -0,0 +1,586 @@
+import asyncio
+import logging
+import threading
+import time
+
+from src.application.focus_debouncer import FocusDebouncer
+from src.application.switch_decider import SwitchDecider, SWITCH_ALREADY_ACTIVE, SWITCH_SUBMIT
+from src.application.switch_executor import SwitchRequest
+from src.application.switch_throttle import SwitchThrottle
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.configuration.config_watcher import FileChangePoller
+from src.infrastructure.events.async_mailbox import AsyncLatestValueMailbox
+from src.infrastructure.events.foreground_event import ForegroundEvent
+from src.infrastructure.power_management.async_power_backends import create_async_power_backend
+from src.infrastructure.power_management.scheme_catalog import SchemeCatalog
+from src.utils.metrics import get_registry
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Same metric names as the threaded PowerSwitcherApp, so both runtimes can be compared directly
+_metrics = get_registry()
+_mailbox_handoff_histogram = _metrics.histogram("pipeline.mailbox_handoff")
+_handle_event_histogram = _metrics.histogram("pipeline.handle_event")
+_event_to_switch_histogram = _metrics.histogram("pipeline.event_to_switch")
+_events_received = _metrics.counter("pipeline.events_received")
+_events_handled = _metrics.counter("pipeline.events_handled")
+
+# Seconds between metrics dumps while running (only with metrics enabled and metrics_dump_path set)
+METRICS_DUMP_INTERVAL = 60.0
+# Seconds stop() waits for the runtime thread, and shutdown waits for an outstanding switch
+STOP_TIMEOUT = 5.0
+
+
+def _create_default_event_source(event_mailbox):
+    """
+    Creates the Win32 foreground window hook (EventListener) feeding event_mailbox.
+    """
+    from src.infrastructure.windows.event_listener import EventListener
+    return EventListener(event_mailbox)
+
+
+class AsyncPowerSwitcherRuntime:
+    """
+    asyncio based alternative to PowerSwitcherApp's thread-per-component design.
+
+    Everything runs as tasks on one event loop: event processing (settle window, throttle,
+    decision), a single-writer switch task, config file watching and periodic metrics dumps.
+    Power commands are awaited (asyncio.create_subprocess_exec for the subprocess backend), so
+    no thread waits on powercfg. Shutdown cancels the tasks instead of joining threads with timeouts.
+
+    The decision step is PowerSwitcherApp's (SwitchDecider with the same config snapshot,
+    FocusDebouncer and SwitchThrottle with trailing switches; superseded switch requests), and thread based event
+    sources feed the AsyncLatestValueMailbox unchanged. Sources with a run_async() coroutine
+    (ReplayEventSource) run as a task as well, so replaying a trace on Linux needs no extra thread.
+
+    Use `await runtime.run()` inside an existing loop, or start()/stop() to run the loop on a
+    dedicated "AsyncRuntimeThread" like PowerSwitcherApp.
+    """
+    def __init__(self, clock=time.monotonic, event_source_factory=None, config_manager=None, power_backend=None,
+                 process_enumerator=None):
+        """
+        Args:
+            clock: callable returning monotonic time in seconds (settle window, throttle, active plan cache).
+            event_source_factory: optional callable receiving the event mailbox and returning an EventSource.
+                   Defaults to the Win32 EventListener.
+            config_manager: optional ConfigManager (e.g. pointing to a benchmark config). Defaults to the project config.
+            power_backend: optional AsyncPowerBackend. Defaults to create_async_power_backend() for the configured backend.
+            process_enumerator: optional ProcessEnumerator for [RunningProcessRules]. Defaults to create_process_enumerator().
+        """
+        logger.info("Initializing AsyncPowerSwitcherRuntime.")
+        self._config_manager = config_manager if config_manager is not None else ConfigManager()
+        self._config_manager.load_config()
+        _metrics.set_enabled(self._config_manager.get_metrics_enabled())
+
+        if power_backend is None:
+            power_backend = create_async_power_backend(
+                self._config_manager.get_power_backend(),
+                powercfg_command=self._config_manager.get_powercfg_path()
+            )
+        self._backend = power_backend
+
+        self._event_mailbox = AsyncLatestValueMailbox()
+        if event_source_factory is None:
+            event_source_factory = _create_default_event_source
+        self._event_source = event_source_factory(self._event_mailbox)
+
+        self._clock = clock
+        self._debouncer = FocusDebouncer(self._config_manager.get_focus_settle_ms() / 1000.0, clock=clock)
+        self._throttle = SwitchThrottle(
+            rate_per_minute=self._config_manager.get_switch_rate_per_minute(),
+            burst=self._config_manager.get_switch_burst(),
+            min_dwell_seconds=self._config_manager.get_min_plan_dwell_ms() / 1000.0,
+            clock=clock
+        )
+
+        # Decision step shared with PowerSwitcherApp (only used by the event processing task)
+        self._decider = SwitchDecider(self._config_manager, self._throttle, describe_plan=self._describe_plan)
+
+        # Power plans and the active plan. The runtime is the only writer of the active plan, so the
+        # cached value stays valid until the TTL expires or an external change is reported.
+        self._catalog = SchemeCatalog()
+        self._active_scheme_cache_ttl = self._config_manager.get_active_scheme_cache_ttl()
+        self._active_guid = None
+        self._active_guid_at = None
+
+        # State of the decision path (only touched by the processing task)
+        self._last_foreground_event = None
+        self._last_applied_power_plan_identifier = None
+        self._last_known_active_guid = None
+
+        # Single-writer switch task: a queued request is replaced by a newer one before it starts
+        self._switch_sequence = 0
+        self._queued_request = None
+        self._running_request = None
+        self._switch_stats = {"submitted": 0, "executed": 0, "failed": 0, "superseded_before_start": 0, "skipped_already_active": 0}
+
+        self._switch_listeners = []
+
+        # Running process rules: the tracker is polled by a task (enumeration runs in a worker thread)
+        self._process_enumerator = process_enumerator
+        self._running_tracker = None
+        self._active_running_rule = None
+        # Config file polling (config_hot_reload), created by the watcher task
+        self._config_poller = None
+
+        # Loop objects, created in run()
+        self._loop = None
+        self._stop_requested = None
+        self._switch_wakeup = None
+        self._switches_idle = None
+        self._tasks = []
+        self._running = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+        logger.info("AsyncPowerSwitcherRuntime initialized.")
+
+    # --- Lifecycle ---
+
+    async def run(self):
+        """
+        Runs the runtime on the current event loop until request_stop() (or cancellation).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_requested = asyncio.Event()
+        self._switch_wakeup = asyncio.Event()
+        self._switches_idle = asyncio.Event()
+        self._switches_idle.set()
+        self._event_mailbox.bind(self._loop)
+        started = time.perf_counter()
+
+        # Plans and the active plan are queried concurrently
+        schemes, active_guid = await asyncio.gather(self._backend.list_schemes(), self._backend.get_active_scheme())
+        if schemes:
+            self._catalog = SchemeCatalog(schemes, version=1)
+        else:
+            logger.warning("No power schemes were loaded. Power switching functionality may be limited or non-functional.")
+        if active_guid:
+            self._store_active_guid(active_guid)
+
+        self._tasks = [
+            asyncio.create_task(self._process_events(), name="process-events"),
+            asyncio.create_task(self._apply_switches(), name="apply-switches"),
+        ]
+        run_async = getattr(self._event_source, "run_async", None)
+        if callable(run_async):
+            self._tasks.append(asyncio.create_task(run_async(), name="event-source"))
+        else:
+            self._event_source.start()
+        if self._config_manager.get_config_hot_reload():
+            self._tasks.append(asyncio.create_task(self._watch_config(), name="config-watcher"))
+        if _metrics.enabled and self._config_manager.get_metrics_dump_path():
+            self._tasks.append(asyncio.create_task(self._dump_metrics_periodically(), name="metrics-dump"))
+        self._ensure_running_tracker()
+
+        self._running.set()
+        self._ready.set()
+        logger.info(f"AsyncPowerSwitcherRuntime started in {(time.perf_counter() - started) * 1000.0:.1f} ms "
+                    f"(event source '{self._event_source.name}', backend '{self._backend.name}', {len(self._tasks)} tasks).")
+        try:
+            await self._stop_requested.wait()
+        finally:
+            await self._shutdown()
+
+    async def _shutdown(self):
+        started = time.perf_counter()
+        self._running.clear()
+        logger.info("Stopping AsyncPowerSwitcherRuntime.")
+        self._event_mailbox.close()
+        if not callable(getattr(self._event_source, "run_async", None)):
+            try:
+                # stop() joins the source's thread, keep the loop responsive meanwhile
+                await asyncio.to_thread(self._event_source.stop)
+            except Exception as e:
+                logger.error(f"Failed to stop event source cleanly: {e}", exc_info=True)
+        # Apply a switch that is still queued, so the final plan matches the last decision
+        try:
+            await asyncio.wait_for(self._switches_idle.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Outstanding power plan switch did not finish within {STOP_TIMEOUT} seconds.")
+        for task in self._tasks:
+            task.cancel()
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        for task, result in zip(self._tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"Task '{task.get_name()}' failed: {result!r}")
+        self._tasks = []
+        await self._backend.aclose()
+        if _metrics.enabled and self._config_manager.get_metrics_dump_path():
+            await asyncio.to_thread(_metrics.dump, self._config_manager.get_metrics_dump_path())
+        logger.info(f"AsyncPowerSwitcherRuntime stopped in {(time.perf_counter() - started) * 1000.0:.1f} ms.")
+
+    def request_stop(self):
+        """
+        Asks the runtime to shut down. Thread safe, returns immediately.
+        """
+        loop = self._loop
+        if loop is None or self._stop_requested is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._stop_requested.set)
+        except RuntimeError:
+            pass # Loop already closed
+
+    def start(self):
+        """
+        Runs the event loop on a dedicated thread and waits until the runtime is ready.
+
+        Returns:
+            True if the runtime started within STOP_TIMEOUT seconds.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("AsyncPowerSwitcherRuntime is already running.")
+            return True
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop_thread, name="AsyncRuntimeThread")
+        self._thread.daemon = False
+        self._thread.start()
+        if not self._ready.wait(STOP_TIMEOUT):
+            logger.error(f"AsyncPowerSwitcherRuntime did not start within {STOP_TIMEOUT} seconds.")
+            return False
+        return True
+
+    def _run_loop_thread(self):
+        try:
+            asyncio.run(self.run())
+        except Exception as e:
+            logger.critical(f"AsyncPowerSwitcherRuntime failed: {e}", exc_info=True)
+        finally:
+            self._running.clear()
+            self._ready.set() # Don't leave start() waiting if startup failed
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stops the runtime started with start() and waits for its thread.
+        """
+        self.request_stop()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.error(f"AsyncRuntimeThread did not stop within {timeout} seconds.")
+
+    def is_running(self):
+        return self._running.is_set()
+
+    # --- Event processing ---
+
+    async def _process_events(self):
+        logger.info(f"Event processing task started (settle window {self._debouncer.settle_seconds * 1000:.0f} ms).")
+        while True:
+            timeout = self._time_until_next_deadline()
+            try:
+                if timeout is None:
+                    foreground_event = await self._event_mailbox.get()
+                else:
+                    foreground_event = await asyncio.wait_for(self._event_mailbox.get(), timeout)
+                if foreground_event is None:
+                    break # Mailbox closed
+                _events_received.inc()
+                if _metrics.enabled:
+                    _mailbox_handoff_histogram.observe(time.perf_counter() - foreground_event.timestamp)
+                self._debouncer.offer(foreground_event)
+            except asyncio.TimeoutError:
+                pass # The settle time (or throttle wait) elapsed without a newer event
+
+            settled_event = self._debouncer.pop_ready()
+            if settled_event is None:
+                settled_event = self._throttle.pop_ready()
+                if settled_event is None:
+                    continue
+                logger.debug("Re-evaluating throttled switch for '%s'.", settled_event.process_name)
+            try:
+                started = _handle_event_histogram.start()
+                await self._handle_foreground_event(settled_event)
+                _handle_event_histogram.stop(started)
+                _events_handled.inc()
+            except Exception as e:
+                logger.error("An unexpected error occurred while processing event for process '%s': %s", settled_event.process_name, e, exc_info=True)
+        logger.info("Event processing task finished.")
+
+    def _time_until_next_deadline(self):
+        settle_wait = self._debouncer.time_until_ready()
+        trailing_wait = self._throttle.time_until_pending_ready()
+        if settle_wait is None:
+            return trailing_wait
+        if trailing_wait is None:
+            return settle_wait
+        return min(settle_wait, trailing_wait)
+
+    async def _handle_foreground_event(self, foreground_event):
+        """
+        Resolves the target plan for one settled foreground event and submits a switch if needed
+        (same SwitchDecider steps as PowerSwitcherApp._handle_foreground_event).
+        """
+        self._last_foreground_event = foreground_event
+        config_snapshot = self._config_manager.get_snapshot()
+        running_rule = self._active_running_rule if config_snapshot.running_rules else None
+        if not self._decider.begin(foreground_event, config_snapshot, running_rule):
+            return
+
+        if self._decider.needs_parent_chain(config_snapshot, foreground_event):
+            # The ancestor walk may describe processes the tracker hasn't indexed yet, so it runs in a
+            # worker thread. The decider is still only used by this task, which waits for it.
+            target_power_plan_guid = await asyncio.to_thread(self._decider.resolve_target_plan, config_snapshot, foreground_event, running_rule)
+        else:
+            target_power_plan_guid = self._decider.resolve_target_plan(config_snapshot, foreground_event, running_rule)
+        if target_power_plan_guid is None:
+            return
+
+        current_active_guid = await self._get_active_guid()
+        if not current_active_guid:
+            logger.error("Failed to get current active power scheme GUID from system. Cannot determine if switch is needed.")
+            return
+
+        decision = self._decider.decide_switch(foreground_event, target_power_plan_guid, current_active_guid,
+                                               self.get_pending_switch_target())
+        if decision == SWITCH_ALREADY_ACTIVE:
+            self._last_applied_power_plan_identifier = target_power_plan_guid
+            self._last_known_active_guid = target_power_plan_guid
+        elif decision == SWITCH_SUBMIT:
+            self._submit_switch(foreground_event, target_power_plan_guid)
+
+    # --- Active plan ---
+
+    def _describe_plan(self, guid):
+        return self._catalog.label(guid)
+
+    def _store_active_guid(self, guid):
+        self._active_guid = str(guid).strip().lower()
+        self._active_guid_at = self._clock()
+
+    async def _get_active_guid(self):
+        if self._active_guid is not None and self._active_scheme_cache_ttl > 0 \
+                and self._clock() - self._active_guid_at < self._active_scheme_cache_ttl:
+            return self._active_guid
+        guid = await self._backend.get_active_scheme()
+        if not guid:
+            return None
+        self._store_active_guid(guid)
+        return self._active_guid
+
+    def notify_power_scheme_changed(self, new_active_guid=None):
+        """
+        External change signal for the active power plan (see PowerSwitcherApp.notify_power_scheme_changed).
+        Thread safe.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._apply_external_plan_change, new_active_guid)
+
+    def _apply_external_plan_change(self, new_active_guid):
+        if not new_active_guid:
+            self._active_guid = None
+            return
+        self._store_active_guid(new_active_guid)
+        if self._last_known_active_guid != self._active_guid:
+            logger.info("Active power plan changed externally to GUID '%s'.", new_active_guid)
+            self._last_known_active_guid = self._active_guid
+            self._decider.forget_last_processed()
+
+    # --- Single-writer switch task ---
+
+    def _submit_switch(self, foreground_event, target_guid):
+        self._switch_sequence += 1
+        if self._queued_request is not None:
+            self._switch_stats["superseded_before_start"] += 1
+        self._queued_request = SwitchRequest(self._switch_sequence, foreground_event, target_guid)
+        self._switch_stats["submitted"] += 1
+        self._switches_idle.clear()
+        self._switch_wakeup.set()
+
+    def get_pending_switch_target(self):
+        """
+        Target GUID of the newest switch that is queued or running, or None.
+        """
+        request = self._queued_request or self._running_request
+        return request.target_guid if request is not None else None
+
+    async def _apply_switches(self):
+        while True:
+            await self._switch_wakeup.wait()
+            self._switch_wakeup.clear()
+            while self._queued_request is not None:
+                request = self._queued_request
+                self._queued_request = None
+                if request.target_guid == self._active_guid:
+                    self._switch_stats["skipped_already_active"] += 1
+                    logger.debug("Skipping switch to %s, it is already the active plan.", request.target_guid)
+                    # Reported as a successful switch: the system is on the requested plan (like SwitchExecutor)
+                    self._on_switch_completed(request, True)
+                    continue
+                self._running_request = request
+                try:
+                    success = await self._backend.set_active_scheme(request.target_guid)
+                except Exception as e:
+                    logger.error("An unexpected error occurred while switching to power plan GUID '%s': %s", request.target_guid, e, exc_info=True)
+                    success = False
+                finally:
+                    self._running_request = None
+                self._switch_stats["executed"] += 1
+                if not success:
+                    self._switch_stats["failed"] += 1
+                self._on_switch_completed(request, success)
+            self._switches_idle.set()
+
+    def _on_switch_completed(self, request, switch_success):
+        foreground_event = request.foreground_event
+        target_power_plan_guid = request.target_guid
+        if switch_success:
+            self._store_active_guid(target_power_plan_guid)
+            self._last_applied_power_plan_identifier = target_power_plan_guid
+            self._last_known_active_guid = target_power_plan_guid
+            logger.info("Power plan switch requested successfully for '%s' to GUID '%s'.", foreground_event.process_name, target_power_plan_guid)
+        else:
+            # The system state is unknown after a failed switch, query it next time
+            self._active_guid = None
+            logger.error("Failed to switch power plan for '%s' to GUID '%s'. Check the power backend logs for details.", foreground_event.process_name, target_power_plan_guid)
+        if _metrics.enabled:
+            _event_to_switch_histogram.observe(time.perf_counter() - foreground_event.timestamp)
+        for callback in self._switch_listeners:
+            try:
+                callback(foreground_event, target_power_plan_guid, switch_success)
+            except Exception as e:
+                logger.error("Switch listener %r raised an error: %s", callback, e, exc_info=True)
+
+    def register_switch_listener(self, callback):
+        """
+        Registers callback(foreground_event, target_guid, success), called on the event loop thread
+        after each switch attempt. Callbacks must be fast and must not block.
+        """
+        self._switch_listeners.append(callback)
+
+    # --- Config reload and metrics tasks ---
+
+    async def _watch_config(self):
+        """
+        Polls the config file with ConfigWatcher's FileChangePoller (backoff, settle delay) and reloads
+        it after a change has settled. Parsing runs in a worker thread, off the event loop.
+        """
+        poller = self._config_poller = FileChangePoller(
+            self._config_manager.get_config_file_path(),
+            min_interval=self._config_manager.get_config_reload_interval()
+        )
+        poller.reset()
+        while True:
+            await asyncio.sleep(poller.next_delay())
+            if not poller.poll():
+                continue
+            logger.info("Change detected in config file '%s'. Reloading.", poller.file_path)
+            try:
+                await self.reload_config()
+            except Exception as e:
+                logger.error("Error while reloading config file '%s': %s", poller.file_path, e, exc_info=True)
+
+    async def reload_config(self):
+        """
+        Reloads the config file and re-evaluates the current foreground app if the new configuration
+        was applied. Must run on the runtime's event loop.
+
+        Returns:
+            True if the new configuration was applied.
+        """
+        if not await asyncio.to_thread(self._config_manager.reload_config):
+            return False
+        logger.info("Configuration reloaded (version %s).", self._config_manager.get_config_version())
+        if self._running.is_set():
+            # Running process rules may have been added
+            self._ensure_running_tracker()
+            self._active_running_rule = self._config_manager.get_snapshot().running_rules.best_rule(
+                self._running_tracker.get_running_names()) if self._running_tracker else None
+        last_event = self._last_foreground_event
+        if last_event is not None and self._running.is_set():
+            self._event_mailbox.put_if_empty(last_event._replace(timestamp=time.perf_counter()))
+        return True
+
+    def _ensure_running_tracker(self):
+        """
+        Creates the running process tracker and its polling task if [RunningProcessRules] or
+        inherit_parent_rules are configured.
+        """
+        if self._running_tracker is not None:
+            return
+        if not self._config_manager.get_snapshot().running_rules and not self._decider.inherit_parent_rules:
+            return
+        if self._process_enumerator is None:
+            from src.infrastructure.processes.process_enumerator import create_process_enumerator
+            self._process_enumerator = create_process_enumerator()
+            if self._process_enumerator is None:
+                logger.error("Running process rules or inherit_parent_rules are configured, but running processes can't be enumerated on this system. They are ignored.")
+                return
+        from src.infrastructure.processes.running_process_tracker import RunningProcessTracker
+        self._running_tracker = RunningProcessTracker(
+            self._process_enumerator,
+            poll_interval=self._config_manager.get_running_process_poll_interval()
+        )
+        self._decider.attach_running_tracker(self._running_tracker)
+        self._tasks.append(asyncio.create_task(self._track_running_processes(), name="running-processes"))
+
+    async def _track_running_processes(self):
+        """
+        Polls the running processes (in a worker thread: enumeration is blocking I/O) and re-evaluates
+        the current foreground app when the active running process rule changes.
+        """
+        tracker = self._running_tracker
+        logger.info("Running process tracking task started (%s, poll interval %ss).", tracker.get_enumerator_name(), tracker.poll_interval)
+        while True:
+            change = await asyncio.to_thread(tracker.poll)
+            if change is not None and change.names_changed:
+                rule = self._config_manager.get_snapshot().running_rules.best_rule(tracker.get_running_names())
+                if rule != self._active_running_rule:
+                    if rule is not None:
+                        logger.info("Running process rule '%s' (priority %s) is now active.", rule.pattern, rule.priority)
+                    else:
+                        logger.info("Running process rule '%s' is no longer active.", self._active_running_rule.pattern)
+                    self._active_running_rule = rule
+                    last_event = self._last_foreground_event or ForegroundEvent(None, None, None, time.perf_counter())
+                    self._event_mailbox.put_if_empty(last_event._replace(timestamp=time.perf_counter()))
+            await asyncio.sleep(tracker.poll_interval)
+
+    async def _dump_metrics_periodically(self):
+        file_path = self._config_manager.get_metrics_dump_path()
+        while True:
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+            await asyncio.to_thread(_metrics.dump, file_path)
+
+    # --- Status ---
+
+    def get_config_manager(self):
+        return self._config_manager
+
+    def get_event_source(self):
+        return self._event_source
+
+    def get_current_state_info(self):
+        """
+        Current operational state (the same core keys as PowerSwitcherApp.get_current_state_info).
+        The active plan is the runtime's cached value; no power command is run.
+        """
+        active_guid = self._active_guid
+        last_applied_guid = self._last_applied_power_plan_identifier
+        return {
+            "runtime": "asyncio",
+            "is_running": self._running.is_set(),
+            "tasks": [task.get_name() for task in self._tasks if not task.done()],
+            "event_source": self._event_source.name if self._event_source else "N/A",
+            "event_listener_thread_alive": self._event_source is not None and self._event_source.is_alive(),
+            "power_backend": self._backend.name,
+            "last_processed_process": self._decider.last_processed_process,
+            "last_applied_power_plan": str(self._catalog.label(last_applied_guid)) if last_applied_guid else "None",
+            "current_active_power_plan": str(self._catalog.label(active_guid)) if active_guid else "Unknown (N/A)",
+            "queue_size": self._event_mailbox.qsize(),
+            "event_mailbox": self._event_mailbox.get_stats(),
+            "event_pipeline": self._event_source.get_pipeline_stats() if self._event_source else "N/A",
+            "focus_settle_ms": self._debouncer.settle_seconds * 1000.0,
+            "events_superseded_while_settling": self._debouncer.get_superseded_count(),
+            "switch_throttle": self._throttle.get_stats(),
+            "switch_executor": dict(self._switch_stats, pending_target=self.get_pending_switch_target()),
+            "decision_memo_size": self._decider.get_stats()["decision_memo_size"],
+            "config_version": self._config_manager.get_config_version(),
+            "config_watcher": self._config_poller.get_stats() if self._config_poller else "disabled",
+            "running_processes": self._running_tracker.get_stats() if self._running_tracker else "disabled",
+            "active_running_rule": self._active_running_rule.pattern if self._active_running_rule else None,
+            "metrics": _metrics.snapshot() if _metrics.enabled else "disabled",
+        }
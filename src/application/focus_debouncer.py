@@ -0,0 +1,73 @@
+import time
+
+
+class FocusDebouncer:
+    """
+    Settle window for foreground changes ("latest wins").
+
+    When the user alt-tabs through several windows in quick succession, only the window that
+    keeps focus for at least `settle_seconds` is handed to the switching logic. Every new event
+    replaces the pending one and restarts the settle timer, so five quick switches result in a
+    single power plan decision for the last window.
+
+    The debouncer does not own a thread or sleep: the caller offers events, asks how long to wait
+    (time_until_ready) and polls (pop_ready). Together with the injectable clock this keeps it
+    deterministic and easy to drive from tests or benchmarks.
+    """
+    def __init__(self, settle_seconds=0.0, clock=time.monotonic):
+        """
+        Args:
+            settle_seconds: how long a foreground app must hold focus before it is acted on.
+                            0 disables debouncing (events are ready immediately).
+            clock: callable returning monotonic time in seconds.
+        """
+        self._settle_seconds = max(0.0, float(settle_seconds or 0.0))
+        self._clock = clock
+        self._pending = None
+        self._pending_since = 0.0
+        # Number of pending events replaced by a newer one before they settled
+        self._superseded = 0
+
+    @property
+    def settle_seconds(self):
+        return self._settle_seconds
+
+    def offer(self, event):
+        """
+        Makes `event` the pending event and restarts the settle timer.
+        """
+        if self._pending is not None:
+            self._superseded += 1
+        self._pending = event
+        self._pending_since = self._clock()
+
+    def has_pending(self):
+        return self._pending is not None
+
+    def time_until_ready(self):
+        """
+        Seconds until the pending event settles (0 if it already has), or None if nothing is pending.
+        """
+        if self._pending is None:
+            return None
+        remaining = self._pending_since + self._settle_seconds - self._clock()
+        return remaining if remaining > 0 else 0.0
+
+    def pop_ready(self):
+        """
+        Returns and clears the pending event if it has settled, otherwise None.
+        """
+        if self._pending is None or self.time_until_ready() > 0:
+            return None
+        event = self._pending
+        self._pending = None
+        return event
+
+    def clear(self):
+        """
+        Drops the pending event without acting on it.
+        """
+        self._pending = None
+
+    def get_superseded_count(self):
+        return self._superseded
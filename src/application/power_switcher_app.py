@@ -11,8 +11,18 @@ from datetime import datetime
 # Assuming src is in the sys.path when this module is imported (handled by main.py)
 try:
     from src.infrastructure.configuration.config_manager import ConfigManager
-    from src.infrastructure.power_management.power_cfg_manager import PowerCfgManager
-    from src.infrastructure.windows.event_listener import EventListener
+    from src.infrastructure.configuration.config_watcher import ConfigWatcher
+    from src.infrastructure.events.foreground_event import ForegroundEvent
+    from src.infrastructure.power_management.power_cfg_manager import PowerCfgManager, SCHEME_LOAD_PENDING
+    from src.infrastructure.power_management.power_backends import create_power_backend
+    from src.application.focus_debouncer import FocusDebouncer
+    from src.application.switch_throttle import SwitchThrottle
+    from src.application.switch_decider import SwitchDecider, SWITCH_ALREADY_ACTIVE, SWITCH_SUBMIT
+    from src.application.switch_executor import SwitchExecutor
+    from src.infrastructure.events.mailbox import LatestValueMailbox
+    from src.utils.metrics import get_registry
+    # The Win32 EventListener is imported lazily in _create_default_event_source(), so this module
+    # (and the whole pipeline with another EventSource) can be used on systems without pywin32.
     # Configure logging utility is primarily called by main.py, but mentioned here
     # from utils.logging_config import configure_logging # Not directly called in App, but depends on it being called elsewhere
 except ImportError as e:
@@ -25,6 +35,21 @@ except ImportError as e:
 # This logger will pick up the logging configuration set up by main.py
 logger = logging.getLogger(__name__)
 
+# Hot-path metrics (no-ops unless metrics are enabled in the config)
+_metrics = get_registry()
+_mailbox_handoff_histogram = _metrics.histogram("pipeline.mailbox_handoff")
+_handle_event_histogram = _metrics.histogram("pipeline.handle_event")
+_event_to_switch_histogram = _metrics.histogram("pipeline.event_to_switch")
+_events_received = _metrics.counter("pipeline.events_received")
+_events_handled = _metrics.counter("pipeline.events_handled")
+
+def _create_default_event_source(event_mailbox):
+    """
+    Creates the Win32 foreground window hook (EventListener) feeding event_mailbox.
+    """
+    from src.infrastructure.windows.event_listener import EventListener
+    return EventListener(event_mailbox)
+
 # --- PowerSwitcherApp Class ---
 
 class PowerSwitcherApp:
@@ -33,44 +58,122 @@ class PowerSwitcherApp:
     它作为前台界面和后台操作之间的桥梁。
     使用电源计划的 GUID 作为主要标识符。
     """
-    def __init__(self):
+    def __init__(self, clock=time.monotonic, event_source_factory=None, config_manager=None, power_backend=None,
+                 load_schemes=True, process_enumerator=None):
         """
         初始化应用程序核心组件。
-        实例化配置管理器、电源管理器和事件监听器。
+        实例化配置管理器、电源管理器和事件源 (默认是 Windows 事件监听器)。
+
+        Args:
+            clock: 返回单调时间 (秒) 的函数。去抖 (settle window) 计时使用它，
+                   测试或基准时可以注入可控的时钟。
+            event_source_factory: 可选，接收事件邮箱并返回 EventSource 的函数。
+                   默认创建 Win32 EventListener；传入 ReplayEventSource 等可在非 Windows 系统上运行完整流水线。
+            config_manager: 可选，已创建的 ConfigManager (例如指向基准测试用的配置文件)。默认使用项目配置文件。
+            power_backend: 可选，PowerBackend 实例。默认按配置中的 power_backend 创建。
+            load_schemes: 是否在初始化时同步加载电源计划列表。启动编排器 (StartupOrchestrator)
+                   传入 False，并在安装事件钩子的同时在后台加载。
+            process_enumerator: 可选，运行进程规则使用的 ProcessEnumerator。默认自动选择 (psutil 或 /proc)。
         """
         logger.info("Initializing PowerSwitcherApp.")
 
         # Infrastructure components
         # ConfigManager is instantiated early, it will load the config file (or create default)
         # It uses its internal logic to find the config file path relative to the project root
-        self._config_manager = ConfigManager()
+        self._config_manager = config_manager if config_manager is not None else ConfigManager()
+        # Load now so the power backend selection below is taken from the config file.
+        # (A no-op if the caller already loaded this file, e.g. the StartupOrchestrator.)
+        self._config_manager.load_config()
+        # Enable metrics before the other components start producing them.
+        _metrics.set_enabled(self._config_manager.get_metrics_enabled())
 
         # PowerCfgManager needs to load system power schemes (GUIDs and Names)
-        # Loading happens in PowerCfgManager's __init__ when it's instantiated
-        self._power_manager = PowerCfgManager()
-
-        # Queue for communication between EventListener (producer) and the Processing thread (consumer)
-        # EventListener puts foreground process names (strings) into this queue.
-        # Processing thread gets process names from this queue.
-        # Limit queue size to prevent excessive memory growth if processing is slow.
-        self._event_queue = queue.Queue(maxsize=100) # Use a larger queue size if needed for buffering
-
-        # EventListener receives window events and puts process names into the queue
-        # It needs the queue instance to send data.
-        self._event_listener = EventListener(self._event_queue)
+        # Loading happens in PowerCfgManager's __init__ when it's instantiated, unless load_schemes is False
+        # (the caller then loads them in the background; the names are only used for logs and the GUI)
+        # The backend decides how powercfg is invoked (one process per call or a persistent shell).
+        if power_backend is None:
+            power_backend = create_power_backend(
+                self._config_manager.get_power_backend(),
+                powercfg_command=self._config_manager.get_powercfg_path()
+            )
+        self._power_manager = PowerCfgManager(
+            backend=power_backend,
+            active_scheme_cache_ttl=self._config_manager.get_active_scheme_cache_ttl(),
+            load_schemes=load_schemes
+        )
+        # The power schemes are loaded by the caller (in the background), which also reports the outcome
+        self._schemes_loaded_by_caller = not load_schemes
+
+        # Mailbox for communication between the event source (producer) and the Processing thread (consumer)
+        # The event source (EventListener's resolver stage on Windows) puts ForegroundEvent items (process name, path, PID, timestamp) into it.
+        # Only the latest foreground app matters, so a newer event replaces one that hasn't been
+        # consumed yet ("latest wins") instead of queueing behind it or being dropped when full.
+        self._event_mailbox = LatestValueMailbox()
+
+        # The event source receives foreground changes and puts foreground events into the mailbox
+        # It needs the mailbox instance to send data.
+        if event_source_factory is None:
+            event_source_factory = _create_default_event_source
+        self._event_source = event_source_factory(self._event_mailbox)
 
         # Thread to process items (process names) from the queue
         self._processing_thread = None
         # Event flag to signal the processing thread to continue running (set by start, cleared by stop)
         self._running = threading.Event()
 
-        # State variables to track last processed info to avoid unnecessary actions
-        self._last_processed_process = None # Last process name received from event listener
+        # Last settled foreground event, re-evaluated after a config reload
+        self._last_foreground_event = None
         # _last_applied_power_plan_identifier will store the GUID string
         self._last_applied_power_plan_identifier = None
         # _last_known_active_guid stores the validated GUID of the plan that was actually active
         # after the last check/switch attempt.
         self._last_known_active_guid = None
+        # Guards the two fields above: they are written by the processing thread, by _on_switch_completed
+        # (on the switch executor thread with background switching) and by external change notifications.
+        self._plan_state_lock = threading.Lock()
+        # Newest switch request sequence that was submitted before the last external change notification.
+        # A completion of such a request must not overwrite the plan reported by the notification.
+        self._external_change_sequence = 0
+
+        # Settle window: only act on a foreground app that has held focus for focus_settle_ms.
+        # Queued events are coalesced ("latest wins") before they reach the debouncer.
+        self._clock = clock
+        self._debouncer = FocusDebouncer(self._config_manager.get_focus_settle_ms() / 1000.0, clock=clock)
+
+        # Switch rate limit and minimum plan dwell time. Switches held back are kept as a trailing
+        # switch and re-evaluated by the processing loop once allowed.
+        self._throttle = SwitchThrottle(
+            rate_per_minute=self._config_manager.get_switch_rate_per_minute(),
+            burst=self._config_manager.get_switch_burst(),
+            min_dwell_seconds=self._config_manager.get_min_plan_dwell_ms() / 1000.0,
+            clock=clock
+        )
+
+        # Decision step shared with the asyncio runtime: target plan resolution (memoized per process),
+        # same-process skip, pending/active plan checks and the throttle. Only used by the processing thread.
+        self._decider = SwitchDecider(self._config_manager, self._throttle, describe_plan=self._power_manager.describe_plan)
+
+        # Callbacks notified after every switch attempt (GUI status, benchmarks).
+        self._switch_listeners = []
+
+        # Single writer for plan switches. With background_switching the processing thread only submits
+        # the desired plan and a slow switch doesn't delay later events; otherwise switches run inline.
+        self._switch_executor = SwitchExecutor(
+            self._power_manager,
+            self._on_switch_completed,
+            threaded=self._config_manager.get_background_switching()
+        )
+
+        # Watches the config file and swaps in a new config snapshot when it changes (config_hot_reload).
+        # Created in start() so it observes the file state after the startup load.
+        self._config_watcher = None
+
+        # Running process rules ([RunningProcessRules]): the tracker keeps the set of running process
+        # names up to date on its own thread. Created once rules exist (at start() or after a reload).
+        self._process_enumerator = process_enumerator
+        self._running_tracker = None
+        # (config snapshot version, tracker generation, active RunningProcessRule or None)
+        self._running_rule_cache = (None, None, None)
 
         logger.info("PowerSwitcherApp initialized.")
 
@@ -90,6 +193,7 @@ class PowerSwitcherApp:
         # If critical failure during config loading, load_config would return False.
         # Let's ensure config is loaded again here just before starting threads,
         # in case settings changed before app.start() was called (e.g., via GUI setting up config first).
+        # The file is only parsed again if its content changed since the load in __init__.
         load_success = self._config_manager.load_config() # Reload config
         if not load_success:
             logger.error("Failed to (re)load configuration during app startup. Application cannot start reliably.")
@@ -111,26 +215,36 @@ class PowerSwitcherApp:
              # Just log a warning and trust the initial logging setup in main.py.
              # configure_logging(log_level=log_level) # Avoid calling configure_logging here if main.py already did
 
-        # 3. Start PowerCfgManager (schemes loaded in __init__)
+        # 3. Start PowerCfgManager (schemes loaded in __init__, or still loading in the background)
         # Check if any schemes were loaded successfully by the manager's __init__
         available_schemes = self._power_manager.get_available_schemes_guid_name_map() # Use GUID->Name map for display in log
-        if not available_schemes:
-             logger.warning("No power schemes were loaded by PowerCfgManager. Power switching functionality may be limited or non-functional.")
+        if self._power_manager.get_scheme_load_state() == SCHEME_LOAD_PENDING:
+             # Not loaded yet (load_schemes=False): switching works by GUID, names show up once loaded
+             logger.info("Power schemes are still being loaded in the background.")
+        elif not available_schemes:
+             # With load_schemes=False the caller that loaded them has already reported it (StartupOrchestrator)
+             if not self._schemes_loaded_by_caller:
+                 logger.warning("No power schemes were loaded by PowerCfgManager. Power switching functionality may be limited or non-functional.")
         else:
              # Log loaded schemes for verification
              logger.info(f"Available Power Schemes loaded by PowerManager: {available_schemes}")
 
-        # 4. Start EventListener (will run in a separate thread and set the Windows Hook)
+        # 4. Track running processes if [RunningProcessRules] or inherit_parent_rules are configured.
+        # Started before the event source, so the first foreground event can already be matched against its parents.
+        self._ensure_running_tracker()
+
+        # 5. Start the event source (EventListener runs in a separate thread and sets the Windows Hook)
         try:
-            self._event_listener.start()
-            logger.info("EventListener thread requested to start.")
+            self._event_source.start()
+            logger.info(f"Event source '{self._event_source.name}' requested to start.")
         except Exception as e:
-             logger.critical(f"Failed to start EventListener thread: {e}", exc_info=True)
-             # If listener fails, the core loop won't receive events. Application cannot function.
+             logger.critical(f"Failed to start event source '{self._event_source.name}': {e}", exc_info=True)
+             # If the source fails, the core loop won't receive events. Application cannot function.
              self.stop() # Attempt to stop everything else cleanly (will mostly just log warnings about things not running)
-             raise RuntimeError("Failed to start EventListener, exiting.") from e # Re-raise as critical error
+             raise RuntimeError("Failed to start event source, exiting.") from e # Re-raise as critical error
 
-        # 5. Start the processing thread (will retrieve events from queue)
+        # 6. Start the switch executor, then the processing thread (will retrieve events from queue)
+        self._switch_executor.start()
         self._running.set() # Set the running flag before starting the thread
         self._processing_thread = threading.Thread(target=self._process_queue, name="ProcessingThread")
         # Processing thread should probably NOT be daemon if we want clean shutdown.
@@ -141,6 +255,17 @@ class PowerSwitcherApp:
         self._processing_thread.start()
         logger.info("ProcessingThread requested to start.")
 
+        # 7. Start watching the config file. Reloads are parsed and compiled on the watcher thread;
+        # the processing thread only picks up the new snapshot reference.
+        if self._config_manager.get_config_hot_reload():
+            self._config_watcher = ConfigWatcher(
+                self._config_manager.get_config_file_path(),
+                self._on_config_file_changed,
+                min_interval=self._config_manager.get_config_reload_interval()
+            )
+            self._config_watcher.start()
+        else:
+            logger.info("Config hot reload is disabled. Restart the application to apply config file changes.")
         logger.info("PowerSwitcherApp start sequence finished. Core threads are expected to be running.")
         return True # Indicate startup was successful
 
@@ -161,23 +286,29 @@ class PowerSwitcherApp:
         # 1. Signal the processing thread to stop. Clear the running flag.
         self._running.clear() # Clear the running flag (main loop condition in _process_queue)
 
-        # 2. Unblock the processing thread's queue.get() by putting a sentinel value (None).
-        # Use put_nowait to ensure this doesn't block the stop() method itself.
+        # 2. Unblock the processing thread's mailbox.get() by closing the mailbox.
+        # close() never blocks, so this can't hang the stop() method itself.
         try:
-            if self._event_queue: # Check if queue was initialized
-                 self._event_queue.put_nowait(None)
-                 logger.debug("Put sentinel value (None) into the event queue to unblock processing thread.")
+            if self._event_mailbox: # Check if mailbox was initialized
+                 self._event_mailbox.close()
+                 logger.debug("Closed the event mailbox to unblock processing thread.")
             else:
-                 logger.warning("Event queue not initialized during stop sequence.")
-        except queue.Full:
-            logger.warning("Event queue is full during stop sequence, could not put sentinel. Processing thread might take longer to stop.")
+                 logger.warning("Event mailbox not initialized during stop sequence.")
         except Exception as e:
-            logger.error(f"Error putting sentinel into queue during stop: {e}", exc_info=True)
+            logger.error(f"Error closing event mailbox during stop: {e}", exc_info=True)
 
         # 3. Perform cleanup sequence (Unhook, join threads)
         # Consolodate cleanup logic into a separate method
         self._cleanup_threads_and_hooks()
 
+        # 4. Release power backend resources (e.g. the persistent powercfg shell) once no thread uses it anymore.
+        if self._power_manager:
+             self._power_manager.close()
+
+        # 5. Write the collected metrics if a dump file is configured.
+        if _metrics.enabled and self._config_manager.get_metrics_dump_path():
+             self.dump_metrics()
+
         logger.info("PowerSwitcherApp stopped.")
 
     def _cleanup_threads_and_hooks(self):
@@ -187,16 +318,28 @@ class PowerSwitcherApp:
         """
         logger.info("Initiating PowerSwitcherApp cleanup sequence.")
 
-        # 1. Stop EventListener (this sends WM_QUIT to its message loop thread and unhooks)
+        # 0. Stop watching the config file and the running processes (no re-evaluations during shutdown)
+        if self._config_watcher:
+            try:
+                self._config_watcher.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop config watcher cleanly: {e}", exc_info=True)
+        if self._running_tracker:
+            try:
+                self._running_tracker.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop running process tracker cleanly: {e}", exc_info=True)
+
+        # 1. Stop the event source (EventListener sends WM_QUIT to its message loop thread and unhooks)
         try:
-            if self._event_listener: # Check if event listener was initialized
-                 self._event_listener.stop()
-                 logger.info("EventListener stop method called.")
+            if self._event_source: # Check if event source was initialized
+                 self._event_source.stop()
+                 logger.info("Event source stop method called.")
                  # stop() method handles joining its internal thread.
             else:
-                 logger.warning("EventListener not initialized during cleanup sequence.")
+                 logger.warning("Event source not initialized during cleanup sequence.")
         except Exception as e:
-             logger.error(f"Failed to stop EventListener cleanly: {e}", exc_info=True)
+             logger.error(f"Failed to stop event source cleanly: {e}", exc_info=True)
              # Continue cleanup of other parts
 
         # 2. Wait (join) for the processing thread to finish
@@ -216,125 +359,64 @@ class PowerSwitcherApp:
         else:
              logger.debug("ProcessingThread was not initialized.")
 
+        # 3. Stop the switch executor once nothing submits anymore (a queued switch is still applied)
+        try:
+            self._switch_executor.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop switch executor cleanly: {e}", exc_info=True)
+
         logger.info("PowerSwitcherApp cleanup sequence finished.")
 
     def _process_queue(self):
         """
         Worker function executed by the processing thread.
-        Retrieves process names from the queue and triggers power plan switching logic
+        Retrieves foreground events from the mailbox (which already coalesces bursts, "latest wins"),
+        waits for the focus settle window and then triggers the power plan switching logic
         based on configured GUIDs.
         """
         # Ensure the logger is available in this thread's context (usually works fine with module-level logger)
         # log_thread = logging.getLogger(__name__) # Alternative way to get logger in thread
-        logger.info("ProcessingThread started queue processing loop (using GUIDs).")
+        logger.info(f"ProcessingThread started queue processing loop (using GUIDs, settle window {self._debouncer.settle_seconds * 1000:.0f} ms).")
 
         # Main processing loop runs while the application's _running flag is set
         # _running.is_set() is controlled by app.start() and app.stop()
         while self._running.is_set():
             try:
-                # Get an item from the queue with a short timeout.
-                # The timeout allows the loop to check the self._running signal periodically
-                # even if no items are in the queue. This is crucial for responsiveness during stop.
-                # Setting block=True is default, timeout makes it return queue.Empty on timeout.
-                process_name = self._event_queue.get(block=True, timeout=0.5)
-
-                # Check if the retrieved item is the sentinel value signaling stop
-                if process_name is None:
-                    logger.debug("ProcessingThread received stop sentinel (None). Exiting loop.")
+                # Wait for the next event. With nothing settling, this blocks on the mailbox's condition
+                # variable until an event arrives or stop() closes the mailbox - no periodic wakeups.
+                # While an event is settling (or a throttled switch is pending), wait at most until it is ready.
+                foreground_event = self._event_mailbox.get(timeout=self._time_until_next_deadline())
+
+                # None means the mailbox was closed by stop()
+                if foreground_event is None:
+                    logger.debug("ProcessingThread event mailbox closed. Exiting loop.")
                     break # Exit the while loop
 
-                # --- Core Business Logic ---
-                # We received a valid foreground process name string.
-                logger.debug(f"Processing received process name from queue: {process_name}")
-
-                # Avoid processing the same process name repeatedly UNLESS the configuration might have changed.
-                # With hot-reloading config (future feature), we'd need to re-check the config even for the same process.
-                # For now, simple check: if the process name is the same as the last one processed, skip.
-                if process_name == self._last_processed_process:
-                     # Log info level if you want to see every time this optimization kicks in
-                     logger.debug(f"Processed same process again: '{process_name}'. Skipping power plan check.")
-                     continue # Skip lookup and switch logic
-
-                self._last_processed_process = process_name # Update last processed process tracker
-
-                # 1. Look up the desired power plan GUID for this process in the configuration
-                # ConfigManager's method handles case-insensitive lookup and returns the GUID string or None.
-                target_power_plan_guid = self._config_manager.get_power_plan_for_process(process_name)
-
-                if target_power_plan_guid is None:
-                    # If the process is not in the map, get the default power plan GUID from config.
-                    logger.debug(f"Process '{process_name}' not found in config map. Retrieving default power plan GUID.")
-                    target_power_plan_guid = self._config_manager.get_default_power_plan()
-                    # Check if the default GUID is also empty or None (unlikely with ConfigManager fallbacks, but defensive)
-                    if not target_power_plan_guid:
-                        logger.warning(f"Default power plan GUID for process '{process_name}' is empty or None from config. Cannot apply default plan.")
-                         # Log the issue and process the next event from the queue.
-                        continue # Skip switch attempt
-
-                 # Ensure resolved target_power_plan_guid is a non-empty string after cleaning whitespace
-                target_power_plan_guid = str(target_power_plan_guid).strip()
-                if not target_power_plan_guid:
-                     logger.warning(f"Resolved target power plan GUID for process '{process_name}' is empty or whitespace only. Cannot switch.")
-                     continue
-
-                logger.debug(f"Target power plan GUID for '{process_name}': {target_power_plan_guid}")
-
-                # 2. Get the current active power plan GUID from the system
-                current_active_guid = self._power_manager.get_active_scheme_guid()
-
-                if not current_active_guid:
-                    logger.error("Failed to get current active power scheme GUID from system. Cannot determine if switch is needed.")
-                    # Processed event, but couldn't get current state. Continue.
-                    continue # Skip switch attempt
-
-                # 3. Compare current active GUID with the target GUID (case-insensitive comparison)
-                # Both are expected to be valid GUID strings at this point.
-                # Use .lower() for robust comparison as GUIDs are case-insensitive.
-                if current_active_guid.lower() == target_power_plan_guid.lower():
-                     # Current plan is already the desired target plan or its GUID equivalent.
-                     current_active_name = self._power_manager.get_power_plan_name_from_guid(current_active_guid) or "Unknown"
-                     target_name = self._power_manager.get_power_plan_name_from_guid(target_power_plan_guid) or "Unknown" # Try to get friendly name for log
-                     logger.debug(f"Current active plan (GUID: {current_active_guid}, Name: '{current_active_name}') is already the target plan for '{process_name}' (Target GUID: {target_power_plan_guid}, Name: '{target_name}'). No switch needed.")
-
-                     # Although no switch occurred, update our internal last applied/known state
-                     # if the effective target plan (identified by its GUID) is new.
-                     if self._last_known_active_guid != target_power_plan_guid.lower():
-                         # This case means the active plan was already the desired one, but it might be a different plan than the *last one we explicitly switched to*.
-                         # Update trackers to reflect current discovered state.
-                         logger.debug(f"Updating _last_applied_power_plan_identifier and _last_known_active_guid based on current active plan match for process '{process_name}'.")
-                         self._last_applied_power_plan_identifier = target_power_plan_guid # Store the target GUID
-                         self._last_known_active_guid = target_power_plan_guid.lower() # Store lowercase target GUID for comparison
-                     continue # Skip switching
-
-                # 4. If current active plan is different from the target, attempt to switch.
-                current_active_name = self._power_manager.get_power_plan_name_from_guid(current_active_guid) or "Unknown"
-                target_name = self._power_manager.get_power_plan_name_from_guid(target_power_plan_guid) or "Unknown"
-                logger.info(f"Current active plan (GUID: {current_active_guid}, Name: '{current_active_name}') is different from target for '{process_name}' (GUID: {target_power_plan_guid}, Name: '{target_name}'). Attempting to switch.")
-
-                # Call the power manager's switch method, passing the target GUID.
-                # PowerCfgManager expects a GUID string and calls powercfg /setactive.
-                switch_success = self._power_manager.switch_power_plan(target_power_plan_guid)
-
-                if switch_success:
-                    logger.info(f"Power plan switch requested successfully for '{process_name}' to GUID '{target_power_plan_guid}'.")
-                    # Update internal state trackers after a successful switch request.
-                    # The actual plan might take a moment to apply in the OS, but we requested it successfully.
-                    self._last_applied_power_plan_identifier = target_power_plan_guid # Store the target GUID
-                    # Update last known GUID to the target we aimed for after successful request
-                    self._last_known_active_guid = target_power_plan_guid.lower()
-                else:
-                    logger.error(f"Failed to switch power plan for '{process_name}' to GUID '{target_power_plan_guid}'. Check power_manager logs for details. (Likely permissions or invalid GUID).")
-                    # Do NOT update self._last_applied_power_plan_identifier or _last_known_active_guid, as the switch failed.
-
-                # Finished processing this event. The loop continues to wait for the next event.
+                _events_received.inc()
+                if _metrics.enabled:
+                    _mailbox_handoff_histogram.observe(time.perf_counter() - foreground_event.timestamp)
+                self._debouncer.offer(foreground_event)
 
             except queue.Empty:
-                # This exception is expected periodically due to the timeout in get().
-                # It allows the thread to check the while condition (_running.is_set()).
+                # The pending event's settle time elapsed without a newer event.
                 pass
+
+            settled_event = self._debouncer.pop_ready()
+            if settled_event is None:
+                # No new settled event: apply the trailing switch once the throttle allows it
+                settled_event = self._throttle.pop_ready()
+                if settled_event is None:
+                    continue
+                logger.debug("Re-evaluating throttled switch for '%s'.", settled_event.process_name)
+
+            try:
+                started = _handle_event_histogram.start()
+                self._handle_foreground_event(settled_event)
+                _handle_event_histogram.stop(started)
+                _events_handled.inc()
             except Exception as e:
                 # Catch any unexpected errors within the processing loop itself
-                logger.error(f"An unexpected error occurred in the ProcessingThread queue loop while processing event for process '{process_name if 'process_name' in locals() else 'N/A'}': {e}", exc_info=True)
+                logger.error("An unexpected error occurred in the ProcessingThread queue loop while processing event for process '%s': %s", settled_event.process_name, e, exc_info=True)
                 # Log the error and continue the loop to process the next event.
                 # A severe, recurring error might indicate a fundamental issue that needs
                 # more robust error handling or a mechanism to stop the thread.
@@ -342,6 +424,256 @@ class PowerSwitcherApp:
         # The while loop condition "_running.is_set()" became False, or hit a break condition.
         logger.info("ProcessingThread queue processing loop finished.")
 
+    def _time_until_next_deadline(self):
+        """
+        Mailbox wait timeout: seconds until the settling event or the trailing switch is due,
+        or None (wait indefinitely) if neither is pending.
+        """
+        settle_wait = self._debouncer.time_until_ready()
+        trailing_wait = self._throttle.time_until_pending_ready()
+        if settle_wait is None:
+            return trailing_wait
+        if trailing_wait is None:
+            return settle_wait
+        return min(settle_wait, trailing_wait)
+
+    def _handle_foreground_event(self, foreground_event):
+        """
+        Core business logic for one settled foreground event:
+        resolve the target power plan GUID and switch if it differs from the active plan.
+        """
+        process_name = foreground_event.process_name
+        logger.debug("Processing received process name from queue: %s", process_name)
+
+        self._last_foreground_event = foreground_event
+
+        # Take the config snapshot once: the lookup and the default plan below come from the same
+        # configuration even if the watcher swaps in a new one meanwhile. No lock is involved.
+        config_snapshot = self._config_manager.get_snapshot()
+
+        # Running process rule that currently applies (None without [RunningProcessRules] or matching processes)
+        running_rule = self._get_active_running_rule(config_snapshot)
+
+        # Avoid processing the same process repeatedly UNLESS the configuration or the running rule changed
+        if not self._decider.begin(foreground_event, config_snapshot, running_rule):
+            return # Skip lookup and switch logic
+
+        # 1. Resolve the target power plan GUID (memoized per process for the current config snapshot)
+        # and arbitrate it with the active running process rule
+        target_power_plan_guid = self._decider.resolve_target_plan(config_snapshot, foreground_event, running_rule)
+        if target_power_plan_guid is None:
+            return # Skip switch attempt
+
+        # 2. Get the current active power plan GUID (served from PowerCfgManager's cache when valid)
+        current_active_guid = self._power_manager.get_active_scheme_guid()
+
+        if not current_active_guid:
+            logger.error("Failed to get current active power scheme GUID from system. Cannot determine if switch is needed.")
+            # Processed event, but couldn't get current state.
+            return # Skip switch attempt
+
+        # 3. Compare with the target (and a switch still queued or running on the executor), apply the throttle
+        decision = self._decider.decide_switch(foreground_event, target_power_plan_guid, current_active_guid,
+                                               self._switch_executor.get_pending_target())
+        if decision == SWITCH_ALREADY_ACTIVE:
+             # Although no switch occurred, update our internal last applied/known state
+             # if the effective target plan (identified by its GUID) is new.
+             with self._plan_state_lock:
+                 if self._last_known_active_guid != target_power_plan_guid:
+                     # This case means the active plan was already the desired one, but it might be a different plan than the *last one we explicitly switched to*.
+                     # Update trackers to reflect current discovered state.
+                     logger.debug("Updating _last_applied_power_plan_identifier and _last_known_active_guid based on current active plan match for process '%s'.", process_name)
+                     self._last_applied_power_plan_identifier = target_power_plan_guid # Store the target GUID
+                     self._last_known_active_guid = target_power_plan_guid # Lowercase target GUID for comparison
+        elif decision == SWITCH_SUBMIT:
+             # 4. Hand the target GUID to the switch executor, which calls the power manager's switch method
+             # (powercfg /setactive or PowerSetActiveScheme) and reports back through _on_switch_completed.
+             self._switch_executor.submit(foreground_event, target_power_plan_guid)
+
+    def _on_switch_completed(self, request, switch_success):
+        """
+        SwitchExecutor callback after a switch attempt. Runs on the executor thread with background
+        switching, otherwise on the processing thread.
+        """
+        foreground_event = request.foreground_event
+        target_power_plan_guid = request.target_guid
+        process_name = foreground_event.process_name
+        if _metrics.enabled:
+            _event_to_switch_histogram.observe(time.perf_counter() - foreground_event.timestamp)
+        self._notify_switch_listeners(foreground_event, target_power_plan_guid, switch_success)
+
+        if switch_success:
+            logger.info("Power plan switch requested successfully for '%s' to GUID '%s'.", process_name, target_power_plan_guid)
+            # Update internal state trackers after a successful switch request.
+            # The actual plan might take a moment to apply in the OS, but we requested it successfully.
+            with self._plan_state_lock:
+                self._last_applied_power_plan_identifier = target_power_plan_guid # Store the target GUID
+                if request.sequence > self._external_change_sequence:
+                    # Update last known GUID to the target we aimed for after successful request
+                    self._last_known_active_guid = target_power_plan_guid
+                else:
+                    # An external change was reported after this switch was requested, it is the newer information
+                    logger.debug("Keeping externally reported active plan '%s' after the switch to '%s'.",
+                                 self._last_known_active_guid, target_power_plan_guid)
+        else:
+            logger.error("Failed to switch power plan for '%s' to GUID '%s'. Check power_manager logs for details. (Likely permissions or invalid GUID).", process_name, target_power_plan_guid)
+            # Do NOT update self._last_applied_power_plan_identifier or _last_known_active_guid, as the switch failed.
+
+    def _get_active_running_rule(self, config_snapshot):
+        """
+        Returns the RunningProcessRule that applies to the currently running processes, or None.
+        Recomputed only when the config snapshot or the set of running process names changed.
+        """
+        tracker = self._running_tracker
+        if tracker is None or not config_snapshot.running_rules:
+            return None
+        generation, names = tracker.get_running_state()
+        version, cached_generation, previous_rule = self._running_rule_cache
+        if version == config_snapshot.version and cached_generation == generation:
+            return previous_rule
+        rule = config_snapshot.running_rules.best_rule(names)
+        # Only the processing thread writes the cache (one tuple assignment, other threads read it as a whole)
+        self._running_rule_cache = (config_snapshot.version, generation, rule)
+        if rule != previous_rule:
+            if rule is not None:
+                logger.info("Running process rule '%s' (priority %s) is now active.", rule.pattern, rule.priority)
+            else:
+                logger.info("Running process rule '%s' is no longer active.", previous_rule.pattern)
+        return rule
+
+    def _ensure_running_tracker(self):
+        """
+        Starts the running process tracker if running process rules or inherit_parent_rules are configured
+        and it isn't running yet.
+        """
+        if self._running_tracker is not None:
+            return
+        if not self._config_manager.get_snapshot().running_rules and not self._decider.inherit_parent_rules:
+            return
+        if self._process_enumerator is None:
+            from src.infrastructure.processes.process_enumerator import create_process_enumerator
+            self._process_enumerator = create_process_enumerator()
+            if self._process_enumerator is None:
+                logger.error("Running process rules or inherit_parent_rules are configured, but running processes can't be enumerated on this system. They are ignored.")
+                return
+        from src.infrastructure.processes.running_process_tracker import RunningProcessTracker
+        self._running_tracker = RunningProcessTracker(
+            self._process_enumerator,
+            poll_interval=self._config_manager.get_running_process_poll_interval(),
+            on_change=self._on_running_processes_changed
+        )
+        self._decider.attach_running_tracker(self._running_tracker)
+        self._running_tracker.start()
+
+    def _on_running_processes_changed(self, change):
+        """
+        RunningProcessTracker callback (runs on the tracker thread): when the active running process
+        rule changes, the current foreground app is re-evaluated so the plan follows without a focus change.
+        The rule cache is left to the processing thread, which refreshes it (and logs the change) when it
+        handles the re-evaluation.
+        """
+        # Also runs before the processing thread starts: the mailbox keeps the event until then
+        # (and ignores it once stop() closed it)
+        if not change.names_changed:
+            return
+        config_snapshot = self._config_manager.get_snapshot()
+        if not config_snapshot.running_rules:
+            return
+        rule = config_snapshot.running_rules.best_rule(self._running_tracker.get_running_state()[1])
+        if rule == self._running_rule_cache[2]:
+            return
+        # Without a foreground event yet, an event without a process decides between the rule and the default plan
+        last_event = self._last_foreground_event or ForegroundEvent(None, None, None, time.perf_counter())
+        # put_if_empty never replaces a newer event that is already waiting in the mailbox
+        self._event_mailbox.put_if_empty(last_event._replace(timestamp=time.perf_counter()))
+
+    def register_switch_listener(self, callback):
+        """
+        Registers callback(foreground_event, target_guid, success), called right after each
+        switch_power_plan() attempt (on the switch executor thread when background switching is enabled). Callbacks must be fast and must not raise;
+        exceptions are logged and ignored.
+        """
+        self._switch_listeners.append(callback)
+
+    def _notify_switch_listeners(self, foreground_event, target_guid, success):
+        for callback in self._switch_listeners:
+            try:
+                callback(foreground_event, target_guid, success)
+            except Exception as e:
+                logger.error("Switch listener %r raised an error: %s", callback, e, exc_info=True)
+
+    def _on_config_file_changed(self):
+        """
+        ConfigWatcher callback (runs on the watcher thread): reloads the config file and, if the new
+        configuration was applied, re-evaluates the current foreground app so a changed mapping takes
+        effect without waiting for the next focus change.
+
+        Returns:
+            True if the new configuration was applied.
+        """
+        if not self._config_manager.reload_config():
+            return False
+        logger.info("Configuration reloaded (version %s).", self._config_manager.get_config_version())
+        if self._running.is_set():
+            # Running process rules may have been added
+            self._ensure_running_tracker()
+        last_event = self._last_foreground_event
+        if last_event is not None and self._running.is_set():
+            # put_if_empty never replaces a newer event that is already waiting in the mailbox
+            if self._event_mailbox.put_if_empty(last_event._replace(timestamp=time.perf_counter())):
+                logger.debug("Re-evaluating foreground process '%s' with the reloaded configuration.", last_event.process_name)
+        return True
+
+    def reload_config(self):
+        """
+        Reloads the config file on demand (e.g. from the GUI) without waiting for the watcher.
+        Only the process map, rules and default plan are applied while running.
+
+        Returns:
+            True if the new configuration was applied.
+        """
+        return self._on_config_file_changed()
+
+    def dump_metrics(self, file_path=None):
+        """
+        Writes the current metrics snapshot as JSON.
+
+        Args:
+            file_path: target file; defaults to metrics_dump_path from the config.
+        Returns:
+            True on success, False if no path is configured or writing failed.
+        """
+        file_path = file_path or self._config_manager.get_metrics_dump_path()
+        if not file_path:
+            logger.warning("No metrics dump path configured (metrics_dump_path). Metrics not dumped.")
+            return False
+        return _metrics.dump(file_path)
+
+    def notify_power_scheme_changed(self, new_active_guid=None):
+        """
+        External change signal for the active power plan (e.g. WM_POWERBROADCAST from the tray window,
+        or the user switching plans in the Control Panel).
+        Keeps the PowerCfgManager active scheme cache authoritative.
+
+        Args:
+            new_active_guid: GUID reported by the notification, or None if unknown (cache is dropped).
+        """
+        self._power_manager.invalidate_active_scheme_cache(new_active_guid)
+        if not new_active_guid:
+            return
+        new_active_guid = str(new_active_guid).strip().lower()
+        with self._plan_state_lock:
+            # Completions of the switches requested so far don't overwrite the reported plan. If one of them
+            # is applied after this change, the system sends another notification for it.
+            self._external_change_sequence = self._switch_executor.get_last_sequence()
+            if self._last_known_active_guid == new_active_guid:
+                return
+            self._last_known_active_guid = new_active_guid
+        logger.info("Active power plan changed externally to GUID '%s'.", new_active_guid)
+        # The next foreground event must be evaluated again even if it's the same process,
+        # otherwise an external change would stick until focus moves to a different app.
+        self._decider.forget_last_processed()
+
     # --- Methods might be called by GUI layer ---
     # These methods provide interfaces for the GUI to interact with the app's state and functionality.
 
@@ -353,6 +685,12 @@ class PowerSwitcherApp:
         """
         return self._config_manager
 
+    def get_event_source(self):
+        """
+        Provides access to the EventSource feeding the application (EventListener on Windows).
+        """
+        return self._event_source
+
     def get_power_manager(self):
         """
         Provides access to the PowerCfgManager instance.
@@ -373,17 +711,36 @@ class PowerSwitcherApp:
             current_name = self._power_manager.get_power_plan_name_from_guid(current_guid) if current_guid else "Unknown"
 
             # Get name for the last applied identifier (which is now expected to be a GUID)
-            last_applied_guid = self._last_applied_power_plan_identifier
+            with self._plan_state_lock:
+                last_applied_guid = self._last_applied_power_plan_identifier
+            # Read once: the processing thread may replace the tuple meanwhile
+            running_rule = self._running_rule_cache[2]
             last_applied_name = self._power_manager.get_power_plan_name_from_guid(last_applied_guid) if last_applied_guid else "None"
 
             return {
                 "is_running": self._running.is_set(),
                 "processing_thread_alive": self._processing_thread is not None and self._processing_thread.is_alive(),
-                "event_listener_thread_alive": self._event_listener is not None and hasattr(self._event_listener, '_listener_thread') and self._event_listener._listener_thread is not None and self._event_listener._listener_thread.is_alive(),
-                "last_processed_process": self._last_processed_process,
+                "switch_executor": self._switch_executor.get_stats(),
+                "event_source": self._event_source.name if self._event_source else "N/A",
+                "event_listener_thread_alive": self._event_source is not None and self._event_source.is_alive(),
+                "last_processed_process": self._decider.last_processed_process,
                 "last_applied_power_plan": f"'{last_applied_name}' ({last_applied_guid})" if last_applied_guid else "None", # Display both name and GUID
                 "current_active_power_plan": f"'{current_name}' ({current_guid})" if current_guid else "Unknown (N/A)", # Display both name and GUID
-                "queue_size": self._event_queue.qsize() if self._event_queue else "N/A",
+                "queue_size": self._event_mailbox.qsize() if self._event_mailbox else "N/A",
+                "event_mailbox": self._event_mailbox.get_stats() if self._event_mailbox else "N/A",
+                "active_scheme_cache": self._power_manager.get_active_scheme_cache_stats(),
+                "scheme_catalog": self._power_manager.get_scheme_catalog_stats(),
+                "event_pipeline": self._event_source.get_pipeline_stats() if self._event_source else "N/A",
+                "focus_settle_ms": self._debouncer.settle_seconds * 1000.0,
+                "events_superseded_while_settling": self._debouncer.get_superseded_count(),
+                "switch_throttle": self._throttle.get_stats(),
+                "rule_engine": self._config_manager.get_rule_engine_stats(),
+                "running_processes": self._running_tracker.get_stats() if self._running_tracker else "disabled",
+                "active_running_rule": running_rule.pattern if running_rule else None,
+                "decision_memo_size": self._decider.get_stats()["decision_memo_size"],
+                "config_version": self._config_manager.get_config_version(),
+                "config_watcher": self._config_watcher.get_stats() if self._config_watcher else "disabled",
+                "metrics": _metrics.snapshot() if _metrics.enabled else "disabled",
             }
         except Exception as e:
              # Log the error but try to return some basic info even if some parts fail
@@ -393,9 +750,9 @@ class PowerSwitcherApp:
                  "error": "Error retrieving status: " + str(e),
                  "is_running": self._running.is_set() if hasattr(self, '_running') else False,
                  "processing_thread_alive": self._processing_thread is not None and self._processing_thread.is_alive() if hasattr(self, '_processing_thread') else False,
-                 "event_listener_thread_alive": self._event_listener is not None and hasattr(self._event_listener, '_listener_thread') and self._event_listener._listener_thread is not None and self._event_listener._listener_thread.is_alive() if hasattr(self, '_event_listener') else False,
-                 "last_processed_process": self._last_processed_process if hasattr(self, '_last_processed_process') else None,
+                 "event_listener_thread_alive": self._event_source is not None and self._event_source.is_alive() if hasattr(self, '_event_source') else False,
+                 "last_processed_process": self._decider.last_processed_process if hasattr(self, '_decider') else None,
                  "last_applied_power_plan": "N/A (Status Error)",
                  "current_active_power_plan": "N/A (Status Error)",
-                 "queue_size": self._event_queue.qsize() if hasattr(self, '_event_queue') and self._event_queue else "N/A",
+                 "queue_size": self._event_mailbox.qsize() if hasattr(self, '_event_mailbox') and self._event_mailbox else "N/A",
              }
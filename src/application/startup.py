@@ -0,0 +1,246 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from src.application.power_switcher_app import PowerSwitcherApp
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.power_management.power_cfg_manager import SCHEME_LOAD_LOADED
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# One startup phase: milliseconds since the timeline origin and the thread it ran on
+StartupPhase = namedtuple("StartupPhase", ["name", "start_ms", "end_ms", "thread"])
+
+
+class StartupTimeline:
+    """
+    Records the phases of application startup (config load, logging setup, scheme enumeration,
+    hook installation, ...) relative to a common origin, so overlapping phases on different
+    threads can be compared. Thread safe.
+    """
+    def __init__(self, clock=time.perf_counter, origin=None):
+        """
+        Args:
+            clock: returns the time in seconds (must be the same clock origin was taken from).
+            origin: clock() value all phases are measured from. Defaults to now; main.py passes
+                    the time the script started so module imports are accounted for as well.
+        """
+        self._clock = clock
+        self._origin = origin if origin is not None else clock()
+        self._lock = threading.Lock()
+        self._phases = []
+
+    def _elapsed_ms(self):
+        return (self._clock() - self._origin) * 1000.0
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager that records the enclosed block as phase name (also when it raises).
+        """
+        start_ms = self._elapsed_ms()
+        try:
+            yield
+        finally:
+            self._add(StartupPhase(name, start_ms, self._elapsed_ms(), threading.current_thread().name))
+
+    def mark(self, name):
+        """
+        Records a point in time (a phase of zero length), e.g. "ready".
+        """
+        now_ms = self._elapsed_ms()
+        self._add(StartupPhase(name, now_ms, now_ms, threading.current_thread().name))
+
+    def _add(self, phase):
+        with self._lock:
+            self._phases.append(phase)
+
+    def get_phases(self):
+        """
+        Returns the recorded phases ordered by start time.
+        """
+        with self._lock:
+            return sorted(self._phases, key=lambda phase: phase.start_ms)
+
+    def as_dict(self):
+        """
+        Returns the phases as {name: {"start_ms", "end_ms", "duration_ms", "thread"}} (for the state info and benchmarks).
+        """
+        return {
+            phase.name: {
+                "start_ms": round(phase.start_ms, 3),
+                "end_ms": round(phase.end_ms, 3),
+                "duration_ms": round(phase.end_ms - phase.start_ms, 3),
+                "thread": phase.thread,
+            }
+            for phase in self.get_phases()
+        }
+
+    def log_summary(self, level=logging.INFO):
+        """
+        Logs one line per phase: start/end offsets, duration and thread.
+        """
+        phases = self.get_phases()
+        if not phases:
+            return
+        lines = [f"  {phase.name:<24} {phase.start_ms:9.1f} -> {phase.end_ms:9.1f} ms "
+                 f"({phase.end_ms - phase.start_ms:8.1f} ms) [{phase.thread}]" for phase in phases]
+        logger.log(level, "Startup timeline (ms since start):\n" + "\n".join(lines))
+
+
+class StartupOrchestrator:
+    """
+    Starts the application with as little serialized work as possible:
+
+      - the config file is parsed once and the same ConfigManager is handed to PowerSwitcherApp
+        (main.py previously parsed it in a throwaway instance just to read the log level);
+      - `powercfg /list` (scheme names, only needed for logs and the GUI) and the first active
+        scheme query run on background threads while the event source installs its hook, instead
+        of blocking PowerSwitcherApp.__init__ before the hook exists.
+
+    Every step is recorded in a StartupTimeline, which is logged once the app has started and the
+    background tasks have finished.
+    """
+    def __init__(self, config_manager=None, app_factory=PowerSwitcherApp, timeline=None):
+        """
+        Args:
+            config_manager: optional ConfigManager (e.g. pointing at a benchmark config). Defaults to the project config file.
+            app_factory: callable creating the app; receives config_manager, load_schemes and the create_app() kwargs.
+            timeline: optional StartupTimeline (e.g. with the script start as origin).
+        """
+        self._config_manager = config_manager if config_manager is not None else ConfigManager()
+        self._app_factory = app_factory
+        self._timeline = timeline if timeline is not None else StartupTimeline()
+        self._config_loaded = False
+        self._app = None
+        self._background_threads = []
+
+        # The summary is logged by whoever finishes last: start_app() or the last background task
+        self._summary_lock = threading.Lock()
+        self._pending_tasks = 0
+        self._app_started = False
+        self._summary_logged = False
+
+    def get_timeline(self):
+        return self._timeline
+
+    def get_config_manager(self):
+        return self._config_manager
+
+    def load_config(self):
+        """
+        Parses the config file (creating the default file if it doesn't exist).
+
+        Returns:
+            True if the config was loaded, False if defaults are used.
+        """
+        with self._timeline.phase("load_config"):
+            self._config_loaded = self._config_manager.load_config()
+        if not self._config_loaded:
+            logger.error("Failed to load the configuration file. Using default settings.")
+        return self._config_loaded
+
+    def configure_logging(self, configure):
+        """
+        Runs configure(log_level, async_logging) with the settings of the loaded config
+        (INFO and synchronous logging if it couldn't be loaded).
+
+        Returns:
+            (log_level_name, async_logging) that were applied.
+        """
+        log_level_str = self._config_manager.get_log_level() if self._config_loaded else "INFO"
+        log_level = getattr(logging, log_level_str.upper(), logging.INFO)
+        async_logging = self._config_manager.get_async_logging() if self._config_loaded else False
+        with self._timeline.phase("configure_logging"):
+            configure(log_level=log_level, async_logging=async_logging)
+        return log_level_str, async_logging
+
+    def create_app(self, **app_kwargs):
+        """
+        Creates the app with the already loaded config and starts loading the power schemes
+        and the active scheme in the background.
+
+        Returns:
+            The app instance.
+        """
+        if not self._config_loaded:
+            self.load_config()
+        with self._timeline.phase("create_app"):
+            self._app = self._app_factory(config_manager=self._config_manager, load_schemes=False, **app_kwargs)
+        power_manager = self._app.get_power_manager()
+        self._start_background("load_schemes", self._load_schemes)
+        if not power_manager.get_backend().batches_commands:
+            # Separate backend calls: query the active scheme in parallel with the scheme list.
+            # A batching backend reads both in one round trip in _load_schemes().
+            self._start_background("prefetch_active_scheme", power_manager.get_active_scheme_guid)
+        return self._app
+
+    def _load_schemes(self):
+        """
+        Background power scheme load. app.start() may already have run, so the outcome is logged here.
+        """
+        power_manager = self._app.get_power_manager()
+        catalog = power_manager.refresh_schemes(include_active_scheme=power_manager.get_backend().batches_commands)
+        if power_manager.get_scheme_load_state() != SCHEME_LOAD_LOADED or not len(catalog):
+            logger.warning("No power schemes were loaded by PowerCfgManager. Power switching functionality may be limited or non-functional.")
+
+    def start_app(self):
+        """
+        Starts the app created by create_app() (event source hook, executor and processing threads)
+        while the background tasks are still running.
+
+        Returns:
+            The result of app.start().
+        """
+        if self._app is None:
+            raise RuntimeError("create_app() must be called before start_app().")
+        with self._timeline.phase("app_start"):
+            started = self._app.start()
+        self._timeline.mark("ready")
+        with self._summary_lock:
+            self._app_started = True
+        self._log_summary_when_done()
+        return started
+
+    def wait_for_background(self, timeout=None):
+        """
+        Waits for the background startup tasks.
+
+        Returns:
+            True if all of them finished.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._background_threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        return not any(thread.is_alive() for thread in self._background_threads)
+
+    def _start_background(self, name, target):
+        with self._summary_lock:
+            self._pending_tasks += 1
+        thread = threading.Thread(target=self._run_background, args=(name, target), name=f"Startup-{name}")
+        # Daemon: a powercfg call that hangs must not keep the process alive at exit
+        thread.daemon = True
+        self._background_threads.append(thread)
+        thread.start()
+
+    def _run_background(self, name, target):
+        try:
+            with self._timeline.phase(name):
+                target()
+        except Exception as e:
+            logger.error(f"Startup task '{name}' failed: {e}", exc_info=True)
+        finally:
+            with self._summary_lock:
+                self._pending_tasks -= 1
+            self._log_summary_when_done()
+
+    def _log_summary_when_done(self):
+        with self._summary_lock:
+            if self._summary_logged or not self._app_started or self._pending_tasks:
+                return
+            self._summary_logged = True
+        self._timeline.log_summary()
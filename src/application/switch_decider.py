@@ -0,0 +1,285 @@
+import logging
+
+from src.infrastructure.configuration.rule_engine import arbitrate_running_rule
+from src.infrastructure.processes.running_process_tracker import normalize_name
+from src.utils.metrics import get_registry
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Hot-path metrics (no-ops unless metrics are enabled in the config)
+_metrics = get_registry()
+_decision_memo_hits = _metrics.counter("pipeline.decision_memo_hits")
+_decision_memo_misses = _metrics.counter("pipeline.decision_memo_misses")
+_switches_throttled = _metrics.counter("pipeline.switches_throttled")
+_parent_rule_matches = _metrics.counter("pipeline.parent_rule_matches")
+
+# Maximum number of memoized switch decisions; the table is cleared when full
+# (there are only ever a few dozen distinct foreground executables).
+DECISION_MEMO_SIZE = 1024
+# Maximum number of memoized parent chain lookups (inherit_parent_rules); the table is cleared when full
+PARENT_MEMO_SIZE = 1024
+
+# Outcomes of SwitchDecider.decide_switch()
+SWITCH_SUBMIT = "submit"
+SWITCH_ALREADY_PENDING = "already_pending"
+SWITCH_ALREADY_ACTIVE = "already_active"
+SWITCH_THROTTLED = "throttled"
+
+
+class SwitchDecider:
+    """
+    Decision step shared by PowerSwitcherApp and AsyncPowerSwitcherRuntime.
+
+    For one settled foreground event it resolves the target power plan (memoized per process for
+    the current config snapshot, parent chain inheritance, running process rule arbitration) and
+    decides whether a switch is needed (pending switch, already active plan, switch throttle).
+    Getting the active plan and submitting the switch stay with the runtime, which does them
+    blocking or awaited.
+
+    Only the runtime's processing thread (or task) calls it, so it needs no locking.
+    """
+    def __init__(self, config_manager, throttle, describe_plan=str):
+        """
+        Args:
+            config_manager: ConfigManager used for the process lookups.
+            throttle: SwitchThrottle; held back switches are deferred to it as trailing switches.
+            describe_plan: callable(guid) returning a plan label for log messages.
+        """
+        self._config_manager = config_manager
+        self._throttle = throttle
+        self._describe_plan = describe_plan
+
+        # Memoized switch decisions: process name (or (name, image path) when path rules exist) ->
+        # (normalized target GUID including the default plan fallback, whether a rule matched).
+        # Dropped whenever the config snapshot version changes.
+        self._decision_memo = {}
+        self._decision_memo_version = None
+        # inherit_parent_rules: (pid, create time, process name) -> plan of the nearest mapped ancestor
+        # or None, dropped together with the decision memo. The create time tells a new process that
+        # got the PID of an exited one (Windows reuses PIDs quickly) from the process memoized before.
+        self._inherit_parent_rules = config_manager.get_inherit_parent_rules()
+        self._parent_chain_max_depth = config_manager.get_parent_chain_max_depth()
+        self._parent_memo = {}
+        # RunningProcessTracker used for the parent chains, attached once the runtime created it
+        self._running_tracker = None
+
+        # State of the same-process skip
+        self._last_processed_process = None
+        # Config snapshot version the last process was evaluated against; a reload invalidates the same-process skip
+        self._last_processed_config_version = None
+        # Running rule the last processed foreground event was decided with
+        self._last_processed_running_rule = None
+        self._last_processed_pid = None
+
+    @property
+    def inherit_parent_rules(self):
+        return self._inherit_parent_rules
+
+    @property
+    def last_processed_process(self):
+        return self._last_processed_process
+
+    def attach_running_tracker(self, tracker):
+        """
+        Sets the RunningProcessTracker the parent chains are read from.
+        """
+        self._running_tracker = tracker
+
+    def forget_last_processed(self):
+        """
+        Makes the next event be evaluated even if it's the same process (e.g. after an external plan change).
+        """
+        self._last_processed_process = None
+
+    def begin(self, foreground_event, config_snapshot, running_rule):
+        """
+        Starts the evaluation of a settled foreground event.
+
+        Returns:
+            False if the event can be skipped: same process (and PID with inherit_parent_rules) as the
+            last one, with the same config snapshot and running process rule.
+        """
+        # The newest foreground app decides the plan: a switch held back for an earlier app is obsolete.
+        self._throttle.clear_pending()
+
+        process_name = foreground_event.process_name
+        # A reloaded config gets a new snapshot version, so the same process is checked again then.
+        # The same goes for a running process rule that became active or inactive.
+        if process_name == self._last_processed_process and config_snapshot.version == self._last_processed_config_version \
+                and running_rule == self._last_processed_running_rule \
+                and (not self._inherit_parent_rules or foreground_event.pid == self._last_processed_pid):
+            logger.debug("Processed same process again: '%s'. Skipping power plan check.", process_name)
+            return False
+
+        self._last_processed_process = process_name
+        self._last_processed_config_version = config_snapshot.version
+        self._last_processed_running_rule = running_rule
+        self._last_processed_pid = foreground_event.pid
+        return True
+
+    def needs_parent_chain(self, config_snapshot, foreground_event):
+        """
+        True if resolve_target_plan() will walk the parent chain of the event's process, which may
+        describe processes and block (the asyncio runtime runs it in a worker thread then).
+        """
+        if not self._inherit_parent_rules or self._running_tracker is None or foreground_event.pid is None:
+            return False
+        if config_snapshot.version == self._decision_memo_version:
+            # Peeked without the hit/miss counters: resolve_target_plan() does the counted lookup
+            memoized = self._decision_memo.get(self._memo_key(config_snapshot, foreground_event.process_name, foreground_event.image_path))
+            if memoized is not None and memoized[1]:
+                return False
+            # The memo key needs the process entry: only a process already in the tracker's index is cheap
+            entry = self._running_tracker.get_process(foreground_event.pid)
+            if entry is None or normalize_name(entry.name) != normalize_name(foreground_event.process_name):
+                return True
+            return self._parent_memo_key(entry, foreground_event.process_name) not in self._parent_memo
+        # Not looked up for this snapshot yet, the process may have no rule
+        return True
+
+    def resolve_target_plan(self, config_snapshot, foreground_event, running_rule=None):
+        """
+        Returns the normalized target power plan GUID for the event's process (configured plan, the plan
+        of the nearest mapped ancestor with inherit_parent_rules, or the default plan, unless the active
+        running process rule takes precedence), or None if there is none.
+        """
+        process_name = foreground_event.process_name
+        target_power_plan_guid, matched = self._lookup(config_snapshot, process_name, foreground_event.image_path)
+        if not matched and foreground_event.pid is not None and self._inherit_parent_rules:
+            # The name has no rule: this particular process may still be a child of a mapped app
+            inherited_guid = self._match_parent_chain(config_snapshot, foreground_event.pid, process_name)
+            if inherited_guid is not None:
+                target_power_plan_guid, matched = inherited_guid, True
+        if target_power_plan_guid is None:
+            return running_rule.guid if running_rule is not None else None
+        target_power_plan_guid = arbitrate_running_rule(target_power_plan_guid, matched, running_rule)
+        logger.debug("Target power plan GUID for '%s': %s", process_name, target_power_plan_guid)
+        return target_power_plan_guid
+
+    @staticmethod
+    def _memo_key(config_snapshot, process_name, image_path):
+        # Path rules can map the same executable name to different plans, the path is part of the key then
+        return (process_name, image_path) if config_snapshot.rule_engine.uses_image_path() else process_name
+
+    def _lookup(self, config_snapshot, process_name, image_path):
+        """
+        Returns the memoized (target GUID or None, matched) of a process for the config snapshot.
+        """
+        if config_snapshot.version != self._decision_memo_version:
+            # Config was (re)loaded or edited: every memoized decision may be stale
+            self._decision_memo = {}
+            self._parent_memo = {}
+            self._decision_memo_version = config_snapshot.version
+        memo_key = self._memo_key(config_snapshot, process_name, image_path)
+        # Memoized as (guid, matched): whether it's a configured plan matters when arbitrating with running rules
+        memoized = self._decision_memo.get(memo_key)
+        if memoized is not None:
+            _decision_memo_hits.inc()
+            return memoized
+        _decision_memo_misses.inc()
+        # Look up the desired power plan GUID for this process in the configuration
+        # ConfigManager's method handles case-insensitive lookup and returns the GUID string or None.
+        # The image path is passed along for path based rules (e.g. everything under D:\Games\**).
+        target_power_plan_guid = self._config_manager.get_power_plan_for_process(process_name, image_path, snapshot=config_snapshot)
+        matched = target_power_plan_guid is not None
+
+        if target_power_plan_guid is None:
+            # If the process is not in the map, use the default power plan GUID from the same snapshot.
+            logger.debug("Process '%s' not found in config map. Using default power plan GUID.", process_name)
+            target_power_plan_guid = config_snapshot.default_power_plan
+            # Check if the default GUID is also empty or None (unlikely with ConfigManager fallbacks, but defensive)
+            if not target_power_plan_guid:
+                logger.warning("Default power plan GUID for process '%s' is empty or None from config. Cannot apply default plan.", process_name)
+                target_power_plan_guid = None
+
+        memoized = (target_power_plan_guid, matched)
+        if len(self._decision_memo) >= DECISION_MEMO_SIZE:
+            self._decision_memo.clear()
+        self._decision_memo[memo_key] = memoized
+        return memoized
+
+    @staticmethod
+    def _parent_memo_key(entry, process_name):
+        return (entry.pid, entry.create_time, process_name)
+
+    def _match_parent_chain(self, config_snapshot, pid, process_name):
+        """
+        Returns the plan of the nearest ancestor of pid that has a matching rule, or None.
+        At most parent_chain_max_depth ancestors are checked; results are memoized per process
+        (PID and start time) until the config snapshot changes (a running process never changes its
+        parent chain). Failed lookups aren't memoized.
+        """
+        tracker = self._running_tracker
+        if tracker is None:
+            return None
+        try:
+            entry = tracker.find_process(pid, name=process_name)
+            if entry is None:
+                # Already exited
+                return None
+            memo_key = self._parent_memo_key(entry, process_name)
+            if memo_key in self._parent_memo:
+                return self._parent_memo[memo_key]
+            ancestors = tracker.get_entry_ancestors(entry, self._parent_chain_max_depth)
+        except Exception as e:
+            logger.warning("Failed to read the parent processes of '%s' (PID %s): %s", process_name, pid, e)
+            return None
+        inherited_guid = None
+        for ancestor in ancestors:
+            # Ancestors are matched by name only (no image path is tracked for them)
+            inherited_guid = self._config_manager.get_power_plan_for_process(ancestor.name, snapshot=config_snapshot)
+            if inherited_guid is not None:
+                _parent_rule_matches.inc()
+                logger.debug("Process '%s' (PID %s) inherits the plan of its ancestor '%s' (PID %s).", process_name, pid, ancestor.name, ancestor.pid)
+                break
+        if len(self._parent_memo) >= PARENT_MEMO_SIZE:
+            self._parent_memo.clear()
+        self._parent_memo[memo_key] = inherited_guid
+        return inherited_guid
+
+    def decide_switch(self, foreground_event, target_power_plan_guid, current_active_guid, pending_guid):
+        """
+        Decides whether to switch to the target plan.
+
+        Args:
+            foreground_event: the settled event (deferred to the throttle if the switch is held back).
+            target_power_plan_guid: result of resolve_target_plan().
+            current_active_guid: normalized GUID of the active plan.
+            pending_guid: target of the switch that is still queued or running, or None.
+        Returns:
+            SWITCH_SUBMIT (the runtime submits the switch), SWITCH_ALREADY_PENDING, SWITCH_ALREADY_ACTIVE
+            or SWITCH_THROTTLED (deferred as the trailing switch).
+        """
+        process_name = foreground_event.process_name
+        # Both are lowercase already: config GUIDs are normalized at load, the runtimes normalize the active GUID.
+        # While a switch is still queued or running, the plan it heads to counts instead.
+        if pending_guid == target_power_plan_guid:
+            logger.debug("A switch to %s for '%s' is already in progress. Nothing to submit.", target_power_plan_guid, process_name)
+            return SWITCH_ALREADY_PENDING
+        if pending_guid is None and current_active_guid == target_power_plan_guid:
+            # This is the steady-state path: skip even creating the log labels when DEBUG is off.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Current active plan %s is already the target plan for '%s'. No switch needed.", self._describe_plan(current_active_guid), process_name)
+            return SWITCH_ALREADY_ACTIVE
+
+        # The active plan differs from the target: switch - unless switches happen too often
+        # (focus ping-pong between two mapped apps). The switch is then deferred, not dropped.
+        if not self._throttle.try_acquire():
+            _switches_throttled.inc()
+            self._throttle.defer(foreground_event)
+            # The trailing re-evaluation of this same process must not hit the same-process skip
+            self._last_processed_process = None
+            logger.debug("Switch for '%s' held back by the switch throttle, retrying in %.0f ms.", process_name, self._throttle.time_until_allowed() * 1000.0)
+            return SWITCH_THROTTLED
+
+        # The decision path only carries GUIDs. Plan labels resolve their friendly names when the record
+        # is formatted (on the logging thread with async logging), and not at all if INFO is filtered out.
+        logger.info("Current active plan %s is different from target %s for '%s'. Attempting to switch.", self._describe_plan(current_active_guid), self._describe_plan(target_power_plan_guid), process_name)
+        return SWITCH_SUBMIT
+
+    def get_stats(self):
+        return {
+            "decision_memo_size": len(self._decision_memo),
+            "parent_memo_size": len(self._parent_memo),
+        }
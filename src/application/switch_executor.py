@@ -0,0 +1,175 @@
+import logging
+import threading
+from collections import namedtuple
+
+from src.infrastructure.events.mailbox import LatestValueMailbox
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# One "desired plan" update: the foreground event that caused it and the normalized target GUID.
+# sequence increases with every submit, so the executor can tell whether a completed request is still the newest.
+SwitchRequest = namedtuple("SwitchRequest", ["sequence", "foreground_event", "target_guid"])
+
+
+class SwitchExecutor:
+    """
+    Single writer for power plan switches.
+
+    The processing thread submits the plan it wants ("desired plan") and goes back to handling
+    events; switch_power_plan() runs here. Requests are kept in a LatestValueMailbox, so a request
+    that hasn't started yet is replaced by a newer one instead of queueing behind it: after a burst
+    of decisions only the last one is applied. A request whose target is already the active plan
+    when it's picked up (e.g. the user went back to the previous app meanwhile) is skipped and
+    reported as a successful switch.
+
+    on_complete(request, success) is called on the executor thread after every switch attempt.
+
+    With threaded=False there is no thread: submit() runs the switch on the caller's thread, so the
+    decision path is the same whether background switching is enabled or not.
+    """
+    def __init__(self, power_manager, on_complete, threaded=True):
+        """
+        Args:
+            power_manager: PowerCfgManager used to query the active plan and to switch.
+            on_complete: callable(request, success) called after every switch attempt.
+            threaded: run switches on a dedicated thread (True) or inline in submit() (False).
+        """
+        self._power_manager = power_manager
+        self._on_complete = on_complete
+        self._threaded = threaded
+
+        self._requests = LatestValueMailbox()
+        self._thread = None
+        # Guards _sequence and _outstanding (submit and completion run on different threads)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        # Newest submitted request that hasn't completed yet (queued or running), None when idle
+        self._outstanding = None
+
+        self._submitted = 0
+        self._executed = 0
+        self._failed = 0
+        self._skipped_already_active = 0
+
+    @property
+    def threaded(self):
+        return self._threaded
+
+    def start(self):
+        """
+        Starts the executor thread (no-op in inline mode).
+        """
+        if not self._threaded:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("SwitchExecutor is already running.")
+            return
+        self._thread = threading.Thread(target=self._run, name="SwitchExecutorThread")
+        # Non-daemon, stop() joins it (same as the other worker threads of the application)
+        self._thread.daemon = False
+        self._thread.start()
+        logger.info("SwitchExecutorThread started.")
+
+    def stop(self, timeout=5.0):
+        """
+        Stops accepting requests and waits for the executor thread. A request that is already
+        queued is still applied, so the final plan matches the last decision.
+        """
+        self._requests.close()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.error(f"SwitchExecutorThread did not stop within {timeout} seconds.")
+            else:
+                logger.info("SwitchExecutorThread joined successfully.")
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, foreground_event, target_guid):
+        """
+        Requests a switch to target_guid. Replaces a request that hasn't started yet.
+        Never blocks in threaded mode.
+        """
+        with self._lock:
+            self._sequence += 1
+            request = SwitchRequest(self._sequence, foreground_event, target_guid)
+            self._outstanding = request
+            self._submitted += 1
+        if self._threaded:
+            self._requests.put(request)
+        else:
+            self._execute(request)
+
+    def get_last_sequence(self):
+        """
+        Sequence number of the newest submitted request (0 before the first submit).
+        """
+        with self._lock:
+            return self._sequence
+
+    def get_pending_target(self):
+        """
+        Target GUID of the newest request that is queued or running, or None if no switch is outstanding.
+        While a switch is outstanding, this (not the active plan) is the plan the system is heading to.
+        """
+        request = self._outstanding
+        return request.target_guid if request is not None else None
+
+    def _run(self):
+        while True:
+            # Blocks without timeout; stop() closes the mailbox, which returns None once it's empty
+            request = self._requests.get()
+            if request is None:
+                break
+            try:
+                self._execute(request)
+            except Exception as e:
+                # Keep the executor alive, the next request may well succeed
+                logger.error("An unexpected error occurred while switching to power plan GUID '%s': %s", request.target_guid, e, exc_info=True)
+        logger.debug("SwitchExecutorThread loop finished.")
+
+    def _execute(self, request):
+        # _finish() runs whatever happens: an exception must not leave the target "outstanding",
+        # or every later decision for that plan would be dropped as already in progress.
+        try:
+            # Time may have passed since the decision: nothing to do if the plan is already active by now.
+            # (Inline, the caller has just compared against the active plan, so the query is skipped.)
+            # ensure_power_plan() queries and switches in one backend round trip where the backend supports it.
+            if self._threaded:
+                already_active, success = self._power_manager.ensure_power_plan(request.target_guid)
+                if already_active:
+                    self._skipped_already_active += 1
+                    logger.debug("Skipping switch to %s, it is already the active plan.", request.target_guid)
+                    # Reported as a successful switch: the system is on the requested plan
+                    self._on_complete(request, True)
+                    return
+            else:
+                success = self._power_manager.switch_power_plan(request.target_guid)
+            self._executed += 1
+            if not success:
+                self._failed += 1
+            self._on_complete(request, success)
+        finally:
+            self._finish(request)
+
+    def _finish(self, request):
+        with self._lock:
+            # Only the newest request clears the outstanding target; an older one finishing
+            # doesn't mean the system reached the plan of a request submitted after it.
+            if self._outstanding is not None and self._outstanding.sequence == request.sequence:
+                self._outstanding = None
+
+    def get_stats(self):
+        mailbox_stats = self._requests.get_stats()
+        return {
+            "threaded": self._threaded,
+            "alive": self.is_alive(),
+            "submitted": self._submitted,
+            "executed": self._executed,
+            "failed": self._failed,
+            "superseded_before_start": mailbox_stats["overwritten"],
+            "skipped_already_active": self._skipped_already_active,
+            "pending_target": self.get_pending_target(),
+        }
@@ -0,0 +1,145 @@
+import time
+
+
+class SwitchThrottle:
+    """
+    Rate limiter and hysteresis for power plan switches.
+
+    Two independent limits decide whether a switch may run now:
+      - token bucket: at most `burst` switches back to back, refilled at `rate_per_minute`;
+      - minimum dwell: after switching to a plan, stay on it for at least `min_dwell_seconds`.
+    A switch that is not allowed yet is not dropped: the caller keeps it as the pending "trailing"
+    switch and re-evaluates it once time_until_allowed() has elapsed, so after a ping-pong between
+    two apps the plan still ends up matching the app that kept focus.
+
+    Like FocusDebouncer, the throttle owns no thread and never sleeps; the processing loop asks how
+    long to wait. The injectable clock keeps it deterministic for tests and benchmarks.
+    """
+    def __init__(self, rate_per_minute=0.0, burst=1, min_dwell_seconds=0.0, clock=time.monotonic):
+        """
+        Args:
+            rate_per_minute: sustained switches per minute. 0 disables the token bucket.
+            burst: bucket capacity, i.e. switches allowed back to back before the rate applies.
+            min_dwell_seconds: minimum time between a switch and the next one. 0 disables it.
+            clock: callable returning monotonic time in seconds.
+        """
+        self._rate_per_second = max(0.0, float(rate_per_minute or 0.0)) / 60.0
+        self._capacity = max(1.0, float(burst or 1))
+        self._min_dwell_seconds = max(0.0, float(min_dwell_seconds or 0.0))
+        self._clock = clock
+
+        self._tokens = self._capacity
+        self._refilled_at = clock()
+        self._last_switch_at = None
+
+        self._pending = None # Trailing switch (opaque to the throttle, the caller's event)
+
+        self._allowed = 0
+        self._suppressed_rate = 0
+        self._suppressed_dwell = 0
+        self._trailing_scheduled = 0
+        self._trailing_superseded = 0
+
+    @property
+    def enabled(self):
+        return self._rate_per_second > 0 or self._min_dwell_seconds > 0
+
+    def _refill(self, now):
+        if self._rate_per_second > 0 and self._tokens < self._capacity:
+            self._tokens = min(self._capacity, self._tokens + (now - self._refilled_at) * self._rate_per_second)
+        self._refilled_at = now
+
+    def time_until_allowed(self):
+        """
+        Seconds until a switch would be allowed (0.0 if it is allowed now). Doesn't consume anything.
+        """
+        if not self.enabled:
+            return 0.0
+        now = self._clock()
+        self._refill(now)
+        wait = 0.0
+        if self._min_dwell_seconds > 0 and self._last_switch_at is not None:
+            wait = max(wait, self._last_switch_at + self._min_dwell_seconds - now)
+        if self._rate_per_second > 0 and self._tokens < 1.0:
+            wait = max(wait, (1.0 - self._tokens) / self._rate_per_second)
+        return wait
+
+    def try_acquire(self):
+        """
+        Returns True and consumes a token if a switch may run now. Otherwise counts the suppressed
+        switch (by the limit that blocked it) and returns False.
+        """
+        if not self.enabled:
+            self._allowed += 1
+            return True
+        now = self._clock()
+        self._refill(now)
+        if self._min_dwell_seconds > 0 and self._last_switch_at is not None \
+                and now - self._last_switch_at < self._min_dwell_seconds:
+            self._suppressed_dwell += 1
+            return False
+        if self._rate_per_second > 0:
+            if self._tokens < 1.0:
+                self._suppressed_rate += 1
+                return False
+            self._tokens -= 1.0
+        self._last_switch_at = now
+        self._allowed += 1
+        return True
+
+    # --- Trailing switch ---
+
+    def defer(self, item):
+        """
+        Keeps `item` as the trailing switch, replacing an older one.
+        """
+        if self._pending is not None:
+            self._trailing_superseded += 1
+        self._pending = item
+        self._trailing_scheduled += 1
+
+    def clear_pending(self):
+        """
+        Drops the trailing switch (a newer decision made it obsolete). Returns True if one was pending.
+        """
+        if self._pending is None:
+            return False
+        self._pending = None
+        self._trailing_superseded += 1
+        return True
+
+    def has_pending(self):
+        return self._pending is not None
+
+    def time_until_pending_ready(self):
+        """
+        Seconds until the trailing switch may run (0 if it may run now), or None if nothing is pending.
+        """
+        if self._pending is None:
+            return None
+        return self.time_until_allowed()
+
+    def pop_ready(self):
+        """
+        Returns and clears the trailing switch if it may run now, otherwise None.
+        """
+        if self._pending is None or self.time_until_allowed() > 0:
+            return None
+        item = self._pending
+        self._pending = None
+        return item
+
+    def get_stats(self):
+        return {
+            "enabled": self.enabled,
+            "rate_per_minute": self._rate_per_second * 60.0,
+            "burst": self._capacity,
+            "min_dwell_ms": self._min_dwell_seconds * 1000.0,
+            "allowed": self._allowed,
+            "suppressed_rate_limit": self._suppressed_rate,
+            "suppressed_min_dwell": self._suppressed_dwell,
+            "suppressed_total": self._suppressed_rate + self._suppressed_dwell,
+            "trailing_scheduled": self._trailing_scheduled,
+            "trailing_superseded": self._trailing_superseded,
+            "trailing_pending": self._pending is not None,
+        }
@@ -1,7 +1,14 @@
 import logging
 import configparser
+import hashlib
 import os
 import sys
+import threading
+
+from src.utils.metrics import get_registry
+from src.infrastructure.configuration.config_snapshot import build_config_snapshot
+from src.infrastructure.configuration.rule_engine import parse_rule_value, parse_running_rule_value
+from src.infrastructure.configuration.rule_index import compile_rule_index, load_rule_index, remove_stale_rule_indexes, rule_index_path
 
 # 获取当前模块的 logger
 logger = logging.getLogger(__name__)
@@ -26,10 +33,91 @@ CONFIG_FILE_PATH = os.path.join(PROJECT_ROOT, CONFIG_DIR_NAME, CONFIG_FILE_NAME)
 # 配置文件 section 名称
 SECTION_GENERAL = "General"
 SECTION_PROCESS_POWER_MAP = "ProcessPowerMap"
+# Pattern rules: "<label> = <kind> | <pattern> | <guid>" (see rule_engine.py)
+SECTION_PROCESS_POWER_RULES = "ProcessPowerRules"
+# Running process rules: "<process name or glob> = <guid> [| <priority>]", active while such a process runs
+SECTION_RUNNING_PROCESS_RULES = "RunningProcessRules"
 
 # General section keys
 KEY_DEFAULT_POWER_PLAN = "default_power_plan"
 KEY_LOG_LEVEL = "log_level"
+KEY_POWER_BACKEND = "power_backend"
+KEY_POWERCFG_PATH = "powercfg_path"
+KEY_ACTIVE_SCHEME_CACHE_TTL = "active_scheme_cache_ttl"
+KEY_FOCUS_SETTLE_MS = "focus_settle_ms"
+KEY_METRICS_ENABLED = "metrics_enabled"
+KEY_METRICS_DUMP_PATH = "metrics_dump_path"
+KEY_ASYNC_LOGGING = "async_logging"
+KEY_CONFIG_HOT_RELOAD = "config_hot_reload"
+KEY_CONFIG_RELOAD_INTERVAL = "config_reload_interval"
+KEY_SWITCH_RATE_PER_MINUTE = "switch_rate_per_minute"
+KEY_SWITCH_BURST = "switch_burst"
+KEY_MIN_PLAN_DWELL_MS = "min_plan_dwell_ms"
+KEY_BACKGROUND_SWITCHING = "background_switching"
+KEY_RULE_INDEX = "rule_index"
+KEY_RUNNING_PROCESS_POLL_INTERVAL = "running_process_poll_interval"
+KEY_INHERIT_PARENT_RULES = "inherit_parent_rules"
+KEY_PARENT_CHAIN_MAX_DEPTH = "parent_chain_max_depth"
+
+# Defaults for the power backend settings (see power_management/power_backends.py)
+DEFAULT_POWER_BACKEND = "subprocess"
+VALID_POWER_BACKENDS = ['subprocess', 'persistent', 'native']
+DEFAULT_POWERCFG_PATH = "powercfg"
+# Seconds the cached active power scheme is trusted (0 disables the cache)
+DEFAULT_ACTIVE_SCHEME_CACHE_TTL = 30.0
+# Milliseconds a foreground app must hold focus before its plan is applied.
+# 0 (the fallback for configs without the key) acts on every foreground change immediately;
+# newly created config files use FOCUS_SETTLE_MS_RECOMMENDED.
+DEFAULT_FOCUS_SETTLE_MS = 0.0
+FOCUS_SETTLE_MS_RECOMMENDED = 250
+# Hot-path metrics collection (see src/utils/metrics.py) is off unless enabled in the config.
+DEFAULT_METRICS_ENABLED = False
+# Where metrics are written on shutdown/on demand. Empty disables dumping; relative paths are relative to the project root.
+DEFAULT_METRICS_DUMP_PATH = ""
+# Queue-based logging (formatting and file I/O on a background thread, see src/utils/logging_config.py).
+# Off for configs without the key; newly created config files enable it.
+DEFAULT_ASYNC_LOGGING = False
+ASYNC_LOGGING_RECOMMENDED = True
+# Watch the config file and apply process map/rule/default plan changes without a restart
+# (see config_watcher.py). Off for configs without the key; newly created config files enable it.
+DEFAULT_CONFIG_HOT_RELOAD = False
+CONFIG_HOT_RELOAD_RECOMMENDED = True
+# Base poll interval of the config file watcher in seconds (backs off while the file is unchanged)
+DEFAULT_CONFIG_RELOAD_INTERVAL = 1.0
+# Switch throttling (see src/application/switch_throttle.py): sustained switches per minute with a burst
+# allowance, and the minimum time to stay on a plan before switching again. Switches held back are applied
+# later ("trailing"), so the final plan is still correct. Off for configs without the keys;
+# newly created config files use the recommended values.
+DEFAULT_SWITCH_RATE_PER_MINUTE = 0.0
+SWITCH_RATE_PER_MINUTE_RECOMMENDED = 20
+DEFAULT_SWITCH_BURST = 3.0
+DEFAULT_MIN_PLAN_DWELL_MS = 0.0
+MIN_PLAN_DWELL_MS_RECOMMENDED = 2000
+# Apply power plan switches on a dedicated executor thread (see src/application/switch_executor.py),
+# so a slow switch doesn't delay handling of later foreground events. Off for configs without the key
+# (switches run on the processing thread as before); newly created config files enable it.
+DEFAULT_BACKGROUND_SWITCHING = False
+BACKGROUND_SWITCHING_RECOMMENDED = True
+# Cache a compiled binary index of large [ProcessPowerMap] sections next to the config file (see rule_index.py)
+# and load it (memory-mapped) instead of parsing the file while its content hash is unchanged.
+# Off for configs without the key; newly created config files enable it.
+DEFAULT_RULE_INDEX = False
+RULE_INDEX_RECOMMENDED = True
+# Smaller maps parse in a few milliseconds, an index file isn't worth it
+RULE_INDEX_MIN_ENTRIES = 500
+# Seconds between process list polls of the running process tracker (only runs with [RunningProcessRules])
+DEFAULT_RUNNING_PROCESS_POLL_INTERVAL = 2.0
+# A foreground process without a rule of its own gets the plan of its nearest mapped ancestor
+# (launcher -> game, IDE -> build workers). Needs the running process tracker, so it is off by default.
+DEFAULT_INHERIT_PARENT_RULES = False
+# Ancestors checked at most; bounds the cost of a lookup regardless of the process tree
+DEFAULT_PARENT_CHAIN_MAX_DEPTH = 4
+MAX_PARENT_CHAIN_DEPTH = 32
+
+# Hot-path metrics (no-ops unless metrics are enabled)
+_plan_lookup_histogram = get_registry().histogram("config.plan_lookup")
+_plan_lookup_hits = get_registry().counter("config.plan_lookup_hits")
+_plan_lookup_misses = get_registry().counter("config.plan_lookup_misses")
 
 # Example common GUIDs (for default config file creation)
 # Note: These are common but may vary slightly; user should verify with 'powercfg /list'
@@ -53,13 +141,45 @@ class ConfigManager:
         """
         self._config_file_path = config_file_path
         self._config_parser = configparser.ConfigParser()
-        # Internal storage for parsed config data, mainly the process-power map
-        # Expect process name (lowercase) -> power plan GUID string
-        self._app_power_map = {}
-        # Expect default power plan GUID string
-        self._default_power_plan = None
+        # Serializes load_config/reload_config (startup, file watcher, GUI save)
+        self._load_lock = threading.Lock()
+        # Immutable snapshot of the process-power map, pattern rules, compiled matcher and default plan.
+        # Replaced as a whole on every (re)load; readers grab the reference once and never lock.
+        # The process map holds process name (lowercase) -> power plan GUID string.
+        self._snapshot = build_config_snapshot(0, None, {})
+        # Content hash of the file as of the last successful non-strict load_config, so that
+        # repeated load_config calls during startup don't parse the same file again
+        self._loaded_content_hash = None
         # Expect log level string, e.g., "INFO", "DEBUG"
         self._log_level = None
+        # Power backend name (see VALID_POWER_BACKENDS) and the powercfg executable used by CLI backends
+        self._power_backend = DEFAULT_POWER_BACKEND
+        self._powercfg_path = DEFAULT_POWERCFG_PATH
+        # Active power scheme cache TTL in seconds
+        self._active_scheme_cache_ttl = DEFAULT_ACTIVE_SCHEME_CACHE_TTL
+        # Focus settle window (debounce) in milliseconds
+        self._focus_settle_ms = DEFAULT_FOCUS_SETTLE_MS
+        # Metrics collection switch and dump file
+        self._metrics_enabled = DEFAULT_METRICS_ENABLED
+        self._metrics_dump_path = DEFAULT_METRICS_DUMP_PATH
+        # Queue-based (asynchronous) logging
+        self._async_logging = DEFAULT_ASYNC_LOGGING
+        # Hot reload: poll the config file for changes and swap in the new snapshot
+        self._config_hot_reload = DEFAULT_CONFIG_HOT_RELOAD
+        self._config_reload_interval = DEFAULT_CONFIG_RELOAD_INTERVAL
+        # Switch throttling
+        self._switch_rate_per_minute = DEFAULT_SWITCH_RATE_PER_MINUTE
+        self._switch_burst = DEFAULT_SWITCH_BURST
+        self._min_plan_dwell_ms = DEFAULT_MIN_PLAN_DWELL_MS
+        # Switch executor thread
+        self._background_switching = DEFAULT_BACKGROUND_SWITCHING
+        # Binary rule index cache for large process maps
+        self._rule_index = DEFAULT_RULE_INDEX
+        # Running process tracker poll interval in seconds
+        self._running_process_poll_interval = DEFAULT_RUNNING_PROCESS_POLL_INTERVAL
+        # Parent process chain matching
+        self._inherit_parent_rules = DEFAULT_INHERIT_PARENT_RULES
+        self._parent_chain_max_depth = DEFAULT_PARENT_CHAIN_MAX_DEPTH
 
         logger.debug(f"ConfigManager initialized with config file path: {self._config_file_path}")
 
@@ -67,9 +187,34 @@ class ConfigManager:
         """
         从配置文件加载应用程序配置。
         电源计划预期为 GUID。
+        文件内容先在局部变量中解析，进程映射、规则和默认计划最后作为一个新快照整体替换。
+        文件内容与上次成功加载时相同 (内容哈希一致) 时不再重复解析，直接返回 True，
+        因此启动过程中多个组件调用 load_config 只会解析一次。
+        无法读取或解析文件时使用默认设置并返回 False。
+        """
+        with self._load_lock:
+            return self._load_config_locked(strict=False)
+
+    def reload_config(self):
         """
+        热重载配置文件 (通常由 ConfigWatcher 在其线程上调用)。
+
+        与 load_config 不同，新内容必须完整解析成功才会生效；任何错误都保留当前快照。
+        只有进程映射、模式规则和默认电源计划会立即生效，其他 [General] 设置
+        (电源后端、日志、缓存 TTL 等) 需要重启程序，变更时记录警告。
+
+        Returns:
+            True 表示新配置已生效；文件内容未变化或新配置无效时返回 False。
+        """
+        with self._load_lock:
+            return self._load_config_locked(strict=True)
+
+    def _load_config_locked(self, strict):
         logger.info(f"Attempting to load configuration from: {self._config_file_path}")
         if not os.path.exists(self._config_file_path):
+            if strict:
+                logger.error(f"Configuration file {self._config_file_path} disappeared. Keeping the current configuration.")
+                return False
             logger.warning(f"Configuration file not found at {self._config_file_path}. Creating with default structure.")
             self._create_default_config_file()
             # After creating, attempt to load again. If creation failed, this load will fail too.
@@ -78,95 +223,339 @@ class ConfigManager:
                  return False
 
         try:
-            # Read the configuration file
-            # configparser.read() returns a list of filenames successfully read.
-            read_files = self._config_parser.read(self._config_file_path, encoding='utf-8')
-            if not read_files:
-                # This might happen if the file exists but is empty or read fails silently
-                logger.error(f"ConfigParser failed to read file: {self._config_file_path}. Read files: {read_files}")
-                # Attempt to reinitialize internal state with defaults or empty state on read failure
-                self._default_power_plan = GUID_BALANCED
-                self._log_level = "INFO"
-                self._app_power_map = {}
+            # Read the configuration file ourselves so the parsed text and its hash always match
+            with open(self._config_file_path, 'rb') as configfile:
+                raw_content = configfile.read()
+            content_hash = hashlib.sha256(raw_content).hexdigest()
+            if strict and content_hash == self._snapshot.content_hash:
+                logger.debug("Configuration file content is unchanged. Nothing to reload.")
                 return False
+            if not strict and content_hash == self._loaded_content_hash:
+                logger.debug("Configuration file content is unchanged since it was loaded. Skipping parsing.")
+                return True
+            # A fresh parser per load: sections/keys removed from the file must disappear
+            parser = configparser.ConfigParser()
+            # An index compiled from exactly this content replaces parsing: the process map is read from
+            # the memory-mapped file, the other sections are restored from their raw values.
+            # (The index file only exists if rule_index was enabled when this content was loaded before.)
+            rule_index = load_rule_index(rule_index_path(self._config_file_path, content_hash), content_hash)
+            if rule_index is not None:
+                rule_index.read_into(parser)
+            else:
+                parser.read_string(raw_content.decode('utf-8-sig'), source=self._config_file_path)
+        except (OSError, UnicodeDecodeError, configparser.Error) as e:
+            logger.error(f"Failed to read or parse config file '{self._config_file_path}': {e}", exc_info=True)
+            if strict:
+                logger.error("Invalid configuration was not applied. Keeping the current configuration.")
+                return False
+            # Ensure internal state defaults on read/parse failure
+            self._apply_general_settings(self._default_general_settings())
+            self._swap_snapshot(GUID_BALANCED, {}, [], None, [])
+            return False
 
+        if rule_index is not None:
+            logger.info(f"Configuration file unchanged since the rule index '{rule_index.path}' was built. Using the index.")
+        else:
             logger.info("Configuration file read successfully.")
 
+        try:
             # --- Parse General Section ---
-            if self._config_parser.has_section(SECTION_GENERAL):
-                try:
-                    # Get default power plan GUID (strip whitespace)
-                    # Use a common default GUID as fallback if not found in config or section missing/empty
-                    self._default_power_plan = self._config_parser.get(SECTION_GENERAL, KEY_DEFAULT_POWER_PLAN, fallback=GUID_BALANCED).strip()
-                    logger.info(f"Loaded default power plan GUID: {self._default_power_plan}")
-
-                    # Get log level string (strip whitespace, convert to uppercase)
-                    self._log_level = self._config_parser.get(SECTION_GENERAL, KEY_LOG_LEVEL, fallback="INFO").strip().upper()
-                    valid_levels = ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET']
-                    if self._log_level not in valid_levels:
-                        logger.warning(f"Invalid log level '{self._log_level}' in config '{KEY_LOG_LEVEL}'. Falling back to 'INFO'. Valid levels are: {', '.join(valid_levels)}")
-                        self._log_level = "INFO"
-                    logger.info(f"Loaded log level setting: {self._log_level}")
-
-                except Exception as e:
-                    logger.error(f"Error parsing '{SECTION_GENERAL}' section from '{self._config_file_path}': {e}", exc_info=True)
-                    # Ensure internal state is set to defaults on error in this section
-                    self._default_power_plan = GUID_BALANCED
-                    self._log_level = "INFO"
+            general_settings = self._parse_general_section(parser, strict)
 
+            # --- Parse ProcessPowerMap Section ---
+            if rule_index is not None:
+                app_power_map = rule_index.process_map
+                logger.info(f"Loaded {len(app_power_map)} process-to-power plan map entries from the rule index.")
             else:
-                logger.warning(f"'{SECTION_GENERAL}' section not found in config file. Using default General settings.")
-                # Ensure internal state is set to defaults
-                self._default_power_plan = GUID_BALANCED
-                self._log_level = "INFO"
+                app_power_map = self._parse_process_power_map(parser, strict)
 
-            # --- Parse ProcessPowerMap Section ---
-            self._app_power_map = {} # Clear previous map before parsing
-            if self._config_parser.has_section(SECTION_PROCESS_POWER_MAP):
-                try:
-                    # Parse all items in the map section. Expect process name and power plan GUID.
-                    for process_name, power_plan_guid_str in self._config_parser.items(SECTION_PROCESS_POWER_MAP):
-                        clean_process_name = process_name.strip()
-                        clean_power_plan_guid = power_plan_guid_str.strip()
-                        # Basic validation: check if it's a process name and something that looks like a GUID
-                        # A more robust check could use a regex for GUID format.
-                        # For now, just check if both key and value are non-empty after stripping.
-                        if clean_process_name and clean_power_plan_guid:
-                            # Store process names lowercase for case-insensitive matching later
-                            # Store GUID as cleaned string. Validation of GUID format happens when powercfg is called.
-                            self._app_power_map[clean_process_name.lower()] = clean_power_plan_guid
-                            # logger.debug(f"Loaded map entry: '{clean_process_name}' -> '{clean_power_plan_guid}'") # Too verbose potentially
-                        # else: commented entries or entries with empty key/value will be skipped
-                        # logger.debug(f"Skipping potential invalid map entry (empty key/value or comment): '{process_name}' -> '{power_plan_guid_str}'")
-
-                    logger.info(f"Loaded {len(self._app_power_map)} process-to-power plan map entries (expecting GUIDs).")
-
-                except Exception as e:
-                    logger.error(f"Error parsing '{SECTION_PROCESS_POWER_MAP}' section from '{self._config_file_path}': {e}", exc_info=True)
-                    self._app_power_map = {} # Clear map on failure
+            # --- Parse ProcessPowerRules Section (optional) ---
+            process_rules = self._parse_process_rules(parser, strict)
 
-            else:
-                logger.warning(f"'{SECTION_PROCESS_POWER_MAP}' section not found in config file. Process-Power map is empty.")
-                self._app_power_map = {}
-
-            logger.info("Configuration loading finished.")
-            return True
-
-        except configparser.Error as e:
-            logger.error(f"ConfigParser error while loading file '{self._config_file_path}': {e}", exc_info=True)
-            # Ensure internal state defaults on major configparser error
-            self._default_power_plan = GUID_BALANCED
-            self._log_level = "INFO"
-            self._app_power_map = {}
-            return False
+            # --- Parse RunningProcessRules Section (optional) ---
+            running_rules = self._parse_running_process_rules(parser, strict)
         except Exception as e:
-            logger.error(f"An unexpected error occurred during config loading from '{self._config_file_path}': {e}", exc_info=True)
-            # Ensure internal state defaults on any exception
-            self._default_power_plan = GUID_BALANCED
-            self._log_level = "INFO"
-            self._app_power_map = {}
+            # Only reached in strict mode, non-strict parsing falls back to defaults per section
+            logger.error(f"Error parsing config file '{self._config_file_path}': {e}", exc_info=True)
+            logger.error("Invalid configuration was not applied. Keeping the current configuration.")
             return False
 
+        if rule_index is None:
+            # The running setting decides on reload (like every [General] setting it applies after a restart)
+            index_enabled = self._rule_index if strict else general_settings["rule_index"]
+            app_power_map = self._update_rule_index(index_enabled, parser, app_power_map, content_hash)
+
+        if strict:
+            # Settings read once at startup can't change while running
+            self._log_restart_required_changes(general_settings)
+        else:
+            self._apply_general_settings(general_settings)
+            self._loaded_content_hash = content_hash
+        self._config_parser = parser
+
+        # Compile exact entries, wildcard keys and pattern rules into one matcher and swap the snapshot
+        self._swap_snapshot(general_settings["default_power_plan"], app_power_map, process_rules, content_hash, running_rules)
+
+        logger.info("Configuration %s (version %s).", "reloaded" if strict else "loading finished", self._snapshot.version)
+        return True
+
+    @staticmethod
+    def _default_general_settings():
+        """
+        [General] 各项设置的默认值 (键为 ConfigManager 的属性名，去掉前导下划线)。
+        """
+        return {
+            "default_power_plan": GUID_BALANCED,
+            "log_level": "INFO",
+            "async_logging": DEFAULT_ASYNC_LOGGING,
+            "power_backend": DEFAULT_POWER_BACKEND,
+            "powercfg_path": DEFAULT_POWERCFG_PATH,
+            "active_scheme_cache_ttl": DEFAULT_ACTIVE_SCHEME_CACHE_TTL,
+            "focus_settle_ms": DEFAULT_FOCUS_SETTLE_MS,
+            "metrics_enabled": DEFAULT_METRICS_ENABLED,
+            "metrics_dump_path": DEFAULT_METRICS_DUMP_PATH,
+            "config_hot_reload": DEFAULT_CONFIG_HOT_RELOAD,
+            "config_reload_interval": DEFAULT_CONFIG_RELOAD_INTERVAL,
+            "switch_rate_per_minute": DEFAULT_SWITCH_RATE_PER_MINUTE,
+            "switch_burst": DEFAULT_SWITCH_BURST,
+            "min_plan_dwell_ms": DEFAULT_MIN_PLAN_DWELL_MS,
+            "background_switching": DEFAULT_BACKGROUND_SWITCHING,
+            "rule_index": DEFAULT_RULE_INDEX,
+            "running_process_poll_interval": DEFAULT_RUNNING_PROCESS_POLL_INTERVAL,
+            "inherit_parent_rules": DEFAULT_INHERIT_PARENT_RULES,
+            "parent_chain_max_depth": DEFAULT_PARENT_CHAIN_MAX_DEPTH,
+        }
+
+    def _apply_general_settings(self, settings):
+        """
+        将解析出的 [General] 设置写入实例属性 (默认电源计划属于快照，不在此处理)。
+        """
+        for name, value in settings.items():
+            if name != "default_power_plan":
+                setattr(self, "_" + name, value)
+
+    def _log_restart_required_changes(self, settings):
+        for name, value in settings.items():
+            if name != "default_power_plan" and getattr(self, "_" + name) != value:
+                logger.warning(f"Setting '{name}' changed from '{getattr(self, '_' + name)}' to '{value}'. This setting takes effect after restarting the application.")
+
+    def _parse_general_section(self, parser, strict):
+        """
+        解析 [General] 部分，返回设置字典。
+        非严格模式下出错时返回默认值；严格模式 (热重载) 下异常向上抛出。
+        """
+        settings = self._default_general_settings()
+        if not parser.has_section(SECTION_GENERAL):
+            logger.warning(f"'{SECTION_GENERAL}' section not found in config file. Using default General settings.")
+            return settings
+        try:
+            # Get default power plan GUID (strip whitespace)
+            # Use a common default GUID as fallback if not found in config or section missing/empty
+            # GUIDs are stored lowercase so per-event comparisons need no normalization
+            settings["default_power_plan"] = parser.get(SECTION_GENERAL, KEY_DEFAULT_POWER_PLAN, fallback=GUID_BALANCED).strip().lower()
+            logger.info(f"Loaded default power plan GUID: {settings['default_power_plan']}")
+
+            # Get log level string (strip whitespace, convert to uppercase)
+            log_level = parser.get(SECTION_GENERAL, KEY_LOG_LEVEL, fallback="INFO").strip().upper()
+            valid_levels = ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET']
+            if log_level not in valid_levels:
+                logger.warning(f"Invalid log level '{log_level}' in config '{KEY_LOG_LEVEL}'. Falling back to 'INFO'. Valid levels are: {', '.join(valid_levels)}")
+                log_level = "INFO"
+            settings["log_level"] = log_level
+            logger.info(f"Loaded log level setting: {log_level}")
+
+            settings["async_logging"] = self._get_bool_setting(SECTION_GENERAL, KEY_ASYNC_LOGGING, DEFAULT_ASYNC_LOGGING, parser=parser)
+            logger.info(f"Loaded async logging setting: {settings['async_logging']}")
+
+            # Get power backend name (strip whitespace, convert to lowercase)
+            power_backend = parser.get(SECTION_GENERAL, KEY_POWER_BACKEND, fallback=DEFAULT_POWER_BACKEND).strip().lower()
+            if power_backend not in VALID_POWER_BACKENDS:
+                logger.warning(f"Invalid power backend '{power_backend}' in config '{KEY_POWER_BACKEND}'. Falling back to '{DEFAULT_POWER_BACKEND}'. Valid backends are: {', '.join(VALID_POWER_BACKENDS)}")
+                power_backend = DEFAULT_POWER_BACKEND
+            settings["power_backend"] = power_backend
+            settings["powercfg_path"] = parser.get(SECTION_GENERAL, KEY_POWERCFG_PATH, fallback=DEFAULT_POWERCFG_PATH).strip() or DEFAULT_POWERCFG_PATH
+            logger.info(f"Loaded power backend setting: {settings['power_backend']} (powercfg: {settings['powercfg_path']})")
+
+            settings["active_scheme_cache_ttl"] = self._get_float_setting(SECTION_GENERAL, KEY_ACTIVE_SCHEME_CACHE_TTL, DEFAULT_ACTIVE_SCHEME_CACHE_TTL, parser=parser)
+            logger.info(f"Loaded active scheme cache TTL: {settings['active_scheme_cache_ttl']}s")
+
+            settings["focus_settle_ms"] = self._get_float_setting(SECTION_GENERAL, KEY_FOCUS_SETTLE_MS, DEFAULT_FOCUS_SETTLE_MS, parser=parser)
+            logger.info(f"Loaded focus settle window: {settings['focus_settle_ms']} ms")
+
+            settings["metrics_enabled"] = self._get_bool_setting(SECTION_GENERAL, KEY_METRICS_ENABLED, DEFAULT_METRICS_ENABLED, parser=parser)
+            settings["metrics_dump_path"] = parser.get(SECTION_GENERAL, KEY_METRICS_DUMP_PATH, fallback=DEFAULT_METRICS_DUMP_PATH).strip()
+            logger.info(f"Loaded metrics settings: enabled={settings['metrics_enabled']}, dump path='{settings['metrics_dump_path']}'")
+
+            settings["config_hot_reload"] = self._get_bool_setting(SECTION_GENERAL, KEY_CONFIG_HOT_RELOAD, DEFAULT_CONFIG_HOT_RELOAD, parser=parser)
+            settings["config_reload_interval"] = self._get_float_setting(SECTION_GENERAL, KEY_CONFIG_RELOAD_INTERVAL, DEFAULT_CONFIG_RELOAD_INTERVAL, minimum=0.1, parser=parser)
+            logger.info(f"Loaded config hot reload setting: {settings['config_hot_reload']} (poll interval {settings['config_reload_interval']}s)")
+
+            settings["switch_rate_per_minute"] = self._get_float_setting(SECTION_GENERAL, KEY_SWITCH_RATE_PER_MINUTE, DEFAULT_SWITCH_RATE_PER_MINUTE, parser=parser)
+            settings["switch_burst"] = self._get_float_setting(SECTION_GENERAL, KEY_SWITCH_BURST, DEFAULT_SWITCH_BURST, minimum=1.0, parser=parser)
+            settings["min_plan_dwell_ms"] = self._get_float_setting(SECTION_GENERAL, KEY_MIN_PLAN_DWELL_MS, DEFAULT_MIN_PLAN_DWELL_MS, parser=parser)
+            logger.info(f"Loaded switch throttling: {settings['switch_rate_per_minute']}/min (burst {settings['switch_burst']}), min plan dwell {settings['min_plan_dwell_ms']} ms")
+
+            settings["background_switching"] = self._get_bool_setting(SECTION_GENERAL, KEY_BACKGROUND_SWITCHING, DEFAULT_BACKGROUND_SWITCHING, parser=parser)
+            logger.info(f"Loaded background switching setting: {settings['background_switching']}")
+
+            settings["rule_index"] = self._get_bool_setting(SECTION_GENERAL, KEY_RULE_INDEX, DEFAULT_RULE_INDEX, parser=parser)
+            logger.info(f"Loaded rule index setting: {settings['rule_index']}")
+
+            settings["running_process_poll_interval"] = self._get_float_setting(SECTION_GENERAL, KEY_RUNNING_PROCESS_POLL_INTERVAL, DEFAULT_RUNNING_PROCESS_POLL_INTERVAL, minimum=0.1, parser=parser)
+            logger.info(f"Loaded running process poll interval: {settings['running_process_poll_interval']}s")
+
+            settings["inherit_parent_rules"] = self._get_bool_setting(SECTION_GENERAL, KEY_INHERIT_PARENT_RULES, DEFAULT_INHERIT_PARENT_RULES, parser=parser)
+            settings["parent_chain_max_depth"] = int(min(MAX_PARENT_CHAIN_DEPTH, self._get_float_setting(SECTION_GENERAL, KEY_PARENT_CHAIN_MAX_DEPTH, DEFAULT_PARENT_CHAIN_MAX_DEPTH, minimum=1, parser=parser)))
+            logger.info(f"Loaded parent rule inheritance: {settings['inherit_parent_rules']} (max depth {settings['parent_chain_max_depth']})")
+
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Error parsing '{SECTION_GENERAL}' section from '{self._config_file_path}': {e}", exc_info=True)
+            # Ensure internal state is set to defaults on error in this section
+            settings = self._default_general_settings()
+        return settings
+
+    def _parse_process_power_map(self, parser, strict):
+        """
+        解析 [ProcessPowerMap] 部分，返回 {进程名(小写): GUID} 字典。
+        """
+        app_power_map = {}
+        if not parser.has_section(SECTION_PROCESS_POWER_MAP):
+            logger.warning(f"'{SECTION_PROCESS_POWER_MAP}' section not found in config file. Process-Power map is empty.")
+            return app_power_map
+        try:
+            # Parse all items in the map section. Expect process name and power plan GUID.
+            for process_name, power_plan_guid_str in parser.items(SECTION_PROCESS_POWER_MAP):
+                clean_process_name = process_name.strip()
+                clean_power_plan_guid = power_plan_guid_str.strip()
+                # Basic validation: check if it's a process name and something that looks like a GUID
+                # A more robust check could use a regex for GUID format.
+                # For now, just check if both key and value are non-empty after stripping.
+                if clean_process_name and clean_power_plan_guid:
+                    # Store process names lowercase for case-insensitive matching later
+                    # Store GUID as cleaned lowercase string. Validation of GUID format happens when powercfg is called.
+                    app_power_map[clean_process_name.lower()] = clean_power_plan_guid.lower()
+                    # logger.debug(f"Loaded map entry: '{clean_process_name}' -> '{clean_power_plan_guid}'") # Too verbose potentially
+                # else: commented entries or entries with empty key/value will be skipped
+                # logger.debug(f"Skipping potential invalid map entry (empty key/value or comment): '{process_name}' -> '{power_plan_guid_str}'")
+
+            logger.info(f"Loaded {len(app_power_map)} process-to-power plan map entries (expecting GUIDs).")
+
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Error parsing '{SECTION_PROCESS_POWER_MAP}' section from '{self._config_file_path}': {e}", exc_info=True)
+            app_power_map = {} # Clear map on failure
+        return app_power_map
+
+    def _parse_process_rules(self, parser, strict):
+        """
+        解析可选的 [ProcessPowerRules] 部分，返回 ProcessRule 列表 (按文件顺序)。
+        """
+        process_rules = []
+        if not parser.has_section(SECTION_PROCESS_POWER_RULES):
+            return process_rules
+        try:
+            # raw=True: regex patterns may contain '%', which must not be treated as interpolation
+            for label, rule_value in parser.items(SECTION_PROCESS_POWER_RULES, raw=True):
+                rule = parse_rule_value(label.strip(), rule_value)
+                if rule is not None:
+                    process_rules.append(rule)
+            logger.info(f"Loaded {len(process_rules)} process power rules.")
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Error parsing '{SECTION_PROCESS_POWER_RULES}' section from '{self._config_file_path}': {e}", exc_info=True)
+            process_rules = []
+        return process_rules
+
+    def _parse_running_process_rules(self, parser, strict):
+        """
+        解析可选的 [RunningProcessRules] 部分，返回 RunningProcessRule 列表 (按文件顺序)。
+        """
+        running_rules = []
+        if not parser.has_section(SECTION_RUNNING_PROCESS_RULES):
+            return running_rules
+        try:
+            for pattern, rule_value in parser.items(SECTION_RUNNING_PROCESS_RULES, raw=True):
+                rule = parse_running_rule_value(pattern, rule_value)
+                if rule is not None:
+                    running_rules.append(rule)
+            logger.info(f"Loaded {len(running_rules)} running process rules.")
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Error parsing '{SECTION_RUNNING_PROCESS_RULES}' section from '{self._config_file_path}': {e}", exc_info=True)
+            running_rules = []
+        return running_rules
+
+    def _update_rule_index(self, enabled, parser, app_power_map, content_hash):
+        """
+        配置文件被完整解析后调用: 启用且映射足够大时把进程映射和其他 section 编译为二进制索引，
+        下次内容不变时直接加载索引；同时删除该配置文件的旧索引。
+
+        Returns:
+            新索引中的映射 (内存映射，代替解析出的字典以节省内存)；未写入索引时返回原映射。
+        """
+        if not enabled or len(app_power_map) < RULE_INDEX_MIN_ENTRIES:
+            remove_stale_rule_indexes(self._config_file_path)
+            return app_power_map
+        index_path = rule_index_path(self._config_file_path, content_hash)
+        # raw=True: values are restored into a new parser when the index is loaded, interpolation happens there
+        sections = {
+            section: dict(parser.items(section, raw=True))
+            for section in parser.sections() if section != SECTION_PROCESS_POWER_MAP
+        }
+        if not compile_rule_index(index_path, content_hash, app_power_map, sections):
+            return app_power_map
+        remove_stale_rule_indexes(self._config_file_path, keep_path=index_path)
+        rule_index = load_rule_index(index_path, content_hash)
+        if rule_index is None:
+            return app_power_map
+        return rule_index.process_map
+
+    def _swap_snapshot(self, default_power_plan, app_power_map, process_rules, content_hash, running_rules):
+        """
+        编译新的快照 (匹配引擎在这里构建，不持有任何锁) 并通过一次赋值替换当前快照。
+        """
+        snapshot = build_config_snapshot(self._snapshot.version + 1, default_power_plan, app_power_map, process_rules, content_hash, running_rules)
+        self._snapshot = snapshot
+        logger.debug(f"Configuration snapshot {snapshot.version} active. Rule engine: {snapshot.rule_engine.get_stats()}")
+        return snapshot
+
+    def _get_float_setting(self, section, key, fallback, minimum=0.0, parser=None):
+        """
+        读取一个数值配置项。缺失、无法解析或小于 minimum 时返回 fallback 并记录警告。
+        parser 为 None 时读取当前生效的配置。
+        """
+        parser = parser if parser is not None else self._config_parser
+        raw_value = parser.get(section, key, fallback=None)
+        if raw_value is None or not raw_value.strip():
+            return fallback
+        try:
+            value = float(raw_value.strip())
+        except ValueError:
+            logger.warning(f"Invalid numeric value '{raw_value}' for '{key}' in section '{section}'. Falling back to {fallback}.")
+            return fallback
+        if minimum is not None and value < minimum:
+            logger.warning(f"Value {value} for '{key}' in section '{section}' is below the minimum {minimum}. Falling back to {fallback}.")
+            return fallback
+        return value
+
+    def _get_bool_setting(self, section, key, fallback, parser=None):
+        """
+        读取一个布尔配置项 (true/false, yes/no, on/off, 1/0)。缺失或无法解析时返回 fallback 并记录警告。
+        parser 为 None 时读取当前生效的配置。
+        """
+        parser = parser if parser is not None else self._config_parser
+        try:
+            return parser.getboolean(section, key, fallback=fallback)
+        except ValueError:
+            raw_value = parser.get(section, key, fallback="")
+            logger.warning(f"Invalid boolean value '{raw_value}' for '{key}' in section '{section}'. Falling back to {fallback}.")
+            return fallback
+
     def save_config(self, config_data: dict):
         """
         将配置数据保存到配置文件。
@@ -256,6 +645,14 @@ class ConfigManager:
             # Use default GUID for Balanced plan (common, but user should verify with 'powercfg /list')
             KEY_DEFAULT_POWER_PLAN: GUID_BALANCED,
             KEY_LOG_LEVEL: 'INFO',             # Default logging level
+            KEY_POWER_BACKEND: DEFAULT_POWER_BACKEND, # How powercfg is invoked
+            KEY_FOCUS_SETTLE_MS: str(FOCUS_SETTLE_MS_RECOMMENDED), # Debounce rapid alt-tabbing
+            KEY_ASYNC_LOGGING: str(ASYNC_LOGGING_RECOMMENDED).lower(), # Keep log I/O off the event threads
+            KEY_CONFIG_HOT_RELOAD: str(CONFIG_HOT_RELOAD_RECOMMENDED).lower(), # Apply map edits without a restart
+            KEY_SWITCH_RATE_PER_MINUTE: str(SWITCH_RATE_PER_MINUTE_RECOMMENDED), # Cap powercfg invocations
+            KEY_MIN_PLAN_DWELL_MS: str(MIN_PLAN_DWELL_MS_RECOMMENDED), # Don't flip plans on focus ping-pong
+            KEY_BACKGROUND_SWITCHING: str(BACKGROUND_SWITCHING_RECOMMENDED).lower(), # Slow switches don't delay event handling
+            KEY_RULE_INDEX: str(RULE_INDEX_RECOMMENDED).lower(), # Load large process maps from a compiled index
         }
 
         config[SECTION_PROCESS_POWER_MAP] = {
@@ -290,13 +687,16 @@ class ConfigManager:
         except Exception as e:
              logger.error(f"An unexpected error occurred during default config file creation at '{self._config_file_path}': {e}", exc_info=True)
 
-    def get_power_plan_for_process(self, process_name: str):
+    def get_power_plan_for_process(self, process_name: str, image_path=None, snapshot=None):
         """
-        根据进程名称查询对应的电源计划 GUID。
+        根据进程名称 (和可选的完整路径) 查询对应的电源计划 GUID。
         期望配置文件中的值为 GUID。
+        先精确匹配进程名，再按顺序匹配通配符/正则/路径规则 (见 rule_engine.py)。
 
         Args:
             process_name: 前台应用的进程名称 (例如 "chrome.exe")。
+            image_path: 可选，进程的完整映像路径 (例如 "D:\\Games\\foo\\foo.exe")，路径规则需要它。
+            snapshot: 可选，使用指定的配置快照 (见 get_snapshot)，调用方可借此让一次处理中的多次查询看到同一份配置。
 
         Returns:
             查找到的电源计划 GUID 字符串。
@@ -305,17 +705,55 @@ class ConfigManager:
         """
         if not process_name:
             return None
-        # Use case-insensitive lookup because process names from OS might vary in casing
-        lookup_name = process_name.lower().strip()
-        power_plan_guid = self._app_power_map.get(lookup_name)
-        # logger.debug(f"Looking up power plan for process '{process_name}' ({lookup_name}) -> '{power_plan_guid}'") # Too verbose
+        started = _plan_lookup_histogram.start()
+        # Case-insensitive lookup because process names from OS might vary in casing.
+        # The engine checks the exact-name table first and memoizes pattern rule results.
+        # The snapshot is immutable and replaced as a whole on reload, so no lock is needed here.
+        power_plan_guid = (snapshot or self._snapshot).match(process_name, image_path)
+        # logger.debug(f"Looking up power plan for process '{process_name}' -> '{power_plan_guid}'") # Too verbose
+        _plan_lookup_histogram.stop(started)
+        if power_plan_guid is None:
+            _plan_lookup_misses.inc()
+        else:
+            _plan_lookup_hits.inc()
         return power_plan_guid
 
     def get_default_power_plan(self):
         """
         获取配置文件中定义的默认电源计划 GUID。
         """
-        return self._default_power_plan
+        return self._snapshot.default_power_plan
+
+    def get_snapshot(self):
+        """
+        获取当前生效的不可变配置快照 (ConfigSnapshot)。
+        配置重新加载时快照整体替换，已取得的快照不会被修改。
+        """
+        return self._snapshot
+
+    def get_config_version(self):
+        """
+        获取当前配置快照的版本号，每次 (重新) 加载或内部更新都会递增。
+        """
+        return self._snapshot.version
+
+    def get_config_file_path(self):
+        """
+        获取配置文件的完整路径。
+        """
+        return self._config_file_path
+
+    def get_config_hot_reload(self):
+        """
+        是否监视配置文件并在其变化时自动重新加载进程映射、规则和默认电源计划。
+        """
+        return self._config_hot_reload
+
+    def get_config_reload_interval(self):
+        """
+        获取配置文件监视的基础轮询间隔 (秒)。
+        """
+        return self._config_reload_interval
 
     def get_log_level(self):
         """
@@ -323,12 +761,125 @@ class ConfigManager:
         """
         return self._log_level
 
+    def get_async_logging(self):
+        """
+        是否使用异步 (队列) 日志：格式化和文件写入在后台线程完成。
+        """
+        return self._async_logging
+
+    def get_power_backend(self):
+        """
+        获取配置文件中定义的电源后端名称 (例如 "subprocess", "persistent").
+        """
+        return self._power_backend
+
+    def get_powercfg_path(self):
+        """
+        获取 powercfg 可执行文件的名称或路径 (CLI 后端使用).
+        """
+        return self._powercfg_path
+
+    def get_active_scheme_cache_ttl(self):
+        """
+        获取活动电源计划缓存的有效期 (秒)。0 表示禁用缓存。
+        """
+        return self._active_scheme_cache_ttl
+
+    def get_focus_settle_ms(self):
+        """
+        获取前台切换的稳定等待时间 (毫秒)。前台应用保持焦点超过该时间后才会切换电源计划。
+        """
+        return self._focus_settle_ms
+
+    def get_switch_rate_per_minute(self):
+        """
+        获取每分钟允许的电源计划切换次数 (令牌桶速率)。0 表示不限制。
+        """
+        return self._switch_rate_per_minute
+
+    def get_switch_burst(self):
+        """
+        获取令牌桶容量：允许连续切换的次数。
+        """
+        return self._switch_burst
+
+    def get_min_plan_dwell_ms(self):
+        """
+        获取切换到某个电源计划后至少保持的时间 (毫秒)。0 表示不限制。
+        """
+        return self._min_plan_dwell_ms
+
+    def get_background_switching(self):
+        """
+        是否在独立的切换线程上执行电源计划切换 (处理线程只提交目标计划，不等待切换完成)。
+        """
+        return self._background_switching
+
+    def get_rule_index(self):
+        """
+        是否为大型进程映射缓存二进制规则索引 (配置文件内容不变时加载索引而不解析文件)。
+        """
+        return self._rule_index
+
+    def get_running_process_poll_interval(self):
+        """
+        获取运行进程跟踪器轮询进程列表的间隔 (秒)。
+        """
+        return self._running_process_poll_interval
+
+    def get_inherit_parent_rules(self):
+        """
+        没有匹配规则的前台进程是否沿父进程链查找 (使用最近的有匹配规则的祖先进程的电源计划)。
+        """
+        return self._inherit_parent_rules
+
+    def get_parent_chain_max_depth(self):
+        """
+        获取沿父进程链最多检查的祖先进程数量。
+        """
+        return self._parent_chain_max_depth
+
+    def get_running_process_rules(self):
+        """
+        获取 [RunningProcessRules] 中解析出的规则列表 (RunningProcessRule 元组)。
+        """
+        return self._snapshot.running_rules.get_rules()
+
+    def get_metrics_enabled(self):
+        """
+        是否启用热路径指标收集 (计数器和耗时直方图)。
+        """
+        return self._metrics_enabled
+
+    def get_metrics_dump_path(self):
+        """
+        获取指标转储文件的完整路径；未配置时返回 None。相对路径以项目根目录为基准。
+        """
+        if not self._metrics_dump_path:
+            return None
+        if os.path.isabs(self._metrics_dump_path):
+            return self._metrics_dump_path
+        return os.path.join(PROJECT_ROOT, self._metrics_dump_path)
+
+    def get_process_rules(self):
+        """
+        获取 [ProcessPowerRules] 中解析出的模式规则列表 (ProcessRule 元组)。
+        """
+        return list(self._snapshot.process_rules)
+
+    def get_rule_engine_stats(self):
+        """
+        获取规则匹配引擎的统计信息 (规则数量、记忆表命中率)。
+        """
+        return self._snapshot.rule_engine.get_stats()
+
     def get_app_power_map(self):
         """
         获取当前加载的应用进程到电源计划 GUID 的映射字典。
-        返回的数据是一个副本，防止外部直接修改内部状态。
+        返回的数据是一个副本，可以自由修改 (例如在 GUI 中编辑后传给 update_app_power_map)。
+        只读访问可以直接使用 get_snapshot().app_power_map，无需复制。
         """
-        return self._app_power_map.copy()
+        return dict(self._snapshot.app_power_map)
 
     # Methods for updating internal state from external data (e.g., from GUI)
     # These methods are intended for GUI interaction and update internal state, NOT the config file.
@@ -348,14 +899,18 @@ class ConfigManager:
              logger.error("update_app_power_map expects a dictionary.")
              return
 
-        # Build the new map from the input data, ensuring keys are lowercase and values are stripped strings
-        self._app_power_map = {
-            str(k).strip().lower(): str(v).strip()
+        # Build the new map from the input data, ensuring keys and values (GUIDs) are stripped lowercase strings
+        app_power_map = {
+            str(k).strip().lower(): str(v).strip().lower()
             for k, v in new_map_data.items()
             # Only include entries where both key (process name) and value (GUID) are non-empty after stripping
             if str(k).strip() and str(v).strip()
         }
-        logger.info(f"Internal app power map updated. Contains {len(self._app_power_map)} entries (expecting GUIDs).")
+        with self._load_lock:
+            current = self._snapshot
+            # Keep the content hash: the file itself did not change, a later reload must still compare against it
+            self._swap_snapshot(current.default_power_plan, app_power_map, current.process_rules, current.content_hash, current.running_rules.get_rules())
+        logger.info(f"Internal app power map updated. Contains {len(app_power_map)} entries (expecting GUIDs).")
 
     def update_general_settings(self, default_power_plan_guid=None, log_level=None):
         """
@@ -369,8 +924,11 @@ class ConfigManager:
             log_level: 新的日志级别字符串 (例如 "INFO").
         """
         if default_power_plan_guid is not None:
-             self._default_power_plan = str(default_power_plan_guid).strip()
-             logger.info(f"Internal default power plan GUID updated to: {self._default_power_plan}")
+             with self._load_lock:
+                 # Only the default plan changes: the compiled rule engine is reused, readers switch over with one assignment
+                 current = self._snapshot
+                 self._snapshot = current.with_default_power_plan(current.version + 1, str(default_power_plan_guid).strip().lower())
+             logger.info(f"Internal default power plan GUID updated to: {self._snapshot.default_power_plan}")
 
         if log_level is not None:
              log_level_str = str(log_level).strip().upper()
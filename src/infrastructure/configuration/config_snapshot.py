@@ -0,0 +1,79 @@
+import dataclasses
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+from src.infrastructure.configuration.rule_engine import ProcessRuleEngine, RunningProcessRuleSet
+from src.infrastructure.configuration.rule_index import CompiledProcessMap
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """
+    不可变的配置快照: 进程映射、模式规则、编译好的匹配引擎和默认电源计划。
+
+    ConfigManager 每次 (重新) 加载或内部更新配置都会创建新的快照，并通过一次属性赋值整体替换旧快照。
+    读取方 (处理线程、GUI) 先取得快照引用再使用其中的字段，因此读取无需加锁也不会等待，
+    不会看到更新到一半的映射，也不会在遍历映射时遇到它被修改。
+
+    所有 GUID 在加载时已规范化为小写 (去除空白)，读取方可以直接比较。
+
+    - version: 每次替换递增，用于判断配置是否变化
+    - default_power_plan: 默认电源计划 GUID
+    - app_power_map: 只读的 {进程名(小写): GUID} 映射 (MappingProxyType，或从规则索引加载的 CompiledProcessMap)
+    - process_rules: [ProcessPowerRules] 中的规则 (ProcessRule 元组)
+    - rule_engine: 由 app_power_map 和 process_rules 编译的 ProcessRuleEngine
+      (引擎的规则不可变，只有内部的记忆表会增长，字典单次操作在多线程下是安全的)
+    - content_hash: 来源文件内容的 SHA-256 (未从文件加载时为 None)
+    - running_rules: [RunningProcessRules] 编译成的 RunningProcessRuleSet (没有规则时为空集合)
+    """
+    version: int
+    default_power_plan: Optional[str]
+    app_power_map: Mapping[str, str]
+    process_rules: Tuple[Any, ...]
+    rule_engine: ProcessRuleEngine
+    content_hash: Optional[str] = None
+    running_rules: Optional[RunningProcessRuleSet] = None
+
+    def __post_init__(self):
+        # Freeze containers handed in directly, so no caller can keep a mutable alias of the snapshot's data.
+        # (frozen dataclasses only allow this through object.__setattr__)
+        if not isinstance(self.app_power_map, (MappingProxyType, CompiledProcessMap)):
+            object.__setattr__(self, "app_power_map", MappingProxyType(dict(self.app_power_map or {})))
+        if not isinstance(self.process_rules, tuple):
+            object.__setattr__(self, "process_rules", tuple(self.process_rules or ()))
+        if self.running_rules is None:
+            object.__setattr__(self, "running_rules", RunningProcessRuleSet())
+
+    def match(self, process_name, image_path=None):
+        """
+        查找进程对应的电源计划 GUID (不含默认计划)；没有匹配时返回 None。
+        """
+        return self.rule_engine.match(process_name, image_path)
+
+    def with_default_power_plan(self, version, default_power_plan):
+        """
+        返回只替换了默认电源计划的新快照。映射和规则不变，已编译的匹配引擎直接复用。
+        """
+        return dataclasses.replace(self, version=version, default_power_plan=default_power_plan)
+
+
+def build_config_snapshot(version, default_power_plan, app_power_map, process_rules=(), content_hash=None, running_rules=()):
+    """
+    创建配置快照并编译匹配引擎。传入的映射会被复制，调用方之后修改它不会影响快照。
+    CompiledProcessMap 本身是只读的，直接使用而不复制 (避免把索引中的条目重新展开为字典)。
+    """
+    if isinstance(app_power_map, CompiledProcessMap):
+        frozen_map = app_power_map
+    else:
+        frozen_map = MappingProxyType(dict(app_power_map or {}))
+    frozen_rules = tuple(process_rules or ())
+    return ConfigSnapshot(
+        version=version,
+        default_power_plan=default_power_plan,
+        app_power_map=frozen_map,
+        process_rules=frozen_rules,
+        rule_engine=ProcessRuleEngine(frozen_map, frozen_rules),
+        content_hash=content_hash,
+        running_rules=RunningProcessRuleSet(running_rules or ()),
+    )
@@ -0,0 +1,222 @@
+import logging
+import os
+import threading
+
+# 获取当前模块的 logger
+logger = logging.getLogger(__name__)
+
+# Default polling parameters (seconds)
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 10.0
+DEFAULT_BACKOFF_FACTOR = 1.5
+# After a change is detected the file must stay unchanged this long before it is reloaded,
+# so an editor that writes the file in several steps is not caught half-way.
+DEFAULT_SETTLE_DELAY = 0.25
+# Upper bound of settle rounds for a file that keeps changing
+MAX_SETTLE_ROUNDS = 20
+
+
+def file_signature(file_path):
+    """
+    返回文件的 (mtime_ns, size)；文件无法访问时返回 None。
+    """
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+class FileChangePoller:
+    """
+    配置文件轮询的判定逻辑 (退避、等待文件稳定)，不包含等待本身：调用方等待 next_delay() 秒后调用 poll()。
+    ConfigWatcher 在线程上使用它，asyncio 运行时在任务中使用它，两者的轮询行为因此完全相同。
+
+    - 只调用 os.stat，不读取文件内容。
+    - 文件未变化时轮询间隔按 backoff_factor 逐步增大到 max_interval，检测到变化后恢复为 min_interval。
+      stat 失败 (文件被编辑器临时删除/替换) 时同样退避，不会报告变化。
+    - 检测到变化后以 settle_delay 为间隔继续检查，文件保持不变 (最多 MAX_SETTLE_ROUNDS 轮) 后才报告变化。
+    """
+    def __init__(self, file_path, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, settle_delay=DEFAULT_SETTLE_DELAY):
+        """
+        Args:
+            file_path: 被监视的文件路径。
+            min_interval: 最短轮询间隔 (秒)。
+            max_interval: 最长轮询间隔 (秒)。
+            backoff_factor: 每次未检测到变化时轮询间隔的放大倍数。
+            settle_delay: 检测到变化后等待文件稳定的时间 (秒)。
+        """
+        self._file_path = file_path
+        self._min_interval = max(0.01, float(min_interval))
+        self._max_interval = max(self._min_interval, float(max_interval))
+        self._backoff_factor = max(1.0, float(backoff_factor))
+        self._settle_delay = max(0.0, float(settle_delay))
+
+        self._last_signature = None
+        self._interval = self._min_interval
+        # Signature of a detected change that hasn't settled yet (None when not settling)
+        self._settling_signature = None
+        self._settle_rounds = 0
+
+        self._polls = 0
+        self._changes = 0
+        self._stat_errors = 0
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    @property
+    def min_interval(self):
+        return self._min_interval
+
+    @property
+    def max_interval(self):
+        return self._max_interval
+
+    def reset(self):
+        """
+        以当前文件状态作为基准 (不会报告为变化)，轮询间隔恢复为 min_interval。
+        """
+        self._last_signature = file_signature(self._file_path)
+        self._interval = self._min_interval
+        self._settling_signature = None
+
+    def next_delay(self):
+        """
+        返回下一次调用 poll() 之前应等待的秒数。
+        """
+        return self._settle_delay if self._settling_signature is not None else self._interval
+
+    def poll(self):
+        """
+        检查一次文件状态。返回 True 表示文件已变化且已稳定，调用方应重新加载。
+        """
+        signature = file_signature(self._file_path)
+        if self._settling_signature is None:
+            self._polls += 1
+            if signature is None:
+                self._stat_errors += 1
+                self._back_off()
+                return False
+            if signature == self._last_signature:
+                self._back_off()
+                return False
+            # Changed: wait until the file stays unchanged for settle_delay
+            self._settling_signature = signature
+            self._settle_rounds = 0
+            return False
+
+        if signature is None:
+            # The file vanished while settling, it will be picked up again once it's back
+            self._settling_signature = None
+            return False
+        self._settle_rounds += 1
+        if signature != self._settling_signature:
+            if self._settle_rounds < MAX_SETTLE_ROUNDS:
+                self._settling_signature = signature
+                return False
+            logger.warning("Config file '%s' keeps changing. Reloading anyway.", self._file_path)
+        self._settling_signature = None
+        self._last_signature = signature
+        self._changes += 1
+        self._interval = self._min_interval
+        return True
+
+    def _back_off(self):
+        self._interval = min(self._max_interval, self._interval * self._backoff_factor)
+
+    def get_stats(self):
+        """
+        返回轮询统计信息。
+        """
+        return {
+            "file_path": self._file_path,
+            "poll_interval_s": self._interval,
+            "polls": self._polls,
+            "changes": self._changes,
+            "stat_errors": self._stat_errors,
+        }
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器：在独立线程上轮询文件的 (mtime, size)，检测到变化后调用 on_change。
+
+    - 轮询和退避逻辑见 FileChangePoller。
+    - 文件内容是否真的变化由 on_change (ConfigManager.reload_config 比较内容哈希) 判断。
+    - on_change 在监视线程上运行，解析和编译配置的开销不会落在事件处理线程上。
+    """
+    def __init__(self, file_path, on_change, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, settle_delay=DEFAULT_SETTLE_DELAY):
+        """
+        Args:
+            file_path: 被监视的文件路径。
+            on_change: 无参数回调，文件变化时调用。返回 True 表示重新加载成功 (用于统计)。
+            min_interval: 最短轮询间隔 (秒)。
+            max_interval: 最长轮询间隔 (秒)。
+            backoff_factor: 每次未检测到变化时轮询间隔的放大倍数。
+            settle_delay: 检测到变化后等待文件稳定的时间 (秒)。
+        """
+        self._file_path = file_path
+        self._on_change = on_change
+        self._poller = FileChangePoller(file_path, min_interval, max_interval, backoff_factor, settle_delay)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._reloads = 0
+        self._failures = 0
+
+    def start(self):
+        """
+        启动监视线程。启动时的文件状态作为基准，不会触发 on_change。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("ConfigWatcher is already running.")
+            return
+        self._stop_event.clear()
+        self._poller.reset()
+        self._thread = threading.Thread(target=self._run, name="ConfigWatcherThread")
+        # Non-daemon, stop() joins it (same as the other worker threads of the application)
+        self._thread.daemon = False
+        self._thread.start()
+        logger.info(f"ConfigWatcher started for '{self._file_path}' (poll interval {self._poller.min_interval}s - {self._poller.max_interval}s).")
+
+    def stop(self, timeout=5.0):
+        """
+        停止监视线程并等待其退出。
+        """
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.error(f"ConfigWatcherThread did not stop within {timeout} seconds.")
+            else:
+                logger.info("ConfigWatcherThread joined successfully.")
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        # Stopping also interrupts the settle wait
+        while not self._stop_event.wait(self._poller.next_delay()):
+            if not self._poller.poll():
+                continue
+            logger.info("Change detected in config file '%s'. Reloading.", self._file_path)
+            try:
+                if self._on_change():
+                    self._reloads += 1
+            except Exception as e:
+                self._failures += 1
+                logger.error("Error while reloading config file '%s': %s", self._file_path, e, exc_info=True)
+        logger.debug("ConfigWatcherThread loop finished.")
+
+    def get_stats(self):
+        """
+        返回轮询统计信息。
+        """
+        stats = self._poller.get_stats()
+        stats.update(alive=self.is_alive(), reloads=self._reloads, failures=self._failures)
+        return stats
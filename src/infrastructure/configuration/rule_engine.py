@@ -0,0 +1,477 @@
+import logging
+import re
+from collections import namedtuple
+
+# 获取当前模块的 logger
+logger = logging.getLogger(__name__)
+
+# --- 规则类型 ---
+# exact:      进程文件名完全匹配 (不区分大小写)，例如 chrome.exe
+# glob:       进程文件名通配符，例如 *.tmp.exe、game_??.exe
+# regex:      进程文件名正则表达式 (完整匹配，不区分大小写)，例如 (cl|link|msbuild)\.exe
+# path:       完整映像路径通配符，** 匹配任意层级目录，例如 D:\Games\**
+# path_regex: 完整映像路径正则表达式 (路径分隔符统一为 /，小写)
+RULE_KIND_EXACT = "exact"
+RULE_KIND_GLOB = "glob"
+RULE_KIND_REGEX = "regex"
+RULE_KIND_PATH = "path"
+RULE_KIND_PATH_REGEX = "path_regex"
+RULE_KINDS = (RULE_KIND_EXACT, RULE_KIND_GLOB, RULE_KIND_REGEX, RULE_KIND_PATH, RULE_KIND_PATH_REGEX)
+
+# Characters that turn a [ProcessPowerMap] key into a glob rule
+GLOB_CHARS = "*?["
+# Separator of "kind | pattern | guid" values in [ProcessPowerRules]
+RULE_VALUE_SEPARATOR = "|"
+
+# Maximum number of memoized lookup results. The memo is cleared when full
+# (the number of distinct foreground executables is small, so this practically never happens).
+DEFAULT_MEMO_SIZE = 4096
+
+# A single pattern rule. order is the position in the configuration (lower wins).
+ProcessRule = namedtuple("ProcessRule", ["label", "kind", "pattern", "guid"])
+
+# A [RunningProcessRules] entry: while a process matching pattern (name or glob) runs, use guid.
+# Among active rules the highest priority wins (the earlier rule on ties).
+RunningProcessRule = namedtuple("RunningProcessRule", ["pattern", "guid", "priority"])
+
+# Priority of a foreground match ([ProcessPowerMap] / [ProcessPowerRules]) when arbitrating with running
+# process rules: a running rule wins if its priority is higher. Falling back to the default plan has no
+# priority, any active running rule wins over it.
+FOREGROUND_RULE_PRIORITY = 0
+# Priority of a running process rule without an explicit one: keeps the plan while focus moves to another mapped app
+DEFAULT_RUNNING_RULE_PRIORITY = 1
+
+
+def parse_rule_value(label, value):
+    """
+    解析 [ProcessPowerRules] 中的一条规则: "<kind> | <pattern> | <guid>"。
+
+    Returns:
+        ProcessRule；格式无效时记录警告并返回 None。
+    """
+    parts = [part.strip() for part in str(value).split(RULE_VALUE_SEPARATOR)]
+    # The pattern itself may contain '|' (regex alternation): kind is the first part, guid the last.
+    if len(parts) < 3:
+        logger.warning(f"Invalid process rule '{label}': expected '<kind> | <pattern> | <guid>', got '{value}'. Rule skipped.")
+        return None
+    kind = parts[0].lower()
+    pattern = RULE_VALUE_SEPARATOR.join(parts[1:-1]).strip()
+    # GUIDs are normalized once here, matching and comparisons downstream don't lower() per event
+    guid = parts[-1].lower()
+    if kind not in RULE_KINDS:
+        logger.warning(f"Invalid process rule '{label}': unknown kind '{kind}'. Valid kinds are: {', '.join(RULE_KINDS)}. Rule skipped.")
+        return None
+    if not pattern or not guid:
+        logger.warning(f"Invalid process rule '{label}': pattern and GUID must not be empty. Rule skipped.")
+        return None
+    return ProcessRule(label, kind, pattern, guid)
+
+
+def parse_running_rule_value(pattern, value):
+    """
+    解析 [RunningProcessRules] 中的一条规则: "<进程名或通配符> = <guid> [| <优先级>]"。
+
+    Returns:
+        RunningProcessRule；格式无效时记录警告并返回 None。
+    """
+    pattern = normalize_process_name(pattern)
+    parts = [part.strip() for part in str(value).split(RULE_VALUE_SEPARATOR)]
+    guid = parts[0].lower()
+    if not pattern or not guid or len(parts) > 2:
+        logger.warning(f"Invalid running process rule '{pattern}': expected '<process> = <guid> [| <priority>]', got '{value}'. Rule skipped.")
+        return None
+    priority = DEFAULT_RUNNING_RULE_PRIORITY
+    if len(parts) == 2 and parts[1]:
+        try:
+            priority = int(parts[1])
+        except ValueError:
+            logger.warning(f"Invalid priority '{parts[1]}' in running process rule '{pattern}'. Using {DEFAULT_RUNNING_RULE_PRIORITY}.")
+    return RunningProcessRule(pattern, guid, priority)
+
+
+def normalize_process_name(process_name):
+    """
+    进程名匹配前的规范化: 去除空白并转为小写。
+    """
+    return process_name.strip().lower()
+
+
+def normalize_image_path(image_path):
+    """
+    路径匹配前的规范化: 转为小写，反斜杠统一为 /。
+    """
+    return image_path.strip().replace("\\", "/").lower()
+
+
+def glob_to_regex(pattern, path_mode=False):
+    """
+    将通配符模式转换为正则表达式源码 (不含锚点)。
+
+    进程名模式 (path_mode=False): * 匹配任意字符，? 匹配单个字符。
+    路径模式 (path_mode=True): 模式先按 normalize_image_path 规范化；
+    * 和 ? 不跨越 /，** 匹配任意层级 (包括零层，"**/" 可以匹配空)。
+    两种模式都支持 [abc] / [!abc] 字符类。
+    """
+    if path_mode:
+        pattern = normalize_image_path(pattern)
+    else:
+        pattern = normalize_process_name(pattern)
+    any_char = "[^/]" if path_mode else "."
+    result = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        if char == "*":
+            if path_mode and pattern.startswith("**", index):
+                index += 2
+                if index < length and pattern[index] == "/":
+                    # "**/" matches zero or more directories
+                    result.append("(?:.*/)?")
+                    index += 1
+                else:
+                    result.append(".*")
+                continue
+            result.append(any_char + "*")
+        elif char == "?":
+            result.append(any_char)
+        elif char == "[":
+            closing = pattern.find("]", index + 2 if pattern.startswith("[!", index) else index + 1)
+            if closing == -1:
+                result.append(re.escape(char))
+            else:
+                body = pattern[index + 1:closing]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append("[" + body.replace("\\", "\\\\") + "]")
+                index = closing
+        else:
+            result.append(re.escape(char))
+        index += 1
+    return "".join(result)
+
+
+class _PatternMatcher:
+    """
+    一组按顺序排列的正则表达式 (对同一个输入: 进程名或路径)，返回第一个匹配的规则序号。
+
+    所有不含捕获组的模式合并为一个带命名分组的大正则 (?P<r0>...)|(?P<r1>...)，一次匹配即可
+    找到最靠前的命中规则；含有捕获组或反向引用、无法安全合并的模式单独匹配。
+    """
+    def __init__(self, indexed_patterns):
+        """
+        Args:
+            indexed_patterns: (order, regex_source) 列表。源码已经过单独编译校验。
+        """
+        self._combined = None
+        self._group_orders = {}
+        self._separate = [] # (order, compiled regex), sorted by order
+        combinable = []
+        for order, source in indexed_patterns:
+            compiled = re.compile(source, re.IGNORECASE)
+            if compiled.groups:
+                self._separate.append((order, compiled))
+            else:
+                combinable.append((order, source))
+
+        if combinable:
+            alternatives = []
+            for order, source in combinable:
+                group_name = f"r{order}"
+                self._group_orders[group_name] = order
+                alternatives.append(f"(?P<{group_name}>{source})")
+            try:
+                self._combined = re.compile("|".join(alternatives), re.IGNORECASE)
+            except re.error as e:
+                # E.g. inline global flags in the middle of a pattern: fall back to matching one by one
+                logger.debug(f"Could not combine rule patterns into one expression ({e}). Matching them separately.")
+                self._combined = None
+                self._group_orders = {}
+                self._separate.extend((order, re.compile(source, re.IGNORECASE)) for order, source in combinable)
+        self._separate.sort(key=lambda item: item[0])
+
+    def first_match(self, text):
+        """
+        返回匹配 text 的最小规则序号；没有匹配时返回 None。
+        """
+        best = None
+        if self._combined is not None:
+            # Alternatives are tried in order, so fullmatch reports the first rule that matches the whole text
+            match = self._combined.fullmatch(text)
+            if match is not None:
+                best = self._group_orders[match.lastgroup]
+        for order, compiled in self._separate:
+            if best is not None and order > best:
+                break
+            if compiled.fullmatch(text):
+                return order
+        return best
+
+
+class ProcessRuleEngine:
+    """
+    进程 -> 电源计划 GUID 的匹配引擎，在配置加载时编译一次。
+
+    查找顺序:
+      1. 进程文件名精确匹配 (哈希表)；
+      2. 模式规则，按配置中的先后顺序，第一个匹配的规则生效。
+         进程名规则 (glob/regex) 和路径规则 (path/path_regex) 各合并为一个正则表达式。
+    查找结果按 (进程名[, 路径]) 记忆，同一个可执行文件再次获得焦点时只需一次字典查找，
+    因此查找开销与规则数量无关 (均摊 O(1))。
+    引擎是不可变的: 配置重新加载时创建新的引擎，旧的记忆表随之丢弃。
+    """
+    def __init__(self, exact_map=None, rules=(), memo_size=DEFAULT_MEMO_SIZE):
+        """
+        Args:
+            exact_map: {进程名: GUID} 或 CompiledProcessMap。键含有通配符 (*?[) 时按 glob 规则处理 (保持在其他规则之前)。
+            rules: ProcessRule 序列 ([ProcessPowerRules] 中的规则)，按优先级从高到低排列。
+            memo_size: 记忆表的最大条目数。
+        """
+        self._exact = {}
+        self._rules = []
+        name_patterns = []
+        path_patterns = []
+
+        ordered_rules = []
+        # A CompiledProcessMap (rule_index.py) already holds the normalized exact entries in a sorted table:
+        # it's searched in place instead of being copied into a dict, only its few wildcard keys are compiled here
+        self._exact_index = exact_map if hasattr(exact_map, "get_exact") else None
+        if self._exact_index is not None:
+            map_entries = self._exact_index.glob_entries()
+        else:
+            map_entries = (exact_map or {}).items()
+        for process_name, guid in map_entries:
+            if any(char in process_name for char in GLOB_CHARS):
+                ordered_rules.append(ProcessRule(process_name, RULE_KIND_GLOB, process_name, guid))
+            else:
+                self._exact[normalize_process_name(process_name)] = guid
+        ordered_rules.extend(rules)
+
+        for rule in ordered_rules:
+            if rule.kind == RULE_KIND_EXACT:
+                key = normalize_process_name(rule.pattern)
+                if key in self._exact or (self._exact_index is not None and self._exact_index.get_exact(key) is not None):
+                    logger.debug(f"Process rule '{rule.label}' duplicates exact entry '{key}', the earlier entry wins.")
+                else:
+                    self._exact[key] = rule.guid
+                continue
+            try:
+                if rule.kind == RULE_KIND_GLOB:
+                    source = glob_to_regex(rule.pattern, path_mode=False)
+                elif rule.kind == RULE_KIND_PATH:
+                    source = glob_to_regex(rule.pattern, path_mode=True)
+                else:
+                    source = rule.pattern
+                # Validate each pattern on its own so one broken rule doesn't disable the others
+                re.compile(source, re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Invalid pattern in process rule '{rule.label}' ({rule.kind}: '{rule.pattern}'): {e}. Rule skipped.")
+                continue
+            order = len(self._rules)
+            self._rules.append(rule)
+            if rule.kind in (RULE_KIND_PATH, RULE_KIND_PATH_REGEX):
+                path_patterns.append((order, source))
+            else:
+                name_patterns.append((order, source))
+
+        self._name_matcher = _PatternMatcher(name_patterns) if name_patterns else None
+        self._path_matcher = _PatternMatcher(path_patterns) if path_patterns else None
+
+        self._memo_size = max(0, int(memo_size))
+        self._memo = {}
+        self._index_memo = {}
+        self._memo_hits = 0
+        self._memo_misses = 0
+
+    def match(self, process_name, image_path=None):
+        """
+        查找进程对应的电源计划 GUID。
+
+        Args:
+            process_name: 进程文件名 (例如 "chrome.exe")。
+            image_path: 可选，进程的完整映像路径。只有路径规则会用到它。
+
+        Returns:
+            GUID 字符串；没有任何规则匹配时返回 None。
+        """
+        if not process_name:
+            return None
+        name_key = normalize_process_name(process_name)
+        if self._exact_index is not None:
+            # The index is a binary search over the mapped file (a few microseconds), remember its answers.
+            # Misses are remembered too (as ""): most foreground apps aren't in a large map either.
+            guid = self._index_memo.get(name_key)
+            if guid is None:
+                guid = self._exact_index.get_exact(name_key) or ""
+                if self._memo_size:
+                    if len(self._index_memo) >= self._memo_size:
+                        self._index_memo.clear()
+                    self._index_memo[name_key] = guid
+            if guid:
+                return guid
+        guid = self._exact.get(name_key)
+        if guid is not None:
+            return guid
+        if not self._rules:
+            return None
+
+        # Path rules only need the path as part of the key when they exist
+        path_key = normalize_image_path(image_path) if (image_path and self._path_matcher is not None) else None
+        memo_key = (name_key, path_key)
+        try:
+            guid = self._memo[memo_key]
+            self._memo_hits += 1
+            return guid
+        except KeyError:
+            self._memo_misses += 1
+
+        guid = self._match_rules(name_key, path_key)
+        if self._memo_size:
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[memo_key] = guid
+        return guid
+
+    def _match_rules(self, name_key, path_key):
+        best = None
+        if self._name_matcher is not None:
+            best = self._name_matcher.first_match(name_key)
+        if path_key is not None:
+            path_order = self._path_matcher.first_match(path_key)
+            if path_order is not None and (best is None or path_order < best):
+                best = path_order
+        if best is None:
+            return None
+        return self._rules[best].guid
+
+    def uses_image_path(self):
+        """
+        是否存在路径规则 (匹配结果可能依赖于映像路径，而不只是进程名)。
+        """
+        return self._path_matcher is not None
+
+    def get_rules(self):
+        """
+        返回编译成功的模式规则列表 (不含精确匹配项)。
+        """
+        return list(self._rules)
+
+    def get_stats(self):
+        """
+        返回规则数量和记忆表统计信息。
+        """
+        return {
+            "exact_entries": len(self._exact) + (self._exact_index.exact_count() if self._exact_index is not None else 0),
+            "exact_index": self._exact_index is not None,
+            "pattern_rules": len(self._rules),
+            "memo_size": len(self._memo),
+            "memo_hits": self._memo_hits,
+            "memo_misses": self._memo_misses,
+        }
+
+
+class RunningProcessRuleSet:
+    """
+    [RunningProcessRules] 的匹配器: 给定当前运行的进程名集合，返回生效的规则 (优先级最高者)。
+
+    进程名 -> 匹配规则的结果按名称记忆 (运行中的进程名种类有限，进程创建/退出时只需查新名称)，
+    精确名称为字典查找，通配符规则合并为一个正则表达式。与 ProcessRuleEngine 一样，
+    规则集在配置加载时编译一次，之后不可变 (只有记忆表增长)。
+    """
+    def __init__(self, rules=(), memo_size=DEFAULT_MEMO_SIZE):
+        """
+        Args:
+            rules: RunningProcessRule 序列，按配置文件顺序 (优先级相同时靠前者优先)。
+            memo_size: 记忆表的最大条目数。
+        """
+        self._rules = []
+        self._exact = {} # name -> [rule order, ...]
+        glob_patterns = []
+        for rule in rules:
+            order = len(self._rules)
+            if any(char in rule.pattern for char in GLOB_CHARS):
+                source = glob_to_regex(rule.pattern, path_mode=False)
+                try:
+                    re.compile(source, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Invalid pattern in running process rule '{rule.pattern}': {e}. Rule skipped.")
+                    continue
+                glob_patterns.append((order, source))
+            else:
+                self._exact.setdefault(rule.pattern, []).append(order)
+            self._rules.append(rule)
+        # Patterns are matched one by one here (a process may match several rules, the best one is picked later)
+        self._globs = [(order, re.compile(source, re.IGNORECASE)) for order, source in glob_patterns]
+        self._memo_size = max(0, int(memo_size))
+        self._memo = {}
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def get_rules(self):
+        """
+        返回编译成功的规则列表 (按配置顺序)。
+        """
+        return list(self._rules)
+
+    def _rank(self, order):
+        # Sort key: higher priority first, then file order
+        return (-self._rules[order].priority, order)
+
+    def best_order_for_name(self, name_key):
+        """
+        返回匹配某个已规范化进程名的最佳规则序号；没有匹配时返回 None。
+        """
+        try:
+            return self._memo[name_key]
+        except KeyError:
+            pass
+        orders = list(self._exact.get(name_key, ()))
+        orders.extend(order for order, compiled in self._globs if compiled.fullmatch(name_key))
+        best = min(orders, key=self._rank) if orders else None
+        if self._memo_size:
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[name_key] = best
+        return best
+
+    def best_rule(self, running_names):
+        """
+        返回当前生效的规则: 在所有匹配运行中进程的规则里优先级最高者 (相同时取配置中靠前者)。
+
+        Args:
+            running_names: 正在运行的进程名 (已规范化为小写) 的可迭代对象。
+
+        Returns:
+            RunningProcessRule；没有规则匹配时返回 None。
+        """
+        if not self._rules:
+            return None
+        best = None
+        for name_key in running_names:
+            order = self.best_order_for_name(name_key)
+            if order is not None and (best is None or self._rank(order) < self._rank(best)):
+                best = order
+        return self._rules[best] if best is not None else None
+
+
+def arbitrate_running_rule(foreground_guid, foreground_matched, running_rule):
+    """
+    在前台匹配结果和生效的运行进程规则之间选择目标电源计划。
+
+    Args:
+        foreground_guid: 前台进程的目标 GUID (匹配的规则或默认计划)。
+        foreground_matched: 前台进程是否匹配了某条规则 (False 表示 foreground_guid 是默认计划)。
+        running_rule: 生效的 RunningProcessRule 或 None。
+
+    Returns:
+        目标 GUID。
+    """
+    if running_rule is None:
+        return foreground_guid
+    if not foreground_matched or running_rule.priority > FOREGROUND_RULE_PRIORITY:
+        return running_rule.guid
+    return foreground_guid
@@ -0,0 +1,302 @@
+import array
+import logging
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+from src.infrastructure.configuration.rule_engine import GLOB_CHARS
+
+# 获取当前模块的 logger
+logger = logging.getLogger(__name__)
+
+# --- 二进制规则索引 ---
+# 大型 [ProcessPowerMap] (数千条) 的预编译形式，缓存在配置文件旁边，来源文件哈希不变时直接复用，
+# 跳过 configparser 对映射部分的解析和逐条 strip().lower()。
+#
+# 文件布局 (本机字节序，仅在小端系统上使用；各表按 4 字节对齐):
+#   header            RULE_INDEX_HEADER
+#   names             按字节序排序的进程名 (UTF-8，已规范化为小写) 依次拼接
+#   name_offsets      uint32[entry_count + 1]，第 i 个名称为 names[name_offsets[i]:name_offsets[i + 1]]
+#   plan_ids          uint16[entry_count]，第 i 个名称对应的计划编号
+#   plans             计划 GUID 字符串 (UTF-8) 依次拼接
+#   plan_offsets      uint32[plan_count + 1]
+#   meta              UTF-8 JSON: 其他 section 的原始值和含通配符的映射键 (保持文件顺序)
+# 所有表都可以直接在内存映射上读取，加载时不为每个条目创建 Python 对象。
+RULE_INDEX_MAGIC = b"APSRIDX\x00"
+RULE_INDEX_FORMAT_VERSION = 1
+# magic, format version, header size, source SHA-256, entry count, plan count,
+# then (offset, size) of names, name_offsets, plan_ids, plans, plan_offsets, meta
+RULE_INDEX_HEADER = struct.Struct("<8sII32sII12I")
+# Index file name: <config file name>.<first 16 hex digits of the source hash>.idx
+# The hash is part of the name because a mapped file can't be replaced on Windows while a snapshot still uses it.
+RULE_INDEX_SUFFIX = ".idx"
+RULE_INDEX_HASH_CHARS = 16
+# The plan id array is uint16
+MAX_INDEX_PLANS = 0xFFFF
+
+
+
+def rule_index_path(config_file_path, content_hash):
+    """
+    返回某个配置文件内容 (SHA-256 十六进制哈希) 对应的索引文件路径。
+    """
+    return f"{config_file_path}.{content_hash[:RULE_INDEX_HASH_CHARS]}{RULE_INDEX_SUFFIX}"
+
+
+class CompiledProcessMap(Mapping):
+    """
+    只读的 {进程名(小写): GUID} 映射，数据直接从二进制规则索引 (通常是内存映射) 中读取。
+
+    精确条目按字节序排序，查找为二分查找 (O(log n)，每次比较只复制一个短名称)；
+    含通配符的键 (数量很少) 单独保存并保持文件顺序，由 ProcessRuleEngine 编译为 glob 规则。
+    与 MappingProxyType 一样不可修改，可以直接作为 ConfigSnapshot.app_power_map。
+    """
+    def __init__(self, buffer, entry_count, names_offset, name_offsets, plan_ids, plans, glob_entries):
+        self._buffer = buffer
+        self._entry_count = entry_count
+        self._names_offset = names_offset
+        self._name_offsets = name_offsets # memoryview of uint32
+        self._plan_ids = plan_ids # memoryview of uint16
+        self._plans = plans # tuple of GUID strings (few distinct plans)
+        self._glob_entries = dict(glob_entries)
+
+    def _name_at(self, index):
+        start = self._names_offset + self._name_offsets[index]
+        return self._buffer[start:self._names_offset + self._name_offsets[index + 1]]
+
+    def get_exact(self, process_name):
+        """
+        只在精确条目中查找已规范化 (小写、去除空白) 的进程名，返回 GUID 或 None。
+        """
+        try:
+            key = process_name.encode("utf-8")
+        except (AttributeError, UnicodeEncodeError):
+            return None
+        low, high = 0, self._entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._entry_count and self._name_at(low) == key:
+            return self._plans[self._plan_ids[low]]
+        return None
+
+    def glob_entries(self):
+        """
+        返回含通配符的映射条目 [(键, GUID), ...]，按配置文件中的顺序。
+        """
+        return list(self._glob_entries.items())
+
+    def exact_count(self):
+        return self._entry_count
+
+    def __getitem__(self, process_name):
+        guid = self.get_exact(process_name)
+        if guid is None:
+            guid = self._glob_entries.get(process_name)
+            if guid is None:
+                raise KeyError(process_name)
+        return guid
+
+    def __len__(self):
+        return self._entry_count + len(self._glob_entries)
+
+    def __iter__(self):
+        for index in range(self._entry_count):
+            yield self._name_at(index).decode("utf-8")
+        yield from self._glob_entries
+
+    def __contains__(self, process_name):
+        if not isinstance(process_name, str):
+            return False
+        return self.get_exact(process_name) is not None or process_name in self._glob_entries
+
+
+class RuleIndex:
+    """
+    已加载的规则索引: 进程映射 (CompiledProcessMap) 和其他 section 的原始配置值。
+    """
+    def __init__(self, path, process_map, sections):
+        self.path = path
+        self.process_map = process_map
+        # {section: {key: raw value}} of every section except [ProcessPowerMap]
+        self.sections = sections
+
+    def read_into(self, parser):
+        """
+        把其他 section 的原始值读入 (空的) ConfigParser，效果与解析原配置文件中的这些 section 相同。
+        """
+        # Written out as INI text like ConfigParser.write does: read_dict() would reject raw values that only
+        # the ConfigParser reading the original file accepted (e.g. '%' in a regex rule read with raw=True)
+        lines = []
+        for section, options in self.sections.items():
+            lines.append(f"[{section}]")
+            lines.extend(f"{key} = " + str(value).replace("\n", "\n\t") for key, value in options.items())
+            lines.append("")
+        parser.read_string("\n".join(lines), source=self.path)
+
+
+def _align(data):
+    padding = (-len(data)) % 4
+    if padding:
+        data.extend(b"\x00" * padding)
+
+
+def compile_rule_index(path, content_hash, app_power_map, sections):
+    """
+    把进程映射和其他 section 的原始值编译为二进制索引并写入 path (先写临时文件再原子替换)。
+
+    Args:
+        path: 索引文件路径 (见 rule_index_path)。
+        content_hash: 来源配置文件内容的 SHA-256 十六进制哈希。
+        app_power_map: {进程名(小写): GUID(小写)}，按文件顺序 (通配符键的顺序决定其优先级)。
+        sections: {section: {key: 原始值}}，不含 [ProcessPowerMap]。
+
+    Returns:
+        True 表示写入成功；失败 (例如计划数超过上限或目录不可写) 时记录警告并返回 False。
+    """
+    if sys.byteorder != "little":
+        logger.warning("Rule index is only supported on little-endian systems. Not writing an index.")
+        return False
+    # Only needed when an index is written or loaded (keeps them out of the startup imports otherwise)
+    import json
+    exact_entries = sorted(
+        (name.encode("utf-8"), guid) for name, guid in app_power_map.items()
+        if not any(char in name for char in GLOB_CHARS)
+    )
+    glob_entries = [[name, guid] for name, guid in app_power_map.items() if any(char in name for char in GLOB_CHARS)]
+
+    plan_ids_by_guid = {}
+    plan_ids = array.array("H")
+    name_offsets = array.array("I", [0])
+    names = bytearray()
+    for name, guid in exact_entries:
+        plan_id = plan_ids_by_guid.setdefault(guid, len(plan_ids_by_guid))
+        if plan_id >= MAX_INDEX_PLANS:
+            logger.warning(f"Process map references more than {MAX_INDEX_PLANS} distinct plans. Not writing a rule index.")
+            return False
+        plan_ids.append(plan_id)
+        names.extend(name)
+        name_offsets.append(len(names))
+    plans = bytearray()
+    plan_offsets = array.array("I", [0])
+    for guid in plan_ids_by_guid: # Insertion order == plan id
+        plans.extend(guid.encode("utf-8"))
+        plan_offsets.append(len(plans))
+    meta = json.dumps({"sections": sections, "glob_entries": glob_entries}, ensure_ascii=False).encode("utf-8")
+
+    body = bytearray()
+    tables = []
+    for table in (names, name_offsets.tobytes(), plan_ids.tobytes(), plans, plan_offsets.tobytes(), meta):
+        tables.append((RULE_INDEX_HEADER.size + len(body), len(table)))
+        body.extend(table)
+        _align(body)
+    header = RULE_INDEX_HEADER.pack(
+        RULE_INDEX_MAGIC, RULE_INDEX_FORMAT_VERSION, RULE_INDEX_HEADER.size, bytes.fromhex(content_hash),
+        len(exact_entries), len(plan_ids_by_guid), *[value for table in tables for value in table]
+    )
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as index_file:
+            index_file.write(header)
+            index_file.write(body)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write rule index '{path}': {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    logger.info(f"Rule index written to '{path}' ({len(exact_entries)} entries, {len(plan_ids_by_guid)} plans, {len(header) + len(body)} bytes).")
+    return True
+
+
+def _close_quietly(buffer):
+    try:
+        buffer.close()
+    except BufferError:
+        # A memoryview of it is still alive, the mapping is released when it's collected
+        pass
+
+
+def load_rule_index(path, content_hash):
+    """
+    加载并校验索引文件 (内存映射)。文件不存在、版本不符、来源哈希不一致或内容损坏时返回 None。
+    """
+    if sys.byteorder != "little":
+        return None
+    import json
+    try:
+        with open(path, "rb") as index_file:
+            buffer = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        # ValueError: empty file
+        logger.warning(f"Failed to open rule index '{path}': {e}. Parsing the configuration file instead.")
+        return None
+
+    try:
+        if len(buffer) < RULE_INDEX_HEADER.size:
+            raise ValueError("file is shorter than the header")
+        fields = RULE_INDEX_HEADER.unpack_from(buffer, 0)
+        magic, format_version, header_size, source_hash, entry_count, plan_count = fields[:6]
+        if magic != RULE_INDEX_MAGIC or format_version != RULE_INDEX_FORMAT_VERSION or header_size != RULE_INDEX_HEADER.size:
+            logger.info(f"Rule index '{path}' has an unsupported format. It will be rebuilt.")
+            _close_quietly(buffer)
+            return None
+        if source_hash.hex() != content_hash:
+            logger.info(f"Rule index '{path}' was built from different file content. It will be rebuilt.")
+            _close_quietly(buffer)
+            return None
+        offsets = fields[6:]
+        tables = [(offsets[index], offsets[index + 1]) for index in range(0, len(offsets), 2)]
+        for offset, size in tables:
+            if offset < header_size or offset + size > len(buffer):
+                raise ValueError("table outside of the file")
+        # The writer pads every table to 4 bytes: any other size means a truncated or appended-to file
+        tables_end = max(offset + size for offset, size in tables)
+        if len(buffer) != tables_end + (-tables_end) % 4:
+            raise ValueError("file size doesn't match the tables")
+        (names_offset, _), (name_offsets_offset, name_offsets_size), (plan_ids_offset, plan_ids_size), \
+            (plans_offset, _), (plan_offsets_offset, plan_offsets_size), (meta_offset, meta_size) = tables
+        view = memoryview(buffer)
+        name_offsets = view[name_offsets_offset:name_offsets_offset + name_offsets_size].cast("I")
+        plan_ids = view[plan_ids_offset:plan_ids_offset + plan_ids_size].cast("H")
+        plan_offsets = view[plan_offsets_offset:plan_offsets_offset + plan_offsets_size].cast("I")
+        if len(name_offsets) != entry_count + 1 or len(plan_ids) != entry_count or len(plan_offsets) != plan_count + 1:
+            raise ValueError("table sizes don't match the entry counts")
+        plans = tuple(
+            bytes(buffer[plans_offset + plan_offsets[index]:plans_offset + plan_offsets[index + 1]]).decode("utf-8")
+            for index in range(plan_count)
+        )
+        meta = json.loads(bytes(buffer[meta_offset:meta_offset + meta_size]).decode("utf-8"))
+        process_map = CompiledProcessMap(buffer, entry_count, names_offset, name_offsets, plan_ids, plans,
+                                         [tuple(entry) for entry in meta["glob_entries"]])
+        sections = meta["sections"]
+    except (ValueError, TypeError, KeyError, struct.error, UnicodeDecodeError) as e:
+        logger.warning(f"Rule index '{path}' is invalid: {e}. Parsing the configuration file instead.")
+        _close_quietly(buffer)
+        return None
+    return RuleIndex(path, process_map, sections)
+
+
+def remove_stale_rule_indexes(config_file_path, keep_path=None):
+    """
+    删除该配置文件的旧索引文件 (keep_path 除外)。仍被映射的文件 (Windows) 删除失败时忽略，下次再清理。
+    """
+    import glob
+    for path in glob.glob(glob.escape(config_file_path) + ".*" + RULE_INDEX_SUFFIX):
+        if keep_path is not None and os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(keep_path)):
+            continue
+        try:
+            os.remove(path)
+            logger.debug(f"Removed stale rule index '{path}'.")
+        except OSError:
+            pass
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+class AsyncLatestValueMailbox:
+    """
+    Single-slot "latest wins" mailbox for an asyncio consumer.
+
+    The asyncio counterpart of LatestValueMailbox, used by AsyncPowerSwitcherRuntime. Producers
+    may run on any thread: put_nowait() called off the event loop hands the value over with
+    loop.call_soon_threadsafe(), so the existing thread based event sources (EventListener,
+    ReplayEventSource) can feed it unchanged. The slot itself is only touched on the loop thread,
+    so no lock is needed. As with the other mailboxes, putting None closes it.
+    """
+    def __init__(self):
+        self._loop = None
+        self._wakeup = None
+        self._has_value = False
+        self._value = None
+        self._closed = False
+
+        self._puts = 0
+        self._gets = 0
+        self._overwritten = 0 # Values replaced before the consumer picked them up
+        self._dropped = 0 # Values put after the event loop was gone
+
+    def bind(self, loop):
+        """
+        Binds the mailbox to the event loop of its consumer. Must be called on that loop before the first put.
+        """
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    def _call_on_loop(self, callback, *args):
+        loop = self._loop
+        if loop is None:
+            raise RuntimeError("AsyncLatestValueMailbox is not bound to an event loop.")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            callback(*args)
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop is closed (runtime shut down while a producer thread was still delivering)
+            self._dropped += 1
+
+    def put(self, value, block=True, timeout=None):
+        """
+        Stores value, replacing any value that hasn't been consumed yet. Never blocks. Thread safe.
+        Putting None closes the mailbox.
+        """
+        if value is None:
+            self.close()
+            return
+        self._call_on_loop(self._store, value)
+
+    def put_nowait(self, value):
+        self.put(value, block=False)
+
+    def put_if_empty(self, value):
+        """
+        Stores value only if the slot is empty. Must be called on the event loop thread.
+
+        Returns:
+            True if the value was stored, False if the slot was occupied or the mailbox is closed.
+        """
+        if value is None or self._closed or self._has_value:
+            return False
+        self._store(value)
+        return True
+
+    def _store(self, value):
+        if self._closed:
+            return
+        if self._has_value:
+            self._overwritten += 1
+        self._value = value
+        self._has_value = True
+        self._puts += 1
+        self._wakeup.set()
+
+    async def get(self):
+        """
+        Waits for and returns the latest value, emptying the slot. Returns None once the mailbox is
+        closed and empty. Cancelling the wait (e.g. asyncio.wait_for timeout) doesn't lose a value.
+        """
+        while not self._has_value and not self._closed:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        if not self._has_value:
+            return None # Closed
+        value = self._value
+        self._value = None
+        self._has_value = False
+        self._gets += 1
+        return value
+
+    def close(self):
+        """
+        Closes the mailbox and wakes up the consumer. Later puts are ignored. Thread safe.
+        """
+        if self._loop is None:
+            self._closed = True
+            return
+        self._call_on_loop(self._close)
+
+    def _close(self):
+        self._closed = True
+        self._wakeup.set()
+
+    def is_closed(self):
+        return self._closed
+
+    def qsize(self):
+        return 1 if self._has_value else 0
+
+    def get_stats(self):
+        return {
+            "puts": self._puts,
+            "gets": self._gets,
+            "overwritten": self._overwritten,
+            "dropped_after_shutdown": self._dropped,
+            "pending": 1 if self._has_value else 0,
+            "closed": self._closed,
+        }
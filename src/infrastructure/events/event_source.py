@@ -0,0 +1,53 @@
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+class EventSource:
+    """
+    Producer of foreground events for PowerSwitcherApp.
+
+    An event source delivers ForegroundEvent items into the output queue/mailbox it was created with
+    (anything with put_nowait). The application only depends on this interface, so the Win32
+    WinEvent hook (EventListener) can be replaced by other sources such as ReplayEventSource,
+    which drives the full pipeline from a trace file on machines without a Windows desktop.
+
+    Subclasses implement start() and stop(); stop() must be safe to call when the source is not
+    running (the application calls it during cleanup after failed starts as well).
+    """
+    # Short name used in logs and status output
+    name = "base"
+
+    def __init__(self, output_queue):
+        """
+        Args:
+            output_queue: LatestValueMailbox (or queue-like object with put_nowait()) receiving ForegroundEvent items.
+        """
+        if not hasattr(output_queue, "put_nowait"):
+            raise TypeError(f"{type(self).__name__} requires a queue-like object with put_nowait().")
+        self._output_queue = output_queue
+
+    def start(self):
+        """
+        Starts delivering events (normally on a background thread). Must not block.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        Stops delivering events and joins any background threads.
+        """
+        raise NotImplementedError
+
+    def is_alive(self):
+        """
+        True while the source is able to deliver events.
+        """
+        return False
+
+    def get_pipeline_stats(self):
+        """
+        Returns a dict of source-specific counters and latencies for status output.
+        """
+        return {}
@@ -0,0 +1,14 @@
+from collections import namedtuple
+
+# Raw event captured by the WinEvent hook callback. Only cheap data is collected there:
+# - hwnd: window handle that moved to the foreground
+# - event_time_ms: dwmsEventTime reported by Windows (GetTickCount based)
+# - received_at: time.perf_counter() when the callback ran, used for per-stage latency
+RawForegroundEvent = namedtuple("RawForegroundEvent", ["hwnd", "event_time_ms", "received_at"])
+
+# Resolved foreground event delivered to the application's processing thread.
+# - process_name: executable file name (e.g. "chrome.exe")
+# - image_path: full path of the executable, or None if unknown
+# - pid: process ID, or None if unknown
+# - timestamp: time.perf_counter() when the event entered the pipeline (hook callback / event source)
+ForegroundEvent = namedtuple("ForegroundEvent", ["process_name", "image_path", "pid", "timestamp"])
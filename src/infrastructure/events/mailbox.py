@@ -0,0 +1,125 @@
+import queue
+import threading
+
+
+class LatestValueMailbox:
+    """
+    Single-slot "latest wins" mailbox.
+
+    Only the most recent foreground app matters for power plan decisions, so instead of a FIFO
+    queue the producers overwrite a single slot and the consumer always receives the newest value.
+    Compared to queue.Queue(maxsize=N) with put_nowait():
+      - the newest event is never dropped (older, unconsumed values are replaced instead);
+      - the consumer blocks on a condition variable without periodic timeout wakeups,
+        close() wakes it up for shutdown.
+
+    The API mirrors the parts of queue.Queue used in this project (put_nowait, get, get_nowait, qsize)
+    so it can be passed wherever a queue was used before. As with the queues, None is the stop
+    sentinel: putting None closes the mailbox.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._has_value = False
+        self._value = None
+        self._closed = False
+
+        self._puts = 0
+        self._gets = 0
+        self._overwritten = 0 # Values replaced before the consumer picked them up
+
+    def put(self, value, block=True, timeout=None):
+        """
+        Stores value, replacing any value that hasn't been consumed yet. Never blocks.
+        Putting None closes the mailbox (stop sentinel).
+        """
+        if value is None:
+            self.close()
+            return
+        with self._condition:
+            if self._closed:
+                return
+            if self._has_value:
+                self._overwritten += 1
+            self._value = value
+            self._has_value = True
+            self._puts += 1
+            self._condition.notify()
+
+    def put_nowait(self, value):
+        self.put(value, block=False)
+
+    def put_if_empty(self, value):
+        """
+        Stores value only if the slot is empty, so it can never replace a newer event from a producer.
+        Used to re-evaluate the current foreground app (e.g. after a config reload).
+
+        Returns:
+            True if the value was stored, False if the slot was occupied or the mailbox is closed.
+        """
+        if value is None:
+            return False
+        with self._condition:
+            if self._closed or self._has_value:
+                return False
+            self._value = value
+            self._has_value = True
+            self._puts += 1
+            self._condition.notify()
+            return True
+
+    def get(self, block=True, timeout=None):
+        """
+        Returns the latest value and empties the slot.
+
+        Args:
+            block: wait for a value if the slot is empty.
+            timeout: maximum seconds to wait (None waits until a value arrives or the mailbox is closed).
+
+        Returns:
+            The latest value, or None once the mailbox is closed and empty.
+        Raises:
+            queue.Empty: no value arrived within the timeout (or block is False and the slot is empty).
+        """
+        with self._condition:
+            if not self._has_value and not self._closed:
+                if not block:
+                    raise queue.Empty
+                if not self._condition.wait_for(lambda: self._has_value or self._closed, timeout=timeout):
+                    raise queue.Empty
+            if not self._has_value:
+                return None # Closed
+            value = self._value
+            self._value = None
+            self._has_value = False
+            self._gets += 1
+            return value
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def close(self):
+        """
+        Closes the mailbox and wakes up all waiting consumers. Later puts are ignored.
+        A value stored before closing is still delivered.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def is_closed(self):
+        with self._condition:
+            return self._closed
+
+    def qsize(self):
+        with self._condition:
+            return 1 if self._has_value else 0
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                "puts": self._puts,
+                "gets": self._gets,
+                "overwritten": self._overwritten,
+                "pending": 1 if self._has_value else 0,
+                "closed": self._closed,
+            }
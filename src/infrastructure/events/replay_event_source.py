@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from .event_source import EventSource
+from .foreground_event import ForegroundEvent
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# One line of a foreground trace:
+# - offset: seconds since the start of the trace when the app came to the foreground
+# - process_name: executable file name (e.g. "chrome.exe")
+# - pid: process ID, or None if the trace doesn't record it
+# - image_path: full path of the executable, or None
+TraceEntry = namedtuple("TraceEntry", ["offset", "process_name", "pid", "image_path"])
+
+# Trace file format (UTF-8 text, one event per line, whitespace separated):
+#   <offset_seconds> <process_name> [pid] [image_path]
+# Blank lines and lines starting with '#' are ignored. image_path may contain spaces (rest of the line).
+# Example:
+#   0.000  explorer.exe  4120  C:\Windows\explorer.exe
+#   1.250  chrome.exe
+TRACE_COMMENT_PREFIX = "#"
+
+
+def parse_trace_lines(lines, source="<trace>"):
+    """
+    Parses trace lines into TraceEntry items sorted by offset. Invalid lines are logged and skipped.
+    """
+    entries = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith(TRACE_COMMENT_PREFIX):
+            continue
+        parts = line.split(None, 3)
+        if len(parts) < 2:
+            logger.warning(f"{source}:{line_number}: expected '<offset_seconds> <process_name> [pid] [image_path]', skipping line: {line}")
+            continue
+        try:
+            offset = float(parts[0])
+        except ValueError:
+            logger.warning(f"{source}:{line_number}: invalid offset '{parts[0]}', skipping line.")
+            continue
+        pid = None
+        if len(parts) >= 3:
+            try:
+                pid = int(parts[2])
+            except ValueError:
+                logger.warning(f"{source}:{line_number}: invalid pid '{parts[2]}', ignoring it.")
+        image_path = parts[3] if len(parts) >= 4 else None
+        entries.append(TraceEntry(max(0.0, offset), parts[1], pid, image_path))
+    # Stable sort keeps the file order for events with the same offset
+    entries.sort(key=lambda entry: entry.offset)
+    return entries
+
+
+def load_trace(trace_path):
+    """
+    Loads a trace file. Returns the list of TraceEntry items, or None if the file can't be read.
+    """
+    try:
+        with open(trace_path, "r", encoding="utf-8") as trace_file:
+            return parse_trace_lines(trace_file, source=trace_path)
+    except OSError as e:
+        logger.error(f"Failed to read foreground trace '{trace_path}': {e}")
+        return None
+
+
+class ReplayEventSource(EventSource):
+    """
+    Event source replaying a recorded (or generated) foreground trace.
+
+    Lets the complete PowerSwitcherApp pipeline (mailbox, settle window, config lookup, power backend)
+    run on machines without a Windows desktop, e.g. to load-test and profile it on Linux CI.
+    Events are delivered on the "ReplayEventThread" thread at their trace offsets divided by `speed`;
+    speed 0 replays as fast as possible. ForegroundEvent.timestamp is the perf_counter value at the
+    moment the event was put into the output queue, like the hook callback does on Windows.
+    """
+    name = "replay"
+
+    def __init__(self, output_queue, trace_path=None, entries=None, speed=1.0, repeat=1):
+        """
+        Args:
+            output_queue: LatestValueMailbox (or queue-like object with put_nowait()) receiving ForegroundEvent items.
+            trace_path: trace file to replay (see parse_trace_lines for the format). Ignored if entries is given.
+            entries: iterable of TraceEntry items to replay instead of a file.
+            speed: replay speed factor (2.0 = twice as fast as recorded, 0 = no delays at all).
+            repeat: how many times the trace is replayed back to back.
+        """
+        super().__init__(output_queue)
+        if entries is not None:
+            self._entries = sorted(entries, key=lambda entry: entry.offset)
+        elif trace_path is not None:
+            self._entries = load_trace(trace_path) or []
+        else:
+            raise ValueError("ReplayEventSource requires either trace_path or entries.")
+        self._trace_path = trace_path
+        self._speed = max(0.0, float(speed))
+        self._repeat = max(1, int(repeat))
+
+        self._thread = None
+        self._async_running = False # run_async() is replaying on an event loop
+        self._stop_event = threading.Event()
+        self._finished_event = threading.Event()
+
+        # Statistics, only written by the replay thread
+        self._stats_lock = threading.Lock()
+        self._emitted = 0
+        self._failed = 0
+        self._lag_total = 0.0 # How late events were delivered compared to their scheduled time
+        self._lag_max = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("ReplayEventSource is already running.")
+            return
+        if not self._entries:
+            logger.warning("ReplayEventSource has no trace entries to replay.")
+        self._stop_event.clear()
+        self._finished_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ReplayEventThread")
+        self._thread.daemon = False
+        self._thread.start()
+        logger.info(f"ReplayEventSource started ({len(self._entries)} entries x {self._repeat}, speed {self._speed}).")
+
+    def stop(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.error(f"ReplayEventSource thread did not stop within {timeout} seconds.")
+        else:
+            logger.info("ReplayEventSource stopped.")
+        self._thread = None
+
+    def is_alive(self):
+        return self._async_running or (self._thread is not None and self._thread.is_alive())
+
+    def wait_until_finished(self, timeout=None):
+        """
+        Blocks until the whole trace has been delivered (or the source was stopped).
+        Returns False if the timeout expired first.
+        """
+        return self._finished_event.wait(timeout)
+
+    def get_pipeline_stats(self):
+        with self._stats_lock:
+            handled = self._emitted + self._failed
+            finished_at = self._finished_at if self._finished_at is not None else time.perf_counter()
+            return {
+                "source": self.name,
+                "trace_path": self._trace_path,
+                "entries": len(self._entries),
+                "repeat": self._repeat,
+                "speed": self._speed,
+                "emitted": self._emitted,
+                "failed": self._failed,
+                "finished": self._finished_event.is_set(),
+                "duration_s": (finished_at - self._started_at) if self._started_at is not None else 0.0,
+                "lag_avg_ms": (self._lag_total / handled * 1000.0) if handled else 0.0,
+                "lag_max_ms": self._lag_max * 1000.0,
+            }
+
+    def _run(self):
+        logger.info("ReplayEventSource loop started.")
+        started_at = time.perf_counter()
+        with self._stats_lock:
+            self._started_at = started_at
+            self._finished_at = None
+        # Offsets of later repetitions continue after the last entry of the previous one
+        trace_length = self._entries[-1].offset if self._entries else 0.0
+        try:
+            for repetition in range(self._repeat):
+                base_offset = repetition * trace_length
+                for entry in self._entries:
+                    if self._stop_event.is_set():
+                        return
+                    if self._speed > 0:
+                        scheduled_at = started_at + (base_offset + entry.offset) / self._speed
+                        delay = scheduled_at - time.perf_counter()
+                        if delay > 0 and self._stop_event.wait(delay):
+                            return
+                    else:
+                        scheduled_at = time.perf_counter()
+                    self._emit(entry, scheduled_at)
+        finally:
+            with self._stats_lock:
+                self._finished_at = time.perf_counter()
+            self._finished_event.set()
+            logger.info("ReplayEventSource loop finished.")
+
+    async def run_async(self):
+        """
+        Replays the trace as a coroutine on the caller's event loop instead of the replay thread
+        (used by AsyncPowerSwitcherRuntime). Cancelling the task stops the replay.
+        """
+        # Imported here: only the asyncio runtime replays on an event loop, the threaded pipeline doesn't need asyncio
+        import asyncio
+        logger.info(f"ReplayEventSource started on the event loop ({len(self._entries)} entries x {self._repeat}, speed {self._speed}).")
+        self._finished_event.clear()
+        self._async_running = True
+        started_at = time.perf_counter()
+        with self._stats_lock:
+            self._started_at = started_at
+            self._finished_at = None
+        trace_length = self._entries[-1].offset if self._entries else 0.0
+        try:
+            for repetition in range(self._repeat):
+                base_offset = repetition * trace_length
+                for entry in self._entries:
+                    if self._speed > 0:
+                        scheduled_at = started_at + (base_offset + entry.offset) / self._speed
+                        delay = scheduled_at - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    else:
+                        scheduled_at = time.perf_counter()
+                    self._emit(entry, scheduled_at)
+                    if self._speed <= 0:
+                        # Let the consumer run between events, as the other tasks would on a real loop
+                        await asyncio.sleep(0)
+        finally:
+            self._async_running = False
+            with self._stats_lock:
+                self._finished_at = time.perf_counter()
+            self._finished_event.set()
+            logger.info("ReplayEventSource loop finished.")
+
+    def _emit(self, entry, scheduled_at):
+        now = time.perf_counter()
+        lag = max(0.0, now - scheduled_at)
+        event = ForegroundEvent(
+            process_name=entry.process_name,
+            image_path=entry.image_path,
+            pid=entry.pid,
+            timestamp=now,
+        )
+        try:
+            self._output_queue.put_nowait(event)
+            emitted = True
+        except Exception as e:
+            emitted = False
+            logger.warning(f"ReplayEventSource failed to deliver event for '{entry.process_name}': {e}")
+        with self._stats_lock:
+            if emitted:
+                self._emitted += 1
+            else:
+                self._failed += 1
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
@@ -0,0 +1,150 @@
+import logging
+import queue
+import threading
+import time
+
+from .foreground_event import ForegroundEvent
+from src.utils.metrics import get_registry
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Hot-path metrics (no-ops unless metrics are enabled)
+_raw_handoff_histogram = get_registry().histogram("pipeline.raw_handoff")
+
+
+class ResolverStage:
+    """
+    Second stage of the foreground event pipeline.
+
+    The WinEvent hook callback only enqueues RawForegroundEvent tuples (hwnd + timestamps).
+    This stage runs on its own thread, resolves the owning process of each window and forwards
+    a ForegroundEvent to the application's processing queue. Slow OpenProcess calls (elevated or
+    protected processes) therefore never stall the hook thread's message pump.
+
+    Per-stage latency is recorded: queue wait (hook -> resolver) and resolve time.
+    """
+    def __init__(self, input_queue, output_queue, resolve_fn, name="ResolverThread"):
+        """
+        Args:
+            input_queue: LatestValueMailbox (or queue) of RawForegroundEvent items. None is the stop sentinel.
+            output_queue: mailbox/queue receiving ForegroundEvent items (must support put_nowait).
+            resolve_fn: callable(hwnd) -> ProcessImageInfo-like object (with pid, image_path, name) or None.
+            name: name of the resolver thread.
+        """
+        self._input_queue = input_queue
+        self._output_queue = output_queue
+        self._resolve_fn = resolve_fn
+        self._thread_name = name
+        self._thread = None
+
+        # Statistics, only written by the resolver thread
+        self._stats_lock = threading.Lock()
+        self._received = 0
+        self._resolved = 0
+        self._failed = 0
+        self._dropped = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._resolve_total = 0.0
+        self._resolve_max = 0.0
+
+    def start(self):
+        """
+        Starts the resolver thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("ResolverStage is already running.")
+            return
+        self._thread = threading.Thread(target=self._run, name=self._thread_name)
+        # Non-daemon so stop() can join it for a clean shutdown
+        self._thread.daemon = False
+        self._thread.start()
+        logger.info(f"ResolverStage thread '{self._thread_name}' started.")
+
+    def stop(self, timeout=5.0):
+        """
+        Stops the resolver thread by sending the stop sentinel and joining it.
+        """
+        if self._thread is None:
+            return
+        try:
+            self._input_queue.put_nowait(None)
+        except queue.Full:
+            logger.warning("Resolver input queue is full during stop, resolver thread will stop after draining it.")
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.error(f"ResolverStage thread did not stop within {timeout} seconds.")
+        else:
+            logger.info("ResolverStage thread joined successfully.")
+        self._thread = None
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_stats(self):
+        """
+        Returns per-stage counters and latencies (milliseconds).
+        """
+        with self._stats_lock:
+            handled = self._resolved + self._failed
+            return {
+                "received": self._received,
+                "resolved": self._resolved,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "queue_wait_avg_ms": (self._queue_wait_total / handled * 1000.0) if handled else 0.0,
+                "queue_wait_max_ms": self._queue_wait_max * 1000.0,
+                "resolve_avg_ms": (self._resolve_total / handled * 1000.0) if handled else 0.0,
+                "resolve_max_ms": self._resolve_max * 1000.0,
+            }
+
+    def _run(self):
+        logger.info("ResolverStage loop started.")
+        while True:
+            raw_event = self._input_queue.get()
+            if raw_event is None:
+                logger.debug("ResolverStage received stop sentinel. Exiting loop.")
+                break
+            try:
+                self._handle(raw_event)
+            except Exception as e:
+                logger.error(f"Unexpected error while resolving foreground event {raw_event}: {e}", exc_info=True)
+        logger.info("ResolverStage loop finished.")
+
+    def _handle(self, raw_event):
+        dequeued_at = time.perf_counter()
+        info = self._resolve_fn(raw_event.hwnd)
+        resolved_at = time.perf_counter()
+
+        queue_wait = dequeued_at - raw_event.received_at
+        resolve_time = resolved_at - dequeued_at
+        _raw_handoff_histogram.observe(queue_wait)
+        with self._stats_lock:
+            self._received += 1
+            if info is not None:
+                self._resolved += 1
+            else:
+                self._failed += 1
+            self._queue_wait_total += queue_wait
+            self._resolve_total += resolve_time
+            self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+            self._resolve_max = max(self._resolve_max, resolve_time)
+
+        if info is None:
+            # The resolver logs its own warnings/errors
+            return
+
+        logger.info("Foreground activity detected: %s. Submitting to queue.", info.name)
+        event = ForegroundEvent(
+            process_name=info.name,
+            image_path=info.image_path,
+            pid=info.pid,
+            timestamp=raw_event.received_at,
+        )
+        try:
+            self._output_queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            logger.warning(f"Processing queue is full, dropped process name: {info.name}")
@@ -0,0 +1,170 @@
+import asyncio
+import locale
+import logging
+
+from src.infrastructure.power_management.power_backends import (
+    CREATE_NO_WINDOW_FLAG,
+    DEFAULT_POWER_BACKEND,
+    GET_ACTIVE_SCHEME_ARG,
+    LIST_ARG,
+    POWER_BACKEND_SUBPROCESS,
+    POWERCFG_COMMAND,
+    SET_ACTIVE_ARG,
+    CommandResult,
+    PowerCfgCliBackend,
+    create_power_backend,
+)
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Seconds one powercfg process may take before it is killed
+ASYNC_COMMAND_TIMEOUT = 10.0
+
+
+class AsyncPowerBackend:
+    """
+    asyncio 版电源后端接口 (AsyncPowerSwitcherRuntime 使用)。
+    方法与 PowerBackend 相同但都是协程；失败时同样返回 None/False 而不是抛出异常。
+    """
+    name = "async-base"
+
+    async def list_schemes(self):
+        """
+        获取系统中所有电源计划: (guid, name) 元组列表；失败时返回 None。
+        """
+        raise NotImplementedError
+
+    async def get_active_scheme(self):
+        """
+        获取当前活动电源计划的 GUID 字符串；失败时返回 None。
+        """
+        raise NotImplementedError
+
+    async def set_active_scheme(self, power_plan_guid: str):
+        """
+        切换到指定 GUID 的电源计划。成功返回 True，否则返回 False。
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        """
+        释放后端持有的资源。默认无操作。
+        """
+        pass
+
+
+class AsyncSubprocessPowerCfgBackend(AsyncPowerBackend):
+    """
+    通过 asyncio.create_subprocess_exec 执行 powercfg：等待进程结束时不占用任何线程。
+    输出解析与同步的 CLI 后端共用 (PowerCfgCliBackend.parse_*)。
+    """
+    name = f"async-{POWER_BACKEND_SUBPROCESS}"
+
+    def __init__(self, powercfg_command=POWERCFG_COMMAND, command_timeout=ASYNC_COMMAND_TIMEOUT):
+        """
+        Args:
+            powercfg_command: powercfg 可执行文件的名称或路径 (在 Linux 上可以指向模拟脚本)。
+            command_timeout: 单条命令的超时时间 (秒)，超时后结束该进程。
+        """
+        self._powercfg_command = powercfg_command or POWERCFG_COMMAND
+        self._command_timeout = command_timeout
+        # Same decoding as subprocess.run(text=True) in the synchronous backend
+        self._encoding = locale.getpreferredencoding(False)
+
+    async def run_command(self, args):
+        """
+        执行一次 powercfg 命令，返回 CommandResult。
+
+        Raises:
+            FileNotFoundError: powercfg 不存在。
+            asyncio.TimeoutError: 命令超时 (进程已被结束)。
+        """
+        process = await asyncio.create_subprocess_exec(
+            self._powercfg_command, *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=CREATE_NO_WINDOW_FLAG
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self._command_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Don't leave a hanging powercfg process behind (timeout or runtime shutdown)
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise
+        return CommandResult(
+            process.returncode,
+            stdout.decode(self._encoding, errors="replace"),
+            stderr.decode(self._encoding, errors="replace")
+        )
+
+    async def _run_checked(self, args, description):
+        try:
+            return await self.run_command(args)
+        except FileNotFoundError:
+            logger.error(f"PowerCfg command '{self._powercfg_command}' not found. Ensure powercfg is in your system's PATH.")
+        except asyncio.TimeoutError:
+            logger.error(f"PowerCfg command '{self._powercfg_command} {' '.join(args)}' did not finish within {self._command_timeout} seconds.")
+        except OSError as e:
+            logger.error(f"An unexpected error occurred while calling powercfg to {description}: {e}", exc_info=True)
+        return None
+
+    async def list_schemes(self):
+        logger.info(f"Loading available power schemes using command: {self._powercfg_command} {LIST_ARG}")
+        result = await self._run_checked([LIST_ARG], "list power schemes")
+        return PowerCfgCliBackend.parse_list_result(result) if result is not None else None
+
+    async def get_active_scheme(self):
+        result = await self._run_checked([GET_ACTIVE_SCHEME_ARG], "get the active scheme")
+        return PowerCfgCliBackend.parse_active_scheme_result(result) if result is not None else None
+
+    async def set_active_scheme(self, power_plan_guid: str):
+        logger.info("Attempting to switch power plan using command: %s %s %s", self._powercfg_command, SET_ACTIVE_ARG, power_plan_guid)
+        result = await self._run_checked([SET_ACTIVE_ARG, power_plan_guid], "switch the power plan")
+        return PowerCfgCliBackend.parse_set_active_result(result, power_plan_guid) if result is not None else False
+
+
+class ThreadedAsyncPowerBackend(AsyncPowerBackend):
+    """
+    把同步 PowerBackend (persistent、native 或基准测试用的模拟后端) 包装成 AsyncPowerBackend：
+    每次调用通过 asyncio.to_thread 在线程池中执行，不阻塞事件循环。
+    """
+    def __init__(self, backend):
+        """
+        Args:
+            backend: 同步 PowerBackend 实例。
+        """
+        self._backend = backend
+        self.name = f"threaded-{backend.name}"
+
+    async def list_schemes(self):
+        return await asyncio.to_thread(self._backend.list_schemes)
+
+    async def get_active_scheme(self):
+        return await asyncio.to_thread(self._backend.get_active_scheme)
+
+    async def set_active_scheme(self, power_plan_guid: str):
+        return await asyncio.to_thread(self._backend.set_active_scheme, power_plan_guid)
+
+    async def aclose(self):
+        await asyncio.to_thread(self._backend.close)
+
+
+def create_async_power_backend(backend_name=None, powercfg_command=None):
+    """
+    根据名称创建 asyncio 电源后端。
+
+    subprocess 后端直接使用 asyncio.create_subprocess_exec；其它后端 (persistent、native)
+    按 create_power_backend 创建同步实例后用 ThreadedAsyncPowerBackend 包装。
+    """
+    name = (backend_name or DEFAULT_POWER_BACKEND).strip().lower()
+    if name == POWER_BACKEND_SUBPROCESS:
+        backend = AsyncSubprocessPowerCfgBackend(powercfg_command=powercfg_command or POWERCFG_COMMAND)
+        logger.info(f"Using power backend: {backend.name}")
+        return backend
+    return ThreadedAsyncPowerBackend(create_power_backend(name, powercfg_command=powercfg_command))
@@ -0,0 +1,526 @@
+import logging
+import os
+import queue
+import re
+import shlex
+import threading
+from collections import namedtuple
+
+from src.infrastructure.power_management.scheme_catalog import parse_powercfg_list
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+POWERCFG_COMMAND = "powercfg"
+SET_ACTIVE_ARG = "/setactive"
+GET_ACTIVE_SCHEME_ARG = "/getactivescheme"
+LIST_ARG = "/list" # Used to get all plans
+
+# Backend identifiers (used by the [General] power_backend config key)
+POWER_BACKEND_SUBPROCESS = "subprocess"
+POWER_BACKEND_PERSISTENT = "persistent"
+POWER_BACKEND_NATIVE = "native"
+DEFAULT_POWER_BACKEND = POWER_BACKEND_SUBPROCESS
+
+# CREATE_NO_WINDOW hides the console window of powercfg on Windows.
+# subprocess only accepts it on Windows, so use 0 elsewhere (e.g. Linux with a fake powercfg script).
+# (Same value as subprocess.CREATE_NO_WINDOW; subprocess itself is imported by the CLI backends when
+# they run their first command, so the native backend and module import don't pay for it.)
+CREATE_NO_WINDOW_FLAG = 0x08000000 if os.name == "nt" else 0
+
+# Seconds to wait for one batch of commands in the persistent shell before giving up and restarting it.
+PERSISTENT_COMMAND_TIMEOUT = 10.0
+
+# Regex to parse power scheme information lines from 'powercfg /list' output.
+# It looks for:
+# - 'GUID:' followed by optional spaces
+# - The GUID pattern (captured in group 1)
+# - Optional spaces followed by '('
+# - The Power Plan Name inside parentheses (captured in group 2)
+# - Optional spaces followed by optional '*' (for the active scheme) and more optional spaces
+# This regex is designed to be robust against preceding text and language variations, focusing on the GUID and the content in parentheses.
+# Kept for compatibility; 'powercfg /list' output is parsed in one pass by scheme_catalog.parse_powercfg_list.
+POWER_PLAN_LIST_REGEX = re.compile(r"GUID:\s*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})\s+\((.*?)\)\s*\*?\s*", re.IGNORECASE)
+
+# Regex to parse the GUID from 'powercfg /getactivescheme' output.
+# It looks for ':' followed by optional spaces and then the GUID pattern (captured in group 1).
+# Only the ':' is required in front of the GUID, because the localized label doesn't always end with 'GUID'
+# (e.g. German 'GUID des Energieschemas: ...' or French 'GUID du mode de gestion de l'alimentation : ...').
+GUID_PARSE_REGEX = re.compile(r":\s*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})", re.IGNORECASE)
+
+# Result of a single powercfg invocation, independent of how it was executed.
+CommandResult = namedtuple("CommandResult", ["returncode", "stdout", "stderr"])
+
+
+class PowerBackend:
+    """
+    电源后端接口。PowerCfgManager 通过它读取和切换电源计划，
+    具体实现决定命令如何执行 (每次一个子进程、常驻进程等)。
+    所有方法在失败时返回 None/False 而不是抛出异常。
+    """
+    name = "base"
+    # True if load_state() and get_and_set_active_scheme() complete their commands in one round trip.
+    # Otherwise callers are better off with independent calls (run in parallel, or answered from a cache).
+    batches_commands = False
+
+    def list_schemes(self):
+        """
+        获取系统中所有电源计划。
+
+        Returns:
+            (guid, name) 元组列表；失败时返回 None。
+        """
+        raise NotImplementedError
+
+    def get_active_scheme(self):
+        """
+        获取当前活动电源计划的 GUID 字符串；失败时返回 None。
+        """
+        raise NotImplementedError
+
+    def set_active_scheme(self, power_plan_guid: str):
+        """
+        切换到指定 GUID 的电源计划。成功返回 True，否则返回 False。
+        """
+        raise NotImplementedError
+
+    def load_state(self):
+        """
+        读取电源计划列表和当前活动电源计划 (启动时需要的两项数据)。
+        默认实现依次调用 list_schemes() 和 get_active_scheme()。
+
+        Returns:
+            (schemes, active_guid) 元组，读取失败的一项为 None。
+        """
+        return self.list_schemes(), self.get_active_scheme()
+
+    def get_and_set_active_scheme(self, power_plan_guid: str):
+        """
+        读取当前活动电源计划，然后切换到指定 GUID 的电源计划 (即使它已经是活动计划，
+        对已激活的计划再次 setactive 不会改变系统状态)。
+        默认实现依次调用 get_active_scheme() 和 set_active_scheme()。
+
+        Returns:
+            (previous_active_guid, switched) 元组；previous_active_guid 读取失败时为 None。
+        """
+        return self.get_active_scheme(), self.set_active_scheme(power_plan_guid)
+
+    def close(self):
+        """
+        释放后端持有的资源 (进程、句柄等)。默认无操作。
+        """
+        pass
+
+
+class PowerCfgCliBackend(PowerBackend):
+    """
+    基于 powercfg 命令行输出的后端基类。
+    负责构造命令和解析输出，子类只需实现 run_command()。
+    """
+    name = "powercfg-cli"
+
+    def __init__(self, powercfg_command=POWERCFG_COMMAND):
+        """
+        Args:
+            powercfg_command: powercfg 可执行文件的名称或路径。
+                              在 Linux 上可以指向一个模拟 powercfg 输出的脚本。
+        """
+        self._powercfg_command = powercfg_command or POWERCFG_COMMAND
+
+    def run_command(self, args):
+        """
+        执行一次 powercfg 命令。
+
+        Args:
+            args: powercfg 参数列表 (不包含 powercfg 本身)，例如 ["/list"]。
+
+        Returns:
+            CommandResult。
+        Raises:
+            FileNotFoundError: powercfg 不存在。
+        """
+        raise NotImplementedError
+
+    def run_batch(self, arg_lists):
+        """
+        按顺序执行多条 powercfg 命令，返回对应的 CommandResult 列表。
+        默认实现逐条调用 run_command()；常驻后端会在一次往返中完成整批命令。
+        """
+        return [self.run_command(args) for args in arg_lists]
+
+    def list_schemes(self):
+        command = [self._powercfg_command, LIST_ARG]
+        logger.info(f"Loading available power schemes using command: {' '.join(command)}")
+        try:
+            result = self.run_command([LIST_ARG])
+        except FileNotFoundError:
+            logger.error(f"PowerCfg command '{self._powercfg_command}' not found. Ensure powercfg is in your system's PATH.", exc_info=True)
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while loading available power schemes from powercfg output: {e}", exc_info=True)
+            return None
+        return self.parse_list_result(result)
+
+    def get_active_scheme(self):
+        command = [self._powercfg_command, GET_ACTIVE_SCHEME_ARG]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Attempting to get active scheme GUID using command: %s", ' '.join(command))
+        try:
+            result = self.run_command([GET_ACTIVE_SCHEME_ARG])
+        except FileNotFoundError:
+            logger.error(f"PowerCfg command '{self._powercfg_command}' not found. Ensure powercfg is in your system's PATH.", exc_info=True)
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while calling powercfg command to get active scheme: {e}", exc_info=True)
+            return None
+        return self.parse_active_scheme_result(result)
+
+    def set_active_scheme(self, power_plan_guid: str):
+        command = [self._powercfg_command, SET_ACTIVE_ARG, power_plan_guid]
+        logger.info("Attempting to switch power plan using command: %s", ' '.join(command))
+        try:
+            result = self.run_command([SET_ACTIVE_ARG, power_plan_guid])
+        except FileNotFoundError:
+            logger.error(f"PowerCfg command '{self._powercfg_command}' not found. Ensure powercfg is in your system's PATH.")
+            return False
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while calling powercfg command: {e}", exc_info=True)
+            return False
+        return self.parse_set_active_result(result, power_plan_guid)
+
+    def load_state(self):
+        logger.info("Loading available power schemes and the active scheme using command: %s %s / %s",
+                    self._powercfg_command, LIST_ARG, GET_ACTIVE_SCHEME_ARG)
+        results = self._run_logged_batch([[LIST_ARG], [GET_ACTIVE_SCHEME_ARG]], "loading power schemes")
+        if results is None:
+            return None, None
+        return self.parse_list_result(results[0]), self.parse_active_scheme_result(results[1])
+
+    def get_and_set_active_scheme(self, power_plan_guid: str):
+        logger.info("Attempting to switch power plan using command: %s %s %s", self._powercfg_command, SET_ACTIVE_ARG, power_plan_guid)
+        results = self._run_logged_batch([[GET_ACTIVE_SCHEME_ARG], [SET_ACTIVE_ARG, power_plan_guid]], "switching power plan")
+        if results is None:
+            return None, False
+        return self.parse_active_scheme_result(results[0]), self.parse_set_active_result(results[1], power_plan_guid)
+
+    def _run_logged_batch(self, arg_lists, description):
+        """
+        run_batch() with the same error handling as the single commands: errors are logged and None is returned.
+        """
+        try:
+            return self.run_batch(arg_lists)
+        except FileNotFoundError:
+            logger.error(f"PowerCfg command '{self._powercfg_command}' not found. Ensure powercfg is in your system's PATH.", exc_info=True)
+        except Exception as e:
+            logger.error("An unexpected error occurred while calling powercfg commands (%s): %s", description, e, exc_info=True)
+        return None
+
+    # --- Output parsing (shared by all powercfg CLI backends) ---
+
+    @staticmethod
+    def parse_list_result(result):
+        """
+        解析 'powercfg /list' 的结果，返回 (guid, name) 列表；命令失败时返回 None。
+        """
+        logger.debug(f"PowerCfg list command executed. Return code: {result.returncode}")
+        if result.stdout:
+            logger.debug(f"PowerCfg list command stdout:\n{result.stdout.strip()}")
+        if result.stderr:
+            # powercfg /list typically doesn't output to stderr unless there's a major issue
+            logger.warning(f"PowerCfg list command stderr:\n{result.stderr.strip()}")
+
+        if result.returncode != 0:
+            logger.error(f"PowerCfg list command failed with return code {result.returncode} when loading schemes.")
+            return None
+
+        # One regex pass over the whole output instead of splitting and searching line by line
+        return [(scheme.guid, scheme.name) for scheme in parse_powercfg_list(result.stdout)]
+
+    @staticmethod
+    def parse_active_scheme_result(result):
+        """
+        解析 'powercfg /getactivescheme' 的结果，返回 GUID 字符串或 None。
+        """
+        logger.debug("PowerCfg get active scheme command executed. Return code: %s", result.returncode)
+        if result.stdout:
+            logger.debug("PowerCfg get active scheme command stdout: %s", result.stdout.strip())
+        if result.stderr:
+            # Not typically expected for getactivescheme, but log just in case
+            logger.warning(f"PowerCfg get active scheme command stderr: {result.stderr.strip()}")
+
+        if result.returncode != 0:
+            logger.error(f"PowerCfg get active scheme command failed with return code {result.returncode} when getting active scheme.")
+            return None
+
+        match = GUID_PARSE_REGEX.search(result.stdout) # re.IGNORECASE is in the compiled regex
+        if not match:
+            # Log the output that failed parsing, helpful for debugging regex or unexpected output format
+            logger.error(f"Could not parse GUID from powercfg output: '{result.stdout.strip()}' using regex '{GUID_PARSE_REGEX.pattern}'.")
+            return None
+        return match.group(1).strip()
+
+    @staticmethod
+    def parse_set_active_result(result, power_plan_guid):
+        """
+        解析 'powercfg /setactive' 的结果，返回 True/False。
+        """
+        logger.debug("PowerCfg switch command executed. Return code: %s", result.returncode)
+        if result.stdout:
+            # powercfg /setactive on success usually has no stdout or minimal output if already active
+            logger.debug("PowerCfg switch command stdout: %s", result.stdout.strip())
+        if result.stderr:
+            # powercfg /setactive on failure writes error message to stderr
+            logger.error(f"PowerCfg switch command stderr: {result.stderr.strip()}")
+
+        if result.returncode == 0:
+            return True
+        # Non-zero return code indicates an issue (invalid GUID, syntax error, permission denied, etc.)
+        logger.error(f"PowerCfg command failed with return code {result.returncode} for GUID '{power_plan_guid}'. Check stderr for details.")
+        logger.error("Hint: Power plan switching typically requires Administrator privileges or the GUID was invalid.")
+        return False
+
+
+class SubprocessPowerCfgBackend(PowerCfgCliBackend):
+    """
+    每条命令启动一个新的 powercfg 进程 (原有实现)。
+    简单可靠，但每次调用都有一次进程创建的开销。
+    """
+    name = POWER_BACKEND_SUBPROCESS
+
+    def run_command(self, args):
+        import subprocess
+        result = subprocess.run(
+            [self._powercfg_command] + list(args),
+            capture_output=True,
+            text=True, # Decode as text using default system encoding
+            check=False, # Do not raise exception for non-zero exit codes
+            shell=False, # Do not use shell
+            creationflags=CREATE_NO_WINDOW_FLAG
+        )
+        return CommandResult(result.returncode, result.stdout or "", result.stderr or "")
+
+
+class PersistentPowerCfgBackend(PowerCfgCliBackend):
+    """
+    通过一个常驻的命令解释器 (Windows 上为 cmd.exe，其它系统为 /bin/sh) 执行 powercfg。
+    powercfg 本身仍然每条命令启动一次 (由解释器启动)，节省的是 Python 端的子进程和管道创建，
+    以及往返次数：load_state() (启动时的 /list + /getactivescheme) 和
+    get_and_set_active_scheme() (切换时的 /getactivescheme + /setactive) 各只需一次往返。
+    单条命令 (缓存命中时的切换、活动计划查询) 与 subprocess 后端的耗时基本相同。
+    命令输出通过唯一的标记行分隔，标记行同时携带退出码。
+    解释器异常退出或超时后会在下一次调用时自动重启。
+    """
+    name = POWER_BACKEND_PERSISTENT
+    batches_commands = True
+
+    def __init__(self, powercfg_command=POWERCFG_COMMAND, command_timeout=PERSISTENT_COMMAND_TIMEOUT):
+        super().__init__(powercfg_command)
+        self._command_timeout = command_timeout
+        self._shell = None
+        self._output_lines = None # queue.Queue filled by the reader thread
+        self._reader_thread = None
+        # Only one batch may be in flight at a time, output markers are matched sequentially
+        self._lock = threading.Lock()
+
+    def run_command(self, args):
+        return self.run_batch([args])[0]
+
+    def run_batch(self, arg_lists):
+        arg_lists = [list(args) for args in arg_lists]
+        if not arg_lists:
+            return []
+        with self._lock:
+            self._ensure_shell()
+            token = os.urandom(16).hex()
+            script_lines = []
+            for index, args in enumerate(arg_lists):
+                script_lines.append(self._build_command_line([self._powercfg_command] + args))
+                script_lines.append(self._build_marker_line(token, index))
+            try:
+                self._shell.stdin.write("\n".join(script_lines) + "\n")
+                self._shell.stdin.flush()
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to write to persistent powercfg shell: {e}. Shell will be restarted on next call.")
+                self._terminate_shell()
+                raise
+            return self._collect_results(token, len(arg_lists))
+
+    def close(self):
+        with self._lock:
+            self._terminate_shell()
+
+    # --- Internal helpers ---
+
+    def _ensure_shell(self):
+        """Start the shell if it isn't running. Must be called with self._lock held."""
+        if self._shell is not None and self._shell.poll() is None:
+            return
+
+        if self._shell is not None:
+            logger.warning(f"Persistent powercfg shell exited with code {self._shell.returncode}. Restarting it.")
+            self._terminate_shell()
+
+        if os.name == "nt":
+            # /Q turns echo off (no prompts or command echo in the output), /D skips AutoRun commands
+            shell_command = ["cmd.exe", "/Q", "/D", "/K"]
+        else:
+            shell_command = ["/bin/sh"]
+
+        logger.info(f"Starting persistent powercfg shell: {' '.join(shell_command)}")
+        import subprocess
+        self._shell = subprocess.Popen(
+            shell_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, # stderr of each command is redirected explicitly, this catches shell errors
+            text=True,
+            bufsize=1, # Line buffered
+            shell=False,
+            creationflags=CREATE_NO_WINDOW_FLAG
+        )
+        self._output_lines = queue.Queue()
+        self._reader_thread = threading.Thread(
+            target=self._read_output,
+            args=(self._shell.stdout, self._output_lines),
+            name="PowerCfgShellReader",
+            daemon=True
+        )
+        self._reader_thread.start()
+
+    @staticmethod
+    def _read_output(stream, output_lines):
+        """Reader thread: forwards every output line of the shell to the queue. None marks EOF."""
+        try:
+            for line in stream:
+                output_lines.put(line.rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            output_lines.put(None)
+
+    @staticmethod
+    def _build_command_line(command):
+        if os.name == "nt":
+            import subprocess
+            return f"{subprocess.list2cmdline(command)} 2>&1"
+        return f"{shlex.join(command)} 2>&1"
+
+    @staticmethod
+    def _build_marker_line(token, index):
+        # %ERRORLEVEL% / $? expand to the exit code of the preceding command
+        if os.name == "nt":
+            return f"echo __APS_{token}_{index}_%ERRORLEVEL%"
+        return f"echo __APS_{token}_{index}_$?"
+
+    def _collect_results(self, token, count):
+        """Read output lines until all markers of the batch have been seen. Must be called with self._lock held."""
+        results = []
+        current_output = []
+        marker_prefix = f"__APS_{token}_"
+        while len(results) < count:
+            try:
+                line = self._output_lines.get(timeout=self._command_timeout)
+            except queue.Empty:
+                logger.error(f"Timed out after {self._command_timeout}s waiting for persistent powercfg shell output. Restarting shell.")
+                self._terminate_shell()
+                raise TimeoutError("Persistent powercfg shell did not respond in time.")
+
+            if line is None:
+                logger.error("Persistent powercfg shell closed its output unexpectedly.")
+                self._terminate_shell()
+                raise OSError("Persistent powercfg shell exited unexpectedly.")
+
+            marker_pos = line.find(marker_prefix)
+            if marker_pos < 0:
+                current_output.append(line)
+                continue
+
+            # Text printed without a trailing newline ends up in front of the marker
+            if marker_pos > 0:
+                current_output.append(line[:marker_pos])
+            _, returncode_str = line[marker_pos + len(marker_prefix):].split("_", 1)
+            try:
+                returncode = int(returncode_str.strip())
+            except ValueError:
+                returncode = -1
+            results.append(CommandResult(returncode, "\n".join(current_output), ""))
+            current_output = []
+
+        # A missing executable is reported by the shell (9009 for cmd.exe, 127 for sh) instead of raising in Python.
+        # Checked after the whole batch was read so no output is left behind for the next batch.
+        for result in results:
+            if result.returncode in (9009, 127):
+                raise FileNotFoundError(f"Command '{self._powercfg_command}' not found by persistent shell: {result.stdout.strip()}")
+        return results
+
+    def _terminate_shell(self):
+        """Stop the shell process. Must be called with self._lock held."""
+        shell = self._shell
+        self._shell = None
+        if shell is None:
+            return
+        try:
+            if shell.poll() is None:
+                try:
+                    shell.stdin.write("exit\n")
+                    shell.stdin.flush()
+                except (OSError, ValueError):
+                    pass
+                import subprocess
+                try:
+                    shell.wait(timeout=1.0)
+                except subprocess.TimeoutExpired:
+                    shell.kill()
+                    shell.wait(timeout=1.0)
+        except Exception as e:
+            logger.warning(f"Error while stopping persistent powercfg shell: {e}")
+        finally:
+            for stream in (shell.stdin, shell.stdout):
+                try:
+                    if stream:
+                        stream.close()
+                except Exception:
+                    pass
+        logger.debug("Persistent powercfg shell stopped.")
+
+
+def _create_native_backend(powercfg_command=None):
+    # Imported lazily: the module binds powrprof.dll through ctypes.windll, which only exists on Windows
+    from src.infrastructure.power_management.powrprof_backend import NativePowerBackend
+    return NativePowerBackend(powercfg_command=powercfg_command)
+
+
+# Registry of selectable backends, keyed by the [General] power_backend config value.
+# Values are backend classes or factories, called with powercfg_command=...
+POWER_BACKENDS = {
+    POWER_BACKEND_SUBPROCESS: SubprocessPowerCfgBackend,
+    POWER_BACKEND_PERSISTENT: PersistentPowerCfgBackend,
+    POWER_BACKEND_NATIVE: _create_native_backend,
+}
+
+
+def create_power_backend(backend_name=None, powercfg_command=None):
+    """
+    根据名称创建电源后端实例。
+
+    Args:
+        backend_name: POWER_BACKENDS 中的名称；为空或未知时使用默认的 subprocess 后端。
+        powercfg_command: powercfg 可执行文件的名称或路径。
+
+    Returns:
+        PowerBackend 实例。native 后端不可用 (非 Windows 系统) 时同样回退到默认后端。
+    """
+    name = (backend_name or DEFAULT_POWER_BACKEND).strip().lower()
+    backend_factory = POWER_BACKENDS.get(name)
+    if backend_factory is None:
+        logger.warning(f"Unknown power backend '{backend_name}'. Falling back to '{DEFAULT_POWER_BACKEND}'. Valid backends are: {', '.join(POWER_BACKENDS)}")
+        backend_factory = POWER_BACKENDS[DEFAULT_POWER_BACKEND]
+    try:
+        backend = backend_factory(powercfg_command=powercfg_command or POWERCFG_COMMAND)
+    except (OSError, AttributeError) as e:
+        # E.g. powrprof.dll (or one of its functions) is not available
+        logger.error(f"Power backend '{name}' is not available: {e}. Falling back to '{DEFAULT_POWER_BACKEND}'.")
+        backend = POWER_BACKENDS[DEFAULT_POWER_BACKEND](powercfg_command=powercfg_command or POWERCFG_COMMAND)
+    logger.info(f"Using power backend: {backend.name}")
+    return backend
@@ -1,130 +1,217 @@
 import logging
-import subprocess
 import sys
-import shlex # Still useful for potential edge cases, but less critical now
-import re
-
-import win32con
-
-# threading is not needed here
-# import threading # Ensure threading is not imported
+import threading
+import time
+
+# The powercfg command construction and output parsing live in the backend layer.
+# Constants are re-exported here for code that still imports them from this module.
+from .power_backends import (
+    POWERCFG_COMMAND as POWERCARD_COMMAND,
+    SET_ACTIVE_ARG,
+    GET_ACTIVE_SCHEME_ARG,
+    LIST_ARG,
+    POWER_PLAN_LIST_REGEX,
+    GUID_PARSE_REGEX,
+    create_power_backend,
+)
+from .scheme_catalog import SchemeCatalog
+from src.utils.metrics import get_registry
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-# --- Constants ---
-POWERCARD_COMMAND = "powercfg"
-SET_ACTIVE_ARG = "/setactive"
-GET_ACTIVE_SCHEME_ARG = "/getactivescheme"
-LIST_ARG = "/list" # Used to get all plans
-
-# Regex to parse power scheme information lines from 'powercfg /list' output.
-# It looks for:
-# - 'GUID:' followed by optional spaces
-# - The GUID pattern (captured in group 1)
-# - Optional spaces followed by '('
-# - The Power Plan Name inside parentheses (captured in group 2)
-# - Optional spaces followed by optional '*' (for the active scheme) and more optional spaces
-# This regex is designed to be robust against preceding text and language variations, focusing on the GUID and the content in parentheses.
-POWER_PLAN_LIST_REGEX = re.compile(r"GUID:\s*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})\s+\((.*?)\)\s*\*?\s*", re.IGNORECASE)
-
-# Regex to parse the GUID from 'powercfg /getactivescheme' output.
-# It looks for 'GUID:' followed by optional spaces and then the GUID pattern (captured in group 1).
-# This regex is also robust against preceding text and language variations.
-GUID_PARSE_REGEX = re.compile(r"GUID:\s*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})", re.IGNORECASE)
+# Seconds a cached active scheme GUID is trusted before powercfg is queried again.
+# The cache is also updated on every successful switch and by external change notifications,
+# so the TTL is only a safety net for changes nobody told us about. 0 disables the cache.
+DEFAULT_ACTIVE_SCHEME_CACHE_TTL = 30.0
+# Minimum seconds between two catalog refreshes triggered by an unknown GUID, so a GUID that
+# really doesn't exist (e.g. a typo in the config) can't make every event list the schemes again.
+DEFAULT_SCHEME_REFRESH_INTERVAL = 30.0
+
+# Hot-path metrics (no-ops unless metrics are enabled)
+_metrics = get_registry()
+_get_active_histogram = _metrics.histogram("power.get_active_scheme")
+_backend_get_active_histogram = _metrics.histogram("power.backend_get_active_scheme")
+_switch_histogram = _metrics.histogram("power.switch_power_plan")
+_switch_failures = _metrics.counter("power.switch_failures")
+_scheme_refreshes = _metrics.counter("power.scheme_catalog_refreshes")
+
+# Power scheme list load states (get_scheme_load_state)
+SCHEME_LOAD_PENDING = "pending"
+SCHEME_LOAD_LOADED = "loaded"
+SCHEME_LOAD_FAILED = "failed"
 
 # --- PowerCfgManager Class ---
 
 class PowerCfgManager:
     """
-    负责通过 Windows 内置的 powercfg 命令行工具管理电源计划。
+    负责管理 Windows 电源计划。
     能够加载系统电源方案列表 (GUID 和名称) 并根据 GUID 切换。
+    实际的系统调用由可替换的电源后端 (见 power_backends.py) 完成。
     """
-    def __init__(self):
+    def __init__(self, backend=None, active_scheme_cache_ttl=DEFAULT_ACTIVE_SCHEME_CACHE_TTL, clock=time.monotonic,
+                 scheme_refresh_interval=DEFAULT_SCHEME_REFRESH_INTERVAL, load_schemes=True):
         """
         初始化 PowerCfgManager. 加载系统可用电源方案列表。
+
+        Args:
+            backend: PowerBackend 实例。为 None 时使用默认的 subprocess 后端
+                     (每次调用启动一个 powercfg 进程)。
+            active_scheme_cache_ttl: 活动电源计划缓存的有效期 (秒)。0 表示禁用缓存。
+            clock: 返回单调时间 (秒) 的函数，用于缓存过期判断。
+            scheme_refresh_interval: 因遇到未知 GUID 而自动刷新电源计划目录的最小间隔 (秒)。
+            load_schemes: 是否在初始化时 (同步) 加载电源计划列表。为 False 时由调用方稍后调用
+                          refresh_schemes() (例如启动编排器在后台线程中加载)，在此之前目录为空。
         """
         logger.debug("Initializing PowerCfgManager instance.")
-        # Store mapping from plan name (lowercase) to GUID
-        self._name_to_guid_map = {}
-        # Store GUID (lowercase) to name map
-        self._guid_to_name_map = {}
-        # Load schemes during initialization
-        self._load_available_schemes()
+        self._backend = backend if backend is not None else create_power_backend()
+
+        # --- Active scheme cache ---
+        # The processing thread, the GUI status path and external change notifications all touch the cache.
+        self._cache_lock = threading.Lock()
+        self._active_scheme_cache_ttl = max(0.0, float(active_scheme_cache_ttl or 0.0))
+        self._clock = clock
+        self._cached_active_guid = None # Lowercase GUID or None if nothing is cached
+        self._cached_active_at = 0.0
+        # Bumped on every cache write/invalidation. A backend query only stores its result if the
+        # generation is unchanged, so a slow query can't overwrite a newer authoritative value.
+        self._cache_generation = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_invalidations = 0
+
+        # --- Power scheme catalog ---
+        # Immutable SchemeCatalog (GUID <-> name), replaced as a whole by refresh_schemes().
+        # Readers (name lookups for logs/GUI) use the current reference without locking.
+        self._catalog = SchemeCatalog()
+        self._catalog_lock = threading.Lock() # Serializes refreshes
+        self._scheme_refresh_interval = max(0.0, float(scheme_refresh_interval or 0.0))
+        self._last_refresh_at = None # clock() of the last refresh attempt
+        self._catalog_refreshes = 0
+        self._catalog_lazy_refreshes = 0
+        # Outcome of the last refresh: SCHEME_LOAD_PENDING until one has finished (e.g. still loading in
+        # the background at startup), then SCHEME_LOAD_LOADED or SCHEME_LOAD_FAILED
+        self._scheme_load_state = SCHEME_LOAD_PENDING
+        # Load schemes during initialization, unless the caller loads them itself (e.g. in parallel with startup)
+        if load_schemes:
+            self._load_available_schemes()
+
+    def get_backend(self):
+        """
+        返回当前使用的电源后端实例。
+        """
+        return self._backend
+
+    def close(self):
+        """
+        释放电源后端持有的资源 (例如常驻的 powercfg 解释器进程)。
+        """
+        try:
+            self._backend.close()
+            logger.debug(f"Power backend '{self._backend.name}' closed.")
+        except Exception as e:
+            logger.error(f"Error closing power backend '{self._backend.name}': {e}", exc_info=True)
 
     def _load_available_schemes(self):
         """
-        通过执行 'powercfg /list' 命令加载系统所有可用电源方案的名称和 GUID。
-        构建名称到 GUID 和 GUID 到名称 的内部映射。
+        通过电源后端加载系统所有可用电源方案的名称和 GUID。
         这个方法在 __init__ 中调用。
         """
-        command = [POWERCARD_COMMAND, LIST_ARG]
-        logger.info(f"Loading available power schemes using command: {' '.join(command)}")
+        self.refresh_schemes()
 
-        try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True, # Decode as text using default system encoding
-                check=False, # Do not raise exception for non-zero exit codes
-                shell=False,# Do not use shell
-                creationflags=win32con.CREATE_NO_WINDOW
-            )
-
-            logger.debug(f"PowerCfg list command executed. Return code: {result.returncode}")
-            if result.stdout:
-                logger.debug(f"PowerCfg list command stdout:\n{result.stdout.strip()}")
-            if result.stderr:
-                # powercfg /list typically doesn't output to stderr unless there's a major issue
-                logger.warning(f"PowerCfg list command stderr:\n{result.stderr.strip()}")
-
-            # On success, parse the output
-            if result.returncode == 0:
-                lines = result.stdout.splitlines()
-                parsed_count = 0
-                # Clear existing maps before populating
-                self._name_to_guid_map = {}
-                self._guid_to_name_map = {}
-
-                for line in lines:
-                    match = POWER_PLAN_LIST_REGEX.search(line)
-                    if match:
-                        # Extract GUID (group 1) and Name (group 2) from regex groups
-                        guid = match.group(1).strip()
-                        name = match.group(2).strip()
-                        if guid and name: # Ensure both GUID and Name were captured
-                            # Store mapping using lowercase name for case-insensitive lookup
-                            self._name_to_guid_map[name.lower()] = guid
-                            # Store mapping using lowercase GUID for case-insensitive lookup
-                            self._guid_to_name_map[guid.lower()] = name
-                            parsed_count += 1
-                            # logger.debug(f"Parsed scheme: '{name}' -> '{guid}'") # Too verbose
-
-                logger.info(f"Successfully loaded {parsed_count} available power schemes.")
-                if parsed_count == 0:
-                     logger.warning(f"Found 0 power schemes when parsing powercfg '{LIST_ARG}' output. Please check command output format or if any schemes exist.")
-
-            else:
-                logger.error(f"PowerCfg list command failed with return code {result.returncode} when loading schemes.", exc_info=True)
-                # Clear maps on failure to indicate no schemes were loaded
-                self._name_to_guid_map = {}
-                self._guid_to_name_map = {}
-
-        except FileNotFoundError:
-            logger.error(f"PowerCfg command '{POWERCARD_COMMAND}' not found. Ensure powercfg is in your system's PATH.", exc_info=True)
-            # Clear maps on failure
-            self._name_to_guid_map = {}
-            self._guid_to_name_map = {}
-        except Exception as e:
-            logger.error(f"An unexpected error occurred while loading available power schemes from powercfg output: {e}", exc_info=True)
-            # Clear maps on failure
-            self._name_to_guid_map = {}
-            self._guid_to_name_map = {}
+    def refresh_schemes(self, include_active_scheme=False):
+        """
+        重新从电源后端读取电源计划列表并替换目录。
+        计划列表未变化时保留原目录的版本号；读取失败时保留原目录。
+
+        Args:
+            include_active_scheme: 为 True 时同时读取当前活动计划并写入缓存 (启动时使用)，
+                                   支持批量执行的后端在一次往返中完成两项读取。
+
+        Returns:
+            刷新后的 SchemeCatalog。
+        """
+        with self._catalog_lock:
+            self._last_refresh_at = self._clock()
+            schemes = None
+            try:
+                if include_active_scheme:
+                    with self._cache_lock:
+                        if self._active_scheme_cache_ttl > 0:
+                            self._cache_misses += 1
+                        generation = self._cache_generation
+                    schemes, active_guid = self._backend.load_state()
+                    if active_guid:
+                        self._store_active_scheme(active_guid, expected_generation=generation)
+                else:
+                    schemes = self._backend.list_schemes()
+            finally:
+                # Also on an exception, so nobody waits for a load that will never finish
+                self._scheme_load_state = SCHEME_LOAD_LOADED if schemes is not None else SCHEME_LOAD_FAILED
+            self._catalog_refreshes += 1
+            _scheme_refreshes.inc()
+
+            if schemes is None:
+                logger.error("Failed to load available power schemes from the power backend.")
+                return self._catalog
+
+            current = self._catalog
+            catalog = SchemeCatalog(schemes, version=current.version + 1)
+            if current.version > 0 and catalog.same_schemes(current):
+                logger.debug("Power scheme list unchanged (catalog version %s).", current.version)
+                return current
+            self._catalog = catalog
+
+        logger.info(f"Successfully loaded {len(catalog)} available power schemes (catalog version {catalog.version}).")
+        if not len(catalog):
+             logger.warning(f"Found 0 power schemes when parsing powercfg '{LIST_ARG}' output. Please check command output format or if any schemes exist.")
+        return catalog
+
+    def _refresh_if_unknown(self, guid):
+        """
+        遇到目录中没有的 GUID 时 (例如用户新建了电源计划)，按最小间隔限制刷新目录。
+        """
+        if not guid or guid in self._catalog:
+            return
+        if self._catalog_lock.locked():
+            # A refresh (e.g. the initial load running in the background at startup) is already in progress
+            return
+        last_refresh_at = self._last_refresh_at
+        if last_refresh_at is not None and self._clock() - last_refresh_at < self._scheme_refresh_interval:
+            return
+        logger.info("GUID '%s' is not in the power scheme catalog. Refreshing the catalog.", guid)
+        self._catalog_lazy_refreshes += 1
+        self.refresh_schemes()
+
+    def get_scheme_catalog(self):
+        """
+        返回当前的电源计划目录 (不可变的 SchemeCatalog)。
+        """
+        return self._catalog
+
+    def get_scheme_load_state(self):
+        """
+        返回电源计划列表的加载状态：SCHEME_LOAD_PENDING (尚未加载完成)、SCHEME_LOAD_LOADED 或 SCHEME_LOAD_FAILED (最近一次读取失败)。
+        """
+        return self._scheme_load_state
+
+    def get_scheme_catalog_stats(self):
+        """
+        返回电源计划目录的统计信息。
+        """
+        catalog = self._catalog
+        return {
+            "version": catalog.version,
+            "schemes": len(catalog),
+            "refreshes": self._catalog_refreshes,
+            "lazy_refreshes": self._catalog_lazy_refreshes,
+            "load_state": self._scheme_load_state,
+        }
 
     def switch_power_plan(self, power_plan_guid: str):
         """
         切换当前的活动电源计划到指定的 GUID.
-        此方法直接使用传入的 GUID 调用 powercfg /setactive.
+        此方法直接使用传入的 GUID 调用电源后端 (默认即 powercfg /setactive).
 
         Args:
             power_plan_guid: 电源计划的 GUID 字符串。
@@ -144,100 +231,151 @@ class PowerCfgManager:
         # We expect a GUID string here based on the application logic and configuration.
         command_identifier = power_plan_guid.strip() # Use the provided GUID directly after cleaning whitespace
 
-        # Basic check if it looks like a GUID (optional, powercfg will validate anyway)
-        # if not re.match(r"^[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}$", command_identifier):
-        #      logger.warning(f"Provided power_plan_guid '{power_plan_guid}' does not look like a standard GUID format.")
-        #      # Still proceed, powercfg will be the final validator.
+        started = _switch_histogram.start()
+        switched = self._backend.set_active_scheme(command_identifier)
+        _switch_histogram.stop(started)
+        return self._record_switch_result(command_identifier, switched)
 
-        # Build the command. Pass the GUID directly.
-        # Use a list of strings for subprocess.run command argument (shell=False is safer)
-        command = [POWERCARD_COMMAND, SET_ACTIVE_ARG, command_identifier]
-        logger.info(f"Attempting to switch power plan using command: {' '.join(command)}")
+    def ensure_power_plan(self, power_plan_guid: str):
+        """
+        确保指定 GUID 的电源计划处于活动状态：已经是活动计划时不做切换，否则切换。
+        缓存有效或后端不支持批量执行时，分别调用 get_active_scheme_guid() 和 switch_power_plan()；
+        否则查询和切换在一次后端往返中完成 (PowerBackend.get_and_set_active_scheme)。
 
-        try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True, # Decode output as text
-                check=False, # Do not raise CalledProcessError on non-zero exit code
-                shell=False, # Do not use shell
-                creationflags=win32con.CREATE_NO_WINDOW
-            )
-
-            logger.debug(f"PowerCfg switch command executed. Return code: {result.returncode}")
-            if result.stdout:
-                # powercfg /setactive on success usually has no stdout or minimal output if already active
-                logger.debug(f"PowerCfg switch command stdout: {result.stdout.strip()}")
-            if result.stderr:
-                # powercfg /setactive on failure writes error message to stderr
-                logger.error(f"PowerCfg switch command stderr: {result.stderr.strip()}")
-
-            if result.returncode == 0:
-                # Successful command even if no change needed (powercfg returns 0 if already active or if valid GUID syntax).
-                logger.info(f"Successfully sent command to switch power plan to GUID '{power_plan_guid}'.")
-                return True
-            else:
-                # Non-zero return code indicates an issue (invalid GUID, syntax error, permission denied, etc.)
-                logger.error(f"PowerCfg command failed with return code {result.returncode} for GUID '{power_plan_guid}'. Check stderr for details.")
-                logger.error("Hint: Power plan switching typically requires Administrator privileges or the GUID was invalid.")
-                return False
-
-        except FileNotFoundError:
-            logger.error(f"PowerCfg command '{POWERCARD_COMMAND}' not found. Ensure powercfg is in your system's PATH.")
-            return False
-        except Exception as e:
-            logger.error(f"An unexpected error occurred while calling powercfg command: {e}", exc_info=True)
-            return False
+        Args:
+            power_plan_guid: 电源计划的 GUID 字符串 (小写)。
 
-    def get_active_scheme_guid(self):
+        Returns:
+            (already_active, success) 元组。already_active 为 True 时系统已处于该计划，success 同样为 True。
+        """
+        if not power_plan_guid:
+            logger.warning("Cannot switch power plan - no GUID provided.")
+            return False, False
+        command_identifier = power_plan_guid.strip()
+        if not self._backend.batches_commands or self._has_fresh_active_scheme():
+            if self.get_active_scheme_guid() == command_identifier:
+                return True, True
+            return False, self.switch_power_plan(command_identifier)
+
+        with self._cache_lock:
+            if self._active_scheme_cache_ttl > 0:
+                self._cache_misses += 1
+        started = _switch_histogram.start()
+        previous_guid, switched = self._backend.get_and_set_active_scheme(command_identifier)
+        _switch_histogram.stop(started)
+        if previous_guid and previous_guid.strip().lower() == command_identifier.lower():
+            # The plan was already active, the setactive in the same batch didn't change anything
+            self._store_active_scheme(command_identifier)
+            return True, True
+        return False, self._record_switch_result(command_identifier, switched)
+
+    def _record_switch_result(self, guid, switched):
+        """
+        Update the cache, the catalog and the metrics after a setactive call.
+        """
+        if switched:
+            # Successful command even if no change needed (powercfg returns 0 if already active or if valid GUID syntax).
+            logger.info("Successfully sent command to switch power plan to GUID '%s'.", guid)
+            # We just made this plan active, so it is the best known value for the cache.
+            self._store_active_scheme(guid)
+            # The switch succeeded, so the plan exists: an unknown GUID means the catalog is stale
+            self._refresh_if_unknown(guid)
+            return True
+        _switch_failures.inc()
+        # The state of the system is unknown after a failed switch, query it next time.
+        self.invalidate_active_scheme_cache()
+        return False
+
+    def get_active_scheme_guid(self, use_cache=True):
         """
         获取当前活动的电源计划的 GUID.
+        在缓存有效期内直接返回缓存值，不调用电源后端。
+
+        Args:
+            use_cache: False 时忽略缓存，强制向系统查询 (查询结果仍会写入缓存)。
 
         Returns:
-            当前活跃电源计划的 GUID 字符串，或在获取失败时返回 None.
+            当前活跃电源计划的 GUID 字符串 (小写)，或在获取失败时返回 None.
+        """
+        started = _get_active_histogram.start()
+        caching_enabled = self._active_scheme_cache_ttl > 0
+        with self._cache_lock:
+            if use_cache and caching_enabled and self._cached_active_guid is not None \
+                    and self._clock() - self._cached_active_at < self._active_scheme_cache_ttl:
+                self._cache_hits += 1
+                _get_active_histogram.stop(started)
+                return self._cached_active_guid
+            if caching_enabled:
+                self._cache_misses += 1
+            generation = self._cache_generation
+
+        backend_started = _backend_get_active_histogram.start()
+        active_guid = self._backend.get_active_scheme()
+        _backend_get_active_histogram.stop(backend_started)
+        if active_guid:
+            # Same normalization as the cache, callers compare it with lowercase config GUIDs
+            active_guid = active_guid.strip().lower()
+            logger.debug("Successfully retrieved active power scheme GUID: %s", active_guid)
+            self._store_active_scheme(active_guid, expected_generation=generation)
+        _get_active_histogram.stop(started)
+        # Outside the measured section: only does work for a GUID the catalog doesn't know yet
+        self._refresh_if_unknown(active_guid)
+        return active_guid
+
+    def _has_fresh_active_scheme(self):
         """
-        command = [POWERCARD_COMMAND, GET_ACTIVE_SCHEME_ARG]
-        logger.debug(f"Attempting to get active scheme GUID using command: {' '.join(command)}")
+        True if get_active_scheme_guid() would currently be answered from the cache.
+        """
+        with self._cache_lock:
+            return self._active_scheme_cache_ttl > 0 and self._cached_active_guid is not None \
+                and self._clock() - self._cached_active_at < self._active_scheme_cache_ttl
 
-        try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=False,
-                shell=False,
-                creationflags=win32con.CREATE_NO_WINDOW
-            )
-
-            logger.debug(f"PowerCfg get active scheme command executed. Return code: {result.returncode}")
-            if result.stdout:
-                logger.debug(f"PowerCfg get active scheme command stdout: {result.stdout.strip()}")
-            if result.stderr:
-                # Not typically expected for getactivescheme, but log just in case
-                logger.warning(f"PowerCfg get active scheme command stderr: {result.stderr.strip()}")
-
-            # On success (return code 0), parse the stdout
-            if result.returncode == 0:
-                match = GUID_PARSE_REGEX.search(result.stdout) # re.IGNORECASE is in the compiled regex
-                if match:
-                    # Extract the captured GUID (group 1) and strip whitespace
-                    active_guid = match.group(1).strip()
-                    logger.info(f"Successfully retrieved active power scheme GUID: {active_guid}")
-                    return active_guid
-                else:
-                    # Log the output that failed parsing, helpful for debugging regex or unexpected output format
-                    logger.error(f"Could not parse GUID from powercfg output: '{result.stdout.strip()}' using regex '{GUID_PARSE_REGEX.pattern}'.")
-                    return None
-            else:
-                logger.error(f"PowerCfg get active scheme command failed with return code {result.returncode} when getting active scheme.")
-                return None
-
-        except FileNotFoundError:
-            logger.error(f"PowerCfg command '{POWERCARD_COMMAND}' not found. Ensure powercfg is in your system's PATH.", exc_info=True)
-            return None
-        except Exception as e:
-            logger.error(f"An unexpected error occurred while calling powercfg command to get active scheme: {e}", exc_info=True)
-            return None
+    def invalidate_active_scheme_cache(self, new_active_guid=None):
+        """
+        外部变更信号：系统的活动电源计划被本程序以外的途径修改时调用
+        (例如 WM_POWERBROADCAST / GUID_POWERSCHEME_PERSONALITY 通知，或用户手动切换)。
+
+        Args:
+            new_active_guid: 通知中携带的新活动计划 GUID。提供时直接作为权威值写入缓存，
+                             否则清空缓存，下次查询时重新调用电源后端。
+        """
+        with self._cache_lock:
+            self._cache_invalidations += 1
+        if new_active_guid:
+            self._store_active_scheme(new_active_guid)
+            logger.debug(f"Active scheme cache updated by external change notification: {new_active_guid}")
+            return
+        with self._cache_lock:
+            self._cached_active_guid = None
+            self._cache_generation += 1
+        logger.debug("Active scheme cache invalidated.")
+
+    def get_active_scheme_cache_stats(self):
+        """
+        返回活动电源计划缓存的统计信息 (命中/未命中/失效次数等)，用于验证缓存效果。
+        """
+        with self._cache_lock:
+            return {
+                "ttl_seconds": self._active_scheme_cache_ttl,
+                "cached_guid": self._cached_active_guid,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "invalidations": self._cache_invalidations,
+            }
+
+    def _store_active_scheme(self, guid, expected_generation=None):
+        """
+        Write a GUID into the active scheme cache.
+        With expected_generation set (backend query results), the write is dropped if the cache
+        was updated or invalidated while the query was running.
+        """
+        with self._cache_lock:
+            if expected_generation is not None and expected_generation != self._cache_generation:
+                logger.debug("Discarding active scheme query result '%s', cache changed during the query.", guid)
+                return
+            self._cached_active_guid = str(guid).strip().lower()
+            self._cached_active_at = self._clock()
+            self._cache_generation += 1
 
     def get_power_plan_name_from_guid(self, guid: str):
         """
@@ -250,17 +388,22 @@ class PowerCfgManager:
             对应的电源计划名称，如果在加载的方案中未找到则返回 None。
              注意：此查找是不区分大小写的 GUID 匹配。
         """
-        if not guid:
-             return None
-        # Use lowercase for map lookup (GUIDs are typically case-insensitive when compared)
-        return self._guid_to_name_map.get(str(guid).strip().lower())
+        # The catalog handles case-insensitive lookup (GUIDs are typically case-insensitive when compared)
+        return self._catalog.get_name(guid)
+
+    def describe_plan(self, guid):
+        """
+        返回电源计划的日志标签 (PowerPlanLabel)，用作日志参数。
+        计划名称只在日志记录被格式化时查找，日志级别不需要时没有任何查找或字符串拼接。
+        """
+        return self._catalog.label(guid)
 
     def get_available_schemes(self):
         """
         获取加载的所有可用电源方案 (名称 -> GUID 映射).
         返回一个副本。
         """
-        return dict(self._name_to_guid_map) # Return a copy
+        return self._catalog.name_to_guid_map() # Return a copy
 
     def get_available_schemes_guid_name_map(self):
         """
@@ -268,4 +411,4 @@ class PowerCfgManager:
         GUI 界面可能需要这个映射来显示友好名称。
         返回一个副本。
         """
-        return dict(self._guid_to_name_map) # Return a copy
+        return self._catalog.guid_to_name_map() # Return a copy
@@ -0,0 +1,217 @@
+import ctypes
+import logging
+import threading
+import uuid
+from ctypes import wintypes
+
+from src.infrastructure.power_management.power_backends import POWER_BACKEND_NATIVE, PowerBackend
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# --- Win32 constants ---
+ERROR_SUCCESS = 0
+ERROR_ACCESS_DENIED = 5
+ERROR_INVALID_PARAMETER = 87
+ERROR_MORE_DATA = 234
+ERROR_NO_MORE_ITEMS = 259
+ERROR_FILE_NOT_FOUND = 2 # Returned by PowerSetActiveScheme for an unknown scheme GUID
+# POWER_DATA_ACCESSOR value enumerating power schemes with PowerEnumerate
+ACCESS_SCHEME = 16
+# Upper bound for PowerEnumerate, protects against an API that never reports ERROR_NO_MORE_ITEMS
+MAX_ENUMERATED_SCHEMES = 256
+
+# Error codes with a hint for the user
+_ERROR_HINTS = {
+    ERROR_ACCESS_DENIED: "Power plan switching typically requires Administrator privileges.",
+    ERROR_FILE_NOT_FOUND: "The power plan GUID does not exist on this system (check 'powercfg /list').",
+    ERROR_INVALID_PARAMETER: "The power plan GUID is invalid.",
+}
+
+
+class GUID(ctypes.Structure):
+    """
+    Win32 GUID structure. Converted from/to the usual string form through uuid.UUID (bytes_le is the in-memory layout).
+    """
+    # Fixed width types (DWORD/WORD) so the 16 byte layout also holds where wintypes.DWORD is 8 bytes wide
+    _fields_ = [
+        ("Data1", ctypes.c_uint32),
+        ("Data2", ctypes.c_uint16),
+        ("Data3", ctypes.c_uint16),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+    @classmethod
+    def from_string(cls, guid_string):
+        """Raises ValueError if guid_string is not a valid GUID."""
+        return cls.from_buffer_copy(uuid.UUID(str(guid_string).strip()).bytes_le)
+
+    def to_string(self):
+        """Lowercase GUID string without braces, the same format powercfg prints."""
+        return str(uuid.UUID(bytes_le=bytes(self)))
+
+
+class PowrProfApi:
+    """
+    Thin ctypes binding of the powrprof.dll functions used by NativePowerBackend.
+
+    Every method returns (error_code, value); error_code is a Win32 error code (0 = success).
+    Nothing here logs or raises for API failures, so the backend can be driven by a fake
+    implementation with the same methods on systems without powrprof.dll.
+    """
+    def __init__(self):
+        """
+        Raises:
+            OSError: powrprof.dll can't be loaded (not running on Windows).
+        """
+        windll = getattr(ctypes, "windll", None)
+        if windll is None:
+            raise OSError("powrprof.dll is only available on Windows")
+        self._powrprof = windll.powrprof
+        self._kernel32 = windll.kernel32
+
+        self._power_get_active_scheme = self._powrprof.PowerGetActiveScheme
+        self._power_get_active_scheme.argtypes = [wintypes.HKEY, ctypes.POINTER(ctypes.POINTER(GUID))]
+        self._power_get_active_scheme.restype = wintypes.DWORD
+
+        self._power_set_active_scheme = self._powrprof.PowerSetActiveScheme
+        self._power_set_active_scheme.argtypes = [wintypes.HKEY, ctypes.POINTER(GUID)]
+        self._power_set_active_scheme.restype = wintypes.DWORD
+
+        self._power_enumerate = self._powrprof.PowerEnumerate
+        self._power_enumerate.argtypes = [wintypes.HKEY, ctypes.POINTER(GUID), ctypes.POINTER(GUID),
+                                          wintypes.DWORD, wintypes.ULONG, ctypes.c_void_p, ctypes.POINTER(wintypes.DWORD)]
+        self._power_enumerate.restype = wintypes.DWORD
+
+        self._power_read_friendly_name = self._powrprof.PowerReadFriendlyName
+        self._power_read_friendly_name.argtypes = [wintypes.HKEY, ctypes.POINTER(GUID), ctypes.POINTER(GUID),
+                                                   ctypes.POINTER(GUID), ctypes.c_void_p, ctypes.POINTER(wintypes.DWORD)]
+        self._power_read_friendly_name.restype = wintypes.DWORD
+
+        self._local_free = self._kernel32.LocalFree
+        self._local_free.argtypes = [ctypes.c_void_p]
+        self._local_free.restype = ctypes.c_void_p
+
+    def get_active_scheme(self):
+        """Returns (error_code, guid_string)."""
+        guid_pointer = ctypes.POINTER(GUID)()
+        error_code = self._power_get_active_scheme(None, ctypes.byref(guid_pointer))
+        if error_code != ERROR_SUCCESS:
+            return error_code, None
+        try:
+            return ERROR_SUCCESS, guid_pointer.contents.to_string()
+        finally:
+            # PowerGetActiveScheme allocates the GUID, the caller frees it with LocalFree
+            self._local_free(guid_pointer)
+
+    def set_active_scheme(self, guid_string):
+        """Returns (error_code, None). Raises ValueError for a malformed GUID string."""
+        guid = GUID.from_string(guid_string)
+        return self._power_set_active_scheme(None, ctypes.byref(guid)), None
+
+    def enumerate_schemes(self):
+        """Returns (error_code, [guid_string, ...])."""
+        guids = []
+        for index in range(MAX_ENUMERATED_SCHEMES):
+            guid = GUID()
+            buffer_size = wintypes.DWORD(ctypes.sizeof(GUID))
+            error_code = self._power_enumerate(None, None, None, ACCESS_SCHEME, index, ctypes.byref(guid), ctypes.byref(buffer_size))
+            if error_code == ERROR_NO_MORE_ITEMS:
+                break
+            if error_code != ERROR_SUCCESS:
+                return error_code, None
+            guids.append(guid.to_string())
+        return ERROR_SUCCESS, guids
+
+    def read_friendly_name(self, guid_string):
+        """Returns (error_code, name) of a power scheme."""
+        guid = GUID.from_string(guid_string)
+        buffer_size = wintypes.DWORD(0)
+        # First call with a NULL buffer reports the required size in bytes
+        error_code = self._power_read_friendly_name(None, ctypes.byref(guid), None, None, None, ctypes.byref(buffer_size))
+        if error_code not in (ERROR_SUCCESS, ERROR_MORE_DATA):
+            return error_code, None
+        buffer = ctypes.create_string_buffer(buffer_size.value)
+        error_code = self._power_read_friendly_name(None, ctypes.byref(guid), None, None, buffer, ctypes.byref(buffer_size))
+        if error_code != ERROR_SUCCESS:
+            return error_code, None
+        # UTF-16LE, NUL terminated
+        return ERROR_SUCCESS, buffer.raw[:buffer_size.value].decode("utf-16-le", errors="replace").rstrip("\x00")
+
+
+class NativePowerBackend(PowerBackend):
+    """
+    直接调用 powrprof.dll 的电源后端 (PowerEnumerate / PowerReadFriendlyName /
+    PowerGetActiveScheme / PowerSetActiveScheme)。
+    切换电源计划只需一次 DLL 调用，不需要启动 powercfg 进程，也不需要解析本地化的命令行输出。
+    与其它后端一样，失败时返回 None/False 而不是抛出异常。
+    """
+    name = POWER_BACKEND_NATIVE
+
+    def __init__(self, powercfg_command=None, api=None):
+        """
+        Args:
+            powercfg_command: 不使用，仅为与 CLI 后端保持相同的构造参数 (见 create_power_backend)。
+            api: 提供 get_active_scheme/set_active_scheme/enumerate_schemes/read_friendly_name 的对象。
+                 默认使用 PowrProfApi (ctypes)；在非 Windows 系统上可以传入模拟实现。
+
+        Raises:
+            OSError: 未传入 api 且无法加载 powrprof.dll。
+        """
+        self._api = api if api is not None else PowrProfApi()
+        # powrprof calls are thread safe, the lock only keeps concurrent enumerations (index based) apart
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _describe_error(function_name, error_code):
+        hint = _ERROR_HINTS.get(error_code)
+        message = f"{function_name} failed with Win32 error code {error_code}."
+        return f"{message} {hint}" if hint else message
+
+    def list_schemes(self):
+        logger.info("Loading available power schemes using powrprof PowerEnumerate.")
+        try:
+            with self._lock:
+                error_code, guids = self._api.enumerate_schemes()
+                if error_code != ERROR_SUCCESS:
+                    logger.error(self._describe_error("PowerEnumerate", error_code))
+                    return None
+                schemes = []
+                for guid in guids:
+                    name_error, name = self._api.read_friendly_name(guid)
+                    if name_error != ERROR_SUCCESS or not name:
+                        # Keep the scheme usable even if its name can't be read
+                        logger.warning(self._describe_error("PowerReadFriendlyName", name_error) + f" Using the GUID as name for '{guid}'.")
+                        name = guid
+                    schemes.append((guid, name))
+                return schemes
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while enumerating power schemes through powrprof: {e}", exc_info=True)
+            return None
+
+    def get_active_scheme(self):
+        try:
+            error_code, guid = self._api.get_active_scheme()
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while calling PowerGetActiveScheme: {e}", exc_info=True)
+            return None
+        if error_code != ERROR_SUCCESS:
+            logger.error(self._describe_error("PowerGetActiveScheme", error_code))
+            return None
+        logger.debug("PowerGetActiveScheme returned %s", guid)
+        return guid
+
+    def set_active_scheme(self, power_plan_guid: str):
+        logger.info("Attempting to switch power plan using PowerSetActiveScheme: %s", power_plan_guid)
+        try:
+            error_code, _ = self._api.set_active_scheme(power_plan_guid)
+        except ValueError:
+            logger.error(f"'{power_plan_guid}' is not a valid power plan GUID. Cannot switch.")
+            return False
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while calling PowerSetActiveScheme: {e}", exc_info=True)
+            return False
+        if error_code != ERROR_SUCCESS:
+            logger.error(self._describe_error("PowerSetActiveScheme", error_code) + f" (GUID '{power_plan_guid}')")
+            return False
+        return True
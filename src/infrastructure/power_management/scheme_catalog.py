@@ -0,0 +1,166 @@
+import re
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+# One power scheme. guid is normalized to lowercase; active is True for the scheme marked with '*'
+# in 'powercfg /list' output (False when the source doesn't say).
+PowerScheme = namedtuple("PowerScheme", ["guid", "name", "active"])
+
+# Single-pass parser for the whole 'powercfg /list' output (one findall over the text, no line splitting).
+# Each matching line looks like (the prefix text is localized):
+#   Power Scheme GUID: 381b4222-f694-41f0-9685-ff5bb260df2e  (Balanced) *
+#   GUID des Energieschemas: 381b4222-f694-41f0-9685-ff5bb260df2e  (Ausbalanciert) *
+#   GUID du mode de gestion de l'alimentation : 381b4222-f694-41f0-9685-ff5bb260df2e  (Utilisation normale) *
+# - group 1: GUID
+# - group 2: name, up to the LAST ')' on the line, so names containing parentheses stay intact
+# - group 3: '*' of the active scheme (empty otherwise)
+# Only the ':' in front of the GUID is matched literally, "GUID" doesn't directly precede it in every language.
+# A literal first character still lets the regex engine skip ahead, which makes the scan about twice as fast
+# as starting with the GUID character classes.
+POWER_PLAN_LIST_LINE_REGEX = re.compile(
+    r":[ \t]*([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})[ \t]+\(([^\r\n]*)\)[ \t]*(\*?)"
+)
+
+
+def parse_powercfg_list(text):
+    """
+    一次遍历解析 'powercfg /list' 的完整输出。
+
+    Args:
+        text: 命令的标准输出。
+
+    Returns:
+        PowerScheme 列表 (按输出顺序，GUID 为小写，重复的 GUID 只保留第一个)。
+    """
+    schemes = []
+    seen = set()
+    for guid, name, active_marker in POWER_PLAN_LIST_LINE_REGEX.findall(text or ""):
+        guid = guid.lower()
+        name = name.strip()
+        if not name or guid in seen:
+            continue
+        seen.add(guid)
+        schemes.append(PowerScheme(guid, name, active_marker == "*"))
+    return schemes
+
+
+class SchemeCatalog:
+    """
+    不可变的电源计划目录 (GUID -> 名称、名称 -> GUID)。
+
+    PowerCfgManager 每次刷新都会创建新的目录并整体替换旧目录，读取方无需加锁。
+    内容未变化的刷新会保留原来的版本号，因此版本号只在计划被添加、删除或重命名时递增。
+    """
+    __slots__ = ("_version", "_schemes", "_by_guid", "_guid_by_name", "_loaded_at")
+
+    def __init__(self, schemes=(), version=0, loaded_at=None):
+        """
+        Args:
+            schemes: PowerScheme 或 (guid, name) 序列。
+            version: 目录版本号。
+            loaded_at: 加载时间 (time.time())，默认当前时间。
+        """
+        normalized = []
+        by_guid = {}
+        guid_by_name = {}
+        for scheme in schemes:
+            if not isinstance(scheme, PowerScheme):
+                guid, name = scheme[0], scheme[1]
+                scheme = PowerScheme(str(guid).strip().lower(), str(name).strip(), False)
+            if scheme.guid in by_guid:
+                continue
+            normalized.append(scheme)
+            by_guid[scheme.guid] = scheme
+            # Lowercase name for case-insensitive lookup; the first scheme wins for duplicate names
+            guid_by_name.setdefault(scheme.name.lower(), scheme.guid)
+        self._version = version
+        self._schemes = tuple(normalized)
+        self._by_guid = MappingProxyType(by_guid)
+        self._guid_by_name = MappingProxyType(guid_by_name)
+        self._loaded_at = loaded_at if loaded_at is not None else time.time()
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    def __len__(self):
+        return len(self._schemes)
+
+    def __contains__(self, guid):
+        return bool(guid) and str(guid).strip().lower() in self._by_guid
+
+    def get_schemes(self):
+        """
+        返回所有电源计划 (PowerScheme 元组)。
+        """
+        return self._schemes
+
+    def get_name(self, guid):
+        """
+        根据 GUID 获取计划名称 (不区分大小写)；未知 GUID 返回 None。
+        """
+        if not guid:
+            return None
+        scheme = self._by_guid.get(guid)
+        if scheme is None:
+            # Slow path only for GUIDs that aren't normalized yet
+            scheme = self._by_guid.get(str(guid).strip().lower())
+        return scheme.name if scheme is not None else None
+
+    def get_guid(self, name):
+        """
+        根据计划名称获取 GUID (不区分大小写)；未知名称返回 None。
+        """
+        if not name:
+            return None
+        return self._guid_by_name.get(str(name).strip().lower())
+
+    def same_schemes(self, other):
+        """
+        判断两个目录是否包含相同的计划 (GUID 和名称，不考虑活动标记和顺序)。
+        """
+        return {(s.guid, s.name) for s in self._schemes} == {(s.guid, s.name) for s in other.get_schemes()}
+
+    def label(self, guid):
+        """
+        返回用于日志的 PowerPlanLabel。名称在日志记录真正被格式化时才查找。
+        """
+        return PowerPlanLabel(self, guid)
+
+    def name_to_guid_map(self):
+        """
+        名称 (小写) -> GUID 字典 (副本)。
+        """
+        return dict(self._guid_by_name)
+
+    def guid_to_name_map(self):
+        """
+        GUID (小写) -> 名称 字典 (副本)。
+        """
+        return {scheme.guid: scheme.name for scheme in self._schemes}
+
+
+class PowerPlanLabel:
+    """
+    日志参数: 格式化时输出 "'名称' (GUID)"。
+
+    作为 %-style 日志参数传入 (logger.info("... %s", label))，只有日志级别允许、记录真正被格式化时
+    (使用异步日志时在日志线程上) 才会查找计划名称并拼接字符串，决策路径上只传递 GUID。
+    """
+    __slots__ = ("_catalog", "_guid")
+
+    def __init__(self, catalog, guid):
+        self._catalog = catalog
+        self._guid = guid
+
+    def __str__(self):
+        if not self._guid:
+            return "None"
+        return f"'{self._catalog.get_name(self._guid) or 'Unknown'}' ({self._guid})"
+
+    __repr__ = __str__
@@ -0,0 +1,158 @@
+import logging
+import os
+from collections import namedtuple
+from importlib.util import find_spec
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# One running process.
+# - pid: process ID
+# - ppid: parent process ID, or None if unknown
+# - name: executable file name (e.g. "chrome.exe" on Windows, "cc1plus" on Linux), or None if it couldn't be read
+# - create_time: process start time as reported by the enumerator (only compared for equality), or None
+ProcessEntry = namedtuple("ProcessEntry", ["pid", "ppid", "name", "create_time"])
+
+# Enumerator names accepted by create_process_enumerator()
+VALID_PROCESS_ENUMERATORS = ("auto", "psutil", "procfs")
+DEFAULT_PROC_ROOT = "/proc"
+
+
+class ProcessEnumerator:
+    """
+    Lists the processes of the system for the RunningProcessTracker.
+
+    Enumeration is split into a cheap and an expensive part, so the tracker can diff PID sets and
+    only look at processes that appeared since the last poll:
+      - pids(): the IDs of all running processes (one system call / directory listing);
+      - describe(pid): name, parent and start time of one process.
+    """
+    # Short name used in logs and status output
+    name = "base"
+
+    def pids(self):
+        """
+        Returns an iterable of the PIDs of all running processes. Raises OSError on failure.
+        """
+        raise NotImplementedError
+
+    def describe(self, pid):
+        """
+        Returns the ProcessEntry of pid, or None if the process has exited meanwhile.
+        Fields that can't be read (e.g. access denied) are None.
+        """
+        raise NotImplementedError
+
+
+class ProcFsProcessEnumerator(ProcessEnumerator):
+    """
+    Linux /proc implementation (no dependencies). Used for running and benchmarking the tracker on Linux.
+    """
+    name = "procfs"
+
+    def __init__(self, proc_root=DEFAULT_PROC_ROOT):
+        self._proc_root = proc_root
+
+    def pids(self):
+        return [int(entry) for entry in os.listdir(self._proc_root) if entry.isdigit()]
+
+    def describe(self, pid):
+        process_dir = os.path.join(self._proc_root, str(pid))
+        try:
+            with open(os.path.join(process_dir, "stat"), "rb") as stat_file:
+                stat = stat_file.read().decode("utf-8", "replace")
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+        except OSError as e:
+            logger.debug("Could not read /proc stat of PID %s: %s", pid, e)
+            return ProcessEntry(pid, None, None, None)
+
+        # "<pid> (<comm>) <state> <ppid> ... <starttime (field 22)> ...". comm may contain spaces and ")".
+        comm_end = stat.rfind(")")
+        comm = stat[stat.find("(") + 1:comm_end]
+        fields = stat[comm_end + 2:].split()
+        try:
+            ppid = int(fields[1])
+            create_time = int(fields[19])
+        except (IndexError, ValueError):
+            ppid, create_time = None, None
+        return ProcessEntry(pid, ppid, self._read_name(process_dir, comm), create_time)
+
+    @staticmethod
+    def _read_name(process_dir, comm):
+        # comm is truncated to 15 characters: use the executable's file name where we're allowed to read it
+        try:
+            return os.path.basename(os.readlink(os.path.join(process_dir, "exe"))).removesuffix(" (deleted)")
+        except OSError:
+            pass
+        # Other users' processes: argv[0] is readable, accepted if it agrees with comm
+        try:
+            with open(os.path.join(process_dir, "cmdline"), "rb") as cmdline_file:
+                argv0 = cmdline_file.read().split(b"\0", 1)[0].decode("utf-8", "replace")
+            program = os.path.basename(argv0)
+            if program.startswith(comm):
+                return program
+        except OSError:
+            pass
+        return comm or None
+
+
+class PsutilProcessEnumerator(ProcessEnumerator):
+    """
+    psutil implementation (Windows, Linux, macOS). psutil is imported when the enumerator is created.
+    """
+    name = "psutil"
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+
+    def pids(self):
+        return self._psutil.pids()
+
+    def describe(self, pid):
+        psutil = self._psutil
+        try:
+            process = psutil.Process(pid)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None
+        values = {}
+        # oneshot(): one query for all three values where the platform allows it
+        with process.oneshot():
+            for field, getter in (("name", process.name), ("ppid", process.ppid), ("create_time", process.create_time)):
+                try:
+                    values[field] = getter()
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    return None
+                except psutil.AccessDenied:
+                    # E.g. protected system processes on Windows; the other fields may still be readable
+                    values[field] = None
+        return ProcessEntry(pid, values["ppid"], values["name"], values["create_time"])
+
+
+def create_process_enumerator(name="auto"):
+    """
+    创建进程枚举器。
+
+    Args:
+        name: "psutil"、"procfs" 或 "auto" (已安装 psutil 时使用 psutil，否则在有 /proc 的系统上使用 procfs)。
+
+    Returns:
+        ProcessEnumerator；当前系统上没有可用的实现时记录警告并返回 None。
+    """
+    name = (name or "auto").strip().lower()
+    if name not in VALID_PROCESS_ENUMERATORS:
+        logger.warning(f"Unknown process enumerator '{name}'. Valid enumerators are: {', '.join(VALID_PROCESS_ENUMERATORS)}. Using 'auto'.")
+        name = "auto"
+    # find_spec: psutil itself is only imported if it is used
+    if name == "psutil" or (name == "auto" and find_spec("psutil") is not None):
+        try:
+            return PsutilProcessEnumerator()
+        except ImportError as e:
+            logger.warning(f"psutil is not available ({e}).")
+            if name == "psutil":
+                return None
+    if os.path.isdir(os.path.join(DEFAULT_PROC_ROOT, "self")):
+        return ProcFsProcessEnumerator()
+    logger.warning("No process enumerator is available on this system (install psutil: pip install psutil).")
+    return None
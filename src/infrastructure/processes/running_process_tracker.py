@@ -0,0 +1,335 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Default seconds between polls
+DEFAULT_POLL_INTERVAL = 2.0
+# Every Nth poll describes all processes again instead of only new PIDs. A PID that was reused between
+# two polls (old process exited, new one got the same ID) looks unchanged to the PID diff; the full
+# rescan notices the different start time. Between full rescans such a process keeps the old entry.
+DEFAULT_FULL_RESCAN_EVERY = 30
+# Seconds stop() waits for the tracker thread
+STOP_TIMEOUT = 5.0
+# Number of exited processes whose entries are kept for parent chain lookups: a launcher that starts
+# the game binary and exits is still found as its parent (if a poll saw it running)
+DEFAULT_EXITED_RETENTION = 256
+
+# Result of one poll: ProcessEntry lists of processes that appeared / exited, and whether the set
+# of distinct running process names changed (only then can the active running rule change)
+ProcessSetChange = namedtuple("ProcessSetChange", ["created", "exited", "names_changed"])
+
+
+def normalize_name(name):
+    """Process names are compared lowercase, like the rule engine does."""
+    return name.strip().lower() if name else None
+
+
+def _started_after(parent, child):
+    """A "parent" that started after its child is a different process that reused the parent's PID."""
+    return parent.create_time is not None and child.create_time is not None and parent.create_time > child.create_time
+
+
+class RunningProcessTracker:
+    """
+    Keeps the set of running processes up to date with incremental diffing.
+
+    The first poll enumerates and describes every process. Later polls only list the PIDs
+    (ProcessEnumerator.pids(), cheap) and describe the PIDs that weren't known before, so a poll
+    costs one listing plus work proportional to the number of processes created since the last one,
+    not to the total number of processes.
+
+    Maintained indexes (readers on other threads get consistent snapshots without locking):
+      - pid -> ProcessEntry (get_process(), parent lookups);
+      - pid -> ProcessEntry of the last exited_retention processes that exited (parent lookups only);
+      - lowercase name -> number of running processes with that name, published as one
+        (generation, frozenset of names) tuple (get_running_state()); the generation changes with the names.
+
+    Polling runs on its own thread (start()/stop()), or the owner calls poll() itself, e.g. from an
+    asyncio task through asyncio.to_thread.
+    """
+    def __init__(self, enumerator, poll_interval=DEFAULT_POLL_INTERVAL, full_rescan_every=DEFAULT_FULL_RESCAN_EVERY,
+                 on_change=None, clock=time.perf_counter, exited_retention=DEFAULT_EXITED_RETENTION):
+        """
+        Args:
+            enumerator: ProcessEnumerator.
+            poll_interval: seconds between polls of the tracker thread.
+            full_rescan_every: every Nth poll describes all processes again (PID reuse detection). 0 disables it.
+            on_change: optional callable(ProcessSetChange) called on the polling thread after a poll that
+                       found created or exited processes. Must be fast and must not raise.
+            clock: timer used for the poll duration statistics.
+            exited_retention: number of exited processes kept for parent chain lookups. 0 disables it.
+        """
+        self._enumerator = enumerator
+        self._poll_interval = max(0.01, float(poll_interval))
+        self._full_rescan_every = max(0, int(full_rescan_every))
+        self._on_change = on_change
+        self._clock = clock
+        self._exited_retention = max(0, int(exited_retention))
+
+        # Only the polling thread modifies these. Readers on other threads use single dict operations
+        # (get) on the pid index, and the (generation, names) tuple is replaced as a whole, so they need no lock.
+        self._processes = {} # pid -> ProcessEntry
+        self._exited_processes = {} # pid -> ProcessEntry, oldest exit first
+        self._name_counts = {} # lowercase name -> number of running processes
+        self._running_state = (0, frozenset())
+        # Serializes poll() when the owner polls manually while the thread runs (it shouldn't, but be safe)
+        self._poll_lock = threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._polls = 0
+        self._full_rescans = 0
+        self._created = 0
+        self._exited = 0
+        self._reused = 0
+        self._poll_failures = 0
+        self._last_poll_ms = 0.0
+        self._max_poll_ms = 0.0
+
+    @property
+    def poll_interval(self):
+        return self._poll_interval
+
+    def get_enumerator_name(self):
+        return self._enumerator.name
+
+    def start(self):
+        """
+        Starts the polling thread. The first (full) enumeration runs on that thread, not in the caller.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("RunningProcessTracker is already running.")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="RunningProcessTracker")
+        # Daemon: a hanging enumeration must not keep the process alive at exit
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Running process tracker started ({self._enumerator.name}, poll interval {self._poll_interval}s).")
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stops the polling thread. Safe to call when it isn't running.
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.error(f"Running process tracker thread did not stop within {timeout} seconds.")
+            else:
+                logger.info("Running process tracker stopped.")
+        self._thread = None
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Unexpected error while polling running processes: {e}", exc_info=True)
+            self._stop_event.wait(self._poll_interval)
+
+    def poll(self):
+        """
+        One tracking step: a full enumeration on the first call and every full_rescan_every calls,
+        otherwise a PID diff. Calls on_change if processes were created or exited.
+
+        Returns:
+            ProcessSetChange, or None if the process list couldn't be read.
+        """
+        with self._poll_lock:
+            full = self._polls == 0 or (self._full_rescan_every and self._polls % self._full_rescan_every == 0)
+            change = self._poll_locked(full)
+        if change is not None and (change.created or change.exited) and self._on_change is not None:
+            try:
+                self._on_change(change)
+            except Exception as e:
+                logger.error(f"Running process change callback raised an error: {e}", exc_info=True)
+        return change
+
+    def _poll_locked(self, full):
+        started = self._clock()
+        try:
+            current_pids = set(self._enumerator.pids())
+        except OSError as e:
+            self._poll_failures += 1
+            logger.warning(f"Failed to list running processes ({self._enumerator.name}): {e}")
+            return None
+
+        known = self._processes
+        exited = [known[pid] for pid in known.keys() - current_pids]
+        created = []
+        # Only new PIDs are described, except on full rescans
+        for pid in (current_pids if full else current_pids - known.keys()):
+            entry = self._enumerator.describe(pid)
+            previous = known.get(pid)
+            if entry is None:
+                # Exited between pids() and describe()
+                if previous is not None:
+                    exited.append(previous)
+                continue
+            if previous is not None:
+                if previous.create_time == entry.create_time and previous.name == entry.name:
+                    continue
+                # Same PID, different process
+                self._reused += 1
+                exited.append(previous)
+            created.append(entry)
+
+        names_changed = False
+        if exited or created:
+            # Updated in place: the cost of a poll depends on the number of changes, not on the number of processes
+            touched_names = set()
+            for entry in exited:
+                known.pop(entry.pid, None)
+                touched_names.add(self._count_name(entry.name, -1))
+                self._retain_exited(entry)
+            for entry in created:
+                known[entry.pid] = entry
+                touched_names.add(self._count_name(entry.name, 1))
+            touched_names.discard(None)
+            # Net change only: a process replaced by another one with the same name (e.g. a reused PID)
+            # leaves the set of names as it was
+            previous_names = self._running_state[1]
+            names_changed = any((name_key in self._name_counts) != (name_key in previous_names) for name_key in touched_names)
+            if names_changed:
+                self._running_state = (self._running_state[0] + 1, frozenset(self._name_counts))
+
+        elapsed_ms = (self._clock() - started) * 1000.0
+        self._polls += 1
+        self._full_rescans += 1 if full else 0
+        self._created += len(created)
+        self._exited += len(exited)
+        self._last_poll_ms = elapsed_ms
+        self._max_poll_ms = max(self._max_poll_ms, elapsed_ms)
+        if created or exited:
+            logger.debug("Process poll (%s): %d created, %d exited, %d running, %.2f ms.",
+                         "full" if full else "diff", len(created), len(exited), len(self._processes), elapsed_ms)
+        return ProcessSetChange(created, exited, names_changed)
+
+    def _retain_exited(self, entry):
+        if not self._exited_retention:
+            return
+        retained = self._exited_processes
+        # Re-inserted at the end: the newest exit of a PID replaces an older one
+        retained.pop(entry.pid, None)
+        retained[entry.pid] = entry
+        while len(retained) > self._exited_retention:
+            del retained[next(iter(retained))]
+
+    def _count_name(self, name, delta):
+        """
+        Updates the name -> count index. Returns the lowercase name (None if the process has no name).
+        """
+        name_key = normalize_name(name)
+        if name_key is None:
+            return None
+        count = self._name_counts.get(name_key, 0) + delta
+        if count > 0:
+            self._name_counts[name_key] = count
+        else:
+            self._name_counts.pop(name_key, None)
+        return name_key
+
+    def get_running_state(self):
+        """
+        Returns (generation, frozenset of the lowercase names of all running processes).
+        The generation changes whenever the set of names changes.
+        """
+        return self._running_state
+
+    def get_running_names(self):
+        return self._running_state[1]
+
+    def get_process(self, pid):
+        """
+        Returns the ProcessEntry of a tracked PID, or None.
+        """
+        return self._processes.get(pid)
+
+    def find_process(self, pid, name=None):
+        """
+        Returns the ProcessEntry of a running process, from the pid index or described directly if
+        it started since the last poll (typically the new foreground app). None if it isn't running.
+        The entry isn't added to the index, which only the polling thread modifies.
+
+        Args:
+            pid: process ID.
+            name: optional executable name of pid. An index entry with a different name belongs to
+                  an exited process whose PID was reused, and pid is described again.
+        """
+        entry = self._processes.get(pid)
+        if entry is None or (name is not None and normalize_name(entry.name) != normalize_name(name)):
+            entry = self._enumerator.describe(pid)
+        return entry
+
+    def get_ancestors(self, pid, max_depth, name=None):
+        """
+        Returns the ProcessEntry list of the parent, grandparent, ... of pid (nearest first, at most max_depth).
+        See find_process() for pid and name, and get_entry_ancestors().
+        """
+        return self.get_entry_ancestors(self.find_process(pid, name), max_depth)
+
+    def get_entry_ancestors(self, entry, max_depth):
+        """
+        Returns the ProcessEntry list of the parent, grandparent, ... of the process entry
+        (nearest first, at most max_depth).
+
+        Parents come from the pid index, are described directly when they started since the last
+        poll, or come from the recently exited processes: a launcher that started the process and
+        exited is still found, provided a poll saw it running. The cost depends on max_depth, not on
+        the number of processes.
+        """
+        ancestors = []
+        seen = {entry.pid} if entry is not None else set()
+        while entry is not None and len(ancestors) < max_depth:
+            parent_pid = entry.ppid
+            # PID 0 (and None) terminates the chain; a loop means inconsistent data
+            if not parent_pid or parent_pid in seen:
+                break
+            parent = self._processes.get(parent_pid) or self._enumerator.describe(parent_pid)
+            if parent is None or _started_after(parent, entry):
+                # Exited, or its PID was reused by a process that started after the child
+                parent = self._exited_processes.get(parent_pid)
+                if parent is None or _started_after(parent, entry):
+                    break
+            ancestors.append(parent)
+            seen.add(parent_pid)
+            entry = parent
+        return ancestors
+
+    def get_process_count(self):
+        return len(self._processes)
+
+    def has_polled(self):
+        """
+        True once the initial enumeration has completed.
+        """
+        return self._polls > 0
+
+    def get_stats(self):
+        return {
+            "enumerator": self._enumerator.name,
+            "alive": self.is_alive(),
+            "poll_interval_s": self._poll_interval,
+            "processes": len(self._processes),
+            "exited_retained": len(self._exited_processes),
+            "distinct_names": len(self._running_state[1]),
+            "generation": self._running_state[0],
+            "polls": self._polls,
+            "full_rescans": self._full_rescans,
+            "created": self._created,
+            "exited": self._exited,
+            "pid_reuse_detected": self._reused,
+            "poll_failures": self._poll_failures,
+            "last_poll_ms": self._last_poll_ms,
+            "max_poll_ms": self._max_poll_ms,
+        }
@@ -11,7 +11,11 @@ import win32con # Still useful for constants like EVENT_SYSTEM_FOREGROUND, WM_QU
 # Import our ctypes helper function to get process name from hwnd
 # Ensure the version of process_info.py using ctypes is in src/infrastructure/windows
 try:
-    from .process_info import get_process_name_from_hwnd
+    from .process_info import get_process_image_info_from_hwnd
+    from ..events.foreground_event import RawForegroundEvent
+    from ..events.resolver_stage import ResolverStage
+    from ..events.mailbox import LatestValueMailbox
+    from ..events.event_source import EventSource
 except ImportError as e:
     print(f"Error importing process_info.py: {e}")
     print("Please ensure src/infrastructure/windows/process_info.py exists and uses ctypes.")
@@ -106,7 +110,7 @@ user32.PostThreadMessageW.restype = ctypes.wintypes.BOOL
 # the callback function (SetWinEventHook's 4th arg) must be a plain C-compatible function
 # pointer. This makes it difficult to directly access instance variables (like self._processing_queue).
 # A common pattern is to use global/module-level state, managed carefully by the controlling class.
-_processing_queue = None       # Global reference to the queue to pass data to main logic
+_raw_event_queue = None        # Global reference to the mailbox of raw (hwnd, time) events for the resolver stage
 _hook_handle = None            # Global handle to the event hook (needed for Unhook)
 _listener_thread_id = None     # Global ID of the thread running the message loop (needed for PostThreadMessage)
 _win_event_proc_ref = None     # Global reference to the ctypes callback function pointer,
@@ -128,51 +132,50 @@ def _global_win_event_callback(hWinEventHook, event, hwnd, idObject, idChild, dw
     if event == win32con.EVENT_SYSTEM_FOREGROUND:
         # This event signifies that a new window has moved to the foreground (received focus).
         # Note: This callback runs on the EventListener thread, not the main application thread.
-        # It's crucial this function is fast and does not block.
-        logger.debug(f"Foreground window change event received (hwnd={hwnd})")
-
-        # Get the process name using the helper function.
-        # This function uses ctypes internally and should be relatively fast.
-        process_name = get_process_name_from_hwnd(hwnd)
-
-        if process_name:
-            logger.info(f"Foreground activity detected: {process_name}. Submitting to queue.")
-            # Pass the process name to the main processing logic via the queue.
-            if _processing_queue is not None:
-                try:
-                    # The `put_nowait` is used to avoid blocking the callback thread
-                    # if the queue is full (which shouldn't happen with a large enough queue
-                    # or prompt processing in the main thread).
-                    _processing_queue.put_nowait(process_name)
-                    # logger.debug(f"Submitted '{process_name}' to processing queue.") # Only log if needed for debug
-                except queue.Full:
-                     logger.warning(f"Processing queue is full, dropped process name: {process_name}")
-                except Exception as e:
-                    logger.error(f"Failed to put process name into queue: {e}", exc_info=True)
-            else:
-                 # This indicates a severe setup error or the listener is being called after stop.
-                 logger.error("Processing queue is not set in the global callback. Cannot submit process name!", stack_info=True)
-        # else: get_process_name_from_hwnd logs warnings/errors if it fails.
+        # It's crucial this function is fast and does not block, so it only records the raw event.
+        # Process name resolution (OpenProcess etc.) happens on the resolver stage thread.
+        if _raw_event_queue is not None:
+            try:
+                # The mailbox never blocks: a raw event the resolver hasn't picked up yet is simply replaced.
+                _raw_event_queue.put_nowait(RawForegroundEvent(hwnd, dwmsEventTime, time.perf_counter()))
+            except Exception as e:
+                logger.error(f"Failed to put raw foreground event into queue: {e}", exc_info=True)
+        else:
+             # This indicates a severe setup error or the listener is being called after stop.
+             logger.error("Raw event queue is not set in the global callback. Cannot submit foreground event!", stack_info=True)
 
 # --- Event Listener Class ---
 # Manages the listening thread and the Windows Hook using ctypes.
-class EventListener:
+class EventListener(EventSource):
     """
-    Manages the Windows event listening thread for foreground window changes using ctypes.
+    Win32 EventSource: manages the Windows event listening thread for foreground window changes using ctypes.
+    Events flow through two stages:
+      1. the hook callback (listener thread) enqueues raw (hwnd, event time) tuples;
+      2. the resolver stage thread resolves process names and feeds the processing queue.
     """
-    def __init__(self, processing_queue: queue.Queue):
+    name = "win32"
+
+    def __init__(self, processing_queue):
         """
         Initializes the EventListener.
 
         Args:
-            processing_queue: A queue.Queue object to send foreground process names to.
+            processing_queue: A LatestValueMailbox (or queue.Queue) to send ForegroundEvent items to.
         """
         logger.debug("Initializing EventListener instance (ctypes).")
-        if not isinstance(processing_queue, queue.Queue):
-             logger.error("EventListener requires a queue.Queue instance.", exc_info=True)
-             raise TypeError("EventListener requires a queue.Queue instance.")
+        # EventSource validates the queue (must provide put_nowait())
+        super().__init__(processing_queue)
 
         self._processing_queue = processing_queue
+        # Raw events from the hook callback to the resolver stage.
+        # Latest wins: only the newest foreground window needs resolving.
+        self._raw_event_queue = LatestValueMailbox()
+        self._resolver_stage = ResolverStage(
+            self._raw_event_queue,
+            self._processing_queue,
+            get_process_image_info_from_hwnd,
+            name="EventResolverThread"
+        )
         self._listener_thread = None
         self._is_running = False
         # We need to store a persistent reference to the ctypes callback function
@@ -190,6 +193,8 @@ class EventListener:
 
         logger.info("Starting EventListener thread (ctypes).")
         self._is_running = True
+        # Start the consumer stage before the hook so no raw event waits for it
+        self._resolver_stage.start()
         # Create the thread, targeting _thread_entry method
         self._listener_thread = threading.Thread(target=self._thread_entry, name="EventListenerThread")
         # Make it non-daemon so main thread can wait for it on stop
@@ -204,6 +209,8 @@ class EventListener:
         """
         if not self._is_running:
             logger.warning("EventListener is not running.")
+            # The listener thread may have failed after the resolver stage was started
+            self._resolver_stage.stop()
             # Clear global state even if not running, just in case it was partially started/stuck
             self._clear_global_state()
             return
@@ -241,11 +248,30 @@ class EventListener:
             else:
                  logger.info("EventListener thread (ctypes) joined successfully.")
 
+        # The hook is gone, no more raw events can arrive: stop the resolver stage
+        self._resolver_stage.stop()
+
         # Explicitly clear the global state controlled by this instance *after* joining
         self._clear_global_state()
 
         logger.info("EventListener stopped (ctypes).")
 
+    def is_alive(self):
+        """
+        True while the hook/message loop thread is running.
+        """
+        return self._listener_thread is not None and self._listener_thread.is_alive()
+
+    def get_pipeline_stats(self):
+        """
+        Returns counters and per-stage latencies of the event pipeline
+        (raw queue depth, resolver queue wait and resolve time).
+        """
+        stats = self._resolver_stage.get_stats()
+        stats["source"] = self.name
+        stats["raw_mailbox"] = self._raw_event_queue.get_stats()
+        return stats
+
     def _thread_entry(self):
         """
         The main function executed by the ctypes listener thread.
@@ -254,8 +280,8 @@ class EventListener:
         logger.info("EventListener thread entry point (ctypes).")
 
         # Set the global state BEFORE setting the hook and running the message loop.
-        global _processing_queue, _hook_handle, _listener_thread_id, _win_event_proc_ref
-        _processing_queue = self._processing_queue
+        global _raw_event_queue, _hook_handle, _listener_thread_id, _win_event_proc_ref
+        _raw_event_queue = self._raw_event_queue
         # Store this thread's ID for posting quit messages
         try:
             # ### 修复 NameError 问题 ###
@@ -323,7 +349,7 @@ class EventListener:
         Unhooks the Windows event hook and clears global state related to this thread.
         This is called from within the listener thread itself.
         """
-        global _hook_handle, _processing_queue, _listener_thread_id, _win_event_proc_ref
+        global _hook_handle, _raw_event_queue, _listener_thread_id, _win_event_proc_ref
 
         # First, unhook the event if the hook handle is valid.
         if _hook_handle is not None and _hook_handle != 0:
@@ -349,9 +375,9 @@ class EventListener:
 
         # Clear the global queue and thread ID references if they match this instance/thread.
         # This helps prevent state from a previous run interfering if cleanup wasn't perfect.
-        if _processing_queue is not None and _processing_queue is self._processing_queue:
-             _processing_queue = None
-             logger.debug("Cleared global processing queue reference.")
+        if _raw_event_queue is not None and _raw_event_queue is self._raw_event_queue:
+             _raw_event_queue = None
+             logger.debug("Cleared global raw event queue reference.")
 
         if _listener_thread_id == ctypes.windll.kernel32.GetCurrentThreadId():
              _listener_thread_id = None
@@ -367,16 +393,15 @@ class EventListener:
         ideally by the listener thread itself reacting to WM_QUIT.
         This is a safeguard to release references in the main thread's view.
         """
-        global _processing_queue, _hook_handle, _listener_thread_id, _win_event_proc_ref
+        global _raw_event_queue, _hook_handle, _listener_thread_id, _win_event_proc_ref
         # This method's main purpose is to clear references held by the main thread's view.
         # Actual cleanup (Unhook, PumpMessages exit) happens in the listener thread.
         # We should probably verify the listener thread IS NOT _listener_thread_id when calling this for real,
         # to ensure the thread has fully exited. But for simplicity, we clear references here.
 
-        if _processing_queue is self._processing_queue:
-             self._processing_queue = None
-             _processing_queue = None
-             logger.debug("_clear_global_state: Cleared instance and global queue references.")
+        if _raw_event_queue is self._raw_event_queue:
+             _raw_event_queue = None
+             logger.debug("_clear_global_state: Cleared global raw event queue reference.")
 
         # Note: We don't force unhook here. Unhooking should happen in _cleanup_thread_entry
         # after the thread receives WM_QUIT.
@@ -415,8 +440,8 @@ if __name__ == "__main__":
             try:
                 # Get a process name from the queue with a short timeout.
                 # The timeout allows the main thread to periodically check for KeyboardInterrupt.
-                process_name = event_queue.get(timeout=0.1)
-                logger.info(f"Main thread received PROCESS from queue: {process_name}")
+                foreground_event = event_queue.get(timeout=0.1)
+                logger.info(f"Main thread received PROCESS from queue: {foreground_event.process_name} (PID {foreground_event.pid}, {foreground_event.image_path})")
                 # === PLACEHOLDER for Power Switching Logic ===
                 # In the real application, you would call your power switching
                 # module here based on the received process_name.
@@ -5,6 +5,9 @@ import ctypes
 import ctypes.wintypes
 import win32con # We can still use win32con for constants like PROCESS_QUERY_INFORMATION
 
+from .process_name_cache import ProcessNameCache, ProcessImageInfo
+from src.utils.metrics import get_registry
+
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
@@ -39,33 +42,37 @@ kernel32.CloseHandle.restype = ctypes.wintypes.BOOL
 kernel32.QueryFullProcessImageNameW.argtypes = [HANDLE, DWORD, LPWSTR, LPDWORD]
 kernel32.QueryFullProcessImageNameW.restype = ctypes.wintypes.BOOL # Success/Failure
 
+# BOOL GetProcessTimes(HANDLE hProcess, LPFILETIME lpCreationTime, LPFILETIME lpExitTime, LPFILETIME lpKernelTime, LPFILETIME lpUserTime);
+LPFILETIME = ctypes.POINTER(ctypes.wintypes.FILETIME)
+kernel32.GetProcessTimes.argtypes = [HANDLE, LPFILETIME, LPFILETIME, LPFILETIME, LPFILETIME]
+kernel32.GetProcessTimes.restype = ctypes.wintypes.BOOL
+
+# DWORD WaitForSingleObject(HANDLE hHandle, DWORD dwMilliseconds);
+kernel32.WaitForSingleObject.argtypes = [HANDLE, DWORD]
+kernel32.WaitForSingleObject.restype = DWORD
+
 # Define flags (can still use win32con values)
 PROCESS_QUERY_INFORMATION = win32con.PROCESS_QUERY_INFORMATION # 0x0400
 PROCESS_VM_READ = win32con.PROCESS_VM_READ                     # 0x0010 - sometimes needed, though QUERY_INFORMATION usually works
+# Limited query access is enough for QueryFullProcessImageNameW/GetProcessTimes and is granted
+# for more (e.g. elevated) processes than PROCESS_QUERY_INFORMATION.
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+# SYNCHRONIZE lets us wait on the handle, which is how the cache detects that a process has exited.
+SYNCHRONIZE = 0x00100000
 
-# Combine ACCESS_MASK for OpenProcess if needed (though QUERY_INFORMATION should be enough)
-PROCESS_ACCESS = PROCESS_QUERY_INFORMATION # | PROCESS_VM_READ # Use | if also need PROCESS_VM_READ
+# Combine ACCESS_MASK for OpenProcess. The handle is kept open by the process name cache.
+PROCESS_ACCESS = PROCESS_QUERY_LIMITED_INFORMATION | SYNCHRONIZE
 
-def get_process_name_from_hwnd(hwnd):
-    """
-    根据 Windows 窗口句柄 (HWND) 获取所属进程的可执行文件名称 (.exe).
-    使用 ctypes 调用 Windows API.
+WAIT_TIMEOUT = 0x00000102 # WaitForSingleObject result: the process is still running
 
-    Args:
-        hwnd: Windows 窗口句柄 (integer).
+# Number of processes whose image info (and open handle) is cached
+PROCESS_NAME_CACHE_SIZE = 256
 
-    Returns:
-        如果成功获取到进程名称，返回进程文件名称 (例如 "notepad.exe")。
-        如果获取失败 (例如句柄无效、权限不足等)，返回 None。
-    """
-    logger.debug(f"Entering get_process_name_from_hwnd (ctypes): hwnd={hwnd}")
-
-    # Check if hwnd is potentially valid (basic check)
-    # Note: user32.IsWindow is also available via ctypes if needed, but relying on API calls to fail is also common.
-    if not hwnd or hwnd == 0:
-         logger.warning(f"Invalid hwnd provided (0). Returning None.")
-         return None
 
+def _get_process_id_from_hwnd(hwnd):
+    """
+    Returns the PID owning the window, or None on failure.
+    """
     process_id = DWORD(0) # DWORD object to receive the process ID
     thread_id = user32.GetWindowThreadProcessId(hwnd, ctypes.byref(process_id))
 
@@ -75,14 +82,39 @@ def get_process_name_from_hwnd(hwnd):
         logger.error(f"GetWindowThreadProcessId failed for hwnd={hwnd}. WinError: {ctypes.WinError()}", exc_info=True)
         return None # Failed to get PID
 
-    logger.debug(f"From hwnd={hwnd} got thread_id={thread_id}, process_id={process_id_val}")
+    logger.debug("From hwnd=%s got thread_id=%s, process_id=%s", hwnd, thread_id, process_id_val)
 
     if process_id_val == 0:
          logger.warning(f"Obtained process_id is 0 for hwnd={hwnd}. Returning None.")
          return None
+    return process_id_val
+
+
+def _close_handle(process_handle):
+    """
+    Closes a process handle, logging failures.
+    """
+    try:
+        if kernel32.CloseHandle(process_handle):
+            logger.debug("Closed process handle: %s", process_handle)
+        else:
+            # CloseHandle can fail if the handle is invalid, though it shouldn't happen here.
+            logger.warning(f"CloseHandle failed for process handle {process_handle}. WinError: {ctypes.WinError()}")
+    except Exception as e:
+        logger.error(f"An error occurred while closing handle {process_handle}: {e}", exc_info=True)
+
 
+def _resolve_process_image(process_id_val):
+    """
+    Resolver used by the process name cache: opens the process and reads its image path and creation time.
+    On success the process handle stays open and is owned by the returned ProcessImageInfo
+    (closed by _release_process_image when the entry leaves the cache).
+
+    Returns:
+        ProcessImageInfo, or None on failure.
+    """
     process_handle = None
-    process_name = None
+    keep_handle = False
 
     try:
         # Open the process to query information
@@ -92,27 +124,21 @@ def get_process_name_from_hwnd(hwnd):
             # Check for error code 5 (Access is denied) specifically
             error_code = ctypes.GetLastError()
             if error_code == 5: # ERROR_ACCESS_DENIED
-                 logger.warning(f"Access denied when trying to open process (PID: {process_id_val}) for hwnd={hwnd}. May require admin privileges. WinError: {ctypes.WinError()}")
+                 logger.warning(f"Access denied when trying to open process (PID: {process_id_val}). May require admin privileges. WinError: {ctypes.WinError()}")
             else:
-                 logger.error(f"OpenProcess failed for PID {process_id_val}, hwnd={hwnd}. WinError: {ctypes.WinError()}", exc_info=True)
+                 logger.error(f"OpenProcess failed for PID {process_id_val}. WinError: {ctypes.WinError()}", exc_info=True)
             return None # Failed to open process
 
-        logger.debug(f"Successfully opened process (PID: {process_id_val}), handle={process_handle}")
+        logger.debug("Successfully opened process (PID: %s), handle=%s", process_id_val, process_handle)
 
         # Get the process executable path
-        buffer_size = DWORD(os.pathconf('.', 'PC_PATH_MAX') if hasattr(os, 'pathconf') else 260) # Reasonable buffer size
+        # Windows paths can be up to 32767 characters with the \\?\ prefix; MAX_PATH (260) covers normal paths.
+        buffer_size = DWORD(1024)
         filename_buffer = ctypes.create_unicode_buffer(buffer_size.value)
 
-        returned_size = DWORD(0)
-        # The path buffer includes the null terminator, so the required size is length + 1.
-        # QueryFullProcessImageNameW returns the number of *characters* copied into the buffer, *excluding* the null terminator.
-        # So the buffer_size we pass should be the *total size* including space for the null terminator.
-        # The returned_size will be the length of the string itself.
-        # If the buffer is too small, the function returns 0, GetLastError() returns ERROR_INSUFFICIENT_BUFFER (122),
-        # and lpdwSize must be DOUBLED and the call retried.
-        # For simplicity here, we use a fixed buffer size and log an error if it's insufficient.
-        # A more robust version would handle ERROR_INSUFFICIENT_BUFFER by resizing the buffer.
-
+        # QueryFullProcessImageNameW takes the buffer size in characters (including the null terminator)
+        # and writes back the length of the string itself. If the buffer is too small, it fails with
+        # ERROR_INSUFFICIENT_BUFFER (122). For simplicity we use a fixed, generous buffer and log the error.
         success = kernel32.QueryFullProcessImageNameW(
             process_handle,
             0, # dwFlags - 0 for full path
@@ -123,39 +149,127 @@ def get_process_name_from_hwnd(hwnd):
         if not success:
              error_code = ctypes.GetLastError()
              if error_code == 122: # ERROR_INSUFFICIENT_BUFFER
-                 logger.error(f"Buffer too small for process name (PID: {process_id_val}, hwnd={hwnd}). Need to retry with larger buffer. WinError: {ctypes.WinError()}")
+                 logger.error(f"Buffer too small for process name (PID: {process_id_val}). Need to retry with larger buffer. WinError: {ctypes.WinError()}")
              else:
-                 logger.error(f"QueryFullProcessImageNameW failed for PID {process_id_val}, hwnd={hwnd}. WinError: {ctypes.WinError()}", exc_info=True)
+                 logger.error(f"QueryFullProcessImageNameW failed for PID {process_id_val}. WinError: {ctypes.WinError()}", exc_info=True)
              return None # Failed to get path
 
         # success is non-zero on success
         process_path = filename_buffer.value # .value extracts string from buffer
-
-        logger.debug(f"Got process (PID: {process_id_val}) path: {process_path}")
-
-        # Extract the executable file name from the path
-        process_name = os.path.basename(process_path)
-        logger.info(f"From hwnd={hwnd} (PID: {process_id_val}) got process name: {process_name}")
+        logger.debug("Got process (PID: %s) path: %s", process_id_val, process_path)
+
+        # Creation time lets other components detect PID reuse without keeping their own handles
+        creation_time = None
+        creation, exit_time, kernel_time, user_time = (ctypes.wintypes.FILETIME() for _ in range(4))
+        if kernel32.GetProcessTimes(process_handle, ctypes.byref(creation), ctypes.byref(exit_time), ctypes.byref(kernel_time), ctypes.byref(user_time)):
+            creation_time = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+
+        keep_handle = True
+        return ProcessImageInfo(
+            pid=process_id_val,
+            image_path=process_path,
+            # Extract the executable file name from the path
+            name=os.path.basename(process_path),
+            creation_time=creation_time,
+            handle=process_handle,
+        )
 
     except Exception as e:
-        logger.error(f"An unexpected error occurred while getting process info for PID {process_id_val}, hwnd={hwnd}: {e}", exc_info=True)
+        logger.error(f"An unexpected error occurred while getting process info for PID {process_id_val}: {e}", exc_info=True)
         return None # Ensure None is returned on error
     finally:
-        # Always close the process handle if it was successfully opened
-        if process_handle and process_handle != ctypes.wintypes.HANDLE(): # Check if handle is valid (not NULL)
-            try:
-                # Check if handle needs closing (OpenProcess returns a handle that needs closing)
-                 if kernel32.CloseHandle(process_handle):
-                     logger.debug(f"Closed process handle: {process_handle}")
-                 else:
-                     # CloseHandle can fail if the handle is invalid, though it shouldn't happen here.
-                     logger.warning(f"CloseHandle failed for process handle {process_handle}. WinError: {ctypes.WinError()}")
-            except Exception as e:
-                 logger.error(f"An error occurred while closing handle {process_handle}: {e}", exc_info=True)
-
-    logger.debug(f"get_process_name_from_hwnd (ctypes) finished, returning: {process_name}")
+        # Close the handle unless it's now owned by a cache entry
+        if process_handle and not keep_handle:
+            _close_handle(process_handle)
+
+
+def _is_process_alive(info):
+    """
+    Cache validator: True while the cached process is still running.
+    Because the cache holds the process handle, the PID can't have been reused while this is True.
+    """
+    return kernel32.WaitForSingleObject(info.handle, 0) == WAIT_TIMEOUT
+
+
+def _release_process_image(info):
+    """
+    Cache release callback: closes the process handle owned by the entry.
+    """
+    if info.handle:
+        _close_handle(info.handle)
+
+
+# Module level cache shared by all callers (the event pipeline resolves names on a single thread).
+_process_name_cache = ProcessNameCache(
+    resolver=_resolve_process_image,
+    is_same_process=_is_process_alive,
+    release=_release_process_image,
+    max_entries=PROCESS_NAME_CACHE_SIZE,
+)
+
+
+# Hot-path metrics (no-ops unless metrics are enabled)
+_resolve_histogram = get_registry().histogram("process_info.resolve")
+_resolve_failures = get_registry().counter("process_info.resolve_failures")
+
+
+def get_process_image_info_from_hwnd(hwnd):
+    """
+    根据 Windows 窗口句柄 (HWND) 获取所属进程的映像信息 (PID、完整路径、文件名、创建时间)。
+    结果按 PID 缓存，重复聚焦同一进程时只需一次 GetWindowThreadProcessId 和一次字典查找。
+
+    Args:
+        hwnd: Windows 窗口句柄 (integer).
+
+    Returns:
+        ProcessImageInfo，获取失败时返回 None。
+    """
+    # Check if hwnd is potentially valid (basic check)
+    if not hwnd or hwnd == 0:
+         logger.warning(f"Invalid hwnd provided (0). Returning None.")
+         return None
+
+    started = _resolve_histogram.start()
+    process_id_val = _get_process_id_from_hwnd(hwnd)
+    info = _process_name_cache.lookup(process_id_val) if process_id_val is not None else None
+    _resolve_histogram.stop(started)
+    if info is None:
+        _resolve_failures.inc()
+    return info
+
+
+def get_process_name_from_hwnd(hwnd):
+    """
+    根据 Windows 窗口句柄 (HWND) 获取所属进程的可执行文件名称 (.exe).
+    使用 ctypes 调用 Windows API，结果按 PID 缓存。
+
+    Args:
+        hwnd: Windows 窗口句柄 (integer).
+
+    Returns:
+        如果成功获取到进程名称，返回进程文件名称 (例如 "notepad.exe")。
+        如果获取失败 (例如句柄无效、权限不足等)，返回 None。
+    """
+    logger.debug("Entering get_process_name_from_hwnd (ctypes): hwnd=%s", hwnd)
+    info = get_process_image_info_from_hwnd(hwnd)
+    process_name = info.name if info is not None else None
+    logger.debug("get_process_name_from_hwnd (ctypes) finished, returning: %s", process_name)
     return process_name
 
+
+def invalidate_process(pid):
+    """
+    从进程名缓存中移除指定 PID (例如收到进程退出通知时)。
+    """
+    _process_name_cache.invalidate(pid)
+
+
+def get_process_name_cache_stats():
+    """
+    返回进程名缓存的命中/未命中统计。
+    """
+    return _process_name_cache.get_stats()
+
 # Example Usage (for testing this module standalone)
 if __name__ == "__main__":
     import sys
@@ -188,4 +302,9 @@ if __name__ == "__main__":
     get_process_name_from_hwnd(0)
     get_process_name_from_hwnd(99999999) # An unlikely handle value
 
+    # Resolve the foreground window again, this time it should be a cache hit
+    if current_foreground_hwnd:
+        get_process_name_from_hwnd(current_foreground_hwnd)
+    print(f"Process name cache stats: {get_process_name_cache_stats()}")
+
     logger.info("Standalone ctypes process_info test finished.")
\ No newline at end of file
@@ -0,0 +1,151 @@
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+# This module is deliberately free of ctypes/Windows imports: the Windows specific parts
+# (opening processes, querying image paths) are passed in as callables, so the cache logic
+# can be exercised and benchmarked on any platform with a fake resolver.
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Maximum number of processes kept in the cache. Each entry may hold an open process handle,
+# so this also bounds the number of handles the application keeps open.
+DEFAULT_MAX_ENTRIES = 256
+
+# Everything we know about the image of one process.
+# - pid: process ID
+# - image_path: full path of the executable (e.g. "C:\\Windows\\notepad.exe")
+# - name: executable file name (e.g. "notepad.exe")
+# - creation_time: process creation time as reported by the OS (FILETIME ticks on Windows), or None
+# - handle: opaque resolver specific token (an open process handle on Windows), or None
+ProcessImageInfo = namedtuple("ProcessImageInfo", ["pid", "image_path", "name", "creation_time", "handle"])
+
+
+class ProcessNameCache:
+    """
+    Bounded PID -> ProcessImageInfo cache with LRU eviction.
+
+    PID reuse protection: every hit is checked with the is_same_process callback before it is returned.
+    On Windows the resolver keeps a SYNCHRONIZE handle open for each cached process. While that handle
+    is open the PID cannot be reused, and checking whether the process has exited is a single
+    non-blocking wait on the handle - far cheaper than OpenProcess + QueryFullProcessImageNameW.
+    Exited processes are dropped (and their handle released) the next time they are looked up,
+    or explicitly via invalidate().
+    """
+    def __init__(self, resolver, is_same_process=None, release=None, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            resolver: callable(pid) -> ProcessImageInfo or None. Does the expensive lookup.
+            is_same_process: optional callable(info) -> bool. Returns False if the cached process
+                             has exited (or the PID now belongs to a different process).
+                             Without it, cached entries are trusted until evicted or invalidated.
+            release: optional callable(info) called when an entry leaves the cache (e.g. CloseHandle).
+            max_entries: maximum number of cached processes.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self._resolver = resolver
+        self._is_same_process = is_same_process
+        self._release = release
+        self._max_entries = max_entries
+        self._entries = OrderedDict() # pid -> ProcessImageInfo, least recently used first
+        # Lookups normally happen on a single thread, but invalidate()/clear() may come from others
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0 # Hits rejected because the process exited / PID was reused
+        self._evictions = 0
+
+    def lookup(self, pid):
+        """
+        Returns the ProcessImageInfo for pid, resolving it if it isn't cached (or no longer valid).
+        Returns None if the resolver fails.
+        """
+        if not pid:
+            return None
+
+        stale_info = None
+        with self._lock:
+            info = self._entries.get(pid)
+            if info is not None:
+                if self._is_same_process is None or self._is_same_process(info):
+                    self._entries.move_to_end(pid)
+                    self._hits += 1
+                    return info
+                # The process behind this PID has exited - drop the entry and resolve again
+                del self._entries[pid]
+                self._stale += 1
+                stale_info = info
+            self._misses += 1
+
+        if stale_info is not None:
+            logger.debug("Cached process info for PID %s (%s) is stale. Resolving again.", pid, stale_info.name)
+            self._release_entry(stale_info)
+
+        # Resolve outside the lock, this is the slow part
+        info = self._resolver(pid)
+        if info is None:
+            return None
+
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(pid, None)
+            if previous is not None:
+                # Another thread resolved the same PID concurrently, keep the newer result
+                evicted.append(previous)
+            self._entries[pid] = info
+            while len(self._entries) > self._max_entries:
+                _, oldest = self._entries.popitem(last=False)
+                evicted.append(oldest)
+                self._evictions += 1
+
+        for old_info in evicted:
+            self._release_entry(old_info)
+        return info
+
+    def invalidate(self, pid):
+        """
+        Removes a PID from the cache, e.g. when the process is known to have exited.
+        """
+        with self._lock:
+            info = self._entries.pop(pid, None)
+        if info is not None:
+            self._release_entry(info)
+
+    def clear(self):
+        """
+        Removes all entries and releases their resources.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for info in entries:
+            self._release_entry(info)
+
+    def get_stats(self):
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "evictions": self._evictions,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _release_entry(self, info):
+        if self._release is None:
+            return
+        try:
+            self._release(info)
+        except Exception as e:
+            logger.warning(f"Failed to release cached process info for PID {info.pid}: {e}")
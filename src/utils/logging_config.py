@@ -1,15 +1,15 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 
 # 项目根目录，便于日志文件存放
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 日志文件存放目录
+# 日志文件存放目录 (在 configure_logging 中创建，导入本模块没有文件系统副作用)
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-# 确保日志目录存在
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
 
 # 日志文件名称 (可以考虑使用日期或时间命名，这里简化处理)
 LOG_FILE_NAME = "app_power_switcher.log"
@@ -24,14 +24,36 @@ DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 # logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL
 DEFAULT_LOG_LEVEL = logging.INFO
 
-def configure_logging(log_level=None):
+# 异步日志模式下的后台监听器 (QueueListener)，未启用时为 None
+_queue_listener = None
+
+
+class DeferredFormattingQueueHandler(logging.handlers.QueueHandler):
+    """
+    只把 LogRecord 放入队列的 QueueHandler。
+
+    标准 QueueHandler.prepare() 会在调用线程上格式化消息 (拼接参数、格式化时间和异常)。
+    这里把记录原样入队，格式化和磁盘写入全部在 QueueListener 线程上完成，
+    事件钩子线程和处理线程上只剩一次入队操作。
+    记录只在进程内传递，所以参数和异常信息不需要预先转成字符串；
+    调用方不应在记录日志后修改作为参数传入的可变对象。
+    """
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(log_level=None, async_logging=False):
     """
     配置应用程序的日志系统.
 
     Args:
         log_level: 可选参数，用于覆盖默认的日志级别。
                    应为 logging 模块定义的级别常量 (如 logging.INFO)。
+        async_logging: 为 True 时使用队列日志: 根 logger 上只有一个 DeferredFormattingQueueHandler，
+                   控制台和文件处理器由后台 QueueListener 线程驱动，格式化和磁盘 I/O 不在调用线程上执行。
+                   程序退出前应调用 shutdown_logging() 以写出队列中剩余的日志 (也已注册到 atexit)。
     """
+    global _queue_listener
     # 获取根 logger
     root_logger = logging.getLogger()
 
@@ -53,9 +75,14 @@ def configure_logging(log_level=None):
     console_handler.setLevel(level) # 控制台输出级别
     console_handler.setFormatter(formatter)
 
+    # 输出处理器。同步模式下直接挂在根 logger 上，异步模式下交给 QueueListener。
+    output_handlers = []
+
     # 创建文件处理器 (File Handler)
     # 使用 RotatingFileHandler 可以限制日志文件大小和数量
     try:
+        # 确保日志目录存在
+        os.makedirs(LOG_DIR, exist_ok=True)
         from logging.handlers import RotatingFileHandler
         file_handler = RotatingFileHandler(
             LOG_FILE_PATH,
@@ -65,15 +92,28 @@ def configure_logging(log_level=None):
         )
         file_handler.setLevel(level) # 文件输出级别
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        output_handlers.append(file_handler)
         print(f"Logging configured. Output to console and file: {LOG_FILE_PATH}") # 初始提示信息
     except Exception as e:
         # 如果文件处理器创建失败 (例如权限问题), 只配置控制台输出
         print(f"Warning: Could not create file handler at {LOG_FILE_PATH}. Log will only be output to console.")
         print(f"Error details: {e}")
 
-    # 将处理器添加到根 logger
-    root_logger.addHandler(console_handler)
+    output_handlers.append(console_handler)
+
+    if async_logging:
+        # 无界队列: 入队永不阻塞调用线程 (日志量受日志级别限制，不会无限增长)
+        log_queue = queue.SimpleQueue()
+        _queue_listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+        _queue_listener.start()
+        queue_handler = DeferredFormattingQueueHandler(log_queue)
+        queue_handler.setLevel(level)
+        root_logger.addHandler(queue_handler)
+        atexit.register(shutdown_logging)
+    else:
+        # 将处理器添加到根 logger
+        for handler in output_handlers:
+            root_logger.addHandler(handler)
 
     # 获取当前 logger，用于在此模块中记录配置状态
     logger = logging.getLogger(__name__)
@@ -81,6 +121,36 @@ def configure_logging(log_level=None):
     logger.info(f"Log Level set to: {logging.getLevelName(root_logger.level)}")
     for handler in root_logger.handlers:
          logger.info(f"Handler added: {type(handler).__name__} with level {logging.getLevelName(handler.level)}")
+    if _queue_listener is not None:
+         logger.info(f"Asynchronous logging enabled. Output handlers run on the queue listener thread: {', '.join(type(handler).__name__ for handler in output_handlers)}")
+
+
+def is_async_logging():
+    """
+    当前是否使用异步 (队列) 日志模式。
+    """
+    return _queue_listener is not None
+
+
+def shutdown_logging():
+    """
+    停止异步日志的后台监听线程，并写出队列中剩余的日志。同步模式下无操作。可以重复调用。
+    """
+    global _queue_listener
+    listener = _queue_listener
+    if listener is None:
+        return
+    _queue_listener = None
+    try:
+        # stop() 会处理完队列中已有的记录后再返回
+        listener.stop()
+    except Exception as e:
+        print(f"Warning: Failed to stop the logging queue listener cleanly: {e}")
+    for handler in listener.handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass
 
 # 可以在程序的入口 (main.py) 调用 configure_logging() 函数来初始化日志系统。
 # 例如:
@@ -95,4 +165,4 @@ def configure_logging(log_level=None):
 # config.load_config() # 假设配置中包含了日志级别
 # log_level_str = config.get_log_level()
 # log_level = getattr(logging, log_level_str.upper(), logging.INFO) # 转换为 logging 级别对象
-# configure_logging(log_level)
\ No newline at end of file
+# configure_logging(log_level, async_logging=config.get_async_logging())
\ No newline at end of file
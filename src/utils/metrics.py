@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# 获取当前模块的 logger
+logger = logging.getLogger(__name__)
+
+# 直方图桶的上界 (毫秒)。对数刻度，覆盖从微秒级的字典查找到数秒的 powercfg 调用。
+# 超过最后一个上界的样本计入溢出桶。
+DEFAULT_HISTOGRAM_BOUNDS_MS = (
+    0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0, 10.0, 20.0, 50.0,
+    100.0, 200.0, 500.0, 1000.0, 2000.0, 5000.0,
+)
+
+
+class Counter:
+    """
+    单调递增计数器。注册表禁用时 inc() 只做一次属性判断。
+    """
+    __slots__ = ("name", "_registry", "_lock", "_value")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._value += amount
+
+    def get_value(self):
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+    def snapshot(self):
+        return self._value
+
+
+class Histogram:
+    """
+    耗时直方图 (秒为单位输入，毫秒为单位输出)。
+    记录次数、总和、最小值、最大值和固定桶的计数，百分位数由桶估算 (取桶上界)。
+
+    热路径用法 (禁用时 start() 返回 None，stop(None) 直接返回):
+        started = histogram.start()
+        ... 被测代码 ...
+        histogram.stop(started)
+    """
+    __slots__ = ("name", "_registry", "_lock", "_bounds_ms", "_buckets", "_count", "_total", "_min", "_max")
+
+    def __init__(self, name, registry, bounds_ms=DEFAULT_HISTOGRAM_BOUNDS_MS):
+        self.name = name
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._bounds_ms = tuple(bounds_ms)
+        self._buckets = [0] * (len(self._bounds_ms) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._min = None
+        self._max = 0.0
+
+    def start(self):
+        """
+        返回计时起点 (perf_counter)；注册表禁用时返回 None。
+        """
+        if not self._registry.enabled:
+            return None
+        return time.perf_counter()
+
+    def stop(self, started):
+        """
+        记录从 start() 返回的起点到现在的耗时。started 为 None 时不做任何事。
+        """
+        if started is None:
+            return
+        self.observe(time.perf_counter() - started)
+
+    def observe(self, seconds):
+        """
+        记录一个耗时样本 (秒)。
+        """
+        if not self._registry.enabled:
+            return
+        value_ms = seconds * 1000.0
+        index = bisect_left(self._bounds_ms, value_ms)
+        with self._lock:
+            self._buckets[index] += 1
+            self._count += 1
+            self._total += value_ms
+            if self._min is None or value_ms < self._min:
+                self._min = value_ms
+            if value_ms > self._max:
+                self._max = value_ms
+
+    def _percentile_ms(self, fraction):
+        # Caller holds the lock
+        if not self._count:
+            return 0.0
+        rank = fraction * self._count
+        seen = 0
+        for index, bucket_count in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= rank:
+                # Upper bound of the bucket, capped by the largest observed value
+                upper = self._bounds_ms[index] if index < len(self._bounds_ms) else self._max
+                return min(upper, self._max)
+        return self._max
+
+    def reset(self):
+        with self._lock:
+            self._buckets = [0] * (len(self._bounds_ms) + 1)
+            self._count = 0
+            self._total = 0.0
+            self._min = None
+            self._max = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self._count,
+                "avg_ms": (self._total / self._count) if self._count else 0.0,
+                "min_ms": self._min if self._min is not None else 0.0,
+                "max_ms": self._max,
+                "p50_ms": self._percentile_ms(0.50),
+                "p95_ms": self._percentile_ms(0.95),
+                "p99_ms": self._percentile_ms(0.99),
+                "buckets": {
+                    (f"le_{bound:g}ms" if index < len(self._bounds_ms) else "overflow"): bucket_count
+                    for index, (bound, bucket_count) in enumerate(zip(self._bounds_ms + (None,), self._buckets))
+                    if bucket_count
+                },
+            }
+
+
+class MetricsRegistry:
+    """
+    轻量级指标注册表 (计数器和耗时直方图)。
+
+    指标对象在模块导入时创建并缓存在模块级变量中，热路径上只调用 inc()/start()/stop()。
+    禁用时 (默认) 这些调用只判断 enabled 属性，不加锁也不读时钟，开销接近于零。
+    """
+    def __init__(self, enabled=False):
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._enabled_at = time.time() if self.enabled else None
+
+    def set_enabled(self, enabled):
+        """
+        启用或禁用指标收集。已收集的数据保留。
+        """
+        enabled = bool(enabled)
+        if enabled and not self.enabled:
+            self._enabled_at = time.time()
+        self.enabled = enabled
+        logger.info(f"Metrics collection {'enabled' if enabled else 'disabled'}.")
+
+    def is_enabled(self):
+        return self.enabled
+
+    def counter(self, name):
+        """
+        获取 (或创建) 指定名称的计数器。
+        """
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters[name] = Counter(name, self)
+            return counter
+
+    def histogram(self, name, bounds_ms=DEFAULT_HISTOGRAM_BOUNDS_MS):
+        """
+        获取 (或创建) 指定名称的耗时直方图。
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(name, self, bounds_ms)
+            return histogram
+
+    def reset(self):
+        """
+        清零所有指标。
+        """
+        with self._lock:
+            instruments = list(self._counters.values()) + list(self._histograms.values())
+        for instrument in instruments:
+            instrument.reset()
+
+    def snapshot(self):
+        """
+        返回所有指标的当前值 (可 JSON 序列化的字典)。
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        return {
+            "enabled": self.enabled,
+            "enabled_since": self._enabled_at,
+            "counters": {name: counter.snapshot() for name, counter in sorted(counters.items())},
+            "histograms": {name: histogram.snapshot() for name, histogram in sorted(histograms.items())},
+        }
+
+    def dump(self, file_path):
+        """
+        将当前指标以 JSON 格式写入文件。成功返回 True，否则返回 False。
+        """
+        try:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            snapshot = self.snapshot()
+            snapshot["dumped_at"] = time.time()
+            # Write to a temporary file first so readers never see a half-written dump
+            temp_path = file_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as dump_file:
+                json.dump(snapshot, dump_file, indent=2)
+            os.replace(temp_path, file_path)
+            logger.info(f"Metrics dumped to {file_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to dump metrics to '{file_path}': {e}", exc_info=True)
+            return False
+
+
+# 进程级的全局注册表。各模块通过 get_registry() 获取指标对象。
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """
+    返回全局指标注册表。
+    """
+    return _registry
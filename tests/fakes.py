@@ -0,0 +1,35 @@
+"""
+Test doubles shared by the unit tests.
+"""
+
+
+class FakeClock:
+    """
+    Manually advanced monotonic clock (seconds), for components with an injectable clock.
+    """
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeProcessEnumerator:
+    """
+    In-memory process table for RunningProcessTracker tests. Edit `processes` between polls.
+    """
+    name = "fake"
+
+    def __init__(self, entries=()):
+        self.processes = {entry.pid: entry for entry in entries}
+        self.describe_calls = []
+
+    def pids(self):
+        return list(self.processes)
+
+    def describe(self, pid):
+        self.describe_calls.append(pid)
+        return self.processes.get(pid)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.infrastructure.configuration.config_manager import ConfigManager
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+SAVER = "a1841308-3541-4fab-bc81-f71556f20b4a"
+LOGGER = "src.infrastructure.configuration.config_manager"
+
+
+def config_text(game_plan):
+    return f"[General]\ndefault_power_plan = {BALANCED}\n[ProcessPowerMap]\nGame.exe = {game_plan.upper()}\n"
+
+
+class ConfigReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_config_")
+        self.config_path = os.path.join(self.work_dir, "app_config.ini")
+        self._write(config_text(HIGH))
+        self.config_manager = ConfigManager(self.config_path)
+        with self.assertLogs(LOGGER, "INFO"):
+            self.assertTrue(self.config_manager.load_config())
+        self.snapshot = self.config_manager.get_snapshot()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _write(self, content):
+        with open(self.config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(content)
+
+    def _assert_snapshot_kept(self):
+        self.assertIs(self.config_manager.get_snapshot(), self.snapshot)
+        self.assertEqual(self.config_manager.get_config_version(), self.snapshot.version)
+        self.assertEqual(dict(self.snapshot.app_power_map), {"game.exe": HIGH})
+
+    def test_loaded_snapshot(self):
+        self.assertEqual(self.snapshot.default_power_plan, BALANCED)
+        self.assertEqual(dict(self.snapshot.app_power_map), {"game.exe": HIGH})
+        # A second load of the same content isn't parsed again
+        self.assertTrue(self.config_manager.load_config())
+        self.assertIs(self.config_manager.get_snapshot(), self.snapshot)
+
+    def test_unchanged_content_is_not_reloaded(self):
+        with self.assertLogs(LOGGER, "DEBUG") as logs:
+            self.assertFalse(self.config_manager.reload_config())
+        self.assertIn("unchanged", logs.output[-1])
+        self._assert_snapshot_kept()
+
+    def test_valid_change_is_applied(self):
+        self._write(config_text(SAVER))
+        with self.assertLogs(LOGGER, "INFO"):
+            self.assertTrue(self.config_manager.reload_config())
+        snapshot = self.config_manager.get_snapshot()
+        self.assertEqual(snapshot.version, self.snapshot.version + 1)
+        self.assertEqual(dict(snapshot.app_power_map), {"game.exe": SAVER})
+
+    def test_syntax_error_keeps_the_previous_snapshot(self):
+        self._write("[General\ndefault_power_plan = " + BALANCED + "\n")
+        with self.assertLogs(LOGGER, "ERROR") as logs:
+            self.assertFalse(self.config_manager.reload_config())
+        self.assertIn("Keeping the current configuration", logs.output[-1])
+        self._assert_snapshot_kept()
+
+    def test_duplicate_key_keeps_the_previous_snapshot(self):
+        self._write(config_text(SAVER) + f"game.exe = {HIGH}\n")
+        with self.assertLogs(LOGGER, "ERROR"):
+            self.assertFalse(self.config_manager.reload_config())
+        self._assert_snapshot_kept()
+
+    def test_reverting_a_broken_file_needs_no_reload(self):
+        self._write("[General\n")
+        with self.assertLogs(LOGGER, "ERROR"):
+            self.config_manager.reload_config()
+        self._write(config_text(HIGH))
+        with self.assertLogs(LOGGER, "DEBUG"):
+            self.assertFalse(self.config_manager.reload_config())
+        self._assert_snapshot_kept()
+
+    def test_missing_file_keeps_the_previous_snapshot(self):
+        os.remove(self.config_path)
+        with self.assertLogs(LOGGER, "ERROR"):
+            self.assertFalse(self.config_manager.reload_config())
+        self._assert_snapshot_kept()
+        self.assertFalse(os.path.exists(self.config_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.infrastructure.configuration.config_watcher import MAX_SETTLE_ROUNDS, FileChangePoller
+
+
+class FileChangePollerTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_watcher_")
+        self.file_path = os.path.join(self.work_dir, "app_config.ini")
+        self.mtime_ns = 1_000_000_000_000_000_000
+        self._write("a")
+        self.poller = FileChangePoller(self.file_path, min_interval=1.0, max_interval=4.0, backoff_factor=2.0, settle_delay=0.25)
+        self.poller.reset()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _write(self, content):
+        with open(self.file_path, "w", encoding="utf-8") as config_file:
+            config_file.write(content)
+        # Explicit mtimes: two writes within the file system's timestamp resolution must still differ
+        self.mtime_ns += 1_000_000
+        os.utime(self.file_path, ns=(self.mtime_ns, self.mtime_ns))
+
+    def test_unchanged_file_backs_off(self):
+        delays = []
+        for _ in range(4):
+            delays.append(self.poller.next_delay())
+            self.assertFalse(self.poller.poll())
+        self.assertEqual(delays, [1.0, 2.0, 4.0, 4.0])
+
+    def test_change_is_reported_once_settled(self):
+        self.poller.poll()
+        self._write("bb")
+        self.assertFalse(self.poller.poll()) # Detected, settling
+        self.assertEqual(self.poller.next_delay(), 0.25)
+        self.assertTrue(self.poller.poll())
+        self.assertEqual(self.poller.next_delay(), 1.0)
+        self.assertFalse(self.poller.poll())
+        self.assertEqual(self.poller.get_stats()["changes"], 1)
+
+    def test_file_still_being_written_is_not_reported(self):
+        self._write("bb")
+        self.assertFalse(self.poller.poll())
+        self._write("ccc")
+        self.assertFalse(self.poller.poll())
+        self.assertTrue(self.poller.poll())
+
+    def test_file_that_keeps_changing_is_reported_eventually(self):
+        self._write("b")
+        self.assertFalse(self.poller.poll())
+        for _ in range(MAX_SETTLE_ROUNDS - 1):
+            self._write("b")
+            self.assertFalse(self.poller.poll())
+        self._write("b")
+        with self.assertLogs("src.infrastructure.configuration.config_watcher", "WARNING"):
+            self.assertTrue(self.poller.poll())
+
+    def test_missing_file_is_not_a_change(self):
+        os.remove(self.file_path)
+        self.assertFalse(self.poller.poll())
+        self.assertEqual(self.poller.next_delay(), 2.0)
+        self.assertEqual(self.poller.get_stats()["stat_errors"], 1)
+        self._write("a")
+        self.assertFalse(self.poller.poll())
+        self.assertTrue(self.poller.poll())
+
+    def test_file_vanishing_while_settling(self):
+        self._write("bb")
+        self.assertFalse(self.poller.poll())
+        os.remove(self.file_path)
+        self.assertFalse(self.poller.poll())
+        self.assertEqual(self.poller.get_stats()["changes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
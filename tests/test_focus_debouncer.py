@@ -0,0 +1,61 @@
+import unittest
+
+from src.application.focus_debouncer import FocusDebouncer
+from tests.fakes import FakeClock
+
+
+class FocusDebouncerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # A binary fraction, so the deadline arithmetic on the fake clock is exact
+        self.debouncer = FocusDebouncer(settle_seconds=0.25, clock=self.clock)
+
+    def test_nothing_pending(self):
+        self.assertFalse(self.debouncer.has_pending())
+        self.assertIsNone(self.debouncer.time_until_ready())
+        self.assertIsNone(self.debouncer.pop_ready())
+
+    def test_event_is_released_exactly_at_the_deadline(self):
+        self.debouncer.offer("editor")
+        self.clock.advance(0.125)
+        self.assertEqual(self.debouncer.time_until_ready(), 0.125)
+        self.assertIsNone(self.debouncer.pop_ready())
+        self.clock.advance(0.125)
+        self.assertEqual(self.debouncer.time_until_ready(), 0.0)
+        self.assertEqual(self.debouncer.pop_ready(), "editor")
+        self.assertFalse(self.debouncer.has_pending())
+        self.assertIsNone(self.debouncer.pop_ready())
+
+    def test_newer_event_supersedes_and_restarts_the_window(self):
+        self.debouncer.offer("editor")
+        self.clock.advance(0.125)
+        self.debouncer.offer("browser")
+        self.clock.advance(0.125)
+        # The deadline of the first event has passed, but the window restarted with the second one
+        self.assertIsNone(self.debouncer.pop_ready())
+        self.assertEqual(self.debouncer.time_until_ready(), 0.125)
+        self.debouncer.offer("game")
+        self.clock.advance(0.25)
+        self.assertEqual(self.debouncer.pop_ready(), "game")
+        self.assertEqual(self.debouncer.get_superseded_count(), 2)
+
+    def test_settled_events_are_not_counted_as_superseded(self):
+        self.debouncer.offer("editor")
+        self.clock.advance(0.25)
+        self.debouncer.pop_ready()
+        self.debouncer.offer("browser")
+        self.debouncer.clear()
+        self.debouncer.offer("game")
+        self.assertEqual(self.debouncer.get_superseded_count(), 0)
+
+    def test_zero_settle_time_passes_events_through(self):
+        debouncer = FocusDebouncer(settle_seconds=0, clock=self.clock)
+        debouncer.offer("editor")
+        self.assertEqual(debouncer.time_until_ready(), 0.0)
+        self.assertEqual(debouncer.pop_ready(), "editor")
+        self.assertEqual(FocusDebouncer(settle_seconds=None).settle_seconds, 0.0)
+        self.assertEqual(FocusDebouncer(settle_seconds=-1).settle_seconds, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
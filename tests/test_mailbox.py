@@ -0,0 +1,68 @@
+import queue
+import threading
+import time
+import unittest
+
+from src.infrastructure.events.mailbox import LatestValueMailbox
+
+
+class LatestValueMailboxTest(unittest.TestCase):
+    def setUp(self):
+        self.mailbox = LatestValueMailbox()
+
+    def test_latest_value_wins(self):
+        for value in ("editor", "browser", "game"):
+            self.mailbox.put_nowait(value)
+        self.assertEqual(self.mailbox.qsize(), 1)
+        self.assertEqual(self.mailbox.get_nowait(), "game")
+        with self.assertRaises(queue.Empty):
+            self.mailbox.get_nowait()
+        stats = self.mailbox.get_stats()
+        self.assertEqual((stats["puts"], stats["gets"], stats["overwritten"], stats["pending"]), (3, 1, 2, 0))
+
+    def test_get_times_out(self):
+        started = time.monotonic()
+        with self.assertRaises(queue.Empty):
+            self.mailbox.get(timeout=0.05)
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+    def test_put_if_empty_never_overwrites(self):
+        self.assertTrue(self.mailbox.put_if_empty("re-evaluate"))
+        self.assertFalse(self.mailbox.put_if_empty("re-evaluate again"))
+        self.mailbox.put("game")
+        self.assertFalse(self.mailbox.put_if_empty("re-evaluate"))
+        self.assertEqual(self.mailbox.get_nowait(), "game")
+        self.assertFalse(self.mailbox.put_if_empty(None))
+        self.assertEqual(self.mailbox.qsize(), 0)
+
+    def test_close_wakes_a_blocked_getter(self):
+        results = []
+        getter = threading.Thread(target=lambda: results.append(self.mailbox.get()))
+        getter.start()
+        time.sleep(0.05) # Let the getter block
+        self.mailbox.close()
+        getter.join(timeout=5.0)
+        self.assertFalse(getter.is_alive())
+        self.assertEqual(results, [None])
+
+    def test_blocked_getter_receives_a_value(self):
+        results = []
+        getter = threading.Thread(target=lambda: results.append(self.mailbox.get(timeout=5.0)))
+        getter.start()
+        self.mailbox.put("game")
+        getter.join(timeout=5.0)
+        self.assertEqual(results, ["game"])
+
+    def test_value_stored_before_close_is_delivered(self):
+        self.mailbox.put("game")
+        self.mailbox.put(None) # Stop sentinel closes the mailbox
+        self.assertTrue(self.mailbox.is_closed())
+        self.mailbox.put("ignored")
+        self.assertFalse(self.mailbox.put_if_empty("ignored"))
+        self.assertEqual(self.mailbox.get(), "game")
+        self.assertIsNone(self.mailbox.get())
+        self.assertIsNone(self.mailbox.get_nowait())
+
+
+if __name__ == "__main__":
+    unittest.main()
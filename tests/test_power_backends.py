@@ -0,0 +1,116 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from src.infrastructure.power_management.power_backends import (
+    GET_ACTIVE_SCHEME_ARG,
+    LIST_ARG,
+    SET_ACTIVE_ARG,
+    PersistentPowerCfgBackend,
+    SubprocessPowerCfgBackend,
+)
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+UNKNOWN = "00000000-0000-0000-0000-000000000000"
+FAKE_POWERCFG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fake_powercfg.py")
+
+
+def write_launcher(work_dir):
+    """
+    Executable powercfg stand-in running benchmarks/fake_powercfg.py, with its state file in work_dir.
+    """
+    state_file = os.path.join(work_dir, "active.txt")
+    if os.name == "nt":
+        launcher = os.path.join(work_dir, "powercfg.cmd")
+        with open(launcher, "w", encoding="utf-8") as launcher_file:
+            launcher_file.write(f'@set "APS_FAKE_POWERCFG_STATE={state_file}"\n@"{sys.executable}" "{FAKE_POWERCFG}" %*\n')
+    else:
+        launcher = os.path.join(work_dir, "powercfg")
+        with open(launcher, "w", encoding="utf-8") as launcher_file:
+            launcher_file.write(f'#!/bin/sh\nAPS_FAKE_POWERCFG_STATE="{state_file}" exec "{sys.executable}" "{FAKE_POWERCFG}" "$@"\n')
+        os.chmod(launcher, 0o755)
+    return launcher
+
+
+class PowerCfgCliBackendTests:
+    """
+    Runs a powercfg CLI backend against benchmarks/fake_powercfg.py. Mixed into one TestCase per backend.
+    """
+    backend_class = None
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_backend_")
+        self.backend = self.backend_class(powercfg_command=write_launcher(self.work_dir))
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_single_commands(self):
+        schemes = self.backend.list_schemes()
+        self.assertEqual(len(schemes), 3)
+        self.assertIn((HIGH, "High performance"), schemes)
+        self.assertEqual(self.backend.get_active_scheme(), BALANCED)
+        self.assertTrue(self.backend.set_active_scheme(HIGH))
+        self.assertEqual(self.backend.get_active_scheme(), HIGH)
+
+    def test_batched_commands(self):
+        results = self.backend.run_batch([[SET_ACTIVE_ARG, HIGH], [GET_ACTIVE_SCHEME_ARG], [LIST_ARG]])
+        self.assertEqual([result.returncode for result in results], [0, 0, 0])
+        self.assertEqual(results[0].stdout, "")
+        self.assertIn(HIGH, results[1].stdout)
+        self.assertIn(f"{HIGH}  (High performance) *", results[2].stdout)
+
+    def test_load_state(self):
+        schemes, active_guid = self.backend.load_state()
+        self.assertEqual(len(schemes), 3)
+        self.assertEqual(active_guid, BALANCED)
+
+    def test_get_and_set_active_scheme(self):
+        self.assertEqual(self.backend.get_and_set_active_scheme(HIGH), (BALANCED, True))
+        self.assertEqual(self.backend.get_and_set_active_scheme(HIGH), (HIGH, True))
+        self.assertEqual(self.backend.get_active_scheme(), HIGH)
+
+    def test_non_zero_exit_code(self):
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "ERROR"):
+            self.assertFalse(self.backend.set_active_scheme(UNKNOWN))
+        result = self.backend.run_command(["/bogus"])
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Invalid Parameters", result.stdout + result.stderr)
+        # A failing command in the middle of a batch doesn't shift the results of the others
+        results = self.backend.run_batch([[GET_ACTIVE_SCHEME_ARG], ["/bogus"], [GET_ACTIVE_SCHEME_ARG]])
+        self.assertEqual([result.returncode for result in results], [0, 1, 0])
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "ERROR"):
+            self.assertEqual(self.backend.get_and_set_active_scheme(UNKNOWN), (BALANCED, False))
+
+    def test_missing_executable(self):
+        backend = self.backend_class(powercfg_command=os.path.join(self.work_dir, "missing_powercfg"))
+        try:
+            with self.assertLogs("src.infrastructure.power_management.power_backends", "ERROR"):
+                self.assertIsNone(backend.list_schemes())
+            with self.assertLogs("src.infrastructure.power_management.power_backends", "ERROR"):
+                self.assertEqual(backend.load_state(), (None, None))
+        finally:
+            backend.close()
+
+
+class SubprocessPowerCfgBackendTest(PowerCfgCliBackendTests, unittest.TestCase):
+    backend_class = SubprocessPowerCfgBackend
+
+
+class PersistentPowerCfgBackendTest(PowerCfgCliBackendTests, unittest.TestCase):
+    backend_class = PersistentPowerCfgBackend
+
+    def test_shell_is_restarted_after_it_exits(self):
+        self.assertEqual(self.backend.get_active_scheme(), BALANCED)
+        self.backend._shell.kill()
+        self.backend._shell.wait()
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "WARNING"):
+            self.assertEqual(self.backend.get_active_scheme(), BALANCED)
+
+
+if __name__ == "__main__":
+    unittest.main()
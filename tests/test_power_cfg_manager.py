@@ -0,0 +1,135 @@
+import unittest
+
+from src.infrastructure.power_management.power_backends import PowerBackend
+from src.infrastructure.power_management.power_cfg_manager import PowerCfgManager
+from tests.fakes import FakeClock
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+
+class FakeBackend(PowerBackend):
+    """
+    In-memory power backend recording its calls. during_query runs inside get_active_scheme(),
+    to change the manager's state while a query is in flight.
+    """
+    name = "fake"
+
+    def __init__(self, active=BALANCED, batches_commands=False):
+        self.active = active
+        self.batches_commands = batches_commands
+        self.calls = []
+        self.during_query = None
+
+    def list_schemes(self):
+        self.calls.append("list")
+        return [(BALANCED, "Balanced"), (HIGH, "High performance")]
+
+    def get_active_scheme(self):
+        self.calls.append("get")
+        active = self.active
+        if self.during_query is not None:
+            self.during_query()
+        return active.upper()
+
+    def set_active_scheme(self, power_plan_guid):
+        self.calls.append("set")
+        self.active = power_plan_guid
+        return True
+
+    def load_state(self):
+        self.calls.append("load_state")
+        return self.list_schemes(), self.get_active_scheme()
+
+    def get_and_set_active_scheme(self, power_plan_guid):
+        self.calls.append("get_and_set")
+        return super().get_and_set_active_scheme(power_plan_guid)
+
+
+class ActiveSchemeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = FakeBackend()
+        self.manager = PowerCfgManager(backend=self.backend, active_scheme_cache_ttl=10.0, clock=self.clock)
+        self.backend.calls.clear()
+
+    def _stats(self):
+        stats = self.manager.get_active_scheme_cache_stats()
+        return stats["hits"], stats["misses"], stats["invalidations"]
+
+    def test_cached_value_is_used_until_the_ttl_expires(self):
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.clock.advance(9.5)
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.assertEqual(self.backend.calls, ["get"])
+        self.clock.advance(0.5)
+        self.backend.active = HIGH
+        self.assertEqual(self.manager.get_active_scheme_guid(), HIGH)
+        self.assertEqual(self.backend.calls, ["get", "get"])
+        self.assertEqual(self._stats(), (1, 2, 0))
+
+    def test_use_cache_false_queries_the_backend(self):
+        self.manager.get_active_scheme_guid()
+        self.manager.get_active_scheme_guid(use_cache=False)
+        self.assertEqual(self.backend.calls, ["get", "get"])
+        self.assertEqual(self._stats(), (0, 2, 0))
+
+    def test_switch_and_external_change_update_the_cache(self):
+        self.assertTrue(self.manager.switch_power_plan(HIGH))
+        self.assertEqual(self.manager.get_active_scheme_guid(), HIGH)
+        self.manager.invalidate_active_scheme_cache(BALANCED.upper())
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.assertEqual(self.backend.calls, ["set"])
+        self.manager.invalidate_active_scheme_cache()
+        self.manager.get_active_scheme_guid()
+        self.assertEqual(self.backend.calls, ["set", "get"])
+        self.assertEqual(self._stats(), (2, 1, 2))
+
+    def test_query_result_is_dropped_if_the_cache_changed_meanwhile(self):
+        # An external change notification arrives while the (slow) query is running
+        self.backend.during_query = lambda: self.manager.invalidate_active_scheme_cache(HIGH)
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.backend.during_query = None
+        # The older query result didn't overwrite the notification
+        self.assertEqual(self.manager.get_active_scheme_guid(), HIGH)
+        self.assertEqual(self.backend.calls, ["get"])
+
+    def test_ttl_zero_disables_the_cache(self):
+        manager = PowerCfgManager(backend=self.backend, active_scheme_cache_ttl=0, clock=self.clock)
+        self.backend.calls.clear()
+        manager.get_active_scheme_guid()
+        manager.get_active_scheme_guid()
+        self.assertEqual(self.backend.calls, ["get", "get"])
+        stats = manager.get_active_scheme_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 0))
+
+
+class BatchedBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = FakeBackend(batches_commands=True)
+        self.manager = PowerCfgManager(backend=self.backend, active_scheme_cache_ttl=10.0, clock=self.clock, load_schemes=False)
+
+    def test_startup_load_fills_the_catalog_and_the_cache(self):
+        catalog = self.manager.refresh_schemes(include_active_scheme=True)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.assertEqual(self.backend.calls, ["load_state", "list", "get"])
+
+    def test_ensure_power_plan_uses_one_round_trip_on_a_cache_miss(self):
+        self.manager.refresh_schemes()
+        self.backend.calls.clear()
+        self.assertEqual(self.manager.ensure_power_plan(HIGH), (False, True))
+        self.assertEqual(self.backend.calls, ["get_and_set", "get", "set"])
+        # The switch stored the new plan, so the next call is answered from the cache
+        self.assertEqual(self.manager.ensure_power_plan(HIGH), (True, True))
+        self.assertEqual(self.backend.calls, ["get_and_set", "get", "set"])
+
+    def test_ensure_power_plan_on_the_active_plan(self):
+        self.assertEqual(self.manager.ensure_power_plan(BALANCED), (True, True))
+        self.assertEqual(self.manager.get_active_scheme_guid(), BALANCED)
+        self.assertEqual(self.backend.calls, ["get_and_set", "get", "set"])
+
+
+if __name__ == "__main__":
+    unittest.main()
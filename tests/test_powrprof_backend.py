@@ -0,0 +1,132 @@
+import ctypes
+import os
+import unittest
+
+from src.infrastructure.power_management.power_backends import (
+    PersistentPowerCfgBackend,
+    SubprocessPowerCfgBackend,
+    create_power_backend,
+)
+from src.infrastructure.power_management.powrprof_backend import (
+    ERROR_ACCESS_DENIED,
+    ERROR_FILE_NOT_FOUND,
+    ERROR_SUCCESS,
+    GUID,
+    NativePowerBackend,
+)
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+
+class FakePowrProfApi:
+    """
+    PowrProfApi stand-in keeping the schemes as GUID structures, so every GUID passing through it
+    takes the same string -> GUID -> string round trip as with powrprof.dll.
+    """
+    def __init__(self, schemes, active):
+        self.schemes = {bytes(GUID.from_string(guid)): name for guid, name in schemes}
+        self.active = GUID.from_string(active)
+        self.set_error = ERROR_SUCCESS
+
+    def get_active_scheme(self):
+        return ERROR_SUCCESS, self.active.to_string()
+
+    def set_active_scheme(self, guid_string):
+        guid = GUID.from_string(guid_string)
+        if self.set_error != ERROR_SUCCESS:
+            return self.set_error, None
+        if bytes(guid) not in self.schemes:
+            return ERROR_FILE_NOT_FOUND, None
+        self.active = guid
+        return ERROR_SUCCESS, None
+
+    def enumerate_schemes(self):
+        return ERROR_SUCCESS, [GUID.from_buffer_copy(raw).to_string() for raw in self.schemes]
+
+    def read_friendly_name(self, guid_string):
+        name = self.schemes.get(bytes(GUID.from_string(guid_string)))
+        return (ERROR_SUCCESS, name) if name is not None else (ERROR_FILE_NOT_FOUND, None)
+
+
+class GuidTest(unittest.TestCase):
+    def test_layout_matches_the_win32_structure(self):
+        self.assertEqual(ctypes.sizeof(GUID), 16)
+        guid = GUID.from_string(BALANCED)
+        self.assertEqual((guid.Data1, guid.Data2, guid.Data3), (0x381b4222, 0xf694, 0x41f0))
+        self.assertEqual(bytes(guid.Data4), bytes.fromhex("9685ff5bb260df2e"))
+
+    def test_string_round_trip_uses_the_powercfg_format(self):
+        self.assertEqual(GUID.from_string(HIGH).to_string(), HIGH)
+        self.assertEqual(GUID.from_string(f" {{{HIGH.upper()}}} ").to_string(), HIGH)
+
+    def test_malformed_guid(self):
+        for value in ("", "not-a-guid", HIGH[:-1]):
+            with self.assertRaises(ValueError):
+                GUID.from_string(value)
+
+
+class NativePowerBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.api = FakePowrProfApi([(BALANCED, "Balanced"), (HIGH, "")], active=BALANCED)
+        self.backend = NativePowerBackend(api=self.api)
+
+    def test_list_schemes(self):
+        with self.assertLogs("src.infrastructure.power_management.powrprof_backend", "WARNING"):
+            schemes = self.backend.list_schemes()
+        # A scheme whose name can't be read is listed under its GUID
+        self.assertEqual(schemes, [(BALANCED, "Balanced"), (HIGH, HIGH)])
+
+    def test_switch_and_query(self):
+        self.assertEqual(self.backend.get_active_scheme(), BALANCED)
+        self.assertTrue(self.backend.set_active_scheme(HIGH.upper()))
+        self.assertEqual(self.backend.get_active_scheme(), HIGH)
+        self.assertEqual(self.backend.get_and_set_active_scheme(BALANCED), (HIGH, True))
+
+    def test_failed_switches(self):
+        with self.assertLogs("src.infrastructure.power_management.powrprof_backend", "ERROR"):
+            self.assertFalse(self.backend.set_active_scheme("not-a-guid"))
+        with self.assertLogs("src.infrastructure.power_management.powrprof_backend", "ERROR") as logs:
+            self.assertFalse(self.backend.set_active_scheme("00000000-0000-0000-0000-000000000000"))
+        self.assertIn("does not exist", logs.output[0])
+        self.api.set_error = ERROR_ACCESS_DENIED
+        with self.assertLogs("src.infrastructure.power_management.powrprof_backend", "ERROR") as logs:
+            self.assertFalse(self.backend.set_active_scheme(HIGH))
+        self.assertIn("Administrator", logs.output[0])
+        self.assertEqual(self.backend.get_active_scheme(), BALANCED)
+
+
+class CreatePowerBackendTest(unittest.TestCase):
+    def _create(self, name):
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "INFO"):
+            return create_power_backend(name, powercfg_command="powercfg")
+
+    def test_selection(self):
+        self.assertIsInstance(self._create(None), SubprocessPowerCfgBackend)
+        self.assertIsInstance(self._create(" Subprocess "), SubprocessPowerCfgBackend)
+        backend = self._create("persistent")
+        self.assertIsInstance(backend, PersistentPowerCfgBackend)
+        backend.close()
+
+    def test_unknown_backend_falls_back(self):
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "WARNING") as logs:
+            backend = create_power_backend("turbo")
+        self.assertIsInstance(backend, SubprocessPowerCfgBackend)
+        self.assertIn("Unknown power backend 'turbo'", logs.output[0])
+
+    @unittest.skipIf(hasattr(ctypes, "windll"), "powrprof.dll is available")
+    def test_native_backend_falls_back_without_powrprof(self):
+        with self.assertLogs("src.infrastructure.power_management.power_backends", "ERROR") as logs:
+            backend = create_power_backend("native", powercfg_command="/opt/fake/powercfg")
+        self.assertIsInstance(backend, SubprocessPowerCfgBackend)
+        # The fallback keeps the configured powercfg command
+        self.assertEqual(backend._powercfg_command, "/opt/fake/powercfg")
+        self.assertIn("'native' is not available", logs.output[0])
+
+    @unittest.skipUnless(os.name == "nt" and hasattr(ctypes, "windll"), "needs powrprof.dll")
+    def test_native_backend_on_windows(self):
+        self.assertIsInstance(self._create("native"), NativePowerBackend)
+
+
+if __name__ == "__main__":
+    unittest.main()
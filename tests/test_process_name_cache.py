@@ -0,0 +1,126 @@
+import threading
+import unittest
+
+from src.infrastructure.windows.process_name_cache import ProcessImageInfo, ProcessNameCache
+
+
+class FakeResolver:
+    """
+    Resolves PIDs to "proc<pid>.exe". `generation` stands in for the process creation time:
+    bumping a PID's generation simulates the PID being reused by a new process.
+    """
+    def __init__(self):
+        self.calls = []
+        self.generation = {}
+        self.released = []
+
+    def resolve(self, pid):
+        self.calls.append(pid)
+        if pid < 0:
+            return None
+        return ProcessImageInfo(pid, f"C:\\bin\\proc{pid}.exe", f"proc{pid}.exe", self.generation.get(pid, 0), object())
+
+    def is_same_process(self, info):
+        return info.creation_time == self.generation.get(info.pid, 0)
+
+    def release(self, info):
+        self.released.append(info)
+
+
+class ProcessNameCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.resolver = FakeResolver()
+        self.cache = ProcessNameCache(self.resolver.resolve, is_same_process=self.resolver.is_same_process,
+                                      release=self.resolver.release, max_entries=3)
+
+    def test_hits_and_misses(self):
+        first = self.cache.lookup(10)
+        self.assertEqual(first.name, "proc10.exe")
+        self.assertIs(self.cache.lookup(10), first)
+        self.assertEqual(self.resolver.calls, [10])
+        self.assertIsNone(self.cache.lookup(0))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_failed_resolve_is_not_cached(self):
+        self.assertIsNone(self.cache.lookup(-1))
+        self.assertIsNone(self.cache.lookup(-1))
+        self.assertEqual(self.resolver.calls, [-1, -1])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for pid in (1, 2, 3):
+            self.cache.lookup(pid)
+        self.cache.lookup(1) # 2 is now the least recently used entry
+        self.cache.lookup(4)
+        self.assertEqual([info.pid for info in self.resolver.released], [2])
+        self.resolver.calls.clear()
+        for pid in (1, 3, 4):
+            self.cache.lookup(pid)
+        self.assertEqual(self.resolver.calls, [])
+        self.cache.lookup(2)
+        self.assertEqual(self.resolver.calls, [2])
+        self.assertEqual(self.cache.get_stats()["evictions"], 2)
+        self.assertEqual(len(self.cache), 3)
+
+    def test_reused_pid_is_resolved_again(self):
+        old = self.cache.lookup(10)
+        self.resolver.generation[10] = 1
+        new = self.cache.lookup(10)
+        self.assertIsNot(new, old)
+        self.assertEqual(new.creation_time, 1)
+        self.assertEqual(self.resolver.released, [old])
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stale"], stats["size"]), (0, 2, 1, 1))
+
+    def test_invalidate_and_clear_release_entries(self):
+        for pid in (1, 2):
+            self.cache.lookup(pid)
+        self.cache.invalidate(1)
+        self.cache.invalidate(99)
+        self.assertEqual([info.pid for info in self.resolver.released], [1])
+        self.cache.clear()
+        self.assertEqual([info.pid for info in self.resolver.released], [1, 2])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_failing_release_does_not_break_the_cache(self):
+        def failing_release(info):
+            raise OSError("invalid handle")
+        cache = ProcessNameCache(self.resolver.resolve, release=failing_release, max_entries=1)
+        cache.lookup(1)
+        with self.assertLogs("src.infrastructure.windows.process_name_cache", "WARNING"):
+            self.assertEqual(cache.lookup(2).pid, 2)
+
+    def test_concurrent_lookups(self):
+        cache = ProcessNameCache(self.resolver.resolve, is_same_process=self.resolver.is_same_process,
+                                 release=self.resolver.release, max_entries=8)
+        errors = []
+        start = threading.Barrier(4)
+
+        def worker(offset):
+            try:
+                start.wait()
+                for i in range(500):
+                    pid = (i + offset) % 16 + 1
+                    info = cache.lookup(pid)
+                    if info is None or info.pid != pid:
+                        errors.append((pid, info))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"] + stats["misses"], 2000)
+        self.assertLessEqual(stats["size"], 8)
+        # Every entry that left the cache was released exactly once, and no cached entry was released
+        released_ids = [id(info) for info in self.resolver.released]
+        self.assertEqual(len(released_ids), len(set(released_ids)))
+        self.assertEqual(len(self.resolver.released) + stats["size"], len(self.resolver.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
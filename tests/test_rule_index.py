@@ -0,0 +1,166 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.infrastructure.configuration.config_manager import RULE_INDEX_MIN_ENTRIES, ConfigManager
+from src.infrastructure.configuration.rule_index import (
+    CompiledProcessMap,
+    compile_rule_index,
+    load_rule_index,
+    remove_stale_rule_indexes,
+    rule_index_path,
+)
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+SAVER = "a1841308-3541-4fab-bc81-f71556f20b4a"
+PLANS = [BALANCED, HIGH, SAVER]
+
+
+def config_text(rule_index, count=RULE_INDEX_MIN_ENTRIES + 100):
+    lines = ["[General]", f"default_power_plan = {BALANCED}", f"rule_index = {str(rule_index).lower()}", "",
+             "[ProcessPowerMap]"]
+    lines.extend(f"Tool_{index:05d}.exe = {PLANS[index % 3]}" for index in range(count))
+    # Overlapping wildcard keys: the first one in file order wins
+    lines.extend([f"game_*.exe = {HIGH}", f"game_x*.exe = {SAVER}", f"setup??.exe = {SAVER}", ""])
+    lines.extend(["[ProcessPowerRules]",
+                  # '%' is only valid because rules are read with raw=True
+                  rf"percent = regex | app%\d+\.exe | {SAVER}",
+                  rf"builds = path | C:\Build\** | {HIGH}", ""])
+    lines.extend(["[RunningProcessRules]", f"ffmpeg.exe = {HIGH} | 2", f"obs*.exe = {SAVER}", ""])
+    return "\n".join(lines)
+
+
+PROBES = [
+    ("tool_00000.exe", None), ("TOOL_00001.EXE", None), (f"tool_{RULE_INDEX_MIN_ENTRIES + 99:05d}.exe", None),
+    ("game_x1.exe", None), ("game_abc.exe", None), ("setup12.exe", None), ("setup123.exe", None),
+    ("app%42.exe", None), ("app%.exe", None), ("unmapped.exe", None), ("unmapped.exe", None),
+    ("cl.exe", r"C:\Build\tools\cl.exe"), ("cl.exe", r"D:\Other\cl.exe"),
+]
+
+
+class RuleIndexRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_rule_index_")
+        self.parsed_path = os.path.join(self.work_dir, "parsed.ini")
+        self.indexed_path = os.path.join(self.work_dir, "indexed.ini")
+        with open(self.parsed_path, "w", encoding="utf-8") as config_file:
+            config_file.write(config_text(rule_index=False))
+        with open(self.indexed_path, "w", encoding="utf-8") as config_file:
+            config_file.write(config_text(rule_index=True))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _load(self, path):
+        config_manager = ConfigManager(path)
+        self.assertTrue(config_manager.load_config())
+        return config_manager
+
+    def _index_files(self):
+        return sorted(name for name in os.listdir(self.work_dir) if name.endswith(".idx"))
+
+    def test_index_load_matches_parsed_config(self):
+        parsed = self._load(self.parsed_path)
+        self._load(self.indexed_path) # Builds the index
+        self.assertEqual(len(self._index_files()), 1)
+        indexed = self._load(self.indexed_path) # Loads it
+        self.assertIsInstance(indexed.get_snapshot().app_power_map, CompiledProcessMap)
+        self.assertNotIsInstance(parsed.get_snapshot().app_power_map, CompiledProcessMap)
+
+        for process_name, image_path in PROBES:
+            self.assertEqual(indexed.get_power_plan_for_process(process_name, image_path),
+                             parsed.get_power_plan_for_process(process_name, image_path),
+                             f"{process_name} ({image_path})")
+        self.assertEqual(indexed.get_power_plan_for_process("game_x1.exe"), HIGH)
+        self.assertEqual(indexed.get_power_plan_for_process("app%42.exe"), SAVER)
+        self.assertIsNone(indexed.get_power_plan_for_process("unmapped.exe"))
+        self.assertEqual(indexed.get_running_process_rules(), parsed.get_running_process_rules())
+        self.assertEqual(len(indexed.get_running_process_rules()), 2)
+        self.assertEqual(indexed.get_default_power_plan(), parsed.get_default_power_plan())
+
+    def test_changed_config_rebuilds_index_and_removes_the_old_one(self):
+        self._load(self.indexed_path)
+        old_index = self._index_files()
+        with open(self.indexed_path, "a", encoding="utf-8") as config_file:
+            config_file.write("# edited\n")
+        config_manager = self._load(self.indexed_path)
+        new_index = self._index_files()
+        self.assertEqual(len(new_index), 1)
+        self.assertNotEqual(old_index, new_index)
+        self.assertEqual(config_manager.get_power_plan_for_process("tool_00001.exe"), HIGH)
+
+    def test_disabling_the_index_removes_it(self):
+        self._load(self.indexed_path)
+        with open(self.indexed_path, "w", encoding="utf-8") as config_file:
+            config_file.write(config_text(rule_index=False))
+        self._load(self.indexed_path)
+        self.assertEqual(self._index_files(), [])
+
+
+class RuleIndexFileTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_rule_index_")
+        self.config_path = os.path.join(self.work_dir, "app_config.ini")
+        self.content_hash = hashlib.sha256(b"content").hexdigest()
+        self.index_path = rule_index_path(self.config_path, self.content_hash)
+        self.process_map = {"a.exe": HIGH, "b.exe": SAVER, "c*.exe": BALANCED}
+        self.sections = {"General": {"default_power_plan": BALANCED}}
+        self.assertTrue(compile_rule_index(self.index_path, self.content_hash, self.process_map, self.sections))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _load(self):
+        return load_rule_index(self.index_path, self.content_hash)
+
+    def test_round_trip(self):
+        rule_index = self._load()
+        self.assertIsNotNone(rule_index)
+        self.assertEqual(dict(rule_index.process_map), self.process_map)
+        self.assertEqual(rule_index.process_map.get_exact("b.exe"), SAVER)
+        self.assertIsNone(rule_index.process_map.get_exact("c1.exe"))
+        self.assertEqual(rule_index.process_map.glob_entries(), [("c*.exe", BALANCED)])
+        self.assertEqual(rule_index.sections, self.sections)
+
+    def test_wrong_hash_is_rejected(self):
+        self.assertIsNone(load_rule_index(self.index_path, hashlib.sha256(b"other").hexdigest()))
+
+    def test_truncated_index_is_rejected(self):
+        with open(self.index_path, "rb") as index_file:
+            data = index_file.read()
+        for size in (0, 10, len(data) // 2, len(data) - 1):
+            with open(self.index_path, "wb") as index_file:
+                index_file.write(data[:size])
+            self.assertIsNone(self._load(), f"truncated to {size} bytes")
+
+    def test_wrong_magic_is_rejected(self):
+        with open(self.index_path, "r+b") as index_file:
+            index_file.write(b"NOTANIDX")
+        self.assertIsNone(self._load())
+
+    def test_missing_index(self):
+        os.remove(self.index_path)
+        self.assertIsNone(self._load())
+
+    def test_remove_stale_indexes(self):
+        other_hash = hashlib.sha256(b"older").hexdigest()
+        stale_path = rule_index_path(self.config_path, other_hash)
+        self.assertTrue(compile_rule_index(stale_path, other_hash, self.process_map, self.sections))
+        unrelated_path = rule_index_path(os.path.join(self.work_dir, "other.ini"), other_hash)
+        self.assertTrue(compile_rule_index(unrelated_path, other_hash, self.process_map, self.sections))
+
+        remove_stale_rule_indexes(self.config_path, keep_path=self.index_path)
+        self.assertTrue(os.path.exists(self.index_path))
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(unrelated_path))
+
+        remove_stale_rule_indexes(self.config_path)
+        self.assertFalse(os.path.exists(self.index_path))
+        self.assertTrue(os.path.exists(unrelated_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
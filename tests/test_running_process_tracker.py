@@ -0,0 +1,191 @@
+import unittest
+
+from src.infrastructure.processes.process_enumerator import ProcessEntry
+from src.infrastructure.processes.running_process_tracker import RunningProcessTracker
+from tests.fakes import FakeProcessEnumerator
+
+
+def entry(pid, name, ppid=1, create_time=None):
+    return ProcessEntry(pid, ppid, name, create_time if create_time is not None else pid)
+
+
+class RunningProcessTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.enumerator = FakeProcessEnumerator([entry(1, "init", ppid=0), entry(10, "Chrome.exe"), entry(11, "chrome.exe")])
+        self.changes = []
+        self.tracker = RunningProcessTracker(self.enumerator, full_rescan_every=0, on_change=self.changes.append)
+
+    def test_first_poll_describes_everything(self):
+        change = self.tracker.poll()
+        self.assertEqual(sorted(self.enumerator.describe_calls), [1, 10, 11])
+        self.assertEqual(len(change.created), 3)
+        self.assertTrue(change.names_changed)
+        self.assertEqual(self.tracker.get_running_names(), frozenset({"init", "chrome.exe"}))
+        self.assertEqual(self.tracker.get_process(10).name, "Chrome.exe")
+        self.assertTrue(self.tracker.has_polled())
+
+    def test_diff_poll_only_describes_new_pids(self):
+        self.tracker.poll()
+        self.enumerator.describe_calls.clear()
+        self.enumerator.processes[20] = entry(20, "ffmpeg.exe")
+        change = self.tracker.poll()
+        self.assertEqual(self.enumerator.describe_calls, [20])
+        self.assertEqual([created.pid for created in change.created], [20])
+        self.assertTrue(change.names_changed)
+        self.assertIn("ffmpeg.exe", self.tracker.get_running_names())
+
+    def test_unchanged_poll(self):
+        self.tracker.poll()
+        generation = self.tracker.get_running_state()[0]
+        change = self.tracker.poll()
+        self.assertEqual((change.created, change.exited, change.names_changed), ([], [], False))
+        self.assertEqual(self.tracker.get_running_state()[0], generation)
+        # No created or exited processes: no callback
+        self.assertEqual(len(self.changes), 1)
+
+    def test_exit_of_one_of_several_instances_keeps_the_name(self):
+        self.tracker.poll()
+        generation = self.tracker.get_running_state()[0]
+        del self.enumerator.processes[10]
+        change = self.tracker.poll()
+        self.assertEqual([exited.pid for exited in change.exited], [10])
+        self.assertFalse(change.names_changed)
+        self.assertEqual(self.tracker.get_running_state()[0], generation)
+        self.assertIsNone(self.tracker.get_process(10))
+
+        del self.enumerator.processes[11]
+        change = self.tracker.poll()
+        self.assertTrue(change.names_changed)
+        self.assertNotIn("chrome.exe", self.tracker.get_running_names())
+        self.assertEqual(self.tracker.get_running_state()[0], generation + 1)
+
+    def test_same_name_replacement_does_not_change_the_names(self):
+        self.tracker.poll()
+        generation = self.tracker.get_running_state()[0]
+        del self.enumerator.processes[10]
+        self.enumerator.processes[12] = entry(12, "chrome.exe")
+        change = self.tracker.poll()
+        self.assertEqual(len(change.created), 1)
+        self.assertEqual(len(change.exited), 1)
+        self.assertFalse(change.names_changed)
+        self.assertEqual(self.tracker.get_running_state()[0], generation)
+
+    def test_pid_reuse_is_found_by_the_full_rescan(self):
+        tracker = RunningProcessTracker(self.enumerator, full_rescan_every=2)
+        tracker.poll() # Full
+        # PID 10 exits and a new process gets the same PID between two polls
+        self.enumerator.processes[10] = entry(10, "game.exe", create_time=500)
+        tracker.poll() # Diff: the PID set is unchanged, the reuse isn't visible
+        self.assertEqual(tracker.get_process(10).name, "Chrome.exe")
+        change = tracker.poll() # Full rescan
+        self.assertEqual([created.name for created in change.created], ["game.exe"])
+        self.assertEqual([exited.name for exited in change.exited], ["Chrome.exe"])
+        self.assertTrue(change.names_changed)
+        self.assertEqual(tracker.get_process(10).name, "game.exe")
+        self.assertEqual(tracker.get_stats()["pid_reuse_detected"], 1)
+        self.assertEqual(tracker.get_stats()["full_rescans"], 2)
+
+    def test_pid_reuse_under_the_same_name_keeps_the_generation(self):
+        tracker = RunningProcessTracker(self.enumerator, full_rescan_every=1)
+        tracker.poll()
+        generation = tracker.get_running_state()[0]
+        self.enumerator.processes[10] = entry(10, "Chrome.exe", create_time=500)
+        change = tracker.poll()
+        self.assertEqual(len(change.created), 1)
+        self.assertFalse(change.names_changed)
+        self.assertEqual(tracker.get_running_state()[0], generation)
+        self.assertEqual(tracker.get_process(10).create_time, 500)
+
+    def test_process_exiting_before_describe(self):
+        self.tracker.poll()
+        self.enumerator.processes[30] = entry(30, "short.exe")
+        describe = self.enumerator.describe
+        self.enumerator.describe = lambda pid: None if pid == 30 else describe(pid)
+        change = self.tracker.poll()
+        self.assertEqual(change.created, [])
+        self.assertIsNone(self.tracker.get_process(30))
+
+    def test_failed_listing(self):
+        def fail():
+            raise OSError("denied")
+        self.enumerator.pids = fail
+        self.assertIsNone(self.tracker.poll())
+        self.assertEqual(self.tracker.get_stats()["poll_failures"], 1)
+        self.assertFalse(self.tracker.has_polled())
+
+
+class AncestorLookupTest(unittest.TestCase):
+    def setUp(self):
+        # init(1) -> launcher(10) -> shim(11) -> game(12); explorer(20) -> tool(21)
+        self.enumerator = FakeProcessEnumerator([
+            entry(1, "init", ppid=0), entry(10, "launcher.exe", ppid=1), entry(11, "shim.exe", ppid=10),
+            entry(12, "game.exe", ppid=11), entry(20, "explorer.exe", ppid=1), entry(21, "tool.exe", ppid=20),
+        ])
+        self.tracker = RunningProcessTracker(self.enumerator, full_rescan_every=0, exited_retention=2)
+        self.tracker.poll()
+        self.enumerator.describe_calls.clear()
+
+    def _ancestor_pids(self, pid, max_depth=8, name=None):
+        return [ancestor.pid for ancestor in self.tracker.get_ancestors(pid, max_depth, name=name)]
+
+    def test_chain_from_the_index(self):
+        self.assertEqual(self._ancestor_pids(12), [11, 10, 1])
+        self.assertEqual(self.enumerator.describe_calls, [])
+
+    def test_depth_limit(self):
+        self.assertEqual(self._ancestor_pids(12, max_depth=2), [11, 10])
+
+    def test_new_process_is_described_on_demand(self):
+        self.enumerator.processes[13] = entry(13, "helper.exe", ppid=12)
+        self.assertEqual(self._ancestor_pids(13), [12, 11, 10, 1])
+        self.assertEqual(self.enumerator.describe_calls, [13])
+        # Not added to the index by a lookup
+        self.assertIsNone(self.tracker.get_process(13))
+
+    def test_reused_pid_with_another_name_is_described_again(self):
+        self.enumerator.processes[21] = entry(21, "other.exe", ppid=12, create_time=100)
+        self.assertEqual(self._ancestor_pids(21, name="other.exe"), [12, 11, 10, 1])
+        self.assertEqual(self._ancestor_pids(21), [20, 1])
+
+    def test_parent_started_after_the_child_is_not_its_parent(self):
+        # PID 10 exited (before a poll saw it) and was reused by a later process
+        self.enumerator.processes[10] = entry(10, "late.exe", ppid=1, create_time=100)
+        self.enumerator.processes[30] = entry(30, "worker.exe", ppid=10, create_time=50)
+        tracker = RunningProcessTracker(self.enumerator)
+        tracker.poll()
+        self.assertEqual(tracker.get_ancestors(30, 8), [])
+
+    def test_loop_terminates(self):
+        self.enumerator.processes[40] = entry(40, "a.exe", ppid=41, create_time=5)
+        self.enumerator.processes[41] = entry(41, "b.exe", ppid=40, create_time=5)
+        self.assertEqual(self._ancestor_pids(40), [41])
+
+    def test_exited_parent_is_still_found(self):
+        # The launcher starts the game and exits
+        del self.enumerator.processes[11]
+        del self.enumerator.processes[10]
+        self.tracker.poll()
+        self.assertIsNone(self.tracker.get_process(10))
+        self.assertEqual(self._ancestor_pids(12), [11, 10, 1])
+        self.assertEqual(self.tracker.get_stats()["exited_retained"], 2)
+
+    def test_exited_parent_with_a_reused_pid(self):
+        del self.enumerator.processes[10]
+        self.tracker.poll()
+        # A newer process got PID 10: the retained entry of the launcher is used
+        self.enumerator.processes[10] = entry(10, "late.exe", ppid=1, create_time=100)
+        self.tracker.poll()
+        self.assertEqual([ancestor.name for ancestor in self.tracker.get_ancestors(11, 8)], ["launcher.exe", "init"])
+
+    def test_exited_retention_is_bounded(self):
+        for pid in (10, 11, 20):
+            del self.enumerator.processes[pid]
+            self.tracker.poll()
+        self.assertEqual(self.tracker.get_stats()["exited_retained"], 2)
+        # Oldest exit (10) dropped first
+        self.assertEqual(self._ancestor_pids(12), [11])
+        self.assertEqual(self._ancestor_pids(21), [20, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
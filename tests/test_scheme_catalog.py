@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from src.infrastructure.power_management.power_backends import CommandResult, PowerCfgCliBackend
+from src.infrastructure.power_management.scheme_catalog import PowerScheme, SchemeCatalog, parse_powercfg_list
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+SAVER = "a1841308-3541-4fab-bc81-f71556f20b4a"
+ULTIMATE = "e9a42b02-d5df-448d-aa00-03f14749eb61"
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    # newline="" keeps the CRLF line endings powercfg prints
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8", newline="") as fixture:
+        return fixture.read()
+
+
+class ParsePowercfgListTest(unittest.TestCase):
+    def test_english_output(self):
+        self.assertEqual(parse_powercfg_list(read_fixture("powercfg_list_en.txt")), [
+            PowerScheme(BALANCED, "Balanced", False),
+            PowerScheme(HIGH, "High performance", True),
+            PowerScheme(SAVER, "Power saver", False),
+            # Parentheses inside the name are kept
+            PowerScheme(ULTIMATE, "Ultimate Performance (Custom)", False),
+        ])
+
+    def test_localized_output(self):
+        self.assertEqual(parse_powercfg_list(read_fixture("powercfg_list_de.txt")), [
+            PowerScheme(BALANCED, "Ausbalanciert", True),
+            PowerScheme(HIGH, "Höchstleistung", False),
+            PowerScheme(SAVER, "Energiesparmodus", False),
+        ])
+        self.assertEqual(parse_powercfg_list(read_fixture("powercfg_list_fr.txt")), [
+            PowerScheme(BALANCED, "Utilisation normale", True),
+            PowerScheme(HIGH, "Performances élevées", False),
+            PowerScheme(SAVER, "Économie d'énergie", False),
+        ])
+        self.assertEqual(parse_powercfg_list(read_fixture("powercfg_list_zh.txt")), [
+            PowerScheme(BALANCED, "平衡", False),
+            PowerScheme(HIGH, "高性能", True),
+            PowerScheme(SAVER, "节能", False),
+        ])
+
+    def test_missing_names_and_duplicates_are_skipped(self):
+        self.assertEqual(parse_powercfg_list(read_fixture("powercfg_list_missing_names.txt")),
+                         [PowerScheme(BALANCED, "Balanced", False)])
+
+    def test_active_scheme_output(self):
+        for output in ("Power Scheme GUID: 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c  (High performance)",
+                       "GUID des Energieschemas: 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c  (Höchstleistung)",
+                       "GUID du mode de gestion de l'alimentation : 8C5E7FDA-E8BF-4A96-9A85-A6E23A8C635C  (Performances élevées)"):
+            result = CommandResult(0, output + "\r\n", "")
+            self.assertEqual(PowerCfgCliBackend.parse_active_scheme_result(result).lower(), HIGH)
+
+    def test_empty_output(self):
+        self.assertEqual(parse_powercfg_list(""), [])
+        self.assertEqual(parse_powercfg_list(None), [])
+        self.assertEqual(parse_powercfg_list("Invalid Parameters -- try \"/?\" for help\r\n"), [])
+
+
+class SchemeCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = SchemeCatalog(parse_powercfg_list(read_fixture("powercfg_list_en.txt")), version=1)
+
+    def test_lookups_are_case_insensitive(self):
+        self.assertEqual(len(self.catalog), 4)
+        self.assertIn(HIGH.upper(), self.catalog)
+        self.assertEqual(self.catalog.get_name(HIGH.upper()), "High performance")
+        self.assertEqual(self.catalog.get_guid("power SAVER"), SAVER)
+        self.assertIsNone(self.catalog.get_name("00000000-0000-0000-0000-000000000000"))
+
+    def test_same_schemes_ignores_the_active_marker(self):
+        listed = parse_powercfg_list(read_fixture("powercfg_list_en.txt").replace(" *", ""))
+        self.assertTrue(self.catalog.same_schemes(SchemeCatalog(listed, version=2)))
+        renamed = [(scheme.guid, scheme.name.upper()) for scheme in listed]
+        self.assertFalse(self.catalog.same_schemes(SchemeCatalog(renamed, version=2)))
+
+    def test_label(self):
+        self.assertEqual(str(self.catalog.label(BALANCED)), f"'Balanced' ({BALANCED})")
+
+
+if __name__ == "__main__":
+    unittest.main()
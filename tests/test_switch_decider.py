@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.application.switch_decider import (
+    SWITCH_ALREADY_ACTIVE,
+    SWITCH_ALREADY_PENDING,
+    SWITCH_SUBMIT,
+    SWITCH_THROTTLED,
+    SwitchDecider,
+)
+from src.application.switch_throttle import SwitchThrottle
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.events.foreground_event import ForegroundEvent
+from src.infrastructure.processes.process_enumerator import ProcessEntry
+from src.infrastructure.processes.running_process_tracker import RunningProcessTracker
+from tests.fakes import FakeClock, FakeProcessEnumerator
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+SAVER = "a1841308-3541-4fab-bc81-f71556f20b4a"
+
+
+def event(process_name, pid=None):
+    return ForegroundEvent(process_name, None, pid, 0.0)
+
+
+class SwitchDeciderTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_decider_")
+        self.config_path = os.path.join(self.work_dir, "app_config.ini")
+        self._write_config(HIGH)
+        self.config_manager = ConfigManager(self.config_path)
+        self.assertTrue(self.config_manager.load_config())
+        self.clock = FakeClock()
+        self.throttle = SwitchThrottle(min_dwell_seconds=1.0, clock=self.clock)
+        self.decider = SwitchDecider(self.config_manager, self.throttle)
+        self.enumerator = FakeProcessEnumerator([
+            ProcessEntry(1, 0, "init", 1),
+            ProcessEntry(10, 1, "launcher.exe", 10),
+            ProcessEntry(11, 10, "game_bin.exe", 11),
+        ])
+        self.tracker = RunningProcessTracker(self.enumerator)
+        self.tracker.poll()
+        self.decider.attach_running_tracker(self.tracker)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _write_config(self, game_plan):
+        with open(self.config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(f"[General]\ndefault_power_plan = {BALANCED}\ninherit_parent_rules = true\n"
+                              f"[ProcessPowerMap]\ngame.exe = {game_plan}\nlauncher.exe = {SAVER}\n")
+
+    def _resolve(self, foreground_event):
+        snapshot = self.config_manager.get_snapshot()
+        return self.decider.resolve_target_plan(snapshot, foreground_event)
+
+    def test_resolves_mapped_default_and_inherited_plans(self):
+        self.assertEqual(self._resolve(event("game.exe")), HIGH)
+        self.assertEqual(self._resolve(event("notepad.exe")), BALANCED)
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=11)), SAVER)
+        self.assertEqual(self.decider.get_stats()["decision_memo_size"], 3)
+
+    def test_needs_parent_chain(self):
+        snapshot = self.config_manager.get_snapshot()
+        self.assertFalse(self.decider.needs_parent_chain(snapshot, event("game_bin.exe")))
+        self.assertTrue(self.decider.needs_parent_chain(snapshot, event("game_bin.exe", pid=11)))
+        self.decider.resolve_target_plan(snapshot, event("game_bin.exe", pid=11))
+        # Memoized for this snapshot now
+        self.assertFalse(self.decider.needs_parent_chain(snapshot, event("game_bin.exe", pid=11)))
+        self.decider.resolve_target_plan(snapshot, event("game.exe", pid=12))
+        self.assertFalse(self.decider.needs_parent_chain(snapshot, event("game.exe", pid=12)))
+
+    def test_reload_drops_memoized_decisions(self):
+        self.assertEqual(self._resolve(event("game.exe")), HIGH)
+        self._write_config(SAVER)
+        self.assertTrue(self.config_manager.reload_config())
+        self.assertEqual(self._resolve(event("game.exe")), SAVER)
+
+    def test_same_process_is_skipped_until_the_config_changes(self):
+        snapshot = self.config_manager.get_snapshot()
+        self.assertTrue(self.decider.begin(event("game.exe", pid=5), snapshot, None))
+        self.assertFalse(self.decider.begin(event("game.exe", pid=5), snapshot, None))
+        # inherit_parent_rules: another instance may have another parent
+        self.assertTrue(self.decider.begin(event("game.exe", pid=6), snapshot, None))
+        self.decider.forget_last_processed()
+        self.assertTrue(self.decider.begin(event("game.exe", pid=6), snapshot, None))
+        self._write_config(SAVER)
+        self.config_manager.reload_config()
+        self.assertTrue(self.decider.begin(event("game.exe", pid=6), self.config_manager.get_snapshot(), None))
+
+    def test_decide_switch(self):
+        game = event("game.exe")
+        self.assertEqual(self.decider.decide_switch(game, HIGH, BALANCED, HIGH), SWITCH_ALREADY_PENDING)
+        self.assertEqual(self.decider.decide_switch(game, HIGH, HIGH, None), SWITCH_ALREADY_ACTIVE)
+        # A different switch is still pending: the active plan doesn't count
+        self.assertEqual(self.decider.decide_switch(game, HIGH, HIGH, SAVER), SWITCH_SUBMIT)
+
+    def test_throttled_switch_is_deferred(self):
+        snapshot = self.config_manager.get_snapshot()
+        self.assertEqual(self.decider.decide_switch(event("game.exe"), HIGH, BALANCED, None), SWITCH_SUBMIT)
+        chat = event("chat.exe")
+        self.assertTrue(self.decider.begin(chat, snapshot, None))
+        self.assertEqual(self.decider.decide_switch(chat, SAVER, HIGH, None), SWITCH_THROTTLED)
+        self.assertTrue(self.throttle.has_pending())
+        # The trailing re-evaluation of the same process isn't skipped
+        self.assertTrue(self.decider.begin(chat, snapshot, None))
+        # begin() drops the trailing switch of the previous app
+        self.assertFalse(self.throttle.has_pending())
+
+    def test_reused_pid_is_not_served_from_the_parent_memo(self):
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=11)), SAVER)
+        # game_bin.exe exits and another game_bin.exe (started by init) gets its PID
+        del self.enumerator.processes[11]
+        self.tracker.poll()
+        self.enumerator.processes[11] = ProcessEntry(11, 1, "game_bin.exe", 50)
+        self.tracker.poll()
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=11)), BALANCED)
+
+    def test_failed_parent_lookup_is_not_memoized(self):
+        describe = self.enumerator.describe
+
+        def failing_describe(pid):
+            raise OSError("access denied")
+        self.enumerator.describe = failing_describe
+        # PID 13 isn't indexed yet, so it has to be described
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=13)), BALANCED)
+        self.enumerator.describe = describe
+        self.enumerator.processes[13] = ProcessEntry(13, 10, "game_bin.exe", 13)
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=13)), SAVER)
+
+    def test_launcher_that_exited_is_inherited(self):
+        del self.enumerator.processes[10]
+        self.tracker.poll()
+        self.assertEqual(self._resolve(event("game_bin.exe", pid=11)), SAVER)
+
+
+if __name__ == "__main__":
+    unittest.main()
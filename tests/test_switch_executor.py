@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.application.power_switcher_app import PowerSwitcherApp
+from src.application.switch_executor import SwitchExecutor, SwitchRequest
+from src.infrastructure.configuration.config_manager import ConfigManager
+from src.infrastructure.events.foreground_event import ForegroundEvent
+from src.infrastructure.events.replay_event_source import ReplayEventSource
+from src.infrastructure.power_management.power_backends import PowerBackend
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+SAVER = "a1841308-3541-4fab-bc81-f71556f20b4a"
+TIMEOUT = 5.0
+
+
+def event(process_name):
+    return ForegroundEvent(process_name, None, None, 0.0)
+
+
+class BlockingPowerManager:
+    """
+    Fake PowerCfgManager whose switches wait until the test releases them, so requests can be
+    submitted while an earlier switch is still running.
+    """
+    def __init__(self, active=BALANCED):
+        self.active = active
+        self.switched = []
+        self.started = threading.Semaphore(0)
+        self.release = threading.Semaphore(0)
+        self.fail_targets = set()
+
+    def ensure_power_plan(self, power_plan_guid):
+        self.started.release()
+        if not self.release.acquire(timeout=TIMEOUT):
+            raise AssertionError("switch was never released")
+        if power_plan_guid in self.fail_targets:
+            raise OSError("powercfg crashed")
+        if power_plan_guid == self.active:
+            return True, True
+        self.switched.append(power_plan_guid)
+        self.active = power_plan_guid
+        return False, True
+
+    def switch_power_plan(self, power_plan_guid):
+        self.switched.append(power_plan_guid)
+        self.active = power_plan_guid
+        return True
+
+
+class SwitchExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.power_manager = BlockingPowerManager()
+        self.completed = []
+        self.executor = SwitchExecutor(self.power_manager, lambda request, success: self.completed.append((request.target_guid, success)))
+        self.executor.start()
+
+    def tearDown(self):
+        # Let every switch still waiting finish
+        for _ in range(4):
+            self.power_manager.release.release()
+        self.executor.stop(timeout=TIMEOUT)
+
+    def _wait_for_switch_start(self):
+        self.assertTrue(self.power_manager.started.acquire(timeout=TIMEOUT))
+
+    def test_queued_request_is_superseded_by_a_newer_one(self):
+        self.executor.submit(event("game.exe"), HIGH)
+        self._wait_for_switch_start()
+        # HIGH is running: SAVER is queued and then replaced by BALANCED before it starts
+        self.executor.submit(event("chat.exe"), SAVER)
+        self.executor.submit(event("editor.exe"), BALANCED)
+        self.assertEqual(self.executor.get_pending_target(), BALANCED)
+        self.power_manager.release.release()
+        self._wait_for_switch_start()
+        self.power_manager.release.release()
+        self.executor.stop(timeout=TIMEOUT)
+
+        self.assertEqual(self.power_manager.switched, [HIGH, BALANCED])
+        self.assertEqual(self.completed, [(HIGH, True), (BALANCED, True)])
+        stats = self.executor.get_stats()
+        self.assertEqual((stats["submitted"], stats["executed"], stats["superseded_before_start"]), (3, 2, 1))
+        self.assertIsNone(stats["pending_target"])
+        self.assertEqual(self.executor.get_last_sequence(), 3)
+
+    def test_completion_of_an_older_request_keeps_the_newer_target_pending(self):
+        self.executor.submit(event("game.exe"), HIGH)
+        self._wait_for_switch_start()
+        self.executor.submit(event("chat.exe"), SAVER)
+        self.power_manager.release.release()
+        self._wait_for_switch_start()
+        # HIGH completed, SAVER is running
+        self.assertEqual(self.executor.get_pending_target(), SAVER)
+        self.power_manager.release.release()
+        self.executor.stop(timeout=TIMEOUT)
+        self.assertIsNone(self.executor.get_pending_target())
+
+    def test_request_for_the_active_plan_is_skipped(self):
+        self.executor.submit(event("editor.exe"), BALANCED)
+        self._wait_for_switch_start()
+        self.power_manager.release.release()
+        self.executor.stop(timeout=TIMEOUT)
+        self.assertEqual(self.power_manager.switched, [])
+        self.assertEqual(self.completed, [(BALANCED, True)])
+        self.assertEqual(self.executor.get_stats()["skipped_already_active"], 1)
+
+    def test_failing_switch_does_not_stop_the_executor(self):
+        self.power_manager.fail_targets.add(HIGH)
+        with self.assertLogs("src.application.switch_executor", "ERROR"):
+            self.executor.submit(event("game.exe"), HIGH)
+            self._wait_for_switch_start()
+            self.power_manager.release.release()
+            self.executor.submit(event("chat.exe"), SAVER)
+            self._wait_for_switch_start()
+        self.power_manager.release.release()
+        self.executor.stop(timeout=TIMEOUT)
+        self.assertEqual(self.power_manager.switched, [SAVER])
+        self.assertIsNone(self.executor.get_pending_target())
+
+    def test_inline_mode_switches_on_the_caller_thread(self):
+        completed = []
+        executor = SwitchExecutor(self.power_manager, lambda request, success: completed.append(threading.current_thread()), threaded=False)
+        executor.submit(event("game.exe"), HIGH)
+        self.assertEqual(self.power_manager.switched, [HIGH])
+        self.assertEqual(completed, [threading.current_thread()])
+        self.assertIsNone(executor.get_pending_target())
+
+
+class InstantPowerBackend(PowerBackend):
+    name = "instant"
+
+    def __init__(self):
+        self.active = BALANCED
+
+    def list_schemes(self):
+        return [(BALANCED, "Balanced"), (HIGH, "High performance"), (SAVER, "Power saver")]
+
+    def get_active_scheme(self):
+        return self.active
+
+    def set_active_scheme(self, power_plan_guid):
+        self.active = power_plan_guid
+        return True
+
+
+class SwitchCompletionStateTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="aps_test_executor_")
+        config_path = os.path.join(self.work_dir, "app_config.ini")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            # Background switching, but the executor thread isn't started: the test completes the requests itself
+            config_file.write(f"[General]\ndefault_power_plan = {BALANCED}\nbackground_switching = true\n"
+                              f"[ProcessPowerMap]\ngame.exe = {HIGH}\n")
+        with self.assertLogs("src", "INFO"):
+            self.app = PowerSwitcherApp(event_source_factory=lambda mailbox: ReplayEventSource(mailbox, entries=[]),
+                                        config_manager=ConfigManager(config_path), power_backend=InstantPowerBackend())
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _submit_and_complete(self, target_guid):
+        self.app._switch_executor.submit(event("game.exe"), target_guid)
+        self._complete(self.app._switch_executor.get_last_sequence(), target_guid)
+
+    def _complete(self, sequence, target_guid):
+        with self.assertLogs("src.application.power_switcher_app", "INFO"):
+            self.app._on_switch_completed(SwitchRequest(sequence, event("game.exe"), target_guid), True)
+
+    def test_completion_does_not_overwrite_a_newer_external_change(self):
+        self._submit_and_complete(HIGH)
+        self.assertEqual(self.app._last_known_active_guid, HIGH)
+        # A switch to BALANCED is in flight when the user picks another plan
+        self.app._switch_executor.submit(event("editor.exe"), BALANCED)
+        with self.assertLogs("src.application.power_switcher_app", "INFO"):
+            self.app.notify_power_scheme_changed(SAVER.upper())
+        self._complete(self.app._switch_executor.get_last_sequence(), BALANCED)
+        self.assertEqual(self.app._last_known_active_guid, SAVER)
+        self.assertEqual(self.app._last_applied_power_plan_identifier, BALANCED)
+        # Requests submitted after the notification update the state again
+        self._submit_and_complete(HIGH)
+        self.assertEqual(self.app._last_known_active_guid, HIGH)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from src.application.switch_throttle import SwitchThrottle
+from tests.fakes import FakeClock
+
+
+class SwitchThrottleTest(unittest.TestCase):
+    def test_disabled_throttle_allows_every_switch(self):
+        throttle = SwitchThrottle(clock=FakeClock())
+        self.assertFalse(throttle.enabled)
+        for _ in range(100):
+            self.assertTrue(throttle.try_acquire())
+        self.assertEqual(throttle.time_until_allowed(), 0.0)
+
+    def test_burst_then_rate_limit(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(rate_per_minute=60, burst=3, clock=clock)
+        self.assertEqual([throttle.try_acquire() for _ in range(4)], [True, True, True, False])
+        self.assertEqual(throttle.get_stats()["suppressed_rate_limit"], 1)
+        # One token per second at 60/min
+        self.assertAlmostEqual(throttle.time_until_allowed(), 1.0)
+
+    def test_refill(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(rate_per_minute=60, burst=2, clock=clock)
+        self.assertTrue(throttle.try_acquire())
+        self.assertTrue(throttle.try_acquire())
+        clock.advance(0.5)
+        self.assertFalse(throttle.try_acquire())
+        self.assertAlmostEqual(throttle.time_until_allowed(), 0.5)
+        clock.advance(0.5)
+        self.assertTrue(throttle.try_acquire())
+        self.assertFalse(throttle.try_acquire())
+
+    def test_refill_is_capped_at_burst(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(rate_per_minute=60, burst=2, clock=clock)
+        throttle.try_acquire()
+        clock.advance(3600)
+        self.assertEqual([throttle.try_acquire() for _ in range(3)], [True, True, False])
+
+    def test_min_dwell(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(min_dwell_seconds=0.3, clock=clock)
+        self.assertTrue(throttle.try_acquire())
+        clock.advance(0.1)
+        self.assertFalse(throttle.try_acquire())
+        self.assertAlmostEqual(throttle.time_until_allowed(), 0.2)
+        self.assertEqual(throttle.get_stats()["suppressed_min_dwell"], 1)
+        clock.advance(0.2)
+        self.assertTrue(throttle.try_acquire())
+
+    def test_dwell_and_rate_wait_for_the_longer_limit(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(rate_per_minute=30, burst=1, min_dwell_seconds=0.5, clock=clock)
+        self.assertTrue(throttle.try_acquire())
+        # Dwell allows it after 0.5 s, the bucket only after 2 s
+        self.assertAlmostEqual(throttle.time_until_allowed(), 2.0)
+        clock.advance(1.0)
+        self.assertFalse(throttle.try_acquire())
+        clock.advance(1.0)
+        self.assertTrue(throttle.try_acquire())
+
+    def test_trailing_switch_is_ready_once_allowed(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(min_dwell_seconds=1.0, clock=clock)
+        self.assertIsNone(throttle.time_until_pending_ready())
+        throttle.try_acquire()
+        throttle.defer("game.exe")
+        self.assertTrue(throttle.has_pending())
+        self.assertAlmostEqual(throttle.time_until_pending_ready(), 1.0)
+        self.assertIsNone(throttle.pop_ready())
+        clock.advance(1.0)
+        self.assertEqual(throttle.pop_ready(), "game.exe")
+        self.assertFalse(throttle.has_pending())
+        self.assertIsNone(throttle.pop_ready())
+
+    def test_newer_trailing_switch_replaces_older(self):
+        clock = FakeClock()
+        throttle = SwitchThrottle(min_dwell_seconds=1.0, clock=clock)
+        throttle.try_acquire()
+        throttle.defer("game.exe")
+        throttle.defer("chat.exe")
+        clock.advance(1.0)
+        # The app that kept focus last wins
+        self.assertEqual(throttle.pop_ready(), "chat.exe")
+        stats = throttle.get_stats()
+        self.assertEqual(stats["trailing_scheduled"], 2)
+        self.assertEqual(stats["trailing_superseded"], 1)
+
+    def test_clear_pending(self):
+        throttle = SwitchThrottle(min_dwell_seconds=1.0, clock=FakeClock())
+        self.assertFalse(throttle.clear_pending())
+        throttle.defer("game.exe")
+        self.assertTrue(throttle.clear_pending())
+        self.assertFalse(throttle.has_pending())
+
+
+if __name__ == "__main__":
+    unittest.main()